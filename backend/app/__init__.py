@@ -6,15 +6,34 @@ WHY THIS FILE EXISTS:
 - Central place where Flask app is composed.
 - Ensures all feature modules (routes) are registered.
 - Keeps application startup predictable and testable.
+- Keeps startup cheap: heavy numeric / vision / database libraries are
+  imported on first use, not here (see app.services.warmup).
 """
 
+import os
+
 from flask import Flask
 from flask_cors import CORS # Enables frontend ↔ backend communication
 
-def create_app():
+def create_app(preload=None):
+    """
+    Build the Flask app.
+    - preload: import and warm the image stack now (for pre-fork servers).
+      Defaults to the APP_PRELOAD environment variable (off).
+    """
+    if preload is None:
+        preload = os.getenv("APP_PRELOAD", "").strip().lower() in ("1", "true", "yes")
+
     # Initialize Flask application instance
     app = Flask(__name__)
 
+    # Reject oversized request bodies (413) before they are read or parsed.
+    # Routes that take bigger bodies (batch uploads, bulk import) raise their own limit.
+    app.config["MAX_CONTENT_LENGTH"] = int(os.getenv("MAX_CONTENT_LENGTH", str(16 * 1024 * 1024))) or None
+
+    # Let a front-end proxy (nginx X-Accel / Apache X-Sendfile) send stored blobs itself
+    app.config["USE_X_SENDFILE"] = os.getenv("USE_X_SENDFILE", "").strip().lower() in ("1", "true", "yes")
+
     # Enable CORS globally so the React frontend can access APIs
     CORS(app)
 
@@ -24,6 +43,9 @@ def create_app():
     from .routes.theme import theme_bp
     from .routes.outfits import outfits_bp
     from .routes.auth import auth_bp # 🆕 ADDED: Authentucation routes
+    from .routes.palettes import palettes_bp
+    from .routes.blobs import blobs_bp
+    from .routes.metrics import metrics_bp, instrument_app
     
     # Register image processing routes
     app.register_blueprint(image_routes, url_prefix="/api/image")
@@ -37,9 +59,28 @@ def create_app():
     # Register outfits persistence routes
     app.register_blueprint(outfits_bp)
 
+    # Register palette persistence routes (/api/palettes/*)
+    app.register_blueprint(palettes_bp)
+
+    # Register stored upload / thumbnail serving (/api/blobs/*)
+    app.register_blueprint(blobs_bp)
+
+    # Register Prometheus metrics endpoint (/metrics) and per-request timing / profiling
+    app.register_blueprint(metrics_bp)
+    instrument_app(app)
+
     # 🆕 ADDED: Register authentication routes (/api/auth/*)
     # WHY: Makes login & registration endpoints available to the app
     app.register_blueprint(auth_bp)
 
+    # Register `flask data export|import` bulk commands
+    from .cli import register_cli
+    register_cli(app)
+
+    # Optional: pay heavy imports once up front instead of on the first image request
+    if preload:
+        from .services.warmup import preload as preload_heavy_modules
+        preload_heavy_modules()
+
     # Return the fully configured app instance
     return app
\ No newline at end of file
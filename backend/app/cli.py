@@ -0,0 +1,94 @@
+# backend/app/cli.py
+"""
+Command-line data tools (registered on the app as `flask data ...`).
+
+WHY THIS FILE EXISTS:
+- Migrations between the JSON fallback files and MongoDB (or between
+  palette stores) should not need a running server or `json.load` of the
+  whole dataset. These commands use the same streaming export and batched
+  import as the HTTP endpoints (see app.services.bulk_io).
+
+Usage (from backend/):
+    flask --app run data export outfits -o outfits.ndjson
+    flask --app run data export palettes > palettes.ndjson
+    flask --app run data import outfits outfits.ndjson [--batch 5000]
+    flask --app run data import outfits data/outfits.json      # legacy array
+    cat palettes.ndjson | flask --app run data import palettes -
+    flask --app run data reindex outfits      # rebuild the colour-similarity index
+    flask --app run data gc-blobs [--dry-run] # delete stored uploads nothing references
+
+Storage targets follow the usual environment (MONGO_URI, PALETTE_STORE, ...),
+so exporting with one configuration and importing with another migrates.
+"""
+
+import json
+import sys
+
+import click
+from flask.cli import AppGroup
+
+from app.services import bulk_io
+
+data_cli = AppGroup("data", help="Bulk export / import of outfits and palettes (NDJSON).")
+
+KIND = click.Choice(bulk_io.KINDS)
+
+
+@data_cli.command("export")
+@click.argument("kind", type=KIND)
+@click.option("-o", "--output", type=click.File("w", encoding="utf-8"), default="-",
+              help="Destination file (default: stdout).")
+def export_command(kind, output):
+    """Write every KIND record as NDJSON, oldest first."""
+    for chunk in bulk_io.export_ndjson(kind):
+        output.write(chunk)
+    output.flush()
+
+
+@data_cli.command("import")
+@click.argument("kind", type=KIND)
+@click.argument("source", type=click.File("rb"))
+@click.option("--batch", type=click.IntRange(min=1), default=bulk_io.IMPORT_BATCH, show_default=True,
+              help="Records per write.")
+@click.option("--quiet", is_flag=True, help="No per-batch progress on stderr.")
+def import_command(kind, source, batch, quiet):
+    """Upsert KIND records from SOURCE (NDJSON or a JSON array; '-' for stdin)."""
+    def progress(stats):
+        click.echo(
+            f"\r{stats['imported']} imported, {stats['invalid']} invalid, "
+            f"{stats['bytes'] / 2 ** 20:.1f} MiB, {stats['records_per_s']:.0f} records/s",
+            err=True, nl=False,
+        )
+
+    stats = bulk_io.import_stream(kind, source, batch_size=batch, progress=None if quiet else progress)
+    if not quiet:
+        click.echo(err=True)
+    click.echo(json.dumps(stats, indent=2))
+    if stats["invalid"]:
+        sys.exit(1)
+
+
+@data_cli.command("reindex")
+@click.argument("kind", type=KIND)
+def reindex_command(kind):
+    """Rebuild the KIND colour-similarity index from storage."""
+    from app.services import colour_index
+
+    click.echo(f"{colour_index.rebuild(kind)} {kind} indexed")
+
+
+@data_cli.command("gc-blobs")
+@click.option("--grace", type=click.FloatRange(min=0), default=None,
+              help="Keep unreferenced blobs uploaded within this many seconds (default: BLOB_GC_GRACE).")
+@click.option("--dry-run", is_flag=True, help="Report what would be removed without deleting.")
+def gc_blobs_command(grace, dry_run):
+    """Delete stored uploads that no outfit or palette image_url references."""
+    from app.services import blob_store
+
+    stats = blob_store.collect_garbage(blob_store.GC_GRACE if grace is None else grace, dry_run=dry_run)
+    click.echo(json.dumps(stats, indent=2))
+
+
+def register_cli(app):
+    """Attach the `data` command group to `app`."""
+    app.cli.add_command(data_cli)
@@ -7,13 +7,20 @@ WHY THIS FILE EXISTS:
 - Keeps routes thin and readable.
 """
 
-from flask import Blueprint, request, jsonify
+import logging
+
+from flask import Blueprint, g, request, jsonify
 from app.services.mongo_service import get_collection
 from app.services.auth_service import (
     hash_password,
+    hash_password_async,
+    needs_rehash,
+    verify_dummy_password,
     verify_password,
     generate_token,
+    revoke_token,
 )
+from app.utils.auth import require_auth
 
 # 🔹 ADDED: Dedicated auth blueprint to keep concerns isolated
 auth_bp = Blueprint("auth", __name__, url_prefix="/api/auth")
@@ -29,6 +36,8 @@ def register():
     - Prevents duplicate accounts
     """
     users = get_collection("users")
+    if users is None:
+        return jsonify({"error": "User store unavailable"}), 503
     data = request.json or {}
 
     # 🔐 ADDED: Guard against missing fields
@@ -40,10 +49,15 @@ def register():
         return jsonify({"error": "User already exists"}), 400
     
     # 🔐 ADDED: Password is hashed before storage (never plain text)
-    users.insert_one({
-        "email": data["email"],
-        "password": hash_password(data["password"]),
-    })
+    from pymongo.errors import DuplicateKeyError
+    try:
+        users.insert_one({
+            "email": data["email"],
+            "password": hash_password(data["password"]),
+        })
+    except DuplicateKeyError:
+        # Unique index on users.email catches concurrent registrations
+        return jsonify({"error": "User already exists"}), 400
     return jsonify({"message": "User registered successfully"}), 201
 
 @auth_bp.route("/login", methods=["POST"])
@@ -57,6 +71,8 @@ def login():
     """
 
     users = get_collection("users")
+    if users is None:
+        return jsonify({"error": "User store unavailable"}), 503
     data = request.json or {}
 
     # 🔐 ADDED: Guard against missing fields
@@ -66,10 +82,48 @@ def login():
     user = users.find_one({"email": data["email"]})
 
     # 🔐 ADDED: Unified error to avoid leaking account existence
-    if not user or not verify_password(data["password"], user["password"]):
+    # (unknown emails still pay for one hash so timing doesn't leak it either)
+    if not user:
+        verify_dummy_password(data["password"])
         return jsonify({"error": "Invalid credentials"}), 401
-    
+    if not verify_password(data["password"], user["password"]):
+        return jsonify({"error": "Invalid credentials"}), 401
+
+    # Upgrade hashes made with older cost settings, without delaying this response
+    if needs_rehash(user["password"]):
+        _rehash_in_background(users, user, data["password"])
+
     # 🪪 ADDED: Generate JWT tied to user ID
     token = generate_token(str(user["_id"]))
 
-    return jsonify({"token": token}), 200
\ No newline at end of file
+    return jsonify({"token": token}), 200
+
+def _rehash_in_background(users, user, password):
+    """
+    Store a fresh hash of `password` once it is computed. The update only
+    applies if the stored hash is unchanged, so a concurrent password
+    change always wins.
+    """
+    def store(future):
+        try:
+            users.update_one(
+                {"_id": user["_id"], "password": user["password"]},
+                {"$set": {"password": future.result()}},
+            )
+        except Exception as e:
+            logging.error("[AUTH] Rehash failed for %s: %s", user["_id"], e)
+
+    hash_password_async(password).add_done_callback(store)
+
+@auth_bp.route("/logout", methods=["POST"])
+@require_auth
+def logout():
+    """
+    Revoke the caller's token.
+
+    WHY:
+    - JWTs stay valid until they expire; revocation lets a user end a
+      session early (checked on every protected request)
+    """
+    revoke_token(g.auth_token, expires_at=g.auth_payload.get("exp"))
+    return jsonify({"message": "Logged out"}), 200
@@ -0,0 +1,66 @@
+"""
+Blob Routes
+-----------
+This file exposes endpoints to:
+- Fetch a stored upload by its content hash (GET /api/blobs/<image_id>)
+- Fetch one of its thumbnails (GET /api/blobs/<image_id>/thumbnails/<size>)
+
+Blobs never change (the id is the SHA-256 of the bytes), so responses carry
+the id as a strong ETag and `Cache-Control: public, max-age=1 year,
+immutable`; browsers and CDNs never revalidate, and a stray revalidation is
+answered 304 from If-None-Match. Files go out through `send_file`, which
+hands the open file to the server's `wsgi.file_wrapper` (sendfile(2) under
+gunicorn) or, with USE_X_SENDFILE, to the front-end proxy.
+
+Ids are unguessable 256-bit hashes returned by the upload routes, so these
+endpoints are public like any other image URL.
+"""
+
+import os
+
+from flask import Blueprint, jsonify, send_file, url_for
+
+from app.services.blob_store import blob_store, is_digest
+
+blobs_bp = Blueprint("blobs", __name__, url_prefix="/api/blobs")
+
+# Cache lifetime for blob responses (seconds); the content behind a URL never changes
+BLOB_MAX_AGE = int(os.getenv("BLOB_MAX_AGE", str(365 * 24 * 3600)))
+
+
+def blob_urls(result):
+    """Add "image_url" and per-size "thumbnails" URLs to an upload result with an "image_id"."""
+    digest = result.get("image_id")
+    if digest:
+        result["image_url"] = url_for("blobs.get_blob", image_id=digest)
+        result["thumbnails"] = {
+            str(size): url_for("blobs.get_thumbnail", image_id=digest, size=size)
+            for size in blob_store.thumbnail_sizes
+        }
+    return result
+
+
+def _immutable_file(path, mimetype, etag):
+    response = send_file(path, mimetype=mimetype, etag=etag, max_age=BLOB_MAX_AGE, conditional=True)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+@blobs_bp.route("/<image_id>", methods=["GET"])
+def get_blob(image_id):
+    """Serve an upload byte for byte (JPEG or PNG)."""
+    if not is_digest(image_id) or not blob_store.exists(image_id):
+        return jsonify({"error": "Image not found"}), 404
+    return _immutable_file(blob_store.path(image_id), blob_store.mimetype(image_id), image_id)
+
+
+@blobs_bp.route("/<image_id>/thumbnails/<int:size>", methods=["GET"])
+def get_thumbnail(image_id, size):
+    """Serve a JPEG thumbnail; `size` must be one of BLOB_THUMBNAIL_SIZES."""
+    if size not in blob_store.thumbnail_sizes:
+        return jsonify({"error": f"Unknown size. Choose one of: {', '.join(map(str, blob_store.thumbnail_sizes))}"}), 404
+    path = blob_store.thumbnail(image_id, size) if is_digest(image_id) else None
+    if path is None:
+        return jsonify({"error": "Image not found"}), 404
+    return _immutable_file(path, "image/jpeg", f"{image_id}-{size}")
@@ -0,0 +1,110 @@
+# backend/app/routes/metrics.py
+"""
+Metrics Route + Request Instrumentation
+---------------------------------------
+WHY THIS FILE EXISTS:
+- Exposes GET /metrics in Prometheus text format for scraping.
+- `instrument_app` adds per-route request counters / latency histograms
+  and the opt-in request profiler (see app.services.profiler).
+
+Routes are labelled by their URL rule (e.g. /api/image/jobs/<job_id>),
+never the raw path, so label cardinality stays bounded.
+Streaming responses (NDJSON batches) are timed to the first byte.
+"""
+
+import os
+import time
+
+from flask import Blueprint, Response, g, request
+
+from app.services import metrics, profiler
+
+metrics_bp = Blueprint("metrics", __name__)
+
+# Path the Prometheus endpoint is served on
+METRICS_PATH = os.getenv("METRICS_PATH", "/metrics")
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@metrics_bp.route(METRICS_PATH, methods=["GET"])
+def prometheus_metrics():
+    """Every counter, histogram and collector in Prometheus text format."""
+    return Response(metrics.registry.render_prometheus(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+def _cache_samples(prefix, help_prefix, stats, gauges=("size", "max_entries")):
+    """
+    Samples for a cache's stats() dict: keys in `gauges` are current values,
+    everything else is a running count exported as `<prefix>_<key>_total`.
+    """
+    samples = []
+    for key, value in stats.items():
+        help_text = f"{help_prefix} {key.replace('_', ' ')}"
+        if key in gauges:
+            samples.append((f"{prefix}_{key}", "gauge", help_text, {}, value))
+        else:
+            samples.append((f"{prefix}_{key}_total", "counter", help_text, {}, value))
+    return samples
+
+
+def _collect_service_stats():
+    """Scrape-time gauges for state that lives in the services."""
+    from app.services import admission, job_queue, worker_pool
+    from app.services.palette_cache import palette_cache
+    from app.services.auth_service import token_cache
+    from app.services.segmentation import mask_cache
+    from app.services.outfit_service import favorites_cache
+    from app.services.near_duplicates import near_duplicate_palettes
+
+    samples = []
+    samples += _cache_samples("palette_cache", "Palette cache", palette_cache.stats())
+    samples += _cache_samples("near_duplicate_palettes", "Near-duplicate palette index", near_duplicate_palettes.stats())
+    samples += _cache_samples("mask_cache", "Garment mask cache", mask_cache.stats())
+    samples += _cache_samples("token_cache", "Verified-token cache", token_cache.stats())
+    samples += _cache_samples("favorites_cache", "Favorites page cache", favorites_cache.stats(), gauges=("users", "max_users"))
+
+    # Only report the job queue if this process already created it
+    if job_queue._queue is not None:
+        stats = job_queue._queue.stats()
+        for status, value in stats["jobs"].items():
+            samples.append(("jobs", "gauge", "Palette jobs by status", {"status": status}, value))
+
+    # Only report admission state if this process already created the controller
+    if admission._controller is not None:
+        for pool, stats in admission._controller.stats().items():
+            samples.append(("admission_active", "gauge", "Requests holding an admission slot", {"pool": pool}, stats["active"]))
+            samples.append(("admission_queued", "gauge", "Requests waiting for an admission slot", {"pool": pool}, stats["queued"]))
+            samples.append(("admission_concurrency", "gauge", "Admission slots per pool", {"pool": pool}, stats["concurrency"]))
+
+    samples.append(("image_pool_max_pending", "gauge", "Worker pool in-flight task limit", {}, worker_pool.MAX_PENDING))
+    return samples
+
+
+metrics.registry.register_collector(_collect_service_stats)
+
+
+def instrument_app(app):
+    """Attach request metrics and the opt-in profiler to `app`."""
+
+    @app.before_request
+    def _start_request_timer():
+        g._metrics_started = time.perf_counter()
+        if profiler.ENABLED and profiler.should_profile(request.headers):
+            g._profile = profiler.RequestProfile(f"{request.method} {request.path}")
+            g._profile.start()
+
+    @app.after_request
+    def _record_request(response):
+        started = g.pop("_metrics_started", None)
+        if started is not None and metrics.METRICS_ENABLED:
+            route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+            metrics.observe("http_request_duration_seconds", time.perf_counter() - started, route=route, method=request.method)
+            metrics.count("http_requests_total", route=route, method=request.method, status=str(response.status_code))
+        return response
+
+    @app.teardown_request
+    def _finish_profile(_exc):
+        profile = g.pop("_profile", None)
+        if profile is not None:
+            profile.stop_and_dump()
@@ -1,39 +1,47 @@
 # backend/app/routes/outfits.py
-from flask import Blueprint, request, jsonify
+import os
+
+from flask import Blueprint, g, request, jsonify
 from app.services import outfit_service
-from app.services.auth_service import decode_token # 🆕 ADDED: JWT decoding utility
+from app.services.near_duplicates import parse_hash
+from app.utils.auth import require_auth # JWT check + 401s for protected routes
+from app.utils.ndjson import export_response, import_response
+from app.utils.pagination import decode_cursor, encode_cursor, next_cursor
 
 outfits_bp = Blueprint("outfits", __name__, url_prefix="/api/outfits")
 
-# =========================
-# 🔐 JWT Helper
-# =========================
+# Upper bound on outfits per /api/outfits/save/batch request
+OUTFITS_BATCH_MAX = int(os.getenv("OUTFITS_BATCH_MAX", "1000"))
 
-def get_user_id_from_header():
-    """
-    Extract and decode JWT from Authorization header.
+# Upper bound on results per /api/outfits/similar request
+SIMILAR_MAX = int(os.getenv("SIMILAR_MAX", "100"))
 
-    WHY:
-    - JWT verfication belongs in the route layer, not services
-    - Ensures user udentity is trusted before calling business logic
-    """
-    auth_header = request.headers.get("Authorization", "")
+# Upper bound on outfits per /api/outfits/recent page
+RECENT_PAGE_MAX = int(os.getenv("RECENT_PAGE_MAX", "100"))
 
-    if not auth_header.startswith("Bearer "):
-        return None
-    
-    token = auth_header.replace("Bearer ", "")
-    decode = decode_token(token)
-
-    # Defensive check to avoid KeyErrors and invalid tokens
-    return decoded.get("user_id") if decoded else None
+# Upper bound on favorites per /api/outfits/favorites page
+FAVORITES_PAGE_MAX = int(os.getenv("FAVORITES_PAGE_MAX", "100"))
 
 # =========================
 # Outfit Routes
 # =========================
 
+def _valid_image_hash(value):
+    """An optional image_hash (from the upload response) must be 16 hex digits."""
+    if value is None:
+        return True
+    try:
+        parse_hash(value)
+        return True
+    except ValueError:
+        return False
+
 @outfits_bp.route("/save", methods=["POST"])
 def save_outfit():
+    """
+    Save one outfit. An optional "image_hash" (returned by the upload route)
+    flags near-duplicates: the saved entry then carries "duplicate_of".
+    """
     data = request.json
 
     image_url = data.get("image_url")
@@ -41,57 +49,174 @@ def save_outfit():
     theme = data.get("theme")
     caption = data.get("caption", "")
     tags = data.get("tags", [])
+    image_hash = data.get("image_hash")
 
     if not image_url or not colours:
         return jsonify({"error": "Missing imageUrl or colours fields"}), 400
+    if not _valid_image_hash(image_hash):
+        return jsonify({"error": "image_hash must be 16 hex digits"}), 400
     
-    entry = outfit_service._save_outfit(
+    entry = outfit_service.save_outfit(
         image_url=image_url, 
         colours=colours, 
         theme=theme, 
         caption=caption, 
-        tags=tags
+        tags=tags,
+        image_hash=image_hash,
     )
 
     return jsonify({"message": "Outfit saved", "entry": entry}), 201
 
+@outfits_bp.route("/save/batch", methods=["POST"])
+def save_outfits_batch():
+    """
+    Save many outfits in one request (one bulk write).
+    - Expect JSON: {"outfits": [{"image_url": ..., "colours": [...], "theme": ..., "caption": ..., "tags": [...], "image_hash": ...}, ...]}
+    - Returns the saved entries in input order; near-duplicates (also within
+      the batch) carry "duplicate_of".
+    """
+    data = request.get_json(silent=True) or {}
+    items = data.get("outfits")
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "Missing outfits list"}), 400
+    if len(items) > OUTFITS_BATCH_MAX:
+        return jsonify({"error": f"Too many outfits; a batch may contain at most {OUTFITS_BATCH_MAX}"}), 413
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not item.get("image_url") or not item.get("colours"):
+            return jsonify({"error": f"Outfit {index}: missing imageUrl or colours fields"}), 400
+        if not _valid_image_hash(item.get("image_hash")):
+            return jsonify({"error": f"Outfit {index}: image_hash must be 16 hex digits"}), 400
+
+    entries = outfit_service.save_outfits(items)
+    return jsonify({"message": f"{len(entries)} outfits saved", "entries": entries}), 201
+
+@outfits_bp.route("/export", methods=["GET"])
+def export_outfits():
+    """
+    Stream every outfit as NDJSON (one object per line, oldest first).
+    Memory stays constant regardless of how many outfits exist.
+    """
+    return export_response("outfits")
+
+@outfits_bp.route("/import", methods=["POST"])
+@require_auth
+def import_outfits():
+    """
+    Bulk upsert outfits from the raw request body: NDJSON (e.g. an export)
+    or a legacy JSON array. Parsed incrementally and written in batches.
+    - Optional ?batch=N (records per write).
+    - Returns counts, throughput and the first few validation errors.
+    """
+    return import_response("outfits")
+
 @outfits_bp.route("/recent", methods=["GET"])
 def get_recent_outfits():
-    limit = int(request.args.get("limit", 5))
-    outfits = outfit_service.get_recent_outfits(limit=limit)
-    return jsonify({"outfits": outfits})
+    """
+    Newest outfits first.
+    Optional query params:
+      ?limit=N (default 5, at most RECENT_PAGE_MAX)
+      ?cursor=<next_cursor from a previous response> for the next page
+    """
+    try:
+        limit = int(request.args.get("limit", 5))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    limit = max(1, min(limit, RECENT_PAGE_MAX))
+
+    cursor = request.args.get("cursor")
+    try:
+        cursor = decode_cursor(cursor) if cursor else None
+        outfits = outfit_service.get_recent_outfits(limit=limit, cursor=cursor)
+    except (ValueError, KeyError):
+        return jsonify({"error": "Invalid or expired cursor"}), 400
+    return jsonify({"outfits": outfits, "next_cursor": next_cursor(outfits, limit)})
 
 @outfits_bp.route("/search", methods=["GET"])
 def search_outfits():
+    """
+    Search outfits by tags and/or theme.
+
+    Query params:
+      ?tags=a,b      comma-separated tags
+      ?theme=Winter  seasonal theme
+      ?match=all|any outfits must have all tags (default) or any of them
+      ?sort=newest|oldest (default newest)
+      ?page=1&limit=10 (limit at most RECENT_PAGE_MAX)
+      ?cursor=<next_cursor> keyset paging (constant cost at any depth;
+                            takes precedence over ?page)
+    """
     tags_param = request.args.get("tags", "").strip()
     theme = request.args.get("theme", "").strip()
-    sort = request.args.get("sort", "").strip()
-    page = int(request.args.get("page", 1))
-    limit = int(request.args.get("limit", 10))
-    
-    tags = [t.strip() for t in tags_param.split(",") if t.strip()] if tags_param else []
+    sort = request.args.get("sort", "").strip() or "newest"
+    match = request.args.get("match", "").strip() or "all"
+    try:
+        page = max(int(request.args.get("page", 1)), 1)
+    except ValueError:
+        return jsonify({"error": "page must be an integer"}), 400
+    try:
+        limit = max(1, min(int(request.args.get("limit", 10)), RECENT_PAGE_MAX))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
 
-    results = outfit_service.search_outfits_by_tags_and_theme(tags, theme)
+    tags = [t.strip() for t in tags_param.split(",") if t.strip()] if tags_param else []
 
-    if sort:
-        results = outfit_service.sort_outfits(results, sort)
-    
-    start = (page - 1) * limit
-    end = start + limit
+    cursor = request.args.get("cursor")
+    try:
+        cursor = decode_cursor(cursor) if cursor else None
+        results, total = outfit_service.search_outfits_by_tags_and_theme(
+            tags, theme, sort=sort, page=page, limit=limit, match=match, cursor=cursor
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     return jsonify({
-        "outfits": results[start:end],
+        "outfits": results,
         "page": page,
         "limit": limit,
-        "total": len(results),
-        "total_pages": (len(results) + limit - 1) // limit
+        "total": total,
+        "total_pages": (total + limit - 1) // limit,
+        "next_cursor": next_cursor(results, limit),
         }), 200
 
+@outfits_bp.route("/similar", methods=["GET"])
+def similar_outfits():
+    """
+    Outfits with the most similar colour palette, nearest first.
+
+    Query params (one of colours / outfit_id):
+      ?colours=#aabbcc,#112233  query palette (URL-encode the '#')
+      ?outfit_id=<id>           use that outfit's palette ("more like this")
+      ?limit=10                 at most SIMILAR_MAX
+    Each result carries "distance" (palette ΔE; lower = more similar).
+    """
+    try:
+        limit = max(1, min(int(request.args.get("limit", 10)), SIMILAR_MAX))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+
+    outfit_id = request.args.get("outfit_id", "").strip() or None
+    if outfit_id:
+        found = outfit_service.get_outfits_by_ids([outfit_id])
+        if not found:
+            return jsonify({"error": "Outfit not found"}), 404
+        colours = found[0].get("colours") or []
+    else:
+        colours = [c.strip() for c in request.args.get("colours", "").split(",") if c.strip()]
+        if not colours:
+            return jsonify({"error": "Provide colours or outfit_id"}), 400
+
+    try:
+        results = outfit_service.find_similar_outfits(colours, limit=limit, exclude_id=outfit_id)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"outfits": results, "colours": colours}), 200
+
 # =========================
 # ⭐ Favorites (JWT-Protected)
 # =========================
 
 @outfits_bp.route("/favorite", methods=["POST"])
+@require_auth
 def save_favorite():
     """
     Save an outfit to the authenticated user's favorites.
@@ -100,11 +225,9 @@ def save_favorite():
     - User identity is derived exclusively from JWT
     - Prevents spoofing user IDs via request body
     """
-    user_id = get_user_id_from_header()
-    if not user_id:
-        return jsonify({"error": "Unauthorized"}), 401
-    
-    data = request.json
+    user_id = g.user_id
+
+    data = request.get_json(silent=True) or {}
     outfit_id = data.get("outfit_id")
 
     if not outfit_id:
@@ -114,17 +237,32 @@ def save_favorite():
     return jsonify({"message": "Outfit added to favorites"}), 200
 
 @outfits_bp.route("/favorites", methods=["GET"])
+@require_auth
 def get_favorites():
     """
-    Retrieve authenticated user's favorite outfits.
+    Retrieve authenticated user's favorite outfits, most recent first.
+    Optional query params:
+      ?limit=N (default 20, at most FAVORITES_PAGE_MAX)
+      ?cursor=<next_cursor from a previous response> for the next page
 
     WHY:
     - Favorites are private per user
-    - JWT ensures proper ownership and access control 
+    - JWT ensures proper ownership and access control
+    - Full outfit records come back in one response (one batched lookup),
+      so clients no longer fetch each favorite separately
     """
-    user_id = get_user_id_from_header()
-    if not user_id:
-        return jsonify({"error": "Unauthorized"}), 401
-    
-    favorites = outfit_service.get_favorites(user_id)
-    return jsonify({"favorites": favorites}), 200
\ No newline at end of file
+    try:
+        limit = int(request.args.get("limit", 20))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    limit = max(1, min(limit, FAVORITES_PAGE_MAX))
+
+    cursor = request.args.get("cursor")
+    try:
+        cursor = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        return jsonify({"error": "Invalid cursor"}), 400
+
+    favorites, next_key = outfit_service.get_favorites(g.user_id, limit=limit, cursor=cursor)
+    token = encode_cursor({"timestamp": next_key[0], "id": next_key[1]}) if next_key else None
+    return jsonify({"favorites": favorites, "next_cursor": token}), 200
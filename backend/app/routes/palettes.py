@@ -4,6 +4,9 @@ Palettes Routes
 This file exposes endpoints to:
 - Save a new palette (POST /api/palettes/save)
 - Retrieve recent palettes (GET /api/palettes/recent)
+- Find palettes with similar colours (GET /api/palettes/similar)
+- Stream every palette as NDJSON (GET /api/palettes/export)
+- Bulk import NDJSON / JSON-array palettes (POST /api/palettes/import)
 
 It acts as the controller layer:
 - Validates HTTP request input
@@ -11,12 +14,23 @@ It acts as the controller layer:
 - Returns clean JSON responses for the frontend	
 """
 
+import os
+
 from flask import Blueprint, request, jsonify
 from app.services import palette_service
+from app.utils.auth import require_auth
+from app.utils.ndjson import export_response, import_response
+from app.utils.pagination import decode_cursor, next_cursor
 
 #  Define a blueprint (modular grouping of routes) for palettes
 palettes_bp = Blueprint("palettes", __name__, url_prefix="/api/palettes")
 
+# Upper bound on results per /api/palettes/similar request
+SIMILAR_MAX = int(os.getenv("SIMILAR_MAX", "100"))
+
+# Upper bound on palettes per /api/palettes/recent page
+RECENT_PAGE_MAX = int(os.getenv("RECENT_PAGE_MAX", "100"))
+
 @palettes_bp.route("/save", methods=["POST"])
 def save_palette():
     """
@@ -55,14 +69,71 @@ def get_recent_palettes():
         """
         Fetch the most recent palettes.
         Optional query param:
-          ?limit=N (default = 5)
+          ?limit=N (default = 5, at most RECENT_PAGE_MAX)
+          ?cursor=<next_cursor from a previous response> for the next page
         - Delegates to `palette_service.get_recent_palettes`.
-        - Returns list of palettes in descending order (newest first).
+        - Returns list of palettes in descending order (newest first),
+          plus `next_cursor` (null on the last page).
         """
         try:
-            limit = int(request.args.get("limit", 5)) # Default = 5
-            data = palette_service.get_recent_palettes(limit)
-            return jsonify({"palettes": data}), 200
+            try:
+                limit = max(1, min(int(request.args.get("limit", 5)), RECENT_PAGE_MAX)) # Default = 5
+            except ValueError:
+                return jsonify({"error": "limit must be an integer"}), 400
+            cursor = request.args.get("cursor")
+            try:
+                cursor = decode_cursor(cursor) if cursor else None
+                data = palette_service.get_recent_palettes(limit, cursor=cursor)
+            except (ValueError, KeyError):
+                return jsonify({"error": "Invalid or expired cursor"}), 400
+            return jsonify({"palettes": data, "next_cursor": next_cursor(data, limit)}), 200
         
         except Exception as e:
-            return jsonify({"error": str(e)}), 500
\ No newline at end of file
+            return jsonify({"error": str(e)}), 500
+
+@palettes_bp.route("/similar", methods=["GET"])
+def similar_palettes():
+    """
+    Saved palettes closest to a query palette, nearest first.
+    Query params (one of colours / palette_id):
+      ?colours=#aabbcc,#112233  query palette (URL-encode the '#')
+      ?palette_id=<id>          use that saved palette
+      ?limit=10                 at most SIMILAR_MAX
+    Each result carries "distance" (palette ΔE; lower = more similar).
+    """
+    try:
+        limit = max(1, min(int(request.args.get("limit", 10)), SIMILAR_MAX))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+
+    palette_id = request.args.get("palette_id", "").strip() or None
+    if palette_id:
+        found = palette_service.get_palettes_by_ids([palette_id])
+        if not found:
+            return jsonify({"error": "Palette not found"}), 404
+        colours = found[0].get("colours") or []
+    else:
+        colours = [c.strip() for c in request.args.get("colours", "").split(",") if c.strip()]
+        if not colours:
+            return jsonify({"error": "Provide colours or palette_id"}), 400
+
+    try:
+        results = palette_service.find_similar_palettes(colours, limit=limit, exclude_id=palette_id)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"palettes": results, "colours": colours}), 200
+
+@palettes_bp.route("/export", methods=["GET"])
+def export_palettes():
+    """Stream every palette as NDJSON (oldest first), in constant memory."""
+    return export_response("palettes")
+
+@palettes_bp.route("/import", methods=["POST"])
+@require_auth
+def import_palettes():
+    """
+    Bulk upsert palettes from the raw request body (NDJSON or a JSON array).
+    - Optional ?batch=N (records per write).
+    - Returns counts, throughput and the first few validation errors.
+    """
+    return import_response("palettes")
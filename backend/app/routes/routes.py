@@ -1,19 +1,28 @@
 # backend/app/routes/image.py
 
+import json
 import logging # Enables backend event tracking
-from flask import Blueprint, request, jsonify
-from app.services.color_palette import extract_palette
-import tempfile
 import os
-import cv2
-import numpy as np
-from app.utils.image_utils import crop_center # Utility to crop image center
+from concurrent.futures import FIRST_COMPLETED, wait
+from flask import Blueprint, Response, request, jsonify, stream_with_context, url_for
+from app.services.palette_engines import PALETTE_ENGINES
+from app.services.palette_cache import palette_cache
+from app.services.segmentation import BATCH_SIZE as SEGMENTATION_BATCH_SIZE, DEFAULT_REGION, PALETTE_REGIONS
+from app.services import metrics, worker_pool
+from app.services.job_queue import get_job_queue
+from app.services.admission import PRIORITY_BATCH, PRIORITY_INTERACTIVE
+from app.utils.admission import admitted, rate_limited
+from app.utils.upload_validation import UploadRejected, read_upload
+
+# NOTE: app.services.image_pipeline (cv2 / numpy / sklearn) is imported inside
+# the handlers that use it, so importing this blueprint stays cheap.
 
 # ✅ NEW: persistence service to save palettes
 # from app.services.palette_service import save_palette
 
 # ✅ NEW: allow palette routes (history, retrieval, etc.)
 from app.routes.palettes import palettes_bp
+from app.routes.blobs import blob_urls
 
 # Set up basic logging configuration
 logging.basicConfig(level=logging.INFO)
@@ -30,19 +39,89 @@ api_bp.register_blueprint(palettes_bp)
 # Define allowed image extensions for upload security
 ALLOWED_EXTENSIONS = {'jpg', 'jpeg', 'png'}
 
+# Per-batch limits for /upload/batch
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", "200"))
+BATCH_MAX_BYTES = int(os.getenv("BATCH_MAX_BYTES", str(200 * 1024 * 1024)))
+
+# Request-body allowance per batch file on top of its bytes (multipart headers / boundaries)
+BATCH_PART_OVERHEAD = 1024
+
+# Upper bound for ?wait= long-polling on job status (seconds)
+JOB_MAX_WAIT = float(os.getenv("JOB_MAX_WAIT", "30"))
+
+# User-facing message for anything that fails inside the image pipeline
+PROCESSING_ERROR = "Failed to read or process image. Please upload a valid JPG, JPEG or PNG."
+
 # Helper function to check file extension
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def rejected_upload(error):
+    return jsonify({"error": str(error), "reason": error.reason}), error.status
+
+# uploads_total / upload_rejections_total route label per endpoint
+ROUTE_LABELS = {"image.upload_image": "upload", "image.upload_batch": "batch", "image.create_palette_job": "jobs"}
+
+@image_routes.app_errorhandler(413)
+def request_too_large(error):
+    """JSON 413 when a body exceeds MAX_CONTENT_LENGTH (raised before it is parsed)."""
+    route = ROUTE_LABELS.get(request.endpoint, request.endpoint or "unknown")
+    metrics.count("upload_rejections_total", route=route, reason="body_too_large")
+    limit = request.max_content_length
+    message = f"Request body too large; limit is {limit} bytes" if limit else "Request body too large"
+    return jsonify({"error": message, "reason": "body_too_large"}), 413
+
+# Helper: read ?engine=, ?seed= and ?region= from the query string
+def parse_palette_options():
+    """
+    Returns (options, error_response). `options` holds the validated
+    engine/seed/region kwargs for the image pipeline; `error_response` is a
+    ready (json, status) tuple when validation fails.
+    """
+    engine = request.args.get("engine") or None
+    if engine is not None and engine not in PALETTE_ENGINES:
+        return None, (jsonify({"error": f"Unknown engine '{engine}'. Choose one of: {', '.join(sorted(PALETTE_ENGINES))}"}), 400)
+
+    seed = request.args.get("seed")
+    if seed is not None:
+        try:
+            seed = int(seed)
+        except ValueError:
+            return None, (jsonify({"error": "seed must be an integer"}), 400)
+
+    region = request.args.get("region") or None
+    if region is not None and region not in PALETTE_REGIONS:
+        return None, (jsonify({"error": f"Unknown region '{region}'. Choose one of: {', '.join(PALETTE_REGIONS)}"}), 400)
+
+    return {"engine": engine, "seed": seed, "region": region}, None
+
 @image_routes.route('/upload', methods=["POST"])
+@rate_limited("image")
+@admitted("upload", priority=PRIORITY_INTERACTIVE)
 def upload_image():
     """
     Handle image uploads:
     - Validate file type (JPG, JPEG, PNG)
-    - Save temporarily for processing
+    - Reject non-images, corrupt headers and oversized images from the first
+      bytes / header before decoding (see app.utils.upload_validation)
+    - Decode the upload straight from memory (no temp files)
     - Crop image center (200x200 pixels)
     - Extract top 5 dominant colors
-    - Return palette as JSON
+    - Keep the upload in the blob store, with thumbnails from the same decode
+    - Return palette as JSON, with the image's perceptual hash and stored URLs:
+        {"palette": [...], "image_hash": "<16 hex digits>", "image_id": "<sha256>",
+         "image_url": "/api/blobs/<sha256>", "thumbnails": {"128": "...", ...}}
+      Send image_hash back with /api/outfits/save to flag near-duplicate outfits,
+      and image_url as the outfit's image_url (unreferenced blobs are collected).
+
+    Optional query params:
+      ?engine=kmeans|minibatch|median_cut (default: PALETTE_ENGINE env)
+      ?seed=<int> for reproducible clustering
+      ?region=center|garment (default: PALETTE_REGION env); garment clusters
+        only clothing pixels found by the segmentation model
+
+    Admission-controlled: 429 / 503 with Retry-After when the client is over
+    its rate or the image pool is saturated (see app.services.admission).
     """
 
     # Get the file from the request payload
@@ -56,42 +135,220 @@ def upload_image():
     if not allowed_file(file.filename):
         return jsonify({"error": "Unsupported file type. Please upload a JPG, JPEG, or PNG image."}), 400
 
-    # Log request and file metadata for debugging and audit purposes
-    logging.info(f"[UPLOAD] Received request from {request.remote_addr}")
-    logging.info(f"[UPLOAD] Filename: {file.filename}")
-    logging.info(f"[UPLOAD] Content-Type: {file.content_type}")
+    # Validate the optional palette engine / seed before doing any image work
+    options, error = parse_palette_options()
+    if error:
+        return error
+
+    # Sniff magic bytes and read the header before touching the image stack
+    try:
+        data = read_upload(file, route="upload")
+    except UploadRejected as e:
+        logging.info("[UPLOAD] Rejected %s from %s: %s", file.filename, request.remote_addr, e.reason)
+        return rejected_upload(e)
 
-    # Create a temporary file to safely store the uploaded image
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as temp:
-        image_path = temp.name
-        file.save(image_path)
+    # Log request and file metadata for debugging and audit purposes
+    # (%-style args: formatting is skipped entirely when INFO is disabled)
+    logging.info("[UPLOAD] %s from %s (%s)", file.filename, request.remote_addr, file.content_type)
 
     try:
-        # Load the image from saved file
-        image = cv2.imread(image_path)
-
-        # Check if the image was loaded successfully
-        if image is None or image.size == 0:
-            raise ValueError("Failed to load image from file.")
-        
-        # Crop the center 200x200 pixels from the image (adjust size as needed)
-        cropped_img = crop_center(image, 200, 200)
-
-        # Save cropped image temporarily for palette extraction
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as temp_cropped:
-            cropped_path = temp_cropped.name
-            cv2.imwrite(cropped_path, cropped_img)
-
-        # Extract the top 5 dominant colors from the image
-        palette = extract_palette(cropped_path, k=5)
-        return jsonify({"palette": palette})
+        from app.services.image_pipeline import hashed_palette_from_bytes
+
+        # Decode → crop → (cached) palette extraction, all in memory
+        result = hashed_palette_from_bytes(data, **options)
+        metrics.count("uploads_total", route="upload", outcome="ok")
+        return jsonify(blob_urls(result))
     
     except Exception as e:
         # Log the error and respond with a user-friendly message
-        logging.error(f"[ERROR] Failed to process image: {str(e)}")
-        return jsonify({"error": "Failed to read or process image. Please upload a valid JPG, JPEG or PNG."}), 400
+        logging.error("[ERROR] Failed to process image: %s", e)
+        metrics.count("uploads_total", route="upload", outcome="error")
+        return jsonify({"error": PROCESSING_ERROR}), 400
+
+@image_routes.route('/upload/batch', methods=["POST"])
+@rate_limited("image")
+@admitted("upload_batch", priority=PRIORITY_BATCH)
+def upload_batch():
+    """
+    Handle many uploads in one request:
+    - Accepts multiple files under the `images` form field
+    - Fans decode + palette extraction out to the worker process pool
+    - Streams one NDJSON line per image as soon as it finishes:
+        {"index": 0, "filename": "a.jpg", "palette": [...], "image_hash": "...", "image_url": "...", ...}
+        {"index": 1, "filename": "b.png", "error": "...", "reason": "not_an_image"}
+
+    Supports the same ?engine= / ?seed= / ?region= params as /upload, and
+    produces the same palettes because both run image_pipeline.palette_from_image.
+    In garment mode images go to workers in chunks of SEGMENTATION_BATCH_SIZE
+    so each worker segments a chunk in one pass on its resident model.
+    A batch holds an image-pool slot until its stream ends, queued behind
+    single uploads. Each file is validated like /upload; rejected files get
+    an error line and never reach a worker.
+    """
+    # Batches may exceed the app-wide body limit, up to their own byte budget
+    request.max_content_length = BATCH_MAX_BYTES + BATCH_MAX_FILES * BATCH_PART_OVERHEAD
+
+    files = request.files.getlist('images')
+    if not files:
+        return jsonify({"error": "No files provided"}), 400
+
+    # Enforce per-batch limits before reading any file bodies
+    if len(files) > BATCH_MAX_FILES:
+        return jsonify({"error": f"Too many files; a batch may contain at most {BATCH_MAX_FILES}"}), 413
+
+    options, error = parse_palette_options()
+    if error:
+        return error
+
+    items = []
+    total_bytes = 0
+    for index, file in enumerate(files):
+        if file.filename == '' or not allowed_file(file.filename):
+            items.append((index, file.filename, None, {"error": "Unsupported file type. Please upload a JPG, JPEG, or PNG image."}))
+            continue
+        try:
+            data = read_upload(file, route="batch")
+        except UploadRejected as e:
+            items.append((index, file.filename, None, {"error": str(e), "reason": e.reason}))
+            continue
+        total_bytes += len(data)
+        if total_bytes > BATCH_MAX_BYTES:
+            return jsonify({"error": f"Batch too large; limit is {BATCH_MAX_BYTES} bytes"}), 413
+        items.append((index, file.filename, data, None))
+
+    logging.info("[BATCH] Received %d files (%d bytes) from %s", len(items), total_bytes, request.remote_addr)
+    metrics.count("uploads_total", amount=len(items), route="batch", outcome="accepted")
+
+    return Response(
+        stream_with_context(_stream_batch(items, options)),
+        mimetype="application/x-ndjson",
+    )
+
+def _stream_batch(items, options):
+    """
+    Yield NDJSON lines in completion order, keeping at most
+    worker_pool.MAX_PENDING of this batch's tasks in flight (backpressure).
+    Each task is a chunk of images (one image unless in garment mode).
+    """
+    from app.services.image_pipeline import palettes_from_bytes_batch
+
+    chunk_size = SEGMENTATION_BATCH_SIZE if (options.get("region") or DEFAULT_REGION) == "garment" else 1
+    pending = {}
+    queue = iter(items)
+    exhausted = False
+
+    while True:
+        # Top up the in-flight window from the remaining items
+        while not exhausted and len(pending) < worker_pool.MAX_PENDING:
+            chunk = []
+            while len(chunk) < chunk_size:
+                item = next(queue, None)
+                if item is None:
+                    exhausted = True
+                    break
+                index, filename, data, rejected = item
+                if rejected is not None:
+                    yield _ndjson({"index": index, "filename": filename, **rejected})
+                    continue
+                chunk.append(item)
+            if not chunk:
+                continue
+            try:
+                future = worker_pool.submit(palettes_from_bytes_batch, [data for _, _, data, _ in chunk], **options)
+            except worker_pool.PoolBusyError as e:
+                for index, filename, _, _ in chunk:
+                    yield _ndjson({"index": index, "filename": filename, "error": str(e)})
+                continue
+            pending[future] = [(index, filename) for index, filename, _, _ in chunk]
+
+        if not pending:
+            break
+
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            chunk = pending.pop(future)
+            try:
+                results = future.result()
+            except Exception as e:
+                results = [{"error": str(e)}] * len(chunk)
+            for (index, filename), result in zip(chunk, results):
+                if "error" in result:
+                    logging.error("[ERROR] Failed to process batch image %s: %s", filename, result["error"])
+                    yield _ndjson({"index": index, "filename": filename, "error": PROCESSING_ERROR})
+                else:
+                    yield _ndjson({"index": index, "filename": filename, **blob_urls(result)})
+
+def _ndjson(record):
+    return json.dumps(record) + "\n"
+
+@image_routes.route('/jobs', methods=["POST"])
+@rate_limited("image")
+def create_palette_job():
+    """
+    Job mode for uploads:
+    - Validates the upload like /upload (magic bytes, header, dimensions)
+    - Queues decode → crop → palette → theme in the background
+    - Returns 202 with a job id immediately; poll GET /jobs/<id> for the result
+
+    Supports the same ?engine= / ?seed= / ?region= params as /upload.
+    """
+    file = request.files.get('image')
+    if file is None or file.filename == '':
+        return jsonify({"error": "No file provided"}), 400
+
+    if not allowed_file(file.filename):
+        return jsonify({"error": "Unsupported file type. Please upload a JPG, JPEG, or PNG image."}), 400
+
+    options, error = parse_palette_options()
+    if error:
+        return error
+
+    try:
+        data = read_upload(file, route="jobs")
+    except UploadRejected as e:
+        return rejected_upload(e)
+
+    job = get_job_queue().submit(data, **options)
+    logging.info("[JOB] Queued %s for %s from %s", job["id"], file.filename, request.remote_addr)
+    metrics.count("uploads_total", route="jobs", outcome="queued")
+
+    return jsonify({
+        "job_id": job["id"],
+        "status": job["status"],
+        "status_url": url_for("image.get_palette_job", job_id=job["id"]),
+    }), 202
+
+@image_routes.route('/jobs/<job_id>', methods=["GET"])
+def get_palette_job(job_id):
+    """
+    Fetch a job's status and, once finished, its result.
+    Optional ?wait=N long-polls up to N seconds (capped by JOB_MAX_WAIT)
+    for the job to finish before responding.
+    """
+    try:
+        wait_seconds = min(max(float(request.args.get("wait", 0)), 0.0), JOB_MAX_WAIT)
+    except ValueError:
+        return jsonify({"error": "wait must be a number of seconds"}), 400
+
+    queue = get_job_queue()
+    job = queue.wait(job_id, wait_seconds) if wait_seconds else queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    response = {"job_id": job["id"], "status": job["status"]}
+    if job["status"] == "done":
+        response.update(blob_urls(dict(job["result"])))
+    elif job["status"] == "failed":
+        logging.error("[ERROR] Job %s failed: %s", job_id, job["error"])
+        response["error"] = PROCESSING_ERROR
+    return jsonify(response), 200
+
+@image_routes.route('/jobs/stats', methods=["GET"])
+def palette_job_stats():
+    """Expose job queue depth and latency metrics for monitoring."""
+    return jsonify(get_job_queue().stats()), 200
 
-    finally:
-        # Clean up any temporary files if created
-        if 'cropped_path' in locals() and os.path.exists(cropped_path):
-            os.remove(cropped_path)
+@image_routes.route('/cache/stats', methods=["GET"])
+def palette_cache_stats():
+    """Expose palette cache hit/miss/eviction counters for monitoring."""
+    return jsonify(palette_cache.stats()), 200
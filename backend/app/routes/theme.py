@@ -3,20 +3,36 @@ Theme Route
 - Exposes POST /api/theme endpoint
 - Accepts a JSON body with 'palette': list of hex colors
 - Returns a JSON with 'theme': one of 'Spring', 'Summer', 'Autumn', 'Winter', 'Neutral'
+- Exposes POST /api/theme/batch for many palettes in one vectorized call
 """
 
+import os
+
 from flask import Blueprint, request, jsonify
-from app.services.theme_matcher import match_theme
+
+# theme_matcher (numpy) is imported inside the handlers so app startup stays cheap
 
 # Blueprint allows modular route registration
 theme_bp = Blueprint("theme_bp", __name__)
 
+# Upper bound on palettes per /api/theme/batch request
+THEME_BATCH_MAX = int(os.getenv("THEME_BATCH_MAX", "100000"))
+
+def _mode_from(data):
+    """Optional 'mode' from the JSON body or ?mode= query param (None = default)."""
+    from app.services.theme_matcher import THEME_MODES
+
+    mode = data.get("mode") or request.args.get("mode") or None
+    if mode is not None and mode not in THEME_MODES:
+        raise ValueError(f"Unknown mode '{mode}'. Choose one of: {', '.join(THEME_MODES)}")
+    return mode
+
 # POST /api/theme
 @theme_bp.route("/api/theme", methods=["POST"])
 def api_theme():
     """ 
     Handle POST /api/theme 
-    - Expect JSON: {'palette': ['#aabbcc', ...]} 
+    - Expect JSON: {'palette': ['#aabbcc', ...], 'mode': 'circular' | 'compat' (optional)}
     - Returns: {"theme": "Spring"} or error message
     """
 
@@ -28,9 +44,46 @@ def api_theme():
     palette = data.get("palette", [])
 
     try:
+        mode = _mode_from(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        from app.services.theme_matcher import match_theme
+
         # Match palette to a seasonal theme
-        theme = match_theme(palette)
+        theme = match_theme(palette, mode=mode)
         return jsonify({"theme": theme}), 200
     except Exception as e:
         # Catch-all for unexpected errors
-        return jsonify({"error": f"Failed to match theme: {str(e)}"}), 500
\ No newline at end of file
+        return jsonify({"error": f"Failed to match theme: {str(e)}"}), 500
+
+# POST /api/theme/batch
+@theme_bp.route("/api/theme/batch", methods=["POST"])
+def api_theme_batch():
+    """
+    Handle POST /api/theme/batch
+    - Expect JSON: {'palettes': [['#aabbcc', ...], ...], 'mode': optional}
+    - Returns: {"themes": ["Spring", "Winter", ...]} in input order
+    """
+    data = request.get_json(force=True, silent=True)
+    if not data or not isinstance(data.get("palettes"), list):
+        return jsonify({"error": "Palettes list missing in request body"}), 400
+
+    palettes = data["palettes"]
+    if len(palettes) > THEME_BATCH_MAX:
+        return jsonify({"error": f"Too many palettes; a batch may contain at most {THEME_BATCH_MAX}"}), 413
+    if not all(isinstance(p, list) for p in palettes):
+        return jsonify({"error": "Each palette must be a list of hex colours"}), 400
+
+    try:
+        mode = _mode_from(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        from app.services.theme_matcher import match_themes
+
+        return jsonify({"themes": match_themes(palettes, mode=mode)}), 200
+    except Exception as e:
+        return jsonify({"error": f"Failed to match themes: {str(e)}"}), 500
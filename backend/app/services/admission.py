@@ -0,0 +1,505 @@
+# backend/app/services/admission.py
+"""
+Admission Control
+-----------------
+WHY THIS FILE EXISTS:
+- `/api/image/upload` ran a CPU-bound decode + KMeans for every request it
+  accepted, however many arrived at once. Under a spike every request
+  thread was busy clustering, so health checks, auth and feed reads queued
+  behind them and latency exploded everywhere.
+- Expensive routes now have to be admitted first. When the server is
+  saturated they get a fast 503 (or 429) with Retry-After, and the routes
+  that do not take part keep their threads and CPU.
+
+Pieces:
+- Pools: a concurrency limit shared by several routes ("image": /upload
+  and /upload/batch). A route may also have its own cap inside the pool
+  (batch streams hold a slot for a long time, so they get 1 by default).
+- Bounded wait queue: a request that cannot start waits in its pool's
+  queue, highest priority first, then FIFO. Interactive /upload outranks
+  /upload/batch. A full queue is rejected at once.
+- Deadlines: each pool has a maximum wait. A request whose estimated wait
+  (queue position x recent service time) is already past it is rejected
+  at once instead of waiting to time out. One that waits until the
+  deadline gives up its place and is rejected.
+- Token buckets: per-client (remote address) request rates for a route
+  group, answered with 429 when empty. Off unless IMAGE_RATE_LIMIT is set:
+  behind a reverse proxy or NAT every client has the same address, so one
+  default bucket would throttle all of them together.
+- Routes without a limiter (health, auth, reads) are never queued. Keep
+  IMAGE_CONCURRENCY below the server's worker thread count so some
+  threads are always free for them.
+
+Backends (which requests share the limits):
+- "memory"  threads of one process (default)
+- "sqlite"  every process on the host that points at ADMISSION_DB. Slots,
+            waiters and buckets are rows changed in BEGIN IMMEDIATE
+            transactions; waiters re-check every ADMISSION_POLL_INTERVAL
+            (releases in the same process wake them at once). Rows left by
+            processes that died are removed.
+
+Waits and rejections are exported as admission_wait_seconds and
+admission_requests_total{pool, route, outcome}.
+
+Configuration (environment):
+- ADMISSION_CONTROL         "0" turns every limit off (default on)
+- ADMISSION_BACKEND         "memory" (default) or "sqlite"
+- ADMISSION_DB              SQLite file (default data/admission.sqlite3)
+- ADMISSION_POLL_INTERVAL   SQLite waiter re-check period, seconds (0.02)
+- IMAGE_CONCURRENCY         image requests running at once (default: CPU count)
+- IMAGE_QUEUE_MAX           image requests waiting (default 4 x concurrency)
+- IMAGE_MAX_WAIT            longest queue wait, seconds (default 5)
+- IMAGE_BATCH_CONCURRENCY   /upload/batch streams running at once (default 1)
+- IMAGE_RATE_LIMIT          image requests per second per client (default 0 = off)
+- IMAGE_RATE_BURST          bucket size per client (default 10)
+"""
+
+import itertools
+import math
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import namedtuple
+
+from app.services.metrics import count, observe
+
+ADMISSION_CONTROL = os.getenv("ADMISSION_CONTROL", "1").strip().lower() not in ("0", "false", "no")
+ADMISSION_BACKEND = os.getenv("ADMISSION_BACKEND", "memory")
+ADMISSION_DB = os.getenv(
+    "ADMISSION_DB", os.path.join(os.path.dirname(__file__), "../../data/admission.sqlite3")
+)
+POLL_INTERVAL = float(os.getenv("ADMISSION_POLL_INTERVAL", "0.02"))
+STALE_CHECK_INTERVAL = 5.0  # Seconds between sweeps for rows of dead processes (SQLite)
+
+# Queue priorities (higher is admitted first)
+PRIORITY_BATCH = 0
+PRIORITY_INTERACTIVE = 10
+
+Pool = namedtuple("Pool", "concurrency max_queue max_wait")
+Rate = namedtuple("Rate", "per_second burst")
+
+_image_concurrency = int(os.getenv("IMAGE_CONCURRENCY", "0")) or (os.cpu_count() or 1)
+POOLS = {
+    "image": Pool(
+        concurrency=_image_concurrency,
+        max_queue=int(os.getenv("IMAGE_QUEUE_MAX", "0")) or 4 * _image_concurrency,
+        max_wait=float(os.getenv("IMAGE_MAX_WAIT", "5")),
+    ),
+}
+# route -> (pool, cap on that route's running requests; None = the pool's limit)
+ROUTES = {
+    "upload": ("image", None),
+    "upload_batch": ("image", int(os.getenv("IMAGE_BATCH_CONCURRENCY", "1"))),
+}
+RATES = {
+    "image": Rate(float(os.getenv("IMAGE_RATE_LIMIT", "0")), int(os.getenv("IMAGE_RATE_BURST", "10"))),
+}
+
+# Outcomes of joining a pool
+ADMITTED, QUEUED, FULL = "admitted", "queued", "full"
+
+Ticket = namedtuple("Ticket", "id pool route admitted_at")
+
+
+class AdmissionRejected(RuntimeError):
+    """The request was not admitted. `status` is 503 (busy) or 429 (rate limited)."""
+
+    def __init__(self, message, reason, retry_after, status=503):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.status = status
+
+
+def _refill(tokens, updated, now, rate):
+    """Bucket level after refilling since `updated`, and the wait (0 = allowed) for one token."""
+    tokens = min(rate.burst, tokens + (now - updated) * rate.per_second)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / rate.per_second
+
+
+# =========================
+# States
+# =========================
+
+class MemoryAdmissionState:
+    """Slots, queues and buckets shared by the threads of one process."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._active = {}  # ticket -> (pool, route)
+        self._queued = {}  # ticket -> (pool, route, priority, seq)
+        self._seq = itertools.count()
+        self._buckets = {}  # key -> (tokens, updated)
+        self._generation = 0  # Bumped on every release, so waiters never miss one
+
+    def join(self, ticket, pool, route, priority, limits):
+        """Admit `ticket` now, queue it, or refuse it. Returns (outcome, waiters ahead)."""
+        with self._cond:
+            seq = next(self._seq)
+            if self._admissible(pool, route, priority, seq, limits):
+                self._active[ticket] = (pool, route)
+                return ADMITTED, 0
+            queued = [entry for entry in self._queued.values() if entry[0] == pool]
+            ahead = sum(1 for entry in queued if entry[2] >= priority)
+            if len(queued) >= limits[2]:
+                return FULL, ahead
+            self._queued[ticket] = (pool, route, priority, seq)
+            return QUEUED, ahead
+
+    def poll(self, ticket, limits):
+        """Start a queued ticket if its turn has come. Returns (admitted, waiters ahead)."""
+        with self._cond:
+            pool, route, priority, seq = self._queued[ticket]
+            if self._admissible(pool, route, priority, seq, limits):
+                del self._queued[ticket]
+                self._active[ticket] = (pool, route)
+                return True, 0
+            return False, self._ahead(pool, priority, seq)
+
+    def generation(self):
+        return self._generation
+
+    def wait(self, timeout, generation):
+        """Block until something is released after `generation` was read, or `timeout`."""
+        with self._cond:
+            if self._generation == generation:
+                self._cond.wait(timeout)
+
+    def leave(self, ticket):
+        with self._cond:
+            self._queued.pop(ticket, None)
+            self._generation += 1
+            self._cond.notify_all()
+
+    def release(self, ticket):
+        with self._cond:
+            self._active.pop(ticket, None)
+            self._generation += 1
+            self._cond.notify_all()
+
+    def take_token(self, key, rate):
+        now = time.monotonic()
+        with self._cond:
+            tokens, updated = self._buckets.get(key, (rate.burst, now))
+            tokens, wait = _refill(tokens, updated, now, rate)
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > 10000:
+                # Forget clients whose bucket has refilled completely anyway
+                idle = rate.burst / rate.per_second
+                self._buckets = {k: v for k, v in self._buckets.items() if now - v[1] < idle}
+            return wait
+
+    def snapshot(self):
+        with self._cond:
+            pools = {}
+            for pool, _ in self._active.values():
+                pools.setdefault(pool, {"active": 0, "queued": 0})["active"] += 1
+            for pool, *_ in self._queued.values():
+                pools.setdefault(pool, {"active": 0, "queued": 0})["queued"] += 1
+            return pools
+
+    def _ahead(self, pool, priority, seq):
+        return sum(
+            1 for p, _, other_priority, other_seq in self._queued.values()
+            if p == pool and (other_priority > priority or (other_priority == priority and other_seq < seq))
+        )
+
+    def _admissible(self, pool, route, priority, seq, limits):
+        """Caller holds the condition. `limits` is (pool limit, route cap, max queue)."""
+        routes = [r for p, r in self._active.values() if p == pool]
+        if len(routes) >= limits[0] or routes.count(route) >= limits[1]:
+            return False
+        return self._ahead(pool, priority, seq) < limits[0] - len(routes)
+
+
+class SQLiteAdmissionState:
+    """
+    Slots, queues and buckets shared by every process using the same file.
+
+    WHY:
+    - Pre-fork servers run one limiter per worker process otherwise, which
+      multiplies the effective concurrency by the number of workers.
+    """
+
+    def __init__(self, path=ADMISSION_DB, poll_interval=POLL_INTERVAL):
+        self.path = path
+        self.poll_interval = poll_interval
+        self._local = threading.local()
+        self._cond = threading.Condition()  # Wakes waiters in this process on local releases
+        self._generation = 0
+        self._last_sweep = 0.0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn().executescript("""
+            CREATE TABLE IF NOT EXISTS admission (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                ticket TEXT NOT NULL UNIQUE,
+                pool TEXT NOT NULL,
+                route TEXT NOT NULL,
+                priority INTEGER NOT NULL,
+                state TEXT NOT NULL,
+                pid INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_admission_pool ON admission (pool, state, priority, seq);
+            CREATE TABLE IF NOT EXISTS rate_buckets (
+                key TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL
+            );
+        """)
+
+    def _conn(self):
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")  # Limiter state need not survive power loss
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self, fn):
+        """Run fn(conn) inside BEGIN IMMEDIATE (one writer at a time across processes)."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(conn)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return result
+
+    def join(self, ticket, pool, route, priority, limits):
+        self._sweep_dead_processes()
+
+        def join(conn):
+            (queued,) = conn.execute(
+                "SELECT COUNT(*) FROM admission WHERE pool = ? AND state = 'queued'", (pool,)
+            ).fetchone()
+            (ahead,) = conn.execute(
+                "SELECT COUNT(*) FROM admission WHERE pool = ? AND state = 'queued' AND priority >= ?",
+                (pool, priority),
+            ).fetchone()
+            if self._free(conn, pool, route, limits) > ahead:
+                state, outcome = "active", ADMITTED
+            elif queued >= limits[2]:
+                return FULL, ahead
+            else:
+                state, outcome = "queued", QUEUED
+            conn.execute(
+                "INSERT INTO admission (ticket, pool, route, priority, state, pid) VALUES (?, ?, ?, ?, ?, ?)",
+                (ticket, pool, route, priority, state, os.getpid()),
+            )
+            return outcome, 0 if outcome == ADMITTED else ahead
+
+        return self._transaction(join)
+
+    def poll(self, ticket, limits):
+        def poll(conn):
+            row = conn.execute(
+                "SELECT seq, pool, route, priority FROM admission WHERE ticket = ?", (ticket,)
+            ).fetchone()
+            if row is None:
+                raise KeyError(ticket)  # Swept as stale
+            seq, pool, route, priority = row
+            (ahead,) = conn.execute(
+                "SELECT COUNT(*) FROM admission WHERE pool = ? AND state = 'queued'"
+                " AND (priority > ? OR (priority = ? AND seq < ?))",
+                (pool, priority, priority, seq),
+            ).fetchone()
+            if self._free(conn, pool, route, limits) > ahead:
+                conn.execute("UPDATE admission SET state = 'active' WHERE ticket = ?", (ticket,))
+                return True, 0
+            return False, ahead
+
+        return self._transaction(poll)
+
+    def generation(self):
+        return self._generation
+
+    def wait(self, timeout, generation):
+        # Releases in other processes cannot notify us: re-check every poll interval
+        with self._cond:
+            if self._generation == generation:
+                self._cond.wait(min(timeout, self.poll_interval))
+
+    def leave(self, ticket):
+        self.release(ticket)
+
+    def release(self, ticket):
+        self._conn().execute("DELETE FROM admission WHERE ticket = ?", (ticket,))
+        with self._cond:
+            self._generation += 1
+            self._cond.notify_all()
+
+    def take_token(self, key, rate):
+        now = time.time()
+
+        def take(conn):
+            row = conn.execute("SELECT tokens, updated FROM rate_buckets WHERE key = ?", (key,)).fetchone()
+            tokens, wait = _refill(*(row or (rate.burst, now)), now, rate)
+            conn.execute(
+                "INSERT INTO rate_buckets (key, tokens, updated) VALUES (?, ?, ?)"
+                " ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                (key, tokens, now),
+            )
+            return wait
+
+        return self._transaction(take)
+
+    def snapshot(self):
+        pools = {}
+        for pool, state, n in self._conn().execute(
+            "SELECT pool, state, COUNT(*) FROM admission GROUP BY pool, state"
+        ):
+            pools.setdefault(pool, {"active": 0, "queued": 0})[state] = n
+        return pools
+
+    @staticmethod
+    def _free(conn, pool, route, limits):
+        """Slots a waiter may still take: pool limit minus running, within the route cap."""
+        (pool_active,) = conn.execute(
+            "SELECT COUNT(*) FROM admission WHERE pool = ? AND state = 'active'", (pool,)
+        ).fetchone()
+        (route_active,) = conn.execute(
+            "SELECT COUNT(*) FROM admission WHERE pool = ? AND route = ? AND state = 'active'", (pool, route)
+        ).fetchone()
+        if route_active >= limits[1]:
+            return 0
+        return limits[0] - pool_active
+
+    def _sweep_dead_processes(self):
+        """Drop slots and waiters of processes that died holding them, and idle buckets."""
+        now = time.time()
+        if now - self._last_sweep < STALE_CHECK_INTERVAL:
+            return
+        self._last_sweep = now
+        conn = self._conn()
+        dead = []
+        for (pid,) in conn.execute("SELECT DISTINCT pid FROM admission").fetchall():
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                dead.append(pid)
+            except PermissionError:
+                pass  # Alive, owned by another user
+        for pid in dead:
+            conn.execute("DELETE FROM admission WHERE pid = ?", (pid,))
+        conn.execute("DELETE FROM rate_buckets WHERE updated < ?", (now - 3600,))
+
+
+ADMISSION_STATES = {"memory": MemoryAdmissionState, "sqlite": SQLiteAdmissionState}
+
+
+# =========================
+# Controller
+# =========================
+
+class AdmissionController:
+    """Applies POOLS / ROUTES / RATES to a shared state."""
+
+    def __init__(self, state, pools=None, routes=None, rates=None):
+        self.state = state
+        self.pools = POOLS if pools is None else pools
+        self.routes = ROUTES if routes is None else routes
+        self.rates = RATES if rates is None else rates
+        self._service_time = {}  # pool -> moving average of seconds a slot is held (this process)
+
+    def acquire(self, route, priority=0):
+        """
+        Wait for a slot for `route`. Returns a Ticket to hand to release().
+        Raises AdmissionRejected when the queue is full, the estimated wait
+        exceeds the pool's max_wait, or the wait runs out.
+        """
+        pool_name, cap = self.routes[route]
+        pool = self.pools[pool_name]
+        limits = (pool.concurrency, pool.concurrency if cap is None else cap, pool.max_queue)
+        ticket = uuid.uuid4().hex
+        started = time.monotonic()
+        deadline = started + pool.max_wait
+
+        generation = self.state.generation()
+        outcome, ahead = self.state.join(ticket, pool_name, route, priority, limits)
+        if outcome == FULL:
+            self._reject(pool_name, route, "queue_full", self._estimate(pool_name, ahead, pool))
+        if outcome == QUEUED:
+            estimate = self._estimate(pool_name, ahead, pool)
+            if estimate > pool.max_wait:
+                # Would not start before the deadline anyway: say so now
+                self.state.leave(ticket)
+                self._reject(pool_name, route, "deadline", estimate)
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.state.leave(ticket)
+                    self._reject(pool_name, route, "timeout", self._estimate(pool_name, ahead, pool))
+                self.state.wait(remaining, generation)
+                generation = self.state.generation()
+                try:
+                    admitted, ahead = self.state.poll(ticket, limits)
+                except KeyError:
+                    self._reject(pool_name, route, "timeout", 1)
+                if admitted:
+                    break
+
+        now = time.monotonic()
+        observe("admission_wait_seconds", now - started, pool=pool_name)
+        count("admission_requests_total", pool=pool_name, route=route, outcome="admitted")
+        return Ticket(ticket, pool_name, route, now)
+
+    def release(self, ticket):
+        self.state.release(ticket.id)
+        held = time.monotonic() - ticket.admitted_at
+        previous = self._service_time.get(ticket.pool)
+        self._service_time[ticket.pool] = held if previous is None else 0.8 * previous + 0.2 * held
+
+    def check_rate(self, group, client):
+        """Take one token from `client`'s bucket for `group`; raises AdmissionRejected (429) if empty."""
+        rate = self.rates.get(group)
+        if rate is None or rate.per_second <= 0:
+            return
+        wait = self.state.take_token(f"{group}:{client}", rate)
+        if wait > 0:
+            count("admission_requests_total", pool=group, route="*", outcome="rate_limited")
+            raise AdmissionRejected("Too many requests; slow down.", "rate_limited", wait, status=429)
+
+    def stats(self):
+        snapshot = self.state.snapshot()
+        return {
+            name: {**snapshot.get(name, {"active": 0, "queued": 0}),
+                   "concurrency": pool.concurrency, "max_queue": pool.max_queue}
+            for name, pool in self.pools.items()
+        }
+
+    def _estimate(self, pool_name, ahead, pool):
+        """Seconds until a request with `ahead` waiters in front of it can start (0 if unknown)."""
+        service = self._service_time.get(pool_name)
+        if service is None:
+            return 0.0
+        return (ahead // pool.concurrency + 1) * service
+
+    def _reject(self, pool_name, route, reason, retry_after):
+        count("admission_requests_total", pool=pool_name, route=route, outcome=reason)
+        raise AdmissionRejected("Server is busy; try again later.", reason, retry_after)
+
+
+_controller = None
+_controller_lock = threading.Lock()
+
+
+def get_controller():
+    """Process-wide AdmissionController, or None when ADMISSION_CONTROL is off."""
+    global _controller
+    if not ADMISSION_CONTROL:
+        return None
+    with _controller_lock:
+        if _controller is None:
+            if ADMISSION_BACKEND not in ADMISSION_STATES:
+                raise ValueError(f"Unknown ADMISSION_BACKEND '{ADMISSION_BACKEND}'")
+            _controller = AdmissionController(ADMISSION_STATES[ADMISSION_BACKEND]())
+        return _controller
@@ -8,11 +8,42 @@ WHY THIS FILE EXISTS:
 - Makes auth easier to test, maintain and extend (refresh tokens, roles, etc.)
 
 This file should NOT know about Flask request/response objects.
+
+Password hashing:
+- PASSWORD_HASH_METHOD picks the Werkzeug method and cost, e.g.
+  "scrypt:32768:8:1" (n:r:p, the default) or "pbkdf2:sha256:1000000".
+  Dev / CI can lower it; production should keep or raise it.
+- At most PASSWORD_HASH_WORKERS hashes run at once (a BoundedSemaphore
+  around every hash / verify). They run on the calling request thread:
+  hashlib releases the GIL while hashing, so other request threads keep
+  running, and a login burst can't hold more than N scrypt buffers (each
+  ~32 MB at the default cost) at once; the others wait for a slot.
+- Rehash-on-login is the only work handed to a thread (a small background
+  pool), so the login response doesn't wait for the new hash.
+- Stored hashes record their own parameters, so old hashes keep
+  verifying after a change; login rehashes them with the current ones
+  (needs_rehash).
+
+Token verification (verify_token):
+- Successful verifications are memoized in a bounded LRU keyed by the
+  token's SHA-256 digest, so repeat requests with the same token cost a
+  dict lookup instead of an HMAC + JSON decode. Entries live for
+  TOKEN_CACHE_TTL seconds, never past the token's own `exp`.
+- Revoked tokens (logout) are kept as digests in a dict, checked in O(1)
+  before the cache. Entries drop out once the token would have expired.
+- The cache and revocation list are per process: with several server
+  processes a revocation only takes effect in the one that handled it.
 """
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash, check_password_hash
 import jwt
 import datetime
+import hashlib
 import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 
 # 🔐 ADDED: Load secret from enviroment for security
 # Fallback exists ONLY for local development
@@ -20,6 +51,78 @@ JWT_SECRET = os.getenv("JWT_SECRET", "dev-secret-key") # ⚠️ Change in produc
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRY_HOURS = 24 # Token validity duration
 
+# Password hashing cost and concurrency cap (see module docstring)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "0")) or min(4, os.cpu_count() or 1)
+PASSWORD_SALT_LENGTH = int(os.getenv("PASSWORD_SALT_LENGTH", "16"))
+
+
+def normalize_hash_method(method: str) -> str:
+    """
+    Expand a Werkzeug method to the fully parameterised form it stores in
+    hashes ("scrypt" -> "scrypt:32768:8:1"), so hashes can be compared
+    against the configured cost. Raises ValueError for unknown methods.
+    """
+    name, *args = method.strip().split(":")
+    if name == "scrypt":
+        if not args:
+            args = ["32768", "8", "1"]
+        if len(args) != 3:
+            raise ValueError("'scrypt' takes 3 arguments (n:r:p).")
+        n, r, p = map(int, args)
+        return f"scrypt:{n}:{r}:{p}"
+    if name == "pbkdf2":
+        if len(args) > 2:
+            raise ValueError("'pbkdf2' takes 2 arguments (hash:iterations).")
+        hash_name = args[0] if args else "sha256"
+        iterations = int(args[1]) if len(args) == 2 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{iterations}"
+    raise ValueError(f"Invalid hash method '{method}'.")
+
+
+PASSWORD_HASH_METHOD = normalize_hash_method(os.getenv("PASSWORD_HASH_METHOD", "scrypt"))
+
+_hash_slots = threading.BoundedSemaphore(PASSWORD_HASH_WORKERS)
+_hash_pool = None  # Background rehashes only
+_hash_pool_lock = threading.Lock()
+
+# Verified-token cache (see module docstring); size 0 disables it
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", "300"))
+
+
+class AuthError(Exception):
+    """A token was missing, malformed, expired or revoked (maps to HTTP 401)."""
+
+def configure_hashing(method=None, workers=None):
+    """Override the hashing method / concurrency cap (benchmarks, tests, tooling)."""
+    global PASSWORD_HASH_METHOD, PASSWORD_HASH_WORKERS, _hash_slots, _hash_pool
+    if method is not None:
+        PASSWORD_HASH_METHOD = normalize_hash_method(method)
+    if workers is not None:
+        with _hash_pool_lock:
+            PASSWORD_HASH_WORKERS = workers
+            _hash_slots = threading.BoundedSemaphore(workers)
+            if _hash_pool is not None:
+                _hash_pool.shutdown(wait=True)
+                _hash_pool = None
+
+
+def _get_hash_pool():
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is None:
+            _hash_pool = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+        return _hash_pool
+
+
+@contextmanager
+def hash_slot():
+    """Hold one of the PASSWORD_HASH_WORKERS hashing slots (blocks while all are taken)."""
+    slots = _hash_slots  # configure_hashing may swap the semaphore meanwhile
+    with slots:
+        yield
+
+
 # 🔹 ADDED: Password Hashing Helper
 def hash_password(password: str) -> str:
     """
@@ -28,8 +131,16 @@ def hash_password(password: str) -> str:
     WHY:
     - Passwords must Never be stored in plain text
     - Werzeug uses a secure, salted hashing algorithm
+    - Cost comes from PASSWORD_HASH_METHOD; runs on this thread once a
+      hashing slot is free
     """
-    return generate_password_hash(password)
+    with hash_slot():
+        return generate_password_hash(password, PASSWORD_HASH_METHOD, PASSWORD_SALT_LENGTH)
+
+
+def hash_password_async(password: str):
+    """hash_password on the background pool: returns a Future of the new hash (used for rehash-on-login)."""
+    return _get_hash_pool().submit(hash_password, password)
 
 # 🔹 ADDED: Password Verification Helper
 def verify_password(password: str, hashed: str) -> bool:
@@ -39,8 +150,30 @@ def verify_password(password: str, hashed: str) -> bool:
     WHY:
     - Prevents timing attacks
     - Ensures user authentication logic stays consistent
+    - Uses the parameters stored in `hashed`, so older hashes still verify
+    """
+    with hash_slot():
+        return check_password_hash(hashed, password)
+
+
+def needs_rehash(hashed: str) -> bool:
+    """True when `hashed` was made with different parameters than PASSWORD_HASH_METHOD."""
+    return hashed.split("$", 1)[0] != PASSWORD_HASH_METHOD
+
+
+_dummy_hashes = {}
+
+
+def verify_dummy_password(password: str) -> bool:
     """
-    return check_password_hash(hashed, password)
+    Spend the same time as a real verification and return False. Used when
+    no account matches, so response time doesn't reveal which emails exist.
+    """
+    dummy = _dummy_hashes.get(PASSWORD_HASH_METHOD)
+    if dummy is None:
+        dummy = _dummy_hashes[PASSWORD_HASH_METHOD] = hash_password(os.urandom(16).hex())
+    verify_password(password, dummy)
+    return False
 
 # 🔹 ADDED: JWT Generation Helper
 def generate_token(user_id: str) -> str:
@@ -70,4 +203,123 @@ def decode_token(token: str):
     - Centralizes token handling logic
     - Makes it reusable for Middleware / Decorators later
     """
-    return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
\ No newline at end of file
+    return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+
+# =========================
+# Verification cache + revocation
+# =========================
+
+def token_digest(token: str) -> str:
+    """Cache / revocation key: the raw token never sits in memory maps."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class TokenCache:
+    """Thread-safe LRU of verified token payloads with per-entry expiry."""
+
+    def __init__(self, max_entries=TOKEN_CACHE_SIZE, ttl_seconds=TOKEN_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # digest -> (expires_at, payload)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, digest, now=None):
+        if self.max_entries <= 0:
+            return None
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[digest]
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(digest)
+            self._stats["hits"] += 1
+            return entry[1]
+
+    def set(self, digest, payload, now=None):
+        if self.max_entries <= 0:
+            return
+        now = time.time() if now is None else now
+        # Never trust a cached verification past the token's own expiry
+        expires_at = min(now + self.ttl_seconds, payload.get("exp", now))
+        with self._lock:
+            self._entries[digest] = (expires_at, payload)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def discard(self, digest):
+        with self._lock:
+            self._entries.pop(digest, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, "size": len(self._entries), "max_entries": self.max_entries}
+
+
+# Process-wide cache of verified tokens and revoked token digests (digest -> exp)
+token_cache = TokenCache()
+_revoked = {}
+_revoked_lock = threading.Lock()
+
+
+def revoke_token(token: str, expires_at=None):
+    """
+    Revoke a token (e.g. on logout). `expires_at` (epoch seconds) bounds how
+    long the revocation is kept; defaults to the token's `exp` claim.
+    """
+    if expires_at is None:
+        try:
+            expires_at = jwt.decode(token, options={"verify_signature": False}).get("exp")
+        except jwt.InvalidTokenError:
+            expires_at = None
+    now = time.time()
+    if expires_at is None:
+        expires_at = now + JWT_EXPIRY_HOURS * 3600
+
+    digest = token_digest(token)
+    with _revoked_lock:
+        # Forget revocations of tokens that have expired anyway
+        for key in [k for k, exp in _revoked.items() if exp <= now]:
+            del _revoked[key]
+        _revoked[digest] = expires_at
+    token_cache.discard(digest)
+
+
+def is_revoked(digest: str) -> bool:
+    return digest in _revoked
+
+
+def verify_token(token: str) -> dict:
+    """
+    Verify a JWT and return its payload, using the verification cache.
+    Raises AuthError (never a jwt exception) when the token is unusable.
+    """
+    digest = token_digest(token)
+    if is_revoked(digest):
+        raise AuthError("Token has been revoked")
+
+    payload = token_cache.get(digest)
+    if payload is not None:
+        return payload
+
+    try:
+        payload = decode_token(token)
+    except jwt.ExpiredSignatureError:
+        raise AuthError("Token has expired")
+    except jwt.InvalidTokenError:
+        raise AuthError("Invalid token")
+
+    if not payload.get("user_id"):
+        raise AuthError("Invalid token")
+
+    token_cache.set(digest, payload)
+    return payload
@@ -0,0 +1,274 @@
+# backend/app/services/blob_store.py
+"""
+Blob Store
+----------
+WHY THIS FILE EXISTS:
+- Outfits and palettes store an `image_url`, but uploads were decoded in
+  memory and thrown away, so the frontend had nothing cheap to display.
+- Uploads are kept on local disk, content-addressed by the SHA-256 of their
+  bytes: the same photo uploaded twice is written once, and a blob never
+  changes, so it can be cached forever (strong ETag = the digest).
+- Thumbnails at a few fixed sizes are encoded from the image the palette
+  pipeline already decoded (see image_pipeline), so storing an upload costs
+  no extra decode.
+
+Layout (two levels of hash-prefix shards keep directories small):
+    <BLOB_DIR>/ab/cd/abcd...ef            the upload, byte for byte
+    <BLOB_DIR>/ab/cd/abcd...ef.256.jpg    thumbnail, longest side <= 256 px
+
+Writes go to a temp file in the shard and are renamed into place, so readers
+never see a partial blob; thumbnails are written before the original, so an
+original on disk implies its thumbnails exist (missing sizes, e.g. after
+BLOB_THUMBNAIL_SIZES changes, are rebuilt from the original on request).
+
+Garbage collection (`flask data gc-blobs`) removes blobs that no outfit or
+palette `image_url` references, once they are older than BLOB_GC_GRACE
+(uploads are stored before the client saves the outfit that points at them).
+Re-uploading an existing blob refreshes its mtime for the same reason.
+
+Configuration (environment):
+- BLOB_STORE             "1" (default) keeps uploads; "0" disables storing
+- BLOB_DIR               root directory (default data/blobs)
+- BLOB_THUMBNAIL_SIZES   comma-separated longest-side sizes (default 128,256,512)
+- BLOB_THUMBNAIL_QUALITY JPEG quality for thumbnails (default 85)
+- BLOB_GC_GRACE          seconds an unreferenced blob is kept (default 86400)
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+import time
+
+from app.services.metrics import count, storage_op
+from app.utils.image_headers import sniff_format
+
+BLOB_STORE_ENABLED = os.getenv("BLOB_STORE", "1").strip().lower() not in ("0", "false", "no")
+BLOB_DIR = os.getenv("BLOB_DIR", os.path.join(os.path.dirname(__file__), "../../data/blobs"))
+THUMBNAIL_SIZES = tuple(sorted(int(size) for size in os.getenv("BLOB_THUMBNAIL_SIZES", "128,256,512").split(",") if size.strip()))
+THUMBNAIL_QUALITY = int(os.getenv("BLOB_THUMBNAIL_QUALITY", "85"))
+GC_GRACE = float(os.getenv("BLOB_GC_GRACE", str(24 * 3600)))
+
+# A blob id is the hex SHA-256 of its bytes
+DIGEST_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+# Blob ids inside stored image URLs (absolute or relative, original or thumbnail)
+URL_DIGEST_PATTERN = re.compile(r"/api/blobs/([0-9a-f]{64})")
+
+MIMETYPES = {"jpeg": "image/jpeg", "png": "image/png"}
+
+
+def digest_of(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def is_digest(value):
+    return isinstance(value, str) and DIGEST_PATTERN.match(value) is not None
+
+
+def referenced_digests(urls):
+    """Blob ids referenced by an iterable of image URLs (non-blob URLs are ignored)."""
+    found = set()
+    for url in urls:
+        if isinstance(url, str):
+            found.update(URL_DIGEST_PATTERN.findall(url))
+    return found
+
+
+def make_thumbnails(image, sizes=THUMBNAIL_SIZES, quality=THUMBNAIL_QUALITY):
+    """
+    JPEG thumbnails of a decoded BGR image: {size: bytes}, each scaled so its
+    longest side is at most `size`. Never upscales, so an image decoded
+    smaller than a size (e.g. at reduced scale) is encoded as it is.
+    Largest size first, each resized from the previous one, so only the
+    first resize reads the full image.
+    """
+    import cv2  # Deferred: serving blobs must not pull in the image stack
+
+    height, width = image.shape[:2]
+    thumbnails = {}
+    thumb = image
+    for size in sorted(sizes, reverse=True):
+        scale = min(1.0, size / max(height, width))
+        target = (max(1, round(width * scale)), max(1, round(height * scale)))
+        if target != (thumb.shape[1], thumb.shape[0]):
+            thumb = cv2.resize(thumb, target, interpolation=cv2.INTER_AREA)
+        ok, buffer = cv2.imencode(".jpg", thumb, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if not ok:
+            raise ValueError("Failed to encode thumbnail")
+        thumbnails[size] = buffer.tobytes()
+    return thumbnails
+
+
+class BlobStore:
+    """Write-once, content-addressed files under `root`, with derived thumbnails."""
+
+    def __init__(self, root, thumbnail_sizes=THUMBNAIL_SIZES, thumbnail_quality=THUMBNAIL_QUALITY):
+        self.root = root
+        self.thumbnail_sizes = tuple(thumbnail_sizes)
+        self.thumbnail_quality = thumbnail_quality
+
+    def path(self, digest, size=None):
+        """Path of a blob, or of its `size` thumbnail."""
+        name = digest if size is None else f"{digest}.{size}.jpg"
+        return os.path.join(self.root, digest[:2], digest[2:4], name)
+
+    def exists(self, digest):
+        return os.path.isfile(self.path(digest))
+
+    def mimetype(self, digest):
+        """Content type sniffed from the blob's first bytes (uploads are validated JPEG / PNG)."""
+        with open(self.path(digest), "rb") as f:
+            return MIMETYPES.get(sniff_format(f.read(8)), "application/octet-stream")
+
+    def _write(self, path, data):
+        """Write `data` to `path` atomically (temp file in the same directory + rename)."""
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+    def put(self, data, image=None):
+        """
+        Store upload bytes once; returns their digest. `image` is the already
+        decoded BGR image, used for the thumbnails (skipped when None).
+        """
+        digest = digest_of(data)
+        path = self.path(digest)
+        with storage_op("blobs", "put"):
+            if os.path.isfile(path):
+                try:
+                    # Written before: keep GC's grace period counting from this upload
+                    os.utime(path)
+                    count("blobs_total", outcome="existing")
+                    return digest
+                except FileNotFoundError:
+                    pass  # Collected since the check above: write it again
+            if image is not None:
+                for size, thumbnail in make_thumbnails(image, self.thumbnail_sizes, self.thumbnail_quality).items():
+                    self._write(self.path(digest, size), thumbnail)
+            self._write(path, data)
+        count("blobs_total", outcome="written")
+        return digest
+
+    def thumbnail(self, digest, size):
+        """
+        Path of the `size` thumbnail, rebuilt from the original when missing.
+        None when `size` is not configured or the blob does not exist.
+        """
+        if size not in self.thumbnail_sizes:
+            return None
+        path = self.path(digest, size)
+        if os.path.isfile(path):
+            return path
+        if not self.exists(digest):
+            return None
+
+        from app.utils.image_utils import decode_image
+
+        with open(self.path(digest), "rb") as f:
+            image = decode_image(f.read())
+        if image is None:
+            return None
+        self._write(path, make_thumbnails(image, (size,), self.thumbnail_quality)[size])
+        count("blobs_total", outcome="thumbnail_rebuilt")
+        return path
+
+    def iter_blobs(self):
+        """Yield (digest, path) for every original blob on disk."""
+        if not os.path.isdir(self.root):
+            return
+        for top in sorted(os.listdir(self.root)):
+            top_path = os.path.join(self.root, top)
+            if len(top) != 2 or not os.path.isdir(top_path):
+                continue
+            for shard in sorted(os.listdir(top_path)):
+                shard_path = os.path.join(top_path, shard)
+                if not os.path.isdir(shard_path):
+                    continue
+                for name in sorted(os.listdir(shard_path)):
+                    if DIGEST_PATTERN.match(name):
+                        yield name, os.path.join(shard_path, name)
+
+    def remove(self, digest, uploaded_before=None):
+        """
+        Delete a blob and its thumbnails; returns the bytes freed. With
+        `uploaded_before` (a timestamp), a blob whose mtime is not older is
+        kept and None is returned: the check sits right before the unlink,
+        so a re-upload that refreshed it after GC looked is not lost.
+        """
+        path = self.path(digest)
+        try:
+            if uploaded_before is not None and os.path.getmtime(path) >= uploaded_before:
+                return None
+            freed = os.path.getsize(path)
+            os.unlink(path)
+        except FileNotFoundError:
+            freed = 0
+        # Original first, so an original on disk still implies its thumbnails
+        shard = os.path.dirname(path)
+        for name in os.listdir(shard):
+            if name.startswith(digest + "."):
+                path = os.path.join(shard, name)
+                try:
+                    freed += os.path.getsize(path)
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+        return freed
+
+    def collect_garbage(self, referenced, grace=GC_GRACE, dry_run=False, now=None):
+        """
+        Remove blobs (with their thumbnails) whose digest is not in
+        `referenced` and which were last uploaded more than `grace` seconds
+        ago. Returns {"scanned", "referenced", "recent", "removed", "bytes_freed"}.
+        """
+        now = time.time() if now is None else now
+        stats = {"scanned": 0, "referenced": 0, "recent": 0, "removed": 0, "bytes_freed": 0}
+        for digest, path in self.iter_blobs():
+            stats["scanned"] += 1
+            if digest in referenced:
+                stats["referenced"] += 1
+                continue
+            try:
+                if now - os.path.getmtime(path) < grace:
+                    stats["recent"] += 1
+                    continue
+            except FileNotFoundError:
+                continue
+            if not dry_run:
+                freed = self.remove(digest, uploaded_before=now - grace)
+                if freed is None:
+                    stats["recent"] += 1
+                    continue
+                stats["bytes_freed"] += freed
+            stats["removed"] += 1
+        if not dry_run:
+            count("blobs_total", amount=stats["removed"], outcome="collected")
+        return stats
+
+
+def referenced_by_records():
+    """Blob ids referenced by any stored outfit or palette image_url."""
+    from app.services import outfit_service, palette_service
+
+    urls = (record.get("image_url") for record in outfit_service.iter_outfits())
+    digests = referenced_digests(urls)
+    digests |= referenced_digests(record.get("image_url") for record in palette_service.iter_palettes())
+    return digests
+
+
+def collect_garbage(grace=GC_GRACE, dry_run=False):
+    """Garbage-collect the process-wide store against every stored outfit and palette."""
+    return blob_store.collect_garbage(referenced_by_records(), grace=grace, dry_run=dry_run)
+
+
+# Process-wide instance used by the image pipeline and the blob routes
+blob_store = BlobStore(BLOB_DIR)
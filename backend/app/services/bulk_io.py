@@ -0,0 +1,310 @@
+# backend/app/services/bulk_io.py
+"""
+Bulk Export / Import (NDJSON)
+-----------------------------
+WHY THIS FILE EXISTS:
+- Moving data between the JSON fallback files and MongoDB meant loading
+  everything with `json.load`, and there was no bulk API at all.
+- Export streams one JSON object per line straight off the storage cursor
+  (Mongo cursor, SQLite fetchmany, JSON-lines log), so memory is constant
+  whatever the collection size.
+- Import parses the input incrementally, validates each record and writes
+  in batches through outfit_service.import_outfits /
+  palette_service.import_palettes. Memory is bounded by one batch plus one
+  record, so multi-GB files are fine.
+
+Input formats (detected from the first non-blank byte):
+- NDJSON: one object per line (what export writes, oldest first)
+- a legacy `[ {...}, ... ]` array such as data/outfits.json, decoded one
+  element at a time with json.JSONDecoder.raw_decode over a rolling buffer
+
+Imports are upserts by id: records without an id get a fresh one, so
+re-importing an export is idempotent but re-importing a legacy array is not.
+Invalid records are skipped and counted; the first few are reported with
+their line (NDJSON) or element (array) number.
+
+Configuration (environment):
+- BULK_IMPORT_BATCH        records per write (default 1000)
+- BULK_MAX_RECORD_BYTES    largest single record accepted (default 1 MiB)
+- BULK_EXPORT_CHUNK        records per streamed chunk on export (default 500)
+"""
+
+import codecs
+import json
+import os
+import time
+import uuid
+from datetime import datetime
+
+from . import outfit_service, palette_service
+from .metrics import count
+from .near_duplicates import parse_hash
+
+KINDS = ("outfits", "palettes")
+
+IMPORT_BATCH = int(os.getenv("BULK_IMPORT_BATCH", "1000"))
+MAX_RECORD_BYTES = int(os.getenv("BULK_MAX_RECORD_BYTES", str(1024 * 1024)))
+EXPORT_CHUNK = int(os.getenv("BULK_EXPORT_CHUNK", "500"))
+READ_CHUNK = 64 * 1024
+MAX_REPORTED_ERRORS = 20
+
+
+# =========================
+# Export
+# =========================
+
+def export_records(kind):
+    """Every record of `kind`, oldest first, streamed from storage."""
+    if kind == "outfits":
+        return outfit_service.iter_outfits()
+    if kind == "palettes":
+        return palette_service.iter_palettes()
+    raise ValueError(f"Unknown kind '{kind}'. Use one of: {', '.join(KINDS)}")
+
+
+def export_ndjson(kind, chunk_records=None):
+    """
+    Yield NDJSON text for every record of `kind`, a few hundred lines per
+    chunk (one chunk per write keeps per-line overhead off large exports).
+    """
+    chunk_records = chunk_records or EXPORT_CHUNK
+    lines, exported = [], 0
+    for record in export_records(kind):
+        record.pop("_id", None)
+        lines.append(json.dumps(record, separators=(",", ":"), default=str))
+        if len(lines) >= chunk_records:
+            exported += len(lines)
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        exported += len(lines)
+        yield "\n".join(lines) + "\n"
+    count("bulk_records_total", exported, kind=kind, direction="export")
+
+
+# =========================
+# Incremental parsing
+# =========================
+
+class _CountingReader:
+    """Wraps a binary stream and counts the bytes read from it."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.bytes_read = 0
+
+    def read(self, size):
+        data = self.stream.read(size)
+        self.bytes_read += len(data)
+        return data
+
+
+def iter_json_records(stream, max_record_bytes=None):
+    """
+    Parse NDJSON or a JSON array from a binary stream, one record at a time.
+    Yields (position, record, error): `record` is a dict when `error` is None.
+    Position is the 1-based line number (NDJSON) or element number (array).
+    """
+    max_record_bytes = max_record_bytes or MAX_RECORD_BYTES
+    head = stream.read(READ_CHUNK)
+    stripped = head.lstrip(codecs.BOM_UTF8).lstrip()
+    while not stripped and head:
+        head = stream.read(READ_CHUNK)
+        stripped = head.lstrip()
+    if stripped.startswith(b"["):
+        return _iter_array(stream, stripped[1:], max_record_bytes)
+    return _iter_lines(stream, head.lstrip(codecs.BOM_UTF8), max_record_bytes)
+
+
+def _as_record(value):
+    if not isinstance(value, dict):
+        return None, "not a JSON object"
+    return value, None
+
+
+def _iter_lines(stream, buffer, max_record_bytes):
+    line_no = 0
+    skipping = False  # Inside an oversized line: drop bytes until its newline
+    eof = False
+    while True:
+        newline = buffer.find(b"\n")
+        if newline < 0:
+            if not eof:
+                if len(buffer) > max_record_bytes:
+                    if not skipping:
+                        yield line_no + 1, None, f"record larger than {max_record_bytes} bytes"
+                    skipping, buffer = True, b""
+                chunk = stream.read(READ_CHUNK)
+                eof = not chunk
+                buffer += chunk
+                continue
+            if not buffer:
+                return
+            newline = len(buffer)  # Last line without a trailing newline
+
+        line, buffer = buffer[:newline], buffer[newline + 1:]
+        line_no += 1
+        if skipping:
+            skipping = False
+            continue
+        if not line.strip():
+            continue
+        try:
+            record, error = _as_record(json.loads(line))
+        except ValueError as e:
+            record, error = None, f"invalid JSON: {e}"
+        yield line_no, record, error
+
+
+def _iter_array(stream, head, max_record_bytes):
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer, pos, element = text_decoder.decode(head), 0, 0
+    eof = False
+    while True:
+        # Skip separators between elements
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+        if pos < len(buffer) and buffer[pos] == "]":
+            return
+        if pos < len(buffer):
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except ValueError as e:
+                value, end, error = None, None, e
+        else:
+            value, end, error = None, None, None
+
+        if end is not None:
+            element += 1
+            yield (element, *_as_record(value))
+            pos = end
+            continue
+
+        # Incomplete (or broken) element: read more unless it is already too big
+        if eof:
+            if error is not None:
+                yield element + 1, None, f"invalid JSON: {error}"
+            else:
+                yield element + 1, None, "unterminated JSON array"
+            return
+        if len(buffer) - pos > max_record_bytes:
+            yield element + 1, None, f"record larger than {max_record_bytes} bytes; stopping"
+            return
+        chunk = stream.read(READ_CHUNK)
+        eof = not chunk
+        buffer = buffer[pos:] + text_decoder.decode(chunk, final=eof)
+        pos = 0
+
+
+# =========================
+# Validation
+# =========================
+
+def _is_str_list(value):
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+
+def _normalize_common(record):
+    record = {key: value for key, value in record.items() if key != "_id"}
+    if "id" in record and not isinstance(record["id"], str):
+        record["id"] = str(record["id"])
+    if not record.get("id"):
+        record["id"] = uuid.uuid4().hex
+    if not record.get("timestamp"):
+        record["timestamp"] = datetime.utcnow().isoformat()
+    elif not isinstance(record["timestamp"], str):
+        raise ValueError("timestamp must be an ISO8601 string")
+    return record
+
+
+def validate_outfit(record):
+    """Normalised outfit record, or ValueError explaining what is wrong."""
+    if not isinstance(record.get("image_url"), str) or not record["image_url"]:
+        raise ValueError("missing image_url")
+    if not _is_str_list(record.get("colours")) or not record["colours"]:
+        raise ValueError("colours must be a non-empty list of strings")
+    if not _is_str_list(record.get("tags", [])):
+        raise ValueError("tags must be a list of strings")
+    if record.get("image_hash") is not None:
+        parse_hash(record["image_hash"])
+    record = _normalize_common(record)
+    record.setdefault("theme", None)
+    record.setdefault("caption", "")
+    record.setdefault("tags", [])
+    return record
+
+
+def validate_palette(record):
+    """Normalised palette record, or ValueError explaining what is wrong."""
+    if not _is_str_list(record.get("colours")) or not record["colours"]:
+        raise ValueError("colours must be a non-empty list of strings")
+    record = _normalize_common(record)
+    record.setdefault("image_url", None)
+    record.setdefault("theme", None)
+    return record
+
+
+VALIDATORS = {"outfits": validate_outfit, "palettes": validate_palette}
+WRITERS = {"outfits": outfit_service.import_outfits, "palettes": palette_service.import_palettes}
+
+
+# =========================
+# Import
+# =========================
+
+def import_stream(kind, stream, batch_size=None, progress=None):
+    """
+    Import NDJSON / JSON-array records of `kind` from a binary stream.
+
+    - Records are validated one by one and written every `batch_size`.
+    - `progress(stats)` is called after each batch with the running stats.
+    - Returns the final stats:
+      {"kind", "read", "imported", "invalid", "batches", "bytes",
+       "elapsed_s", "records_per_s", "mb_per_s", "errors": [{"position", "error"}]}
+    """
+    if kind not in VALIDATORS:
+        raise ValueError(f"Unknown kind '{kind}'. Use one of: {', '.join(KINDS)}")
+    validate, write = VALIDATORS[kind], WRITERS[kind]
+    batch_size = batch_size or IMPORT_BATCH
+    reader = _CountingReader(stream)
+    started = time.perf_counter()
+    stats = {"kind": kind, "read": 0, "imported": 0, "invalid": 0, "batches": 0, "errors": []}
+
+    def snapshot():
+        elapsed = time.perf_counter() - started
+        stats["bytes"] = reader.bytes_read
+        stats["elapsed_s"] = round(elapsed, 3)
+        stats["records_per_s"] = round(stats["imported"] / elapsed, 1) if elapsed else 0.0
+        stats["mb_per_s"] = round(reader.bytes_read / 2 ** 20 / elapsed, 2) if elapsed else 0.0
+        return stats
+
+    def flush(batch):
+        stats["imported"] += write(batch)
+        stats["batches"] += 1
+        if progress:
+            progress(dict(snapshot()))
+
+    batch = []
+    for position, record, error in iter_json_records(reader):
+        stats["read"] += 1
+        if error is None:
+            try:
+                batch.append(validate(record))
+            except ValueError as e:
+                error = str(e)
+        if error is not None:
+            stats["invalid"] += 1
+            if len(stats["errors"]) < MAX_REPORTED_ERRORS:
+                stats["errors"].append({"position": position, "error": error})
+            continue
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+
+    count("bulk_records_total", stats["imported"], kind=kind, direction="import")
+    if stats["invalid"]:
+        count("bulk_invalid_records_total", stats["invalid"], kind=kind)
+    return snapshot()
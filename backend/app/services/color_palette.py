@@ -1,33 +1,51 @@
 import cv2
 import numpy as np
-from sklearn.cluster import KMeans
+from app.services.palette_engines import DEFAULT_SEED, get_engine
+from app.utils.image_utils import stratified_sample
 
 # Helper: Convert BGR colour to HEX format (e.g., (255, 0, 0) -> '#FF0000')
 def bgr_to_hex(bgr):
     b, g, r = int(bgr[0]), int(bgr[1]), int(bgr[2])
     return '#{:02x}{:02x}{:02x}'.format(r,g,b)
 
-# Extract the top 'k' dominant colours from an image and return them as HEX codes
-def extract_palette(image_path, k=5):
-    # Load the image from disk using OpenCV (in BGR format by default)
-    image = cv2.imread(image_path)
-
-    # Make sure the image was loaded successfully
-    if image is None:
+# Extract the top 'k' dominant colours from an in-memory BGR image (as returned by
+# cv2.imread / cv2.imdecode) and return them as HEX codes. No disk access happens here.
+# `engine` picks the clustering backend (see palette_engines) and `seed` makes it reproducible.
+# `max_pixels` caps how many pixels are clustered (stratified grid sample; None/0 = all of them).
+# `mask` (bool array, same height/width) clusters only the pixels it selects, e.g. garment pixels.
+def extract_palette_from_array(image, k=5, engine=None, seed=None, max_pixels=None, mask=None):
+    # Make sure we were handed a real, non-empty image
+    if image is None or image.size == 0:
         raise ValueError("Could not load image.")
 
     # Convert the image to RGB colour space for accurate colour analysis
     image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
 
-    # Flatten the image array to a 2D array of pixels (each pixel is [R, G, B])
-    image = image.reshape((-1, 3))
+    seed = DEFAULT_SEED if seed is None else seed
+
+    # Flatten the image array to a 2D array of pixels (each pixel is [R, G, B]),
+    # keeping an evenly spread subset when the crop is larger than max_pixels
+    image = stratified_sample(image, max_pixels, seed, mask=mask)
+    if mask is not None and len(image) < k:
+        raise ValueError("Mask selects too few pixels to extract a palette.")
 
-    # Apply K-Means clusttering to find the top 'k' dominant colours
-    kmeans = KMeans(n_clusters=k)
-    kmeans.fit(image)
+    # Cluster the pixels with the selected engine to find the top 'k' dominant colours
+    cluster = get_engine(engine)
+    dominant_colours = cluster(image, k, seed)
 
     # Convert the cluster centers (RGB colours) to HEX format
-    dominant_colours = kmeans.cluster_centers_
     hex_colours = [bgr_to_hex(colour) for colour in dominant_colours]
 
-    return hex_colours
\ No newline at end of file
+    return hex_colours
+
+# Extract the top 'k' dominant colours from an image on disk and return them as HEX codes.
+# Thin wrapper kept for callers that still work with file paths.
+def extract_palette(image_path, k=5, engine=None, seed=None, mask=None):
+    # Load the image from disk using OpenCV (in BGR format by default)
+    image = cv2.imread(image_path)
+
+    # Make sure the image was loaded successfully
+    if image is None:
+        raise ValueError("Could not load image.")
+
+    return extract_palette_from_array(image, k=k, engine=engine, seed=seed, mask=mask)
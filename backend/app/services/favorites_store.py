@@ -0,0 +1,121 @@
+# backend/app/services/favorites_store.py
+"""
+Favorites Index and Page Cache
+------------------------------
+WHY THIS FILE EXISTS:
+- Favorites used to be one `$addToSet` array per user document: unbounded
+  growth toward the 16 MB document limit, and every read returned the whole
+  array of bare ids, which the client then fetched one by one.
+- Favorites are now one small record per (user, outfit), ordered by when
+  they were added, so a page is a keyset range scan whatever the total.
+  outfit_service hydrates each page with a single batched lookup.
+
+This module holds the two in-memory pieces:
+- FavoritesIndex: per-user (added_at, outfit_id) lists for the JSON fallback
+  (the Mongo equivalent is the (user_id, added_at, outfit_id) index).
+- FavoritesCache: optional per-user cache of hydrated pages, dropped for a
+  user whenever that user saves a favorite in this process.
+"""
+
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict
+
+
+def favorite_id(user_id, outfit_id):
+    """Record id of one favorite (unique per user and outfit)."""
+    return f"{user_id}:{outfit_id}"
+
+
+class FavoritesIndex:
+    """Per-user favorites in (added_at, outfit_id) order, maintained incrementally."""
+
+    def __init__(self):
+        self._by_user = {}  # user_id -> sorted list of (added_at, outfit_id)
+        self._lock = threading.Lock()
+
+    def add(self, record):
+        key = (record.get("added_at") or "", record["outfit_id"])
+        with self._lock:
+            entries = self._by_user.setdefault(record["user_id"], [])
+            position = bisect_left(entries, key)
+            if position < len(entries) and entries[position] == key:
+                return
+            insort(entries, key)
+
+    def add_many(self, records):
+        for record in records:
+            self.add(record)
+
+    def clear(self):
+        with self._lock:
+            self._by_user.clear()
+
+    def count(self, user_id):
+        with self._lock:
+            return len(self._by_user.get(user_id, ()))
+
+    def page(self, user_id, limit, cursor=None):
+        """
+        Newest-first (added_at, outfit_id) pairs for `user_id`, strictly
+        after `cursor` ((added_at, outfit_id)) when given. O(log n + limit).
+        """
+        with self._lock:
+            entries = self._by_user.get(user_id, [])
+            end = bisect_left(entries, tuple(cursor)) if cursor else len(entries)
+            return entries[max(end - limit, 0):end][::-1]
+
+
+class FavoritesCache:
+    """
+    Thread-safe LRU of hydrated favorites pages, grouped by user.
+
+    WHY:
+    - Opening favorites repeats the same first-page query and hydration.
+    - Saving a favorite drops that user's pages here; writes from other
+      processes are picked up once `ttl` seconds have passed.
+    """
+
+    def __init__(self, max_users=1024, ttl=10.0, clock=time.monotonic):
+        self.max_users = max_users
+        self.ttl = ttl
+        self._clock = clock
+        self._users = OrderedDict()  # user_id -> {(limit, cursor): (expires_at, page)}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, user_id, key):
+        if self.max_users <= 0:
+            return None
+        with self._lock:
+            pages = self._users.get(user_id)
+            entry = pages.get(key) if pages else None
+            if entry is None or entry[0] <= self._clock():
+                self._stats["misses"] += 1
+                return None
+            self._users.move_to_end(user_id)
+            self._stats["hits"] += 1
+            return entry[1]
+
+    def set(self, user_id, key, page):
+        if self.max_users <= 0:
+            return
+        with self._lock:
+            self._users.setdefault(user_id, {})[key] = (self._clock() + self.ttl, page)
+            self._users.move_to_end(user_id)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            if self._users.pop(user_id, None) is not None:
+                self._stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, "users": len(self._users), "max_users": self.max_users}
@@ -0,0 +1,352 @@
+# backend/app/services/image_pipeline.py
+"""
+Image Pipeline
+--------------
+WHY THIS FILE EXISTS:
+- The single upload route, the batch endpoint and background workers must
+  produce identical palettes, so they all call the same function here.
+- Functions are plain module-level callables so they can be pickled and
+  run inside worker processes.
+
+Pipeline: raw bytes → header sniff → decode (in memory, reduced scale
+when the crop allows) → crop_center → cache lookup → near-duplicate lookup
+→ (garment mask) → stratified sample + extract_palette_from_array → cache
+store (→ match_theme for jobs). The hashed / batch / job paths also keep the
+upload in the blob store, with thumbnails encoded from the same decoded image.
+
+Near-duplicates (see app.services.near_duplicates): every decoded upload
+gets a perceptual hash, returned to clients as "image_hash". When the exact
+cache misses, a resized / recompressed / slightly cropped copy of an image
+already processed with the same settings reuses that image's palette, but
+only if its colour layout also matches (dHash is greyscale, so a red and a
+navy shirt shot the same way share a hash). The layout is taken over the
+whole frame, like the hash: a pixel crop of a resized copy covers a
+different part of the photo, so crop colours would not line up.
+
+Blob store (see app.services.blob_store): the upload bytes are stored once
+under their SHA-256, returned to clients as "image_id". Thumbnails come from
+the image decoded for the palette, so a reduced-scale decode bounds their
+resolution (thumbnails are never upscaled).
+
+Preprocessing (env):
+- PALETTE_CROP              crop geometry: "200x200" = pixels of the original
+                            photo (default), "0.5" / "0.5x0.4" = fraction of
+                            the image width x height
+- PALETTE_REDUCED_DECODE    decode JPEGs at 1/2, 1/4 or 1/8 scale when the
+                            crop still keeps PALETTE_MIN_CROP_SIDE pixels per
+                            side (default on; 0 = always decode full size)
+- PALETTE_MIN_CROP_SIDE     smallest crop side accepted after reduction (100)
+- PALETTE_MAX_PIXELS        cap on pixels sent to clustering (10000; 0 = all)
+
+A 12 MP JPEG never materialises its ~36 MB full-resolution bitmap; the
+reduced crop covers the same region of the photo, so palettes drift only
+slightly (see benchmarks/bench_preprocess.py).
+
+Region modes (?region= / PALETTE_REGION, see app.services.segmentation):
+- center    the crop above (default)
+- garment   segment the whole frame and cluster only clothing pixels; the
+            frame is decoded with at least PALETTE_GARMENT_MIN_SIDE (256)
+            pixels on its shorter side. Falls back to the centre crop when
+            segmentation is unavailable or finds too little clothing.
+"""
+
+import logging
+import os
+
+from app.services.blob_store import BLOB_STORE_ENABLED, blob_store
+from app.services.color_palette import extract_palette_from_array
+from app.services.colour_index import rgb_to_lab
+from app.services.metrics import count, span
+from app.services.near_duplicates import format_hash, near_duplicate_palettes
+from app.services.palette_cache import make_cache_key, palette_cache
+from app.services.palette_engines import DEFAULT_ENGINE, DEFAULT_SEED
+from app.services import segmentation
+from app.services.theme_matcher import match_theme
+from app.utils.image_utils import colour_grid, crop_center, decode_image, dhash, read_image_size
+
+
+def parse_crop(spec):
+    """
+    "200x200" -> (200, 200) pixels; "0.5" -> (0.5, 0.5) and "0.5x0.4" ->
+    (0.5, 0.4) fractions of the image. Raises ValueError on anything else.
+    """
+    parts = [p.strip() for p in str(spec).lower().split("x")]
+    if len(parts) == 1:
+        parts = parts * 2
+    if len(parts) != 2:
+        raise ValueError(f"Invalid crop spec {spec!r}")
+    if all("." in p for p in parts):
+        fractions = tuple(float(p) for p in parts)
+        if not all(0 < f <= 1 for f in fractions):
+            raise ValueError(f"Crop fractions must be in (0, 1]: {spec!r}")
+        return fractions
+    pixels = tuple(int(p) for p in parts)
+    if not all(p > 0 for p in pixels):
+        raise ValueError(f"Crop size must be positive: {spec!r}")
+    return pixels
+
+
+# Crop geometry and palette size used by every upload path
+CROP_SIZE = parse_crop(os.getenv("PALETTE_CROP", "200x200"))
+PALETTE_SIZE = 5
+
+# Downscale-before-cluster preprocessing (see module docstring)
+REDUCED_DECODE = os.getenv("PALETTE_REDUCED_DECODE", "1").strip().lower() not in ("0", "false", "no")
+MIN_CROP_SIDE = int(os.getenv("PALETTE_MIN_CROP_SIDE", "100"))
+MAX_PIXELS = int(os.getenv("PALETTE_MAX_PIXELS", "10000"))
+
+# Scales libjpeg can decode at directly, largest first
+REDUCTION_FACTORS = (8, 4, 2)
+
+# Garment mode segments and clusters the whole frame
+FULL_FRAME = (1.0, 1.0)
+GARMENT_MIN_SIDE = int(os.getenv("PALETTE_GARMENT_MIN_SIDE", "256"))
+
+# Default for palette_from_image's `mask`: segment there (the batch path passes precomputed masks)
+_SEGMENT = object()
+
+
+def is_relative_crop(crop_size):
+    return isinstance(crop_size[0], float)
+
+
+def crop_pixels(width, height, crop_size, reduce=1):
+    """
+    Crop (width, height) in pixels of an image decoded at 1/`reduce` scale.
+    Pixel crops are given in original-photo pixels, so they shrink with the
+    decode; relative crops are fractions of whatever was decoded.
+    """
+    if is_relative_crop(crop_size):
+        return max(1, round(crop_size[0] * width)), max(1, round(crop_size[1] * height))
+    return max(1, round(crop_size[0] / reduce)), max(1, round(crop_size[1] / reduce))
+
+
+def choose_reduction(data, crop_size=CROP_SIZE, min_side=MIN_CROP_SIDE):
+    """
+    Largest JPEG decode reduction (8, 4, 2, else 1) that still leaves the
+    crop at least `min_side` pixels on its shorter side. Only the header is
+    read; PNG and unknown formats always decode at full size.
+    """
+    header = read_image_size(data)
+    if header is None or header[0] != "jpeg":
+        return 1
+    _, width, height = header
+
+    # Shorter crop side in original pixels, clamped to the image. For relative
+    # crops use the smaller image side so EXIF rotation can't shrink it further.
+    if is_relative_crop(crop_size):
+        side = min(crop_size) * min(width, height)
+    else:
+        side = min(min(crop_size[0], width), min(crop_size[1], height))
+
+    for factor in REDUCTION_FACTORS:
+        if side / factor >= min_side:
+            return factor
+    return 1
+
+
+def colour_layout(image):
+    """Mean CIELAB colour per cell of a 4x4 grid over the frame (near-duplicate colour check)."""
+    return rgb_to_lab(colour_grid(image))
+
+
+def resolve_region(region=None):
+    """Validate a region mode, falling back to "center" when segmentation can't run."""
+    region = region or segmentation.DEFAULT_REGION
+    if region not in segmentation.PALETTE_REGIONS:
+        raise ValueError(f"Unknown region '{region}'")
+    if region == "garment" and not segmentation.available():
+        count("segmentation_fallback_total", reason="unavailable")
+        return "center"
+    return region
+
+
+def palette_from_image(image, k=PALETTE_SIZE, crop_size=CROP_SIZE, engine=None, seed=None,
+                       reduce=1, max_pixels=MAX_PIXELS, region=None, mask=_SEGMENT, image_hash=None):
+    """
+    Crop (or segment) an already-decoded BGR image and return its palette (cached).
+    `reduce` is the scale the image was decoded at (see choose_reduction).
+    In garment mode `mask` may carry a precomputed garment_masks() result.
+    `image_hash` is the image's dhash when the caller already computed it.
+    """
+    if image is None or image.size == 0:
+        raise ValueError("Failed to decode uploaded image.")
+
+    region = resolve_region(region)
+    height, width = image.shape[:2]
+
+    if region == "garment":
+        # The whole frame is the region; the mask picks the pixels
+        region_img = image
+    else:
+        # Crop the center region (200x200 original pixels by default)
+        with span("crop"):
+            region_img = crop_center(image, *crop_pixels(width, height, crop_size, reduce))
+
+    # Re-uploads of the same photo with the same settings skip clustering (and segmentation)
+    with span("cache_lookup"):
+        cache_key = make_cache_key(
+            region_img,
+            k=k,
+            crop_size=crop_size,
+            engine=engine or DEFAULT_ENGINE,
+            seed=DEFAULT_SEED if seed is None else seed,
+            reduce=reduce,
+            max_pixels=max_pixels,
+            region=region,
+        )
+        palette = palette_cache.get(cache_key)
+    outcome = "hit" if palette is not None else "miss"
+
+    # A near-duplicate of an image already processed with these settings reuses its
+    # palette, when the colours of the frame agree as well as the hashes
+    settings = (k, tuple(crop_size), engine or DEFAULT_ENGINE, DEFAULT_SEED if seed is None else seed, max_pixels, region)
+    layout = None
+    if palette is None and near_duplicate_palettes.enabled:
+        with span("near_duplicate_lookup"):
+            if image_hash is None:
+                image_hash = dhash(image)
+            layout = colour_layout(image)
+            palette = near_duplicate_palettes.get(image_hash, settings, layout)
+        if palette is not None:
+            outcome = "near_duplicate"
+            palette_cache.set(cache_key, palette)
+
+    count("palettes_total", cache=outcome)
+
+    if palette is None:
+        if region != "garment":
+            mask = None
+        else:
+            if mask is _SEGMENT:
+                mask = segmentation.garment_mask(image)
+            if mask is None:
+                # Too little clothing found (e.g. a flat lay): use the centre crop instead
+                count("segmentation_fallback_total", reason="low_coverage")
+                with span("crop"):
+                    region_img = crop_center(image, *crop_pixels(width, height, crop_size, reduce))
+
+        # Extract the top k dominant colors directly from the region's pixels
+        with span(f"extract.{engine or DEFAULT_ENGINE}"):
+            palette = extract_palette_from_array(
+                region_img, k=k, engine=engine, seed=seed, max_pixels=max_pixels, mask=mask,
+            )
+        palette_cache.set(cache_key, palette)
+        if image_hash is not None and layout is not None:
+            near_duplicate_palettes.set(image_hash, settings, palette, layout)
+
+    return palette
+
+
+def decode_upload(data, crop_size=CROP_SIZE, reduced_decode=None, region="center"):
+    """
+    Decode upload bytes for a resolved region mode. Returns (image, reduce);
+    image is None when the bytes are not decodable.
+    """
+    if reduced_decode is None:
+        reduced_decode = REDUCED_DECODE
+
+    # Decode the uploaded bytes in memory, at reduced scale when the region allows
+    with span("decode"):
+        reduce = 1
+        if reduced_decode:
+            reduce = choose_reduction(data, crop_size)
+            if region == "garment":
+                # Also keep the frame big enough to segment; the crop bound still
+                # applies so a centre-crop fallback matches center mode exactly
+                reduce = min(reduce, choose_reduction(data, FULL_FRAME, min_side=GARMENT_MIN_SIDE))
+        return decode_image(data, reduce), reduce
+
+
+def palette_from_bytes(data, k=PALETTE_SIZE, crop_size=CROP_SIZE, engine=None, seed=None,
+                       reduced_decode=None, max_pixels=MAX_PIXELS, region=None):
+    """
+    Full pipeline for one upload body. Raises ValueError if the bytes are
+    not a decodable image.
+    """
+    region = resolve_region(region)
+    image, reduce = decode_upload(data, crop_size, reduced_decode, region)
+    return palette_from_image(image, k=k, crop_size=crop_size, engine=engine, seed=seed,
+                              reduce=reduce, max_pixels=max_pixels, region=region)
+
+
+def store_blob(data, image, result, store=None):
+    """
+    Keep the upload (and thumbnails of its decoded `image`) in the blob
+    store and add its "image_id" to `result`. A storage failure only drops
+    the id; the palette is still returned.
+    """
+    if not (BLOB_STORE_ENABLED if store is None else store):
+        return result
+    try:
+        with span("blob_store"):
+            result["image_id"] = blob_store.put(data, image)
+    except OSError as e:
+        logging.error("[BLOB] Failed to store upload: %s", e)
+        count("blobs_total", outcome="error")
+    return result
+
+
+def hashed_palette_from_bytes(data, k=PALETTE_SIZE, crop_size=CROP_SIZE, engine=None, seed=None,
+                              reduced_decode=None, max_pixels=MAX_PIXELS, region=None, store=None):
+    """
+    palette_from_bytes plus the image's perceptual hash (16 hex digits), which
+    clients send back as an outfit's image_hash. Returns {"palette", "image_hash"}
+    plus "image_id" when the upload was kept in the blob store (`store`,
+    default BLOB_STORE).
+    """
+    region = resolve_region(region)
+    image, reduce = decode_upload(data, crop_size, reduced_decode, region)
+    if image is None or image.size == 0:
+        raise ValueError("Failed to decode uploaded image.")
+    with span("dhash"):
+        image_hash = dhash(image)
+    palette = palette_from_image(image, k=k, crop_size=crop_size, engine=engine, seed=seed, reduce=reduce,
+                                 max_pixels=max_pixels, region=region, image_hash=image_hash)
+    return store_blob(data, image, {"palette": palette, "image_hash": format_hash(image_hash)}, store)
+
+
+def palettes_from_bytes_batch(items, k=PALETTE_SIZE, crop_size=CROP_SIZE, engine=None, seed=None, region=None,
+                              store=None):
+    """
+    Pipeline for several upload bodies in one worker task (the batch
+    endpoint). In garment mode all images go through the segmenter in one
+    pass. Returns one {"palette": [...], "image_hash": "...", "image_id": "..."}
+    or {"error": "..."} per item, so a bad image never fails its neighbours.
+    """
+    region = resolve_region(region)
+    results = [None] * len(items)
+    decoded = []
+    for i, data in enumerate(items):
+        try:
+            image, reduce = decode_upload(data, crop_size, region=region)
+            if image is None or image.size == 0:
+                raise ValueError("Failed to decode uploaded image.")
+            decoded.append((i, image, reduce))
+        except Exception as e:
+            results[i] = {"error": str(e)}
+
+    masks = [_SEGMENT] * len(decoded)
+    if decoded and region == "garment":
+        masks = segmentation.garment_masks([image for _, image, _ in decoded])
+
+    for (i, image, reduce), mask in zip(decoded, masks):
+        try:
+            image_hash = dhash(image)
+            palette = palette_from_image(image, k=k, crop_size=crop_size, engine=engine, seed=seed,
+                                         reduce=reduce, region=region, mask=mask, image_hash=image_hash)
+            results[i] = store_blob(items[i], image, {"palette": palette, "image_hash": format_hash(image_hash)}, store)
+        except Exception as e:
+            results[i] = {"error": str(e)}
+    return results
+
+
+def analyse_bytes(data, k=PALETTE_SIZE, crop_size=CROP_SIZE, engine=None, seed=None, region=None):
+    """
+    Palette + seasonal theme for one upload body (used by background jobs).
+    Returns {"palette": [...], "image_hash": "...", "image_id": "...", "theme": "<season>"}.
+    """
+    result = hashed_palette_from_bytes(data, k=k, crop_size=crop_size, engine=engine, seed=seed, region=region)
+    with span("theme"):
+        result["theme"] = match_theme(result["palette"])
+    return result
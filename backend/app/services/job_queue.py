@@ -0,0 +1,369 @@
+# backend/app/services/job_queue.py
+"""
+Palette Job Queue
+-----------------
+WHY THIS FILE EXISTS:
+- Large photos hold a request thread for the whole decode + cluster
+  pipeline. Job mode lets the route return a job id immediately while the
+  work runs in the background.
+- Clients then poll (or long-poll) for the result.
+
+Design:
+- A *store* keeps job records and their input bytes. Two backends:
+    "memory"  in-process dict + deque (default, lost on restart)
+    "sqlite"  single-file database; queued/running jobs survive restarts
+- One dispatcher thread claims queued jobs in FIFO order and hands them to
+  the image worker pool (`worker_pool.submit`), which already applies
+  backpressure. Completion callbacks write the result back to the store.
+
+Configuration (environment):
+- JOB_QUEUE_BACKEND   "memory" (default) or "sqlite"
+- JOB_QUEUE_DB        SQLite file path (default data/jobs.sqlite3)
+- JOB_RETENTION       finished jobs kept before the oldest are pruned (default 1000)
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+from app.services import worker_pool
+
+JOB_QUEUE_BACKEND = os.getenv("JOB_QUEUE_BACKEND", "memory")
+JOB_QUEUE_DB = os.getenv(
+    "JOB_QUEUE_DB", os.path.join(os.path.dirname(__file__), "../../data/jobs.sqlite3")
+)
+JOB_RETENTION = int(os.getenv("JOB_RETENTION", "1000"))
+
+# Job lifecycle states
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+FINISHED_STATES = {DONE, FAILED}
+
+
+def _new_job(options):
+    return {
+        "id": uuid.uuid4().hex,
+        "status": QUEUED,
+        "options": options,
+        "created_at": time.time(),
+        "started_at": None,
+        "finished_at": None,
+        "result": None,
+        "error": None,
+    }
+
+
+# =========================
+# Stores
+# =========================
+
+class InMemoryJobStore:
+    """Process-local job store. Fast, but jobs vanish on restart."""
+
+    def __init__(self, retention=JOB_RETENTION):
+        self.retention = retention
+        self._jobs = OrderedDict()  # id -> job record (insertion = creation order)
+        self._payloads = {}         # id -> input bytes, dropped once claimed
+        self._queue = deque()
+        self._lock = threading.Lock()
+
+    def create(self, data, options):
+        job = _new_job(options)
+        with self._lock:
+            self._jobs[job["id"]] = job
+            self._payloads[job["id"]] = data
+            self._queue.append(job["id"])
+            self._prune()
+        return dict(job)
+
+    def claim_next(self):
+        """Atomically move the oldest queued job to RUNNING; returns (job, data) or None."""
+        with self._lock:
+            while self._queue:
+                job_id = self._queue.popleft()
+                job = self._jobs.get(job_id)
+                if job and job["status"] == QUEUED:
+                    job["status"] = RUNNING
+                    job["started_at"] = time.time()
+                    return dict(job), self._payloads.pop(job_id, b"")
+        return None
+
+    def finish(self, job_id, result=None, error=None):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job["status"] = FAILED if error else DONE
+            job["result"] = result
+            job["error"] = error
+            job["finished_at"] = time.time()
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def counts(self):
+        with self._lock:
+            counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+            for job in self._jobs.values():
+                counts[job["status"]] += 1
+            return counts
+
+    def _prune(self):
+        """Drop the oldest finished jobs beyond the retention limit. Caller holds the lock."""
+        finished = [jid for jid, job in self._jobs.items() if job["status"] in FINISHED_STATES]
+        for job_id in finished[:max(len(finished) - self.retention, 0)]:
+            del self._jobs[job_id]
+
+
+class SQLiteJobStore:
+    """
+    SQLite-backed job store.
+
+    WHY:
+    - Input bytes and state live on disk, so queued jobs survive restarts.
+    - Jobs left RUNNING by a crashed process are re-queued on startup.
+    """
+
+    def __init__(self, path=JOB_QUEUE_DB, retention=JOB_RETENTION):
+        self.path = path
+        self.retention = retention
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._conn()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                options TEXT NOT NULL,
+                payload BLOB,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                result TEXT,
+                error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs (status, created_at);
+        """)
+        # Anything RUNNING when the last process died never finished: retry it
+        conn.execute("UPDATE jobs SET status = ?, started_at = NULL WHERE status = ?", (QUEUED, RUNNING))
+        conn.commit()
+
+    def _conn(self):
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def create(self, data, options):
+        job = _new_job(options)
+        conn = self._conn()
+        conn.execute(
+            "INSERT INTO jobs (id, status, options, payload, created_at) VALUES (?, ?, ?, ?, ?)",
+            (job["id"], QUEUED, json.dumps(options), sqlite3.Binary(data), job["created_at"]),
+        )
+        conn.commit()
+        return job
+
+    def claim_next(self):
+        conn = self._conn()
+        with self._lock:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is None:
+                return None
+            started_at = time.time()
+            # Guarded update so a second process cannot claim the same job
+            claimed = conn.execute(
+                "UPDATE jobs SET status = ?, started_at = ? WHERE id = ? AND status = ?",
+                (RUNNING, started_at, row["id"], QUEUED),
+            ).rowcount
+            conn.commit()
+        if not claimed:
+            return None
+        job = self._row_to_job(row)
+        job.update(status=RUNNING, started_at=started_at)
+        return job, bytes(row["payload"] or b"")
+
+    def finish(self, job_id, result=None, error=None):
+        conn = self._conn()
+        conn.execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, payload = NULL WHERE id = ?",
+            (FAILED if error else DONE, json.dumps(result) if result is not None else None,
+             error, time.time(), job_id),
+        )
+        # Keep only the newest `retention` finished jobs
+        conn.execute(
+            """DELETE FROM jobs WHERE status IN (?, ?) AND id NOT IN (
+                   SELECT id FROM jobs WHERE status IN (?, ?) ORDER BY finished_at DESC LIMIT ?
+               )""",
+            (DONE, FAILED, DONE, FAILED, self.retention),
+        )
+        conn.commit()
+
+    def get(self, job_id):
+        row = self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def counts(self):
+        counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        for status, n in self._conn().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"):
+            counts[status] = n
+        return counts
+
+    @staticmethod
+    def _row_to_job(row):
+        return {
+            "id": row["id"],
+            "status": row["status"],
+            "options": json.loads(row["options"]),
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"],
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+        }
+
+
+JOB_STORES = {
+    "memory": InMemoryJobStore,
+    "sqlite": SQLiteJobStore,
+}
+
+
+# =========================
+# Queue + dispatcher
+# =========================
+
+class JobQueue:
+    """Feeds queued jobs from a store into the image worker pool."""
+
+    # How often the dispatcher re-checks the store when idle (covers jobs
+    # enqueued by other processes sharing a SQLite store)
+    POLL_INTERVAL = 0.5
+
+    def __init__(self, store, runner=None):
+        if runner is None:
+            # Deferred: the image pipeline pulls in cv2 / numpy
+            from app.services.image_pipeline import analyse_bytes
+            runner = analyse_bytes
+        self.store = store
+        self.runner = runner
+        self._wakeup = threading.Event()
+        self._finished = threading.Condition()
+        self._stats_lock = threading.Lock()
+        self._latency = {"queue_wait": [0, 0.0, 0.0], "run": [0, 0.0, 0.0]}  # count, total, max
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name="palette-job-dispatcher", daemon=True)
+        self._dispatcher.start()
+
+    # -------------------------
+    # Public API
+    # -------------------------
+
+    def submit(self, data, **options):
+        """Enqueue one image; returns the job record immediately."""
+        job = self.store.create(data, options)
+        self._wakeup.set()
+        return job
+
+    def get(self, job_id):
+        return self.store.get(job_id)
+
+    def wait(self, job_id, timeout):
+        """
+        Long-poll: block up to `timeout` seconds until the job finishes.
+        Returns the latest job record (finished or not), or None if unknown.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.store.get(job_id)
+            remaining = deadline - time.monotonic()
+            if job is None or job["status"] in FINISHED_STATES or remaining <= 0:
+                return job
+            with self._finished:
+                # Completions in this process notify; the cap covers other processes
+                self._finished.wait(min(remaining, self.POLL_INTERVAL))
+
+    def stats(self):
+        """Queue depth by status plus queue-wait / run latency summaries (seconds)."""
+        with self._stats_lock:
+            latency = {
+                name: {
+                    "count": count,
+                    "avg_s": round(total / count, 4) if count else 0.0,
+                    "max_s": round(peak, 4),
+                }
+                for name, (count, total, peak) in self._latency.items()
+            }
+        counts = self.store.counts()
+        return {"depth": counts[QUEUED], "jobs": counts, "latency": latency}
+
+    # -------------------------
+    # Internals
+    # -------------------------
+
+    def _dispatch_loop(self):
+        while True:
+            claimed = self.store.claim_next()
+            if claimed is None:
+                self._wakeup.wait(self.POLL_INTERVAL)
+                self._wakeup.clear()
+                continue
+
+            job, data = claimed
+            self._record("queue_wait", job["started_at"] - job["created_at"])
+            try:
+                # Blocks while the pool is saturated: that is the backpressure
+                future = worker_pool.submit(self.runner, data, timeout=None, **job["options"])
+            except Exception as e:
+                self._finish(job, error=str(e))
+                continue
+            future.add_done_callback(lambda f, job=job: self._on_done(job, f))
+
+    def _on_done(self, job, future):
+        try:
+            self._finish(job, result=future.result())
+        except Exception as e:
+            self._finish(job, error=str(e) or type(e).__name__)
+
+    def _finish(self, job, result=None, error=None):
+        self.store.finish(job["id"], result=result, error=error)
+        self._record("run", time.time() - job["started_at"])
+        with self._finished:
+            self._finished.notify_all()
+
+    def _record(self, name, seconds):
+        with self._stats_lock:
+            entry = self._latency[name]
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """
+    Return the process-wide job queue, creating it (and its dispatcher
+    thread) on first use so pre-fork servers start threads per worker.
+    """
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            if JOB_QUEUE_BACKEND not in JOB_STORES:
+                raise ValueError(f"Unknown JOB_QUEUE_BACKEND '{JOB_QUEUE_BACKEND}'")
+            _queue = JobQueue(JOB_STORES[JOB_QUEUE_BACKEND]())
+        return _queue
@@ -0,0 +1,544 @@
+# backend/app/services/jsonl_store.py
+"""
+JSON-Lines Storage Engine
+-------------------------
+WHY THIS FILE EXISTS:
+- The JSON fallback used to `json.load` the whole file, insert at the front
+  and rewrite everything with `indent=2` on every save: O(n) per write, and
+  two concurrent writers could corrupt the file.
+- This engine is an append-only log of one JSON object per line, with an
+  in-memory index of byte offsets so reads seek straight to the records
+  they need.
+
+Guarantees:
+- Appends are O(1): one `write` (plus optional fsync) under a file lock.
+- Reads are O(limit): seek to indexed offsets, never parse the whole file.
+- Multi-process safe: writers take an exclusive `flock` on `<path>.lock`,
+  and every process catches up on lines appended by others before it
+  reads or writes.
+- Updates and deletes are appended too (a newer line with the same id, or
+  a tombstone). Compaction periodically rewrites only live records into a
+  new file and atomically swaps it in.
+- Feeds read the log in file order. `merge_many` keeps that order sorted
+  by a key (e.g. timestamp) when records arrive out of order (bulk import):
+  it appends when it can and otherwise rewrites the log with the records
+  merged in, like compaction.
+- A writer that dies mid-append leaves a torn last line. The next writer
+  truncates it away under the lock before appending (otherwise its record
+  would be glued onto the fragment), and lines that do not parse are never
+  indexed.
+
+fsync policies:
+- "always"   fsync after every append (safest, slowest)
+- "interval" fsync at most once every `fsync_interval` seconds (default)
+- "never"    leave flushing to the OS
+"""
+
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager
+
+FSYNC_POLICIES = ("always", "interval", "never")
+
+# Key written in tombstone lines: {"_deleted": "<id>"}
+TOMBSTONE_KEY = "_deleted"
+
+
+class JsonLinesStore:
+    """Append-only JSON-lines log with an in-memory offset index."""
+
+    def __init__(
+        self,
+        path,
+        id_field="id",
+        fsync="interval",
+        fsync_interval=1.0,
+        compact_ratio=0.5,
+        compact_min_bytes=1024 * 1024,
+    ):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync policy must be one of {FSYNC_POLICIES}, got '{fsync}'")
+
+        self.path = path
+        self.id_field = id_field
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.compact_ratio = compact_ratio
+        self.compact_min_bytes = compact_min_bytes
+
+        self._id_prefix = ('{"%s":"' % id_field).encode("utf-8")
+        self._tombstone_prefix = ('{"%s":"' % TOMBSTONE_KEY).encode("utf-8")
+
+        self._lock = threading.RLock()
+        self._lock_path = f"{path}.lock"
+        self._reader = None
+        self._writer = None
+        self._last_fsync = 0.0
+        self._reset_index()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if not os.path.exists(path):
+            open(path, "ab").close()
+
+    # =========================
+    # Public API
+    # =========================
+
+    def append(self, record):
+        """Append one record (must carry `id_field`). Replaces any record with the same id."""
+        self.append_many([record])
+        return record
+
+    def append_if_absent(self, record):
+        """
+        Append `record` unless a live record with its id exists. The check runs
+        under the write lock, so concurrent writers (threads or processes)
+        append at most one of them. Returns True if the record was written.
+        """
+        if self.id_field not in record:
+            raise ValueError(f"Record is missing '{self.id_field}' field")
+        line = self._encode(record)
+        with self._write_lock():
+            if record[self.id_field] in self._ids:
+                return False
+            self._write_lines([line])
+        self._maybe_compact()
+        return True
+
+    def append_many(self, records):
+        """Append several records with a single write and lock acquisition."""
+        lines = []
+        for record in records:
+            if self.id_field not in record:
+                raise ValueError(f"Record is missing '{self.id_field}' field")
+            lines.append(self._encode(record))
+        if not lines:
+            return
+
+        with self._write_lock():
+            self._write_lines(lines)
+        self._maybe_compact()
+
+    def merge_many(self, records, key):
+        """
+        Upsert records so the log stays sorted by `key(record)` (the live
+        records are assumed to be sorted by it already, oldest first; ties
+        keep log order, with merged records after existing ones).
+        - Every record sorts after the last live one and none replaces an
+          existing id: a plain append (the normal case for new saves and for
+          importing an export into an empty log).
+        - Otherwise: one streaming rewrite that merges the sorted records
+          into the live ones (replaced ids keep only the new version) and
+          atomically swaps the file in, so other processes rebuild their
+          index exactly as after a compaction.
+        """
+        records = sorted(records, key=key)
+        for record in records:
+            if self.id_field not in record:
+                raise ValueError(f"Record is missing '{self.id_field}' field")
+        if not records:
+            return
+
+        with self._write_lock():
+            ids = {record[self.id_field] for record in records}
+            last = self._read_at(self._offsets[-1]) if self._offsets else None
+            if last is None or (key(records[0]) >= key(last) and ids.isdisjoint(self._ids)):
+                self._write_lines([self._encode(record) for record in records])
+                return
+            else:
+                self._rewrite_merged(records, ids, key)
+        self._maybe_compact()
+
+    def _rewrite_merged(self, records, ids, key):
+        """Rewrite the log as live records (minus `ids`) merged with sorted `records`. Caller holds the write lock."""
+        tmp_path = f"{self.path}.merge.{os.getpid()}"
+        pending = iter(records)
+        upcoming = next(pending, None)
+        with open(tmp_path, "wb") as out:
+            for offset in self._offsets:
+                line = self._read_line_at(offset)
+                existing = json.loads(line)
+                if existing.get(self.id_field) in ids:
+                    continue
+                while upcoming is not None and key(upcoming) < key(existing):
+                    out.write(self._encode(upcoming))
+                    upcoming = next(pending, None)
+                out.write(line)
+            while upcoming is not None:
+                out.write(self._encode(upcoming))
+                upcoming = next(pending, None)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp_path, self.path)
+
+        self._close_handles()
+        self._reset_index()
+        self._refresh()
+
+    def delete(self, record_id):
+        """Append a tombstone for `record_id`. Returns False if it did not exist."""
+        with self._write_lock():
+            if record_id not in self._ids:
+                return False
+            self._write_lines([self._encode({TOMBSTONE_KEY: record_id})])
+        self._maybe_compact()
+        return True
+
+    def get(self, record_id):
+        """Return the live record with `record_id`, or None."""
+        with self._lock:
+            self._refresh()
+            entry = self._ids.get(record_id)
+            return self._read_at(entry[0]) if entry is not None else None
+
+    def get_many(self, record_ids):
+        """Return live records for the given ids (missing ids are skipped), in request order."""
+        with self._lock:
+            self._refresh()
+            entries = [self._ids.get(record_id) for record_id in record_ids]
+            return [self._read_at(entry[0]) for entry in entries if entry is not None]
+
+    def count(self):
+        """Number of live records."""
+        with self._lock:
+            self._refresh()
+            return len(self._offsets)
+
+    __len__ = count
+
+    def page(self, offset=0, limit=10, newest_first=True):
+        """
+        Return up to `limit` live records starting `offset` records in.
+        Only the requested records are read from disk.
+        """
+        with self._lock:
+            self._refresh()
+            total = len(self._offsets)
+            if offset >= total or limit <= 0:
+                return []
+            end = min(offset + limit, total)
+            if newest_first:
+                positions = range(total - 1 - offset, total - 1 - end, -1)
+            else:
+                positions = range(offset, end)
+            return [self._read_at(self._offsets[p]) for p in positions]
+
+    def page_after(self, record_id, limit=10, newest_first=True):
+        """
+        Keyset page: up to `limit` live records that come after `record_id`
+        in the requested direction. O(log n + limit); raises KeyError if
+        `record_id` is no longer in the log.
+        """
+        with self._lock:
+            self._refresh()
+            entry = self._ids.get(record_id)
+            if entry is None:
+                raise KeyError(record_id)
+            position = bisect_left(self._offsets, entry[0])
+            if newest_first:
+                positions = range(position - 1, max(position - 1 - limit, -1), -1)
+            else:
+                positions = range(position + 1, min(position + 1 + limit, len(self._offsets)))
+            return [self._read_at(self._offsets[p]) for p in positions]
+
+    def iter_records(self, newest_first=False):
+        """Yield every live record without loading the whole file at once."""
+        with self._lock:
+            self._refresh()
+            offsets = array("Q", self._offsets)  # Snapshot of the current file's index
+            reader = open(self.path, "rb")       # Own handle: survives a concurrent compaction
+        try:
+            positions = range(len(offsets) - 1, -1, -1) if newest_first else range(len(offsets))
+            for p in positions:
+                yield self._read_at(offsets[p], reader)
+        finally:
+            reader.close()
+
+    def compact(self):
+        """Rewrite the log with only live records and atomically swap it in."""
+        with self._write_lock():
+            tmp_path = f"{self.path}.compact.{os.getpid()}"
+            with open(tmp_path, "wb") as out:
+                for offset in self._offsets:
+                    out.write(self._read_line_at(offset))
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(tmp_path, self.path)
+
+            # Reopen handles on the new file and rebuild the index from it
+            self._close_handles()
+            self._reset_index()
+            self._refresh()
+
+    def migrate_from_json_array(self, json_path, id_factory, newest_first=True):
+        """
+        One-off import of a legacy `[ {...}, ... ]` JSON file into an empty log.
+
+        WHY:
+        - Existing deployments have data in the old single-array format.
+        - Legacy files are newest-first; the log is append-ordered (oldest
+          first), so the array is reversed on the way in.
+        - Records without an id get one from `id_factory()`.
+
+        Does nothing if the log already has records or the legacy file is missing.
+        Returns the number of records imported.
+        """
+        if not os.path.exists(json_path) or self.count():
+            return 0
+
+        with open(json_path, "r") as f:
+            try:
+                records = json.load(f)
+            except ValueError:
+                return 0
+
+        if newest_first:
+            records = list(reversed(records))
+        # Put the id first, like every line this class writes
+        records = [{self.id_field: r.get(self.id_field) or id_factory(), **r} for r in records]
+
+        with self._write_lock():
+            # Re-check under the lock: another process may have migrated already
+            if self._offsets:
+                return 0
+            self._write_lines([self._encode(r) for r in records])
+        return len(records)
+
+    def version(self):
+        """
+        Cheap token that changes whenever the log changes (in any process).
+        Lets callers keep derived in-memory views and know when to rebuild them.
+        """
+        with self._lock:
+            self._refresh()
+            return (self._inode, self._end)
+
+    def changes_since(self, token):
+        """
+        Records appended after `token` (a value from `version()`).
+
+        Returns (new_token, records). `records` is None when an incremental
+        answer is impossible (file compacted/replaced, or deletes happened),
+        in which case callers should rebuild from `iter_records()`.
+        """
+        with self._lock:
+            self._refresh()
+            current = (self._inode, self._end)
+            if token is None or token[0] != self._inode or token[1] > self._end:
+                return current, None
+            if self._tombstones_since(token[1]):
+                return current, None
+            start = bisect_left(self._offsets, token[1])
+            return current, [self._read_at(offset) for offset in self._offsets[start:]]
+
+    def _tombstones_since(self, offset):
+        # Tombstone offsets are appended in file order, so only the last one matters
+        return bool(self._tombstone_offsets) and self._tombstone_offsets[-1] >= offset
+
+    def stats(self):
+        with self._lock:
+            self._refresh()
+            return {
+                "records": len(self._offsets),
+                "file_bytes": self._end,
+                "dead_bytes": self._dead_bytes,
+                "fsync": self.fsync,
+            }
+
+    def close(self):
+        with self._lock:
+            self._close_handles()
+
+    # =========================
+    # Index maintenance
+    # =========================
+
+    def _reset_index(self):
+        self._offsets = array("Q")  # byte offsets of live records, in append order
+        self._ids = {}              # record id -> (byte offset, length) of its live line
+        self._end = 0               # bytes of the file already indexed
+        self._inode = None
+        self._dead_bytes = 0        # bytes taken by superseded lines and tombstones
+        self._tombstone_offsets = array("Q")  # where deletes happened (for changes_since)
+
+    def _refresh(self):
+        """
+        Catch the index up with the file on disk. Caller holds `self._lock`.
+
+        - File replaced (compaction by another process) → rebuild from scratch.
+        - File grew (appends by another process) → index only the new lines.
+        """
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            open(self.path, "ab").close()
+            st = os.stat(self.path)
+
+        if self._inode is not None and (st.st_ino != self._inode or st.st_size < self._end):
+            self._close_handles()
+            self._reset_index()
+        self._inode = st.st_ino
+
+        if st.st_size > self._end:
+            self._scan_from(self._end)
+
+    def _scan_from(self, start):
+        reader = self._reader_handle()
+        reader.seek(start)
+        offset = start
+        for line in reader:
+            if not line.endswith(b"\n"):
+                break  # Torn write still in progress elsewhere; pick it up next time
+            self._index_line(offset, line, self._parse_id(line))
+            offset += len(line)
+        self._end = offset
+
+    def _index_line(self, offset, line, parsed):
+        """Index one line given its (is_tombstone, id) from `_parse_id` / `_peek_id`."""
+        tombstone, record_id = parsed
+
+        if tombstone:
+            self._tombstone_offsets.append(offset)
+            self._remove_id(record_id)
+            self._dead_bytes += len(line)
+            return
+
+        if record_id is None:
+            self._dead_bytes += len(line)  # Corrupt or id-less line: skip it, compaction drops it
+            return
+        self._remove_id(record_id)
+        self._ids[record_id] = (offset, len(line))
+        self._offsets.append(offset)
+
+    def _parse_id(self, line):
+        """
+        Return (is_tombstone, id) for a line read from the file, or
+        (False, None) when it is not a JSON object (e.g. the remains of a
+        torn append another record was written after). Every line is parsed
+        in full: an index entry must never point at a line `get` cannot read.
+        """
+        try:
+            record = json.loads(line)
+        except ValueError:
+            return False, None
+        if not isinstance(record, dict):
+            return False, None
+        if TOMBSTONE_KEY in record and len(record) == 1:
+            return True, record[TOMBSTONE_KEY]
+        return False, record.get(self.id_field)
+
+    def _peek_id(self, line):
+        """
+        (is_tombstone, id) for a line this process just encoded: valid JSON
+        by construction, so a simple string id is read straight from the
+        prefix (records and tombstones start with their key); anything else
+        falls back to `_parse_id`.
+        """
+        for tombstone, prefix in ((False, self._id_prefix), (True, self._tombstone_prefix)):
+            if line.startswith(prefix):
+                end = line.find(b'"', len(prefix))
+                value = line[len(prefix):end]
+                if end > 0 and b"\\" not in value and line[end + 1:end + 2] in (b",", b"}"):
+                    return tombstone, value.decode("utf-8")
+        return self._parse_id(line)
+
+    def _remove_id(self, record_id):
+        old = self._ids.pop(record_id, None)
+        if old is None:
+            return
+        offset, length = old
+        # Offsets are strictly increasing, so the old line's position is a bisect away
+        del self._offsets[bisect_left(self._offsets, offset)]
+        self._dead_bytes += length
+
+    # =========================
+    # File I/O
+    # =========================
+
+    @contextmanager
+    def _write_lock(self):
+        """Thread lock + exclusive cross-process flock, with the index caught up."""
+        with self._lock:
+            with open(self._lock_path, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    self._refresh()
+                    self._drop_torn_tail()
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _drop_torn_tail(self):
+        """
+        Truncate bytes after the last complete line. Caller holds the write
+        lock; every writer appends under it, so such bytes can only be left
+        by a writer that died mid-append.
+        """
+        size = os.stat(self.path).st_size
+        if size > self._end:
+            logging.warning("[JSONL] Dropping %d bytes of a torn append at the end of %s", size - self._end, self.path)
+            os.truncate(self.path, self._end)
+
+    def _write_lines(self, lines):
+        """Append encoded lines at the end of the file. Caller holds the write lock."""
+        writer = self._writer_handle()
+        start = self._end
+        writer.write(b"".join(lines))
+        writer.flush()
+        self._sync(writer)
+
+        offset = start
+        for line in lines:
+            self._index_line(offset, line, self._peek_id(line))
+            offset += len(line)
+        self._end = offset
+
+    def _sync(self, handle):
+        if self.fsync == "always":
+            os.fsync(handle.fileno())
+        elif self.fsync == "interval":
+            now = time.monotonic()
+            if now - self._last_fsync >= self.fsync_interval:
+                os.fsync(handle.fileno())
+                self._last_fsync = now
+
+    def _maybe_compact(self):
+        """Compact once dead lines make up more than `compact_ratio` of a large enough file."""
+        with self._lock:
+            due = self._end >= self.compact_min_bytes and self._dead_bytes > self._end * self.compact_ratio
+        if due:
+            self.compact()
+
+    def _reader_handle(self):
+        if self._reader is None:
+            self._reader = open(self.path, "rb")
+        return self._reader
+
+    def _writer_handle(self):
+        if self._writer is None:
+            self._writer = open(self.path, "ab")
+        return self._writer
+
+    def _close_handles(self):
+        for handle in (self._reader, self._writer):
+            if handle is not None:
+                handle.close()
+        self._reader = self._writer = None
+
+    def _read_line_at(self, offset, reader=None):
+        reader = reader or self._reader_handle()
+        reader.seek(offset)
+        return reader.readline()
+
+    def _read_at(self, offset, reader=None):
+        return json.loads(self._read_line_at(offset, reader))
+
+    @staticmethod
+    def _encode(record):
+        return (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
@@ -1,6 +1,37 @@
 # backend/app/services/mongo_service.py
-from pymongo import MongoClient
+"""
+MongoDB Access Layer
+--------------------
+WHY THIS FILE EXISTS:
+- One process-wide MongoClient (it owns a connection pool) shared by every
+  service, instead of ad-hoc clients.
+- The client is created lazily on first use, per worker process: PyMongo
+  clients are not fork-safe, so a client inherited across fork() is
+  discarded and the child builds its own.
+- Indexes the services rely on are created once per process when the
+  client is first built.
+- Bulk helpers (`insert_many`, `bulk_write`) chunk large batches so
+  imports and batch saves are a few round-trips, not one per document.
+
+Without MONGO_URI every `get_collection` returns None and services use
+their local JSON / SQLite fallbacks. MONGO_URI="mongomock://" runs against
+an in-memory mongomock client (tests / local stand-in).
+
+Configuration (environment):
+- MONGO_URI                          connection string (default: unset → fallback)
+- MONGO_DB_NAME                      database name (default "blackstyles_db")
+- MONGO_MAX_POOL_SIZE                connections per process (default 50)
+- MONGO_MIN_POOL_SIZE                kept-open connections (default 0)
+- MONGO_MAX_IDLE_TIME_MS             close idle pooled connections after (default 60000)
+- MONGO_CONNECT_TIMEOUT_MS           TCP connect timeout (default 5000)
+- MONGO_SERVER_SELECTION_TIMEOUT_MS  wait for a usable server (default 5000)
+- MONGO_SOCKET_TIMEOUT_MS            per-operation socket timeout (default 20000)
+- MONGO_BULK_BATCH_SIZE              documents / operations per bulk request (default 1000)
+"""
+
+import logging
 import os
+import threading
 
 #-------------------------------------------------
 # Configuration
@@ -10,40 +41,213 @@ import os
 MONGO_URI = os.getenv("MONGO_URI", "")
 
 # default database name for this application
-DB_NAME = "blackstyles_db"
+DB_NAME = os.getenv("MONGO_DB_NAME", "blackstyles_db")
+
+# Connection pool / timeout settings passed to MongoClient
+CLIENT_OPTIONS = {
+    "maxPoolSize": int(os.getenv("MONGO_MAX_POOL_SIZE", "50")),
+    "minPoolSize": int(os.getenv("MONGO_MIN_POOL_SIZE", "0")),
+    "maxIdleTimeMS": int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "60000")),
+    "connectTimeoutMS": int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000")),
+    "serverSelectionTimeoutMS": int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000")),
+    "socketTimeoutMS": int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "20000")),
+}
+
+BULK_BATCH_SIZE = int(os.getenv("MONGO_BULK_BATCH_SIZE", "1000"))
+
+# URI scheme that selects the in-memory mongomock client
+MOCK_SCHEME = "mongomock://"
+
+# Indexes created when a process first connects: collection -> [(keys, options)]
+INDEXES = {
+    "users": [
+        ([("email", 1)], {"unique": True}),
+    ],
+    "outfits": [
+        ([("id", 1)], {"unique": True}),
+        ([("timestamp", -1), ("id", -1)], {}),
+        # Searches match the lowercased copies outfit_service stores next to tags / theme
+        ([("tags_norm", 1), ("timestamp", -1), ("id", -1)], {}),
+        ([("theme_norm", 1), ("tags_norm", 1), ("timestamp", -1), ("id", -1)], {}),
+    ],
+    # Legacy one-array-per-user favorites, migrated lazily by outfit_service
+    "favorites": [
+        ([("user_id", 1)], {"unique": True}),
+    ],
+    # One document per (user, outfit); pages walk (user_id, added_at, outfit_id)
+    "favorite_outfits": [
+        ([("user_id", 1), ("outfit_id", 1)], {"unique": True}),
+        ([("user_id", 1), ("added_at", -1), ("outfit_id", -1)], {}),
+    ],
+}
 
 # Global variables for MongoDB client and database references.
-# These will be initialized once and reused throughout the app.
+# These are created lazily, once per process, and reused throughout the app.
 client = None
 db = None
+_client_pid = None
+_client_factory = None
+_lock = threading.Lock()
+
+
+def configure(uri=None, db_name=None, client_factory=None):
+    """
+    Override connection settings (tests, scripts) and drop any existing client.
+    - client_factory: callable(uri, **options) -> client, e.g. mongomock.MongoClient
+    """
+    global MONGO_URI, DB_NAME, _client_factory
+    with _lock:
+        if uri is not None:
+            MONGO_URI = uri
+        if db_name is not None:
+            DB_NAME = db_name
+        _client_factory = client_factory
+        _discard_client(close=True)
+
 
 def init_mongo():
     """
-    Initializes the MongoDB client and database connection.
-    This function should be called when the backend starts.
+    Connect now instead of on first use (e.g. a one-off script).
+    Returns the database, or None when MONGO_URI is not set.
     """
-    global client, db # Use globals to ensure consistent connection reuse
+    database = get_db()
+    if database is None:
+        # If no URI is found, fallback to JSON-based storage or mock data
+        logging.info("MongoDB URI not found; using local fallback storage.")
+    return database
 
-    # ✅ ADDED: Introduced database connection URI
-    if MONGO_URI:
-        # Create a MongoDB client using connection URI
-        client = MongoClient(MONGO_URI)
 
-        # Select the database specified by DB_NAME
-        db = client[DB_NAME]
+def get_client():
+    """Return this process's MongoClient, creating it on first use (None without MONGO_URI)."""
+    global client, db, _client_pid
+    if not MONGO_URI:
+        return None
+
+    pid = os.getpid()
+    if client is not None and _client_pid == pid:
+        return client
+
+    with _lock:
+        if client is not None and _client_pid != pid:
+            # Inherited across fork(): its sockets belong to the parent
+            _discard_client(close=False)
+        if client is None:
+            new_client = _make_client()
+            new_db = new_client[DB_NAME]
+            ensure_indexes(new_db)
+            client, db, _client_pid = new_client, new_db, pid
+            logging.info(f"[MONGO] Connected (pid {pid}, pool {CLIENT_OPTIONS['maxPoolSize']})")
+        return client
+
+
+def get_db():
+    """Return the application database, or None when MongoDB is not configured."""
+    if get_client() is None:
+        return None
+    return db
 
-        # Print a success message for easier debugging and mointoring
-        print("MongoDB connected successfully.")
-    else:
-        # If no URI is found, fallback to JSON-based storage or mock data
-        print("⚠️ MongoDB URI not found; using JSON fallback.")
 
 def get_collection(name):
     """
     Returns a reference to a MongoDB collection by name.
     This allows other services or routes to perform CRUD operations.
+    Returns None when MongoDB is not configured so callers can fall back.
+    """
+    # PyMongo Database/Collection objects refuse truth testing; compare with None
+    database = get_db()
+    if database is not None:
+        return database[name]
+    return None
+
+
+def ensure_indexes(database):
+    """Create the indexes in INDEXES (idempotent; existing indexes are left alone)."""
+    for name, specs in INDEXES.items():
+        for keys, options in specs:
+            database[name].create_index(keys, **options)
+
+
+def insert_many(name, documents, ordered=False):
+    """
+    Insert `documents` into collection `name` in chunks of BULK_BATCH_SIZE.
+    Copies are inserted so callers' dicts do not gain an ObjectId `_id`.
+    Returns the number of inserted documents.
+    """
+    collection = _require_collection(name)
+    inserted = 0
+    for chunk in _chunks(documents, BULK_BATCH_SIZE):
+        result = collection.insert_many([dict(doc) for doc in chunk], ordered=ordered)
+        inserted += len(result.inserted_ids)
+    return inserted
+
+
+def bulk_write(name, operations, ordered=False):
     """
-    # ✅ ADDED: Provides safe access to collections
-    if db:
-        return db[name]
-    return None # If DB is not initialized, return None to prevent runtime errors
\ No newline at end of file
+    Run PyMongo write operations (InsertOne, ReplaceOne, UpdateOne, ...)
+    against collection `name` in chunks of BULK_BATCH_SIZE.
+    Returns summed counts: inserted / matched / modified / upserted / deleted.
+    """
+    collection = _require_collection(name)
+    totals = {"inserted": 0, "matched": 0, "modified": 0, "upserted": 0, "deleted": 0}
+    for chunk in _chunks(operations, BULK_BATCH_SIZE):
+        result = collection.bulk_write(chunk, ordered=ordered)
+        totals["inserted"] += result.inserted_count
+        totals["matched"] += result.matched_count
+        totals["modified"] += result.modified_count
+        totals["upserted"] += result.upserted_count
+        totals["deleted"] += result.deleted_count
+    return totals
+
+
+def close():
+    """Close this process's client (its pool); the next call reconnects."""
+    with _lock:
+        _discard_client(close=True)
+
+
+def _make_client():
+    if _client_factory is not None:
+        return _client_factory(MONGO_URI, **CLIENT_OPTIONS)
+    if MONGO_URI.startswith(MOCK_SCHEME):
+        import mongomock
+        return mongomock.MongoClient()
+    # Imported here so processes that never talk to MongoDB skip loading pymongo
+    from pymongo import MongoClient
+    return MongoClient(MONGO_URI, **CLIENT_OPTIONS)
+
+
+def _discard_client(close):
+    global client, db, _client_pid
+    if client is not None and close:
+        client.close()
+    client, db, _client_pid = None, None, None
+
+
+def _require_collection(name):
+    collection = get_collection(name)
+    if collection is None:
+        raise RuntimeError("MongoDB is not configured (set MONGO_URI)")
+    return collection
+
+
+def _chunks(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _after_fork_in_child():
+    # The parent's client and lock state are unusable here; start clean
+    global _lock
+    _lock = threading.Lock()
+    _discard_client(close=False)
+
+
+# Drop the parent's client in forked children (pre-fork servers, multiprocessing "fork")
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,248 @@
+# backend/app/services/near_duplicates.py
+"""
+Near-Duplicate Images
+---------------------
+WHY THIS FILE EXISTS:
+- People upload the same garment photo resized, recompressed or slightly
+  cropped. The palette cache keys on exact decoded pixels, so each copy
+  paid the full palette extraction and became another outfit.
+- Every decoded upload now gets a 64-bit perceptual hash (dHash, see
+  app.utils.image_utils.dhash). Copies of a photo hash to values a few bits
+  apart, so "near-duplicate" means Hamming distance <= NEAR_DUPLICATE_DISTANCE.
+- dHash only sees greyscale brightness gradients, so colour variants of one
+  product shot (the same shirt in red, navy and green on white) collide.
+  A hash match is therefore only a candidate: it counts as a duplicate
+  when the colours also agree within NEAR_DUPLICATE_MAX_DELTA_E (CIE76).
+
+Lookup (HammingIndex):
+- Multi-index hashing: the 64 bits are split into 4 chunks of 16, each
+  with its own table of chunk value -> hashes. Two hashes within distance d
+  agree to within d // 4 bits on at least one chunk (pigeonhole), so
+  probing every chunk value that close finds every match: exact, with no
+  false negatives, and only a handful of candidates are compared in full.
+  Lookups stay well under a millisecond at a million hashes
+  (benchmarks/bench_near_duplicates.py). Unlike a BK-tree, entries can be
+  removed, which the bounded palette index below needs.
+
+Users:
+- NearDuplicatePalettes: per-process bounded LRU of hash -> palette, keyed
+  by the extraction settings, consulted by image_pipeline when the exact
+  palette cache misses. Colours are compared as the image's colour layout
+  (mean Lab of a 4x4 grid, see image_pipeline.colour_layout).
+- outfit_service: flags a saved outfit whose image_hash is within the
+  distance of an existing outfit's and whose palette is within the ΔE
+  bound (`duplicate_of`).
+
+Configuration (environment):
+- NEAR_DUPLICATE_DISTANCE     max differing bits (of 64) to count as a
+                              near-duplicate (default 6; -1 disables reuse
+                              and flagging)
+- NEAR_DUPLICATE_MAX_DELTA_E  largest colour difference (ΔE) between
+                              near-duplicates (default 10)
+- NEAR_DUPLICATE_INDEX_SIZE   hashes kept for palette reuse (default 100000)
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from itertools import combinations
+from string import hexdigits
+
+HASH_BITS = 64
+CHUNKS = 4
+MAX_DISTANCE = int(os.getenv("NEAR_DUPLICATE_DISTANCE", "6"))
+MAX_DELTA_E = float(os.getenv("NEAR_DUPLICATE_MAX_DELTA_E", "10"))
+PALETTE_INDEX_SIZE = int(os.getenv("NEAR_DUPLICATE_INDEX_SIZE", "100000"))
+
+
+def format_hash(image_hash):
+    """16-digit hex form of a 64-bit hash (as stored and returned by the API)."""
+    return f"{image_hash:016x}"
+
+
+def parse_hash(text):
+    """Inverse of format_hash. Raises ValueError on anything but 16 hex digits."""
+    if not isinstance(text, str) or len(text) != HASH_BITS // 4 or not all(c in hexdigits for c in text):
+        raise ValueError("image_hash must be 16 hex digits")
+    return int(text, 16)
+
+
+def layout_distance(layout, other):
+    """Mean ΔE between two colour layouts (same-shape (cells, 3) Lab arrays), cell by cell."""
+    import numpy as np
+
+    return float(np.linalg.norm(np.asarray(layout) - np.asarray(other), axis=-1).mean())
+
+
+def palette_distance(lab, other):
+    """
+    ΔE between two palettes ((n, 3) Lab arrays): mean nearest-colour distance
+    in both directions, averaged (as in app.services.colour_index).
+    """
+    import numpy as np
+
+    if not len(lab) or not len(other):
+        return float("inf")
+    delta = np.linalg.norm(np.asarray(lab)[:, None, :] - np.asarray(other)[None, :, :], axis=-1)
+    return float((delta.min(axis=1).mean() + delta.min(axis=0).mean()) / 2)
+
+
+@lru_cache(maxsize=None)
+def _flip_masks(bits, radius):
+    """Every `bits`-wide mask with at most `radius` set bits (0 first)."""
+    return tuple(
+        sum(1 << b for b in positions)
+        for r in range(radius + 1)
+        for positions in combinations(range(bits), r)
+    )
+
+
+class HammingIndex:
+    """Multi-index hashing over 64-bit hashes; each hash carries one or more values."""
+
+    def __init__(self, chunks=CHUNKS):
+        self._bits = HASH_BITS // chunks
+        self._shifts = tuple(range(0, HASH_BITS, self._bits))
+        self._mask = (1 << self._bits) - 1
+        self._tables = [{} for _ in self._shifts]  # chunk value -> set(hashes)
+        self._values = {}  # hash -> [values], oldest first
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    def add(self, image_hash, value):
+        with self._lock:
+            values = self._values.get(image_hash)
+            if values is None:
+                values = self._values[image_hash] = []
+                for table, shift in zip(self._tables, self._shifts):
+                    table.setdefault((image_hash >> shift) & self._mask, set()).add(image_hash)
+            if value not in values:
+                values.append(value)
+                self._count += 1
+
+    def remove(self, image_hash, value):
+        with self._lock:
+            values = self._values.get(image_hash)
+            if not values or value not in values:
+                return
+            values.remove(value)
+            self._count -= 1
+            if values:
+                return
+            del self._values[image_hash]
+            for table, shift in zip(self._tables, self._shifts):
+                key = (image_hash >> shift) & self._mask
+                bucket = table[key]
+                bucket.discard(image_hash)
+                if not bucket:
+                    del table[key]
+
+    def clear(self):
+        with self._lock:
+            for table in self._tables:
+                table.clear()
+            self._values.clear()
+            self._count = 0
+
+    def find(self, image_hash, max_distance=MAX_DISTANCE):
+        """(distance, value) pairs within `max_distance` bits, nearest (then oldest) first."""
+        if max_distance < 0:
+            return []
+        flips = _flip_masks(self._bits, max_distance // len(self._shifts))
+        with self._lock:
+            candidates = set()
+            for table, shift in zip(self._tables, self._shifts):
+                key = (image_hash >> shift) & self._mask
+                for flip in flips:
+                    bucket = table.get(key ^ flip)
+                    if bucket:
+                        candidates.update(bucket)
+            matches = []
+            for candidate in candidates:
+                distance = (candidate ^ image_hash).bit_count()
+                if distance <= max_distance:
+                    matches.extend((distance, order, value) for order, value in enumerate(self._values[candidate]))
+        matches.sort(key=lambda match: match[:2])
+        return [(distance, value) for distance, _, value in matches]
+
+    def nearest(self, image_hash, max_distance=MAX_DISTANCE):
+        """The closest (distance, value) within `max_distance`, or None."""
+        matches = self.find(image_hash, max_distance)
+        return matches[0] if matches else None
+
+
+class NearDuplicatePalettes:
+    """
+    Bounded, thread-safe LRU of image hash -> palette, one HammingIndex per
+    set of extraction settings (a palette is only reused under the settings
+    it was extracted with). Each palette is stored with the colour layout of
+    the image it came from; a hash match whose layout is more than
+    `max_delta_e` away (a colour variant) is not reused.
+    """
+
+    def __init__(self, max_entries=PALETTE_INDEX_SIZE, max_distance=MAX_DISTANCE, max_delta_e=MAX_DELTA_E):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.max_delta_e = max_delta_e
+        self._indexes = {}  # settings -> HammingIndex of hashes
+        self._entries = OrderedDict()  # (settings, hash) -> (palette, colour layout)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "colour_mismatches": 0, "evictions": 0}
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 and self.max_distance >= 0
+
+    def get(self, image_hash, settings, layout):
+        """
+        Palette of the nearest stored near-duplicate whose colour layout is
+        within max_delta_e of `layout`, or None.
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            index = self._indexes.get(settings)
+            matches = index.find(image_hash, self.max_distance) if index is not None else []
+            for _, stored_hash in matches:
+                key = (settings, stored_hash)
+                palette, stored_layout = self._entries[key]
+                if layout_distance(layout, stored_layout) <= self.max_delta_e:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return list(palette)
+            self._stats["colour_mismatches" if matches else "misses"] += 1
+            return None
+
+    def set(self, image_hash, settings, palette, layout):
+        if not self.enabled:
+            return
+        with self._lock:
+            key = (settings, image_hash)
+            if key not in self._entries:
+                self._indexes.setdefault(settings, HammingIndex()).add(image_hash, image_hash)
+            self._entries[key] = (list(palette), layout)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                (old_settings, old_hash), _ = self._entries.popitem(last=False)
+                index = self._indexes[old_settings]
+                index.remove(old_hash, old_hash)
+                if not len(index):
+                    del self._indexes[old_settings]
+                self._stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, "size": len(self._entries), "max_entries": self.max_entries}
+
+
+# Process-wide index used by the image pipeline
+near_duplicate_palettes = NearDuplicatePalettes()
@@ -1,66 +1,523 @@
 # backend/app/services/outfit_service.py
+from . import mongo_service
 from .mongo_service import get_collection
-import json, os
-from datetime import datetime
+from .favorites_store import FavoritesCache, FavoritesIndex, favorite_id
+from .jsonl_store import JsonLinesStore
+from .metrics import storage_op
+from .near_duplicates import MAX_DELTA_E, MAX_DISTANCE as DUPLICATE_DISTANCE, HammingIndex, palette_distance, parse_hash
+from .search_index import MATCH_MODES, SORT_ORDERS, OutfitSearchIndex, search_key
+from app.utils.pagination import mongo_keyset_filter
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta
 
+# Legacy single-array JSON file (read once to migrate into the log below)
 DATA_FILE = os.path.join(os.path.dirname(__file__), "../../data/outfits.json")
 
+# Append-only JSON-lines log used by the JSON fallback
+LOG_FILE = os.getenv("OUTFITS_LOG_FILE", os.path.join(os.path.dirname(__file__), "../../data/outfits.jsonl"))
+
+# fsync policy for the log: "always", "interval" (default) or "never"
+FSYNC_POLICY = os.getenv("OUTFITS_FSYNC", "interval")
+
+_store = None
+_store_lock = threading.Lock()
+
+# MongoDB reads leave out the lowercased search copies of tags / theme (see _search_fields)
+OUTFIT_PROJECTION = {"_id": 0, "tags_norm": 0, "theme_norm": 0}
+
+def _get_store():
+    """
+    Lazily open the outfits log (JSON fallback).
+
+    WHY:
+    - Opening builds the in-memory offset index once per process.
+    - The first open migrates the legacy outfits.json array if the log is empty.
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = JsonLinesStore(LOG_FILE, fsync=FSYNC_POLICY)
+            _store.migrate_from_json_array(DATA_FILE, id_factory=_new_id)
+        return _store
+
+def _new_id():
+    return uuid.uuid4().hex
+
+# Inverted tag/theme index over the JSON log, plus the log version it reflects
+_search_index = OutfitSearchIndex()
+_search_version = None
+_search_lock = threading.Lock()
+
+def _get_search_index():
+    """
+    Return the search index, caught up with the outfits log.
+
+    WHY:
+    - Saves from this process update the index directly (see save_outfit).
+    - Saves from other processes are picked up incrementally via
+      `changes_since`; only compaction or deletes force a full rebuild.
+    - The image-hash index (duplicate flags) is fed from the same records.
+    """
+    global _search_version
+    store = _get_store()
+    with _search_lock:
+        version, records = store.changes_since(_search_version)
+        if records is None:
+            _search_index.clear()
+            _clear_hashes()
+            records = store.iter_records()
+        for record in records:
+            _search_index.add(record)
+            _add_hash(record)
+        _search_version = version
+        return _search_index
+
+# Perceptual-hash index over saved outfits (see near_duplicates), for `duplicate_of` flags
+_duplicate_index = HammingIndex()
+_duplicate_hashes = {}  # outfit id -> hash in _duplicate_index
+_duplicate_colours = {}  # outfit id -> colours, to tell colour variants from duplicates
+_duplicate_since = None  # Newest outfit timestamp loaded from MongoDB
+_duplicate_lock = threading.RLock()
+
+def _add_hash(record):
+    """Index (or re-index) one outfit's image_hash; records without one are skipped."""
+    try:
+        image_hash = parse_hash(record.get("image_hash"))
+    except ValueError:
+        return
+    with _duplicate_lock:
+        previous = _duplicate_hashes.get(record["id"])
+        if previous is not None and previous != image_hash:
+            _duplicate_index.remove(previous, record["id"])
+        _duplicate_hashes[record["id"]] = image_hash
+        _duplicate_colours[record["id"]] = record.get("colours") or []
+        _duplicate_index.add(image_hash, record["id"])
+
+def _clear_hashes():
+    with _duplicate_lock:
+        _duplicate_index.clear()
+        _duplicate_hashes.clear()
+        _duplicate_colours.clear()
+
+def _get_duplicate_index():
+    """
+    Return the image-hash index, caught up with the outfits store.
+    - JSON: caught up together with the search index (same log records).
+    - MongoDB: outfits with an image_hash saved since the last call, read
+      through the (timestamp, id) index.
+    """
+    global _duplicate_since
+    collection = get_collection("outfits")
+    if collection is None:
+        _get_search_index()
+        return _duplicate_index
+
+    with _duplicate_lock:
+        query = {"image_hash": {"$exists": True}}
+        if _duplicate_since is not None:
+            # $gte: outfits saved in the same instant as the last one seen; re-adding is a no-op
+            query["timestamp"] = {"$gte": _duplicate_since}
+        with storage_op("outfits.mongo", "hashes"):
+            for doc in collection.find(query, {"_id": 0, "id": 1, "image_hash": 1, "colours": 1, "timestamp": 1}):
+                _add_hash(doc)
+                if doc.get("timestamp") and (_duplicate_since is None or doc["timestamp"] > _duplicate_since):
+                    _duplicate_since = doc["timestamp"]
+        return _duplicate_index
+
+def _flag_duplicates(entries):
+    """
+    Set `duplicate_of` (id of the nearest saved outfit) on new entries whose
+    image_hash is within NEAR_DUPLICATE_DISTANCE bits of an existing one,
+    including earlier entries of the same batch, and whose palette is within
+    NEAR_DUPLICATE_MAX_DELTA_E of it (colour variants of one shot share a hash).
+    """
+    hashed = [entry for entry in entries if entry.get("image_hash")]
+    if not hashed or DUPLICATE_DISTANCE < 0:
+        return
+    from .colour_index import hex_to_lab  # Deferred: pulls in NumPy
+
+    index = _get_duplicate_index()
+    batch = HammingIndex()
+    batch_colours = {}
+    for entry in hashed:
+        image_hash = parse_hash(entry["image_hash"])
+        lab = hex_to_lab(entry.get("colours"))
+        matches = sorted(index.find(image_hash) + batch.find(image_hash), key=lambda match: match[0])
+        for _, outfit_id in matches:
+            with _duplicate_lock:
+                colours = batch_colours.get(outfit_id, _duplicate_colours.get(outfit_id))
+            if palette_distance(lab, hex_to_lab(colours)) <= MAX_DELTA_E:
+                entry["duplicate_of"] = outfit_id
+                break
+        batch.add(image_hash, entry["id"])
+        batch_colours[entry["id"]] = entry.get("colours") or []
+
 # =========================
 # Outfit CRUD Operations
 # =========================
 
-def get_outfits(page=1, limit=10):
+def get_outfits(page=1, limit=10, cursor=None):
     """
     Retrieve outfits from MongoDB if available; otherwise fallback to JSON file.
-    Pagination ensures efficient data fetching using MongoDB.
+    Newest first.
+    - `cursor` (decoded (timestamp, id) from app.utils.pagination) selects
+      the page right after that outfit: constant cost at any depth.
+    - Without a cursor, `page`/`limit` still work for older clients.
+    In JSON mode the log's offset index seeks straight to the requested page.
     """
+    # Feed / search indexes are created by mongo_service when the client connects
     collection = get_collection("outfits")
-    if collection:
-        skip = (page - 1) * limit
-        return list(collection.find().skip(skip).limit(limit))
+    if collection is not None:
+        query = mongo_keyset_filter(cursor) if cursor else {}
+        found = collection.find(query, OUTFIT_PROJECTION).sort([("timestamp", -1), ("id", -1)])
+        if not cursor:
+            found = found.skip((page - 1) * limit)
+        with storage_op("outfits.mongo", "page"):
+            return list(found.limit(limit))
     
-    with open(DATA_FILE, "r") as f:
-        outfits = json.load(f)
-    start = (page - 1) * limit
-    return outfits[start:start + limit]
+    store = _get_store()
+    with storage_op("outfits.jsonl", "page"):
+        if cursor:
+            # Log order is timestamp order: saves append, imports merge into place
+            return store.page_after(cursor[1], limit=limit, newest_first=True)
+        return store.page(offset=(page - 1) * limit, limit=limit, newest_first=True)
+
+def get_recent_outfits(limit=5, cursor=None):
+    """Newest outfits first (first page of `get_outfits`, or the page after `cursor`)."""
+    return get_outfits(page=1, limit=limit, cursor=cursor)
 
-def save_outfit(image_url, colours, theme, caption="", tags=None):
+def save_outfit(image_url, colours, theme, caption="", tags=None, image_hash=None):
     """
     Persist a new outfit.
     Designed to work in both production (MongoDB) and local/dev environments (JSON).
+    In JSON mode this is a single locked append to the outfits log.
+    `image_hash` (from the upload response) flags near-duplicates of saved
+    outfits: the entry gets `duplicate_of` with the nearest one's id.
     """
-    tags = tags or []
+    entry = _new_entry(image_url, colours, theme, caption, tags, image_hash)
+    _flag_duplicates([entry])
+
+    collection = get_collection("outfits")
+    if collection is not None:
+        # Insert a copy so the returned entry does not gain a BSON ObjectId
+        with storage_op("outfits.mongo", "save"):
+            collection.insert_one(_mongo_doc(entry))
+        _add_hash(entry)
+        _index_colours([entry])
+        return entry
+    
+    with storage_op("outfits.jsonl", "save"):
+        _get_store().append(entry)
+        _get_search_index().add(entry)
+    _index_colours([entry])
+    return entry
+
+def save_outfits(items):
+    """
+    Persist many new outfits in one write.
+    `items` are dicts with the save_outfit keyword arguments.
+    MongoDB: chunked `insert_many`; JSON: one locked append for the whole batch.
+    Returns the saved entries in input order.
+    """
+    entries = [
+        _new_entry(
+            item["image_url"],
+            item["colours"],
+            item.get("theme"),
+            item.get("caption", ""),
+            item.get("tags"),
+            item.get("image_hash"),
+        )
+        for item in items
+    ]
+    if not entries:
+        return []
+    _flag_duplicates(entries)
+
+    if get_collection("outfits") is not None:
+        with storage_op("outfits.mongo", "save_many"):
+            mongo_service.insert_many("outfits", [_mongo_doc(entry) for entry in entries])
+        for entry in entries:
+            _add_hash(entry)
+        _index_colours(entries)
+        return entries
+
+    with storage_op("outfits.jsonl", "save_many"):
+        _get_store().append_many(entries)
+        _get_search_index().add_many(entries)
+    _index_colours(entries)
+    return entries
+
+def import_outfits(records):
+    """
+    Upsert complete outfit records (with "id" and "timestamp") by id, e.g.
+    from an export. Existing outfits with the same id are replaced.
+    MongoDB: chunked `bulk_write` of ReplaceOne(upsert=True); JSON: merged into
+    the log in timestamp order (see JsonLinesStore.merge_many).
+    Returns the number of records written.
+    """
+    records = [{key: value for key, value in record.items() if key != "_id"} for record in records]
+    for record in records:
+        if not record.get("id"):
+            raise ValueError("Every imported outfit needs an 'id'")
+        record.setdefault("timestamp", datetime.utcnow().isoformat())
+    if not records:
+        return 0
+
+    if get_collection("outfits") is not None:
+        from pymongo import ReplaceOne
+
+        with storage_op("outfits.mongo", "import"):
+            mongo_service.bulk_write(
+                "outfits", (ReplaceOne({"id": r["id"]}, _mongo_doc(r), upsert=True) for r in records)
+            )
+        for record in records:
+            _add_hash(record)
+        _index_colours(records, replace=True)
+        return len(records)
+
+    # The log serves feeds (and keyset cursors) in file order, so imported records
+    # are merged into timestamp order rather than appended after newer outfits
+    records.sort(key=lambda r: (r["timestamp"], r["id"]))
+    with storage_op("outfits.jsonl", "import"):
+        _get_store().merge_many(records, key=lambda r: r.get("timestamp") or "")
+        # Catching up with the log indexes the batch (a rewrite forces a full rebuild)
+        _get_search_index()
+    _index_colours(records, replace=True)
+    return len(records)
+
+def iter_outfits(batch_size=1000):
+    """
+    Yield every outfit, oldest first, without loading them all at once.
+    MongoDB: a (timestamp, id)-sorted cursor fetching `batch_size` per round
+    trip; JSON: the log in append order.
+    """
+    collection = get_collection("outfits")
+    if collection is not None:
+        return collection.find({}, OUTFIT_PROJECTION).sort([("timestamp", 1), ("id", 1)]).batch_size(batch_size)
+    return _get_store().iter_records()
+
+def _index_colours(entries, replace=False):
+    """Add saved outfits to the colour-similarity index (imported lazily: pulls in NumPy)."""
+    from .colour_index import index_records
+    index_records("outfits", entries, replace=replace)
 
+def _new_entry(image_url, colours, theme, caption="", tags=None, image_hash=None):
     entry = {
+        "id": _new_id(),
         "timestamp": datetime.utcnow().isoformat(),
         "image_url": image_url,
         "colours": colours,
         "theme": theme,
         "caption": caption,
-        "tags": tags
+        "tags": tags or []
     }
+    if image_hash:
+        entry["image_hash"] = image_hash.lower()
+    return entry
 
-    collection = get_collection("outfits")
-    if collection:
-        collection.insert_one(entry)
-        return entry
-    
-    if not os.path.exists(DATA_FILE):
-        with open(DATA_FILE, "w") as f:
-            json.dump([], f)
+def _search_fields(outfit):
+    """
+    Lowercased copies of an outfit's tags and theme for MongoDB.
 
-    with open(DATA_FILE, "r+") as f:
-        outfits = json.load(f)
-        outfits.insert(0, entry)
-        f.seek(0)
-        json.dump(outfits, f, indent=2)
+    WHY:
+    - Searches match tags / theme case-insensitively (search_index.search_key).
+      MongoDB `$all` / `$in` compare exactly, so queries run against these
+      copies, which have indexes of their own.
+    """
+    return {
+        "tags_norm": list(dict.fromkeys(search_key(t) for t in outfit.get("tags") or [])),
+        "theme_norm": search_key(outfit["theme"]) if outfit.get("theme") else None,
+    }
 
-    return entry
+def _mongo_doc(outfit):
+    """Copy of `outfit` as stored in MongoDB (so the caller's dict gains neither an _id nor search fields)."""
+    return {**outfit, **_search_fields(outfit)}
+
+_search_fields_ready = False
+
+def _backfill_search_fields(collection):
+    """Add the search fields to outfits stored before they existed (once per process)."""
+    global _search_fields_ready
+    if _search_fields_ready:
+        return
+    from pymongo import UpdateOne
+
+    missing = collection.find({"tags_norm": {"$exists": False}}, {"_id": 0, "id": 1, "tags": 1, "theme": 1})
+    with storage_op("outfits.mongo", "backfill"):
+        mongo_service.bulk_write("outfits", (UpdateOne({"id": d["id"]}, {"$set": _search_fields(d)}) for d in list(missing)))
+    _search_fields_ready = True
+
+# =========================
+# 🔎 Search
+# =========================
+
+def search_outfits_by_tags_and_theme(tags, theme, sort="newest", page=1, limit=10, match="all", cursor=None):
+    """
+    Search outfits by tags and/or theme and return one page.
+    `cursor` ((timestamp, id)) replaces page-based offsets with a keyset.
+
+    Returns (outfits, total):
+    - MongoDB: server-side `$all` / `$in` filter on the lowercased search
+      fields (same matching as the JSON index) with sort/skip/limit;
+      `total` comes from `count_documents`, not len() of the results.
+    - JSON: set intersection over the in-memory inverted index; only the
+      page's records are read from the log.
+    """
+    if sort not in SORT_ORDERS:
+        raise ValueError(f"sort must be one of {', '.join(SORT_ORDERS)}")
+    if match not in MATCH_MODES:
+        raise ValueError(f"match must be one of {', '.join(MATCH_MODES)}")
+
+    offset = 0 if cursor else (page - 1) * limit
+
+    collection = get_collection("outfits")
+    if collection is not None:
+        _backfill_search_fields(collection)
+        query = {}
+        if tags:
+            query["tags_norm"] = {"$all" if match == "all" else "$in": [search_key(t) for t in tags]}
+        if theme:
+            query["theme_norm"] = search_key(theme)
+        direction = -1 if sort == "newest" else 1
+        page_query = dict(query)
+        if cursor:
+            page_query.update(mongo_keyset_filter(cursor, descending=(sort == "newest")))
+        found = (
+            collection.find(page_query, OUTFIT_PROJECTION)
+            .sort([("timestamp", direction), ("id", direction)])
+            .skip(offset)
+            .limit(limit)
+        )
+        with storage_op("outfits.mongo", "search"):
+            return list(found), collection.count_documents(query)
+
+    with storage_op("outfits.jsonl", "search"):
+        ids, total = _get_search_index().search(
+            tags=tags, theme=theme, match=match, sort=sort, offset=offset, limit=limit, after=cursor
+        )
+        return _get_store().get_many(ids), total
 
 # =========================
 # ⭐ Favorites (JWT-Scoped)
 # =========================
 
+def get_outfits_by_ids(outfit_ids):
+    """
+    Outfits for `outfit_ids`, in that order (unknown ids are skipped).
+    One batched lookup: a MongoDB `$in` on the unique id index, or the JSON
+    log's id index.
+    """
+    outfit_ids = list(outfit_ids)
+    if not outfit_ids:
+        return []
+
+    collection = get_collection("outfits")
+    if collection is not None:
+        with storage_op("outfits.mongo", "get_many"):
+            found = {doc["id"]: doc for doc in collection.find({"id": {"$in": outfit_ids}}, OUTFIT_PROJECTION)}
+        return [found[outfit_id] for outfit_id in outfit_ids if outfit_id in found]
+
+    with storage_op("outfits.jsonl", "get_many"):
+        return _get_store().get_many(outfit_ids)
+
+def find_similar_outfits(colours, limit=10, exclude_id=None):
+    """
+    Outfits whose palette is closest to `colours` (hex strings), nearest
+    first, each with its palette "distance" (ΔE; lower = more similar).
+    - Matches come from the colour-similarity index (see colour_index);
+      the page is hydrated with one batched lookup.
+    - `exclude_id` drops that outfit (for "more like this one").
+    - Raises ValueError when `colours` has no valid hex colour.
+    """
+    from .colour_index import search
+
+    matches = search("outfits", colours, k=limit + (1 if exclude_id else 0))
+    matches = [(outfit_id, distance) for outfit_id, distance in matches if outfit_id != exclude_id][:limit]
+    outfits = {outfit["id"]: outfit for outfit in get_outfits_by_ids(outfit_id for outfit_id, _ in matches)}
+    return [{**outfits[outfit_id], "distance": distance} for outfit_id, distance in matches if outfit_id in outfits]
+
+# =========================
+# Favorites
+# =========================
+
+# One record per (user, outfit); see favorites_store for the layout notes
+FAVORITES_COLLECTION = "favorite_outfits"
+LEGACY_FAVORITES_COLLECTION = "favorites"  # Old one-array-per-user documents
+FAVORITES_LOG_FILE = os.getenv(
+    "FAVORITES_LOG_FILE", os.path.join(os.path.dirname(__file__), "../../data/favorites.jsonl")
+)
+
+# Hydrated-page cache (FAVORITES_CACHE_SIZE=0 disables it)
+favorites_cache = FavoritesCache(
+    max_users=int(os.getenv("FAVORITES_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("FAVORITES_CACHE_TTL", "10")),
+)
+
+_favorites_store = None
+_favorites_index = FavoritesIndex()
+_favorites_version = None
+_favorites_lock = threading.Lock()
+_migrated_users = set()  # Users whose legacy favorites array this process already checked
+
+def _get_favorites_store():
+    """Lazily open the favorites log (JSON fallback)."""
+    global _favorites_store
+    with _store_lock:
+        if _favorites_store is None:
+            _favorites_store = JsonLinesStore(FAVORITES_LOG_FILE, fsync=FSYNC_POLICY)
+        return _favorites_store
+
+def _get_favorites_index():
+    """Return the per-user favorites index, caught up with the favorites log."""
+    global _favorites_version
+    store = _get_favorites_store()
+    with _favorites_lock:
+        version, records = store.changes_since(_favorites_version)
+        if records is None:
+            _favorites_index.clear()
+            _favorites_index.add_many(store.iter_records())
+        else:
+            _favorites_index.add_many(records)
+        _favorites_version = version
+        return _favorites_index
+
+def _migrate_legacy_favorites(user_id):
+    """
+    Move a user's legacy `favorites` array into per-outfit documents (once).
+
+    WHY:
+    - Old deployments stored every favorite in one growing array per user.
+    - Array order is the order they were added, so each id gets an
+      `added_at` just before now, keeping that order on the new index.
+    - The new documents are written before the array is removed, so a crash
+      in between only means the migration runs again (upserts are idempotent).
+    """
+    if user_id in _migrated_users:
+        return
+    legacy = get_collection(LEGACY_FAVORITES_COLLECTION)
+    doc = legacy.find_one({"user_id": user_id}) if legacy is not None else None
+    if doc and doc.get("outfits"):
+        from pymongo import UpdateOne
+
+        now = datetime.utcnow()
+        outfit_ids = doc["outfits"]
+        operations = (
+            UpdateOne(
+                {"user_id": user_id, "outfit_id": outfit_id},
+                {"$setOnInsert": {"added_at": (now - timedelta(microseconds=len(outfit_ids) - i)).isoformat()}},
+                upsert=True,
+            )
+            for i, outfit_id in enumerate(outfit_ids)
+        )
+        with storage_op("favorites.mongo", "migrate"):
+            mongo_service.bulk_write(FAVORITES_COLLECTION, operations)
+    if doc is not None:
+        legacy.delete_one({"_id": doc["_id"]})
+    _migrated_users.add(user_id)
+
 def save_favorite(user_id, outfit_id):
     """
     Save an outfit to the authenticated user's favorites.
@@ -68,27 +525,73 @@ def save_favorite(user_id, outfit_id):
     WHY:
     - `user_id` must come from a verified JWT, ensuring users can only
       modify their own favorites.
-    - `$addToSet` prevents duplicate favorites without extra logic.
+    - One document per (user, outfit) with a unique index: re-saving is a
+      no-op (`$setOnInsert` keeps the original `added_at`) and no user
+      document grows without bound.
+    - The user's cached favorites pages are dropped.
     """
-    collection = get_collection("favorites")
+    collection = get_collection(FAVORITES_COLLECTION)
+    if collection is not None:
+        _migrate_legacy_favorites(user_id)  # First, so migrated favorites sort before this one
+        added_at = datetime.utcnow().isoformat()
+        with storage_op("favorites.mongo", "save"):
+            collection.update_one(
+                {"user_id": user_id, "outfit_id": outfit_id},  # Scoped to the authenticated user
+                {"$setOnInsert": {"added_at": added_at}},
+                upsert=True,
+            )
+    else:
+        store = _get_favorites_store()
+        record_id = favorite_id(user_id, outfit_id)
+        added_at = datetime.utcnow().isoformat()
+        with storage_op("favorites.jsonl", "save"):
+            # Checked under the log's write lock: a concurrent re-save cannot append a second copy
+            record = {"id": record_id, "user_id": user_id, "outfit_id": outfit_id, "added_at": added_at}
+            if store.append_if_absent(record):
+                _get_favorites_index()  # Catching up indexes the record just appended
 
-    # 🆕 ADDED: JWT-scoped favorites persistence
-    collection.update_one(
-        { "user_id": user_id },                 # 🔐 Scope data authenticated user
-        { "$addToSet": {"outfits": outfit_id}}, # ✅ Prevent duplicates automatically
-        upsert=True                             # 🧠 Create doc if user favourite don't exist yet
-    )
+    favorites_cache.invalidate(user_id)
 
-def get_favorites(user_id):
+def get_favorites(user_id, limit=20, cursor=None):
     """
-    Retrieve all favorite outfits IDs for the authenticated user.
+    One page of the authenticated user's favorite outfits, most recently
+    favorited first, as full outfit records (plus "favorited_at").
 
-    WHY:
-    - Keeps favorites isolated per user (JWT identity boundary).
-    - Return a predictable empty list when no favorites exist.
+    - `cursor` is the (added_at, outfit_id) of the last favorite already
+      served; pages cost O(limit) however many favorites the user has.
+    - The page's outfits are fetched in one batched lookup
+      (get_outfits_by_ids) instead of one request per id. Favorites whose
+      outfit no longer exists are left out.
+    - Returns (outfits, next_key); `next_key` is the cursor for the next
+      page, or None on the last page.
     """
-    collection = get_collection("favorites")
-    doc = collection.find_one({ "user_id": user_id })
+    cache_key = (limit, tuple(cursor) if cursor else None)
+    cached = favorites_cache.get(user_id, cache_key)
+    if cached is not None:
+        return cached
+
+    collection = get_collection(FAVORITES_COLLECTION)
+    if collection is not None:
+        _migrate_legacy_favorites(user_id)
+        query = {"user_id": user_id}
+        if cursor:
+            query.update(mongo_keyset_filter(cursor, fields=("added_at", "outfit_id")))
+        found = collection.find(query, {"_id": 0, "added_at": 1, "outfit_id": 1})
+        with storage_op("favorites.mongo", "page"):
+            rows = [
+                (doc["added_at"], doc["outfit_id"])
+                for doc in found.sort([("added_at", -1), ("outfit_id", -1)]).limit(limit)
+            ]
+    else:
+        with storage_op("favorites.jsonl", "page"):
+            rows = _get_favorites_index().page(user_id, limit, cursor)
 
-    # 🆕 ADDED: Safe Fallback to empty list
-    return doc["outfits"] if doc else []
\ No newline at end of file
+    outfits = {outfit["id"]: outfit for outfit in get_outfits_by_ids(outfit_id for _, outfit_id in rows)}
+    page = [
+        {**outfits[outfit_id], "favorited_at": added_at}
+        for added_at, outfit_id in rows
+        if outfit_id in outfits
+    ]
+    result = (page, rows[-1] if limit > 0 and len(rows) == limit else None)
+    favorites_cache.set(user_id, cache_key, result)
+    return result
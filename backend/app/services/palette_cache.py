@@ -0,0 +1,210 @@
+# backend/app/services/palette_cache.py
+"""
+Palette Cache
+-------------
+WHY THIS FILE EXISTS:
+- Users re-upload the same outfit photos, and every upload used to pay for
+  a full KMeans run.
+- Palettes are keyed by a hash of the decoded crop plus the extraction
+  parameters, so identical pixels + settings short-circuit `extract_palette`.
+
+Tiers:
+- Memory: bounded LRU (OrderedDict), always on unless size is 0.
+- Disk:   optional JSON-per-key directory that survives restarts.
+
+Both tiers honour an optional TTL. The cache stores the exact palette list,
+so responses built from a hit are byte-identical to uncached ones.
+The disk tier is best effort: a failed write (full disk, permissions) is
+logged and counted in `disk_errors`, and the palette is still served.
+
+Configuration (environment):
+- PALETTE_CACHE_SIZE  max in-memory entries (default 1024, 0 disables caching)
+- PALETTE_CACHE_TTL   seconds before an entry expires (default: never)
+- PALETTE_CACHE_DIR   directory for the on-disk tier (default: disabled)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+def make_cache_key(crop, k, crop_size, engine, seed=None, reduce=1, max_pixels=None, region="center"):
+    """
+    Build a cache key from the decoded crop's pixels and extraction params.
+
+    WHY:
+    - Hashing decoded pixels (not upload bytes) means the same photo hits
+      even if it was re-encoded with different metadata.
+    - Shape and dtype are part of the key so two crops with the same raw
+      bytes but different geometry never collide.
+    """
+    import numpy as np  # Deferred: keeps the cache importable without the numeric stack
+
+    digest = hashlib.sha256()
+    digest.update(json.dumps({
+        "shape": list(crop.shape),
+        "dtype": str(crop.dtype),
+        "k": k,
+        "crop_size": list(crop_size),
+        "engine": engine,
+        "seed": seed,
+        "reduce": reduce,
+        "max_pixels": max_pixels or 0,
+        "region": region,
+    }, sort_keys=True).encode("utf-8"))
+    # Crops are usually strided views into the full image; hash their pixels in row order
+    digest.update(np.ascontiguousarray(crop).data)
+    return digest.hexdigest()
+
+
+class PaletteCache:
+    """Thread-safe two-tier (memory LRU + optional disk) palette cache."""
+
+    def __init__(self, max_entries=1024, ttl_seconds=None, disk_dir=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir
+        self._entries = OrderedDict()  # key -> (expires_at or None, palette)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "disk_errors": 0}
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    @classmethod
+    def from_env(cls):
+        """Build the process-wide cache from PALETTE_CACHE_* environment variables."""
+        ttl = os.getenv("PALETTE_CACHE_TTL", "").strip()
+        return cls(
+            max_entries=int(os.getenv("PALETTE_CACHE_SIZE", "1024")),
+            ttl_seconds=float(ttl) if ttl else None,
+            disk_dir=os.getenv("PALETTE_CACHE_DIR") or None,
+        )
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    # -------------------------
+    # Public API
+    # -------------------------
+
+    def get(self, key):
+        """Return the cached palette for `key`, or None on a miss."""
+        if not self.enabled:
+            return None
+
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, palette = entry
+                if expires_at is None or expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return list(palette)
+                # Expired: drop it and fall through to the disk tier / miss
+                del self._entries[key]
+                self._stats["expirations"] += 1
+
+        record = self._disk_get(key, now)
+        with self._lock:
+            if record is None:
+                self._stats["misses"] += 1
+                return None
+            palette, expires_at = record
+            self._stats["disk_hits"] += 1
+            # Promote to memory, keeping the expiry the entry was written with
+            self._remember(key, palette, expires_at)
+        return list(palette)
+
+    def set(self, key, palette):
+        """Store `palette` under `key` in every enabled tier."""
+        if not self.enabled:
+            return
+
+        expires_at = self._expiry(time.time())
+        with self._lock:
+            self._remember(key, list(palette), expires_at)
+        self._disk_set(key, palette, expires_at)
+
+    def clear(self):
+        """Drop every in-memory entry (the disk tier is left untouched)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Snapshot of hit/miss/eviction counters plus current size."""
+        with self._lock:
+            return {**self._stats, "size": len(self._entries), "max_entries": self.max_entries}
+
+    # -------------------------
+    # Internals
+    # -------------------------
+
+    def _expiry(self, now):
+        return now + self.ttl_seconds if self.ttl_seconds else None
+
+    def _remember(self, key, palette, expires_at):
+        """Insert into the LRU tier and evict the oldest entries. Caller holds the lock."""
+        self._entries[key] = (expires_at, palette)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _disk_path(self, key):
+        # Shard by the first two hex chars so no directory grows unbounded
+        return os.path.join(self.disk_dir, key[:2], f"{key}.json")
+
+    def _disk_get(self, key, now):
+        """Return (palette, expires_at) from the disk tier, or None."""
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "r") as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        expires_at = record.get("expires_at")
+        if expires_at is not None and expires_at <= now:
+            with self._lock:
+                self._stats["expirations"] += 1
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return record.get("palette"), expires_at
+
+    def _disk_set(self, key, palette, expires_at):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+
+        # Write to a temp file then rename so readers never see partial JSON
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "w") as f:
+                json.dump({"palette": list(palette), "expires_at": expires_at}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            # The memory tier already has the entry; a cache write must not fail the upload
+            logging.warning("[CACHE] Could not write palette cache entry %s: %s", key, e)
+            with self._lock:
+                self._stats["disk_errors"] += 1
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
+# Process-wide cache used by the image routes
+palette_cache = PaletteCache.from_env()
@@ -2,59 +2,159 @@
 
 """
 Persistence layer for colour palettes.
-- Stores palettes as JSON (simple file-based storage).
+- Delegates storage to a pluggable backend (see palette_store):
+  JSON-lines log (default), SQLite or MongoDB.
 - Provides helper functions to save and fetch palettes.
-- Future-ready: can be swapped for a real DB without changing route logic.
+- Recent palettes are served from a small in-memory ring buffer that is
+  kept warm on writes, so they cost O(limit) instead of O(file size).
+
+Configuration (environment):
+- PALETTE_STORE          "jsonl" (default), "sqlite" or "mongo"
+- PALETTES_LOG_FILE      JSON-lines log path (default data/palettes.jsonl)
+- PALETTES_DB            SQLite path (default data/palettes.sqlite3)
+- RECENT_PALETTES_SIZE   ring buffer capacity (default 100)
 """
 
-import json
 import os
+import threading
+import uuid
 from datetime import datetime
 
-# Location of our JSON "database" file
-DATA_FILE = os.path.join(os.path.dirname(__file__), "../../data/palettes.json")
+from .metrics import storage_op
+from .palette_store import (
+    DATA_DIR,
+    JsonLinesPaletteStore,
+    MongoPaletteStore,
+    RecentPalettes,
+    SQLitePaletteStore,
+)
+
+# Legacy JSON "database" file (migrated into the JSON-lines log on first use)
+DATA_FILE = os.path.join(DATA_DIR, "palettes.json")
+
+PALETTE_STORE = os.getenv("PALETTE_STORE", "jsonl")
+LOG_FILE = os.getenv("PALETTES_LOG_FILE", os.path.join(DATA_DIR, "palettes.jsonl"))
+DB_FILE = os.getenv("PALETTES_DB", os.path.join(DATA_DIR, "palettes.sqlite3"))
+RECENT_SIZE = int(os.getenv("RECENT_PALETTES_SIZE", "100"))
+
+_store = None
+_recent = None
+_lock = threading.Lock()
 
-def _load_data():
-    """Load all palettes from JSON file (returns [] if file does not exist)."""
-    if not os.path.exists(DATA_FILE):
-        return []
-    with open(DATA_FILE, "r") as f:
-        return json.load(f)
+def _new_id():
+    return uuid.uuid4().hex
 
-def _save_data(data):
-    """Persist palettes list back into the JSON file with indentation."""
-    with open(DATA_FILE, "w") as f:
-        json.dump(data, f, indent=2)
+def _build_store():
+    """Create the configured storage backend."""
+    if PALETTE_STORE == "jsonl":
+        return JsonLinesPaletteStore(LOG_FILE, legacy_json=DATA_FILE, id_factory=_new_id)
+    if PALETTE_STORE == "sqlite":
+        return SQLitePaletteStore(DB_FILE)
+    if PALETTE_STORE == "mongo":
+        return MongoPaletteStore()
+    raise ValueError(f"Unknown PALETTE_STORE '{PALETTE_STORE}'. Use jsonl, sqlite or mongo.")
+
+def _get_store():
+    """Lazily create the backend and its recent-palettes buffer (once per process)."""
+    global _store, _recent
+    with _lock:
+        if _store is None:
+            _store = _build_store()
+            _recent = RecentPalettes(_store, size=RECENT_SIZE)
+        return _store, _recent
 
 def save_palette(image_url, colours, theme):
     """
     Save a new colour palette entry.
     Schema of each entry:
     {
+        "id": <hex string>,
         "timestamp": <UTC ISO8601 string>
         "image_url": <str>,
         "colours": <list of hex colour strings>,
         "theme": <str>    
     }
-    - Adds new palettes at the top of the list (most recent first).
+    - Appends to the configured store (no full-file rewrite).
     - Returns the saved entry for immediate use.
     """
-    data = _load_data()
+    store, recent = _get_store()
     entry = {
+        "id": _new_id(),
         "timestamp": datetime.utcnow().isoformat(),
         "image_url": image_url,
         "colours": colours,
         "theme": theme
     }
-    data.insert(0, entry) # push new entry to the front
-    _save_data(data)
+    with storage_op(f"palettes.{PALETTE_STORE}", "save"):
+        store.save(entry)
+    recent.push(entry) # keep the recent buffer warm
+    _index_colours([entry])
     return entry
 
-def get_recent_palettes(limit=5):
+def get_recent_palettes(limit=5, cursor=None):
     """
     Retrieve the most recent colour palettes.
     - Default limit is 5 newest entries.
-    - Slices the JSON data list instead of loading everthing into memory.
+    - `cursor` ((timestamp, id) of the last palette already shown) returns
+      the next page via the store's (timestamp, id) index.
+    - Served from the in-memory ring buffer; only limits larger than the
+      buffer (or cursors past it) reach the storage backend.
+    """
+    _, recent = _get_store()
+    with storage_op(f"palettes.{PALETTE_STORE}", "recent"):
+        return recent.get(limit, cursor)
+
+def get_palettes_by_ids(palette_ids):
+    """Palettes for `palette_ids`, in that order (unknown ids skipped); one batched lookup."""
+    store, _ = _get_store()
+    with storage_op(f"palettes.{PALETTE_STORE}", "get_many"):
+        return store.get_many(palette_ids)
+
+def find_similar_palettes(colours, limit=10, exclude_id=None):
     """
-    data = _load_data()
-    return data[:limit]
\ No newline at end of file
+    Saved palettes closest to `colours` (hex strings), nearest first, each
+    with its "distance" (ΔE; lower = more similar). See colour_index.
+    Raises ValueError when `colours` has no valid hex colour.
+    """
+    from .colour_index import search
+
+    matches = search("palettes", colours, k=limit + (1 if exclude_id else 0))
+    matches = [(palette_id, distance) for palette_id, distance in matches if palette_id != exclude_id][:limit]
+    palettes = {p["id"]: p for p in get_palettes_by_ids(palette_id for palette_id, _ in matches)}
+    return [{**palettes[palette_id], "distance": distance} for palette_id, distance in matches if palette_id in palettes]
+
+def _index_colours(entries, replace=False):
+    """Add saved palettes to the colour-similarity index (imported lazily: pulls in NumPy)."""
+    from .colour_index import index_records
+    index_records("palettes", entries, replace=replace)
+
+def iter_palettes():
+    """Yield every palette, oldest first, streamed from the configured store."""
+    store, _ = _get_store()
+    return store.iter_all()
+
+def import_palettes(records):
+    """
+    Upsert complete palette records (with "id" and "timestamp") by id, e.g.
+    from an export. Existing palettes with the same id are replaced.
+    - One batched write to the store (executemany / bulk_write / one merge
+      into the JSON-lines log, which keeps it in timestamp order).
+    - The recent buffer is dropped and re-warmed on the next read.
+    Returns the number of records written.
+    """
+    records = [{key: value for key, value in record.items() if key != "_id"} for record in records]
+    for record in records:
+        if not record.get("id"):
+            raise ValueError("Every imported palette needs an 'id'")
+        record.setdefault("timestamp", datetime.utcnow().isoformat())
+    if not records:
+        return 0
+
+    # Oldest first: the JSON-lines store merges them into timestamp order
+    records.sort(key=lambda r: (r["timestamp"], r["id"]))
+    store, recent = _get_store()
+    with storage_op(f"palettes.{PALETTE_STORE}", "import"):
+        store.save_many(records)
+    recent.invalidate()
+    _index_colours(records, replace=True)
+    return len(records)
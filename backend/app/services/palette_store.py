@@ -0,0 +1,299 @@
+# backend/app/services/palette_store.py
+"""
+Palette Storage Backends
+------------------------
+WHY THIS FILE EXISTS:
+- `palette_service` used to re-read and re-write the whole palettes.json
+  for every save and every "recent" query.
+- Storage is now a small interface with interchangeable backends, so the
+  service (and routes) never care where palettes live.
+
+Backend interface:
+    save(entry) -> entry          persist one palette (entry carries "id")
+    save_many(entries)            upsert many by id in one batch (bulk import)
+    iter_all()                    every palette, oldest first, streamed
+    get_many(ids)                 palettes for ids, in that order (missing skipped)
+    recent(limit, cursor=None)    newest first; `cursor` = (timestamp, id)
+                                  of the last entry already served
+    version() -> token | None     changes when any process writes; None if
+                                  the backend cannot tell cheaply
+
+Backends:
+- "jsonl"   append-only JSON-lines log (default, local/dev)
+- "sqlite"  single-file database with timestamp / theme indexes
+- "mongo"   MongoDB `palettes` collection via mongo_service.get_collection
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from itertools import islice
+
+from .jsonl_store import JsonLinesStore
+from .mongo_service import get_collection
+from app.utils.pagination import mongo_keyset_filter
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "../../data")
+
+
+class JsonLinesPaletteStore:
+    """Palettes in an append-only JSON-lines log (see jsonl_store)."""
+
+    def __init__(self, path, legacy_json=None, id_factory=None, fsync="interval"):
+        self.log = JsonLinesStore(path, fsync=fsync)
+        if legacy_json and id_factory:
+            self.log.migrate_from_json_array(legacy_json, id_factory=id_factory)
+
+    def save(self, entry):
+        return self.log.append(entry)
+
+    def save_many(self, entries):
+        # Kept in timestamp order so "recent" and its cursors stay consistent when
+        # imports bring in older palettes; new saves are a plain append
+        self.log.merge_many(entries, key=lambda e: e.get("timestamp") or "")
+
+    def iter_all(self):
+        return self.log.iter_records()
+
+    def get_many(self, ids):
+        return self.log.get_many(ids)
+
+    def recent(self, limit, cursor=None):
+        if cursor:
+            return self.log.page_after(cursor[1], limit=limit, newest_first=True)
+        return self.log.page(offset=0, limit=limit, newest_first=True)
+
+    def version(self):
+        return self.log.version()
+
+
+class SQLitePaletteStore:
+    """
+    Palettes in SQLite.
+
+    WHY:
+    - Indexes on timestamp and (theme, timestamp) keep recent / per-theme
+      queries O(limit) regardless of table size.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn().executescript("""
+            CREATE TABLE IF NOT EXISTS palettes (
+                id TEXT PRIMARY KEY,
+                timestamp TEXT NOT NULL,
+                image_url TEXT,
+                colours TEXT NOT NULL,
+                theme TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_palettes_timestamp_id ON palettes (timestamp DESC, id DESC);
+            CREATE INDEX IF NOT EXISTS idx_palettes_theme_timestamp ON palettes (theme, timestamp DESC, id DESC);
+            CREATE TABLE IF NOT EXISTS palette_changes (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                changes INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO palette_changes (id, changes) VALUES (1, 0);
+        """)
+
+    def _conn(self):
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def save(self, entry):
+        conn = self._conn()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO palettes (id, timestamp, image_url, colours, theme) VALUES (?, ?, ?, ?, ?)",
+                (entry["id"], entry["timestamp"], entry["image_url"], json.dumps(entry["colours"]), entry["theme"]),
+            )
+            self._count_change(conn)
+        return entry
+
+    def save_many(self, entries):
+        # One transaction for the whole batch
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO palettes (id, timestamp, image_url, colours, theme) VALUES (?, ?, ?, ?, ?)",
+                [(e["id"], e["timestamp"], e.get("image_url"), json.dumps(e["colours"]), e.get("theme")) for e in entries],
+            )
+            self._count_change(conn)
+
+    def iter_all(self, batch_size=1000):
+        # Dedicated connection so a long export never holds the request thread's one
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            cursor = conn.execute("SELECT * FROM palettes ORDER BY timestamp, id")
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield self._row_to_entry(row)
+        finally:
+            conn.close()
+
+    def get_many(self, ids):
+        ids = list(ids)
+        if not ids:
+            return []
+        rows = self._conn().execute(
+            f"SELECT * FROM palettes WHERE id IN ({','.join('?' * len(ids))})", ids
+        ).fetchall()
+        found = {row["id"]: self._row_to_entry(row) for row in rows}
+        return [found[i] for i in ids if i in found]
+
+    def recent(self, limit, cursor=None):
+        if cursor:
+            # Row-value comparison walks the (timestamp, id) index from the cursor
+            rows = self._conn().execute(
+                "SELECT * FROM palettes WHERE (timestamp, id) < (?, ?) "
+                "ORDER BY timestamp DESC, id DESC LIMIT ?",
+                (cursor[0], cursor[1], limit),
+            ).fetchall()
+        else:
+            rows = self._conn().execute(
+                "SELECT * FROM palettes ORDER BY timestamp DESC, id DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [self._row_to_entry(row) for row in rows]
+
+    def version(self):
+        # Not PRAGMA data_version: that is per connection, and connections are per thread
+        return self._conn().execute("SELECT changes FROM palette_changes").fetchone()[0]
+
+    @staticmethod
+    def _count_change(conn):
+        """Bump the change counter inside the writing transaction."""
+        conn.execute("UPDATE palette_changes SET changes = changes + 1")
+
+    @staticmethod
+    def _row_to_entry(row):
+        return {
+            "id": row["id"],
+            "timestamp": row["timestamp"],
+            "image_url": row["image_url"],
+            "colours": json.loads(row["colours"]),
+            "theme": row["theme"],
+        }
+
+
+class MongoPaletteStore:
+    """Palettes in the MongoDB `palettes` collection."""
+
+    def __init__(self, collection=None):
+        self.collection = collection if collection is not None else get_collection("palettes")
+        if self.collection is None:
+            raise RuntimeError("PALETTE_STORE=mongo but MongoDB is not configured")
+        self.collection.create_index([("timestamp", -1), ("id", -1)])
+        self.collection.create_index([("theme", 1), ("timestamp", -1), ("id", -1)])
+
+    def save(self, entry):
+        # Insert a copy so the caller's entry does not gain a BSON ObjectId
+        self.collection.insert_one(dict(entry))
+        return entry
+
+    def save_many(self, entries):
+        from pymongo import ReplaceOne
+
+        operations = [ReplaceOne({"id": e["id"]}, {k: v for k, v in e.items() if k != "_id"}, upsert=True) for e in entries]
+        if operations:
+            self.collection.bulk_write(operations, ordered=False)
+
+    def iter_all(self, batch_size=1000):
+        # The (timestamp, id) index serves this sort; the cursor fetches in batches
+        return self.collection.find({}, {"_id": 0}).sort([("timestamp", 1), ("id", 1)]).batch_size(batch_size)
+
+    def get_many(self, ids):
+        ids = list(ids)
+        found = {doc["id"]: doc for doc in self.collection.find({"id": {"$in": ids}}, {"_id": 0})}
+        return [found[i] for i in ids if i in found]
+
+    def recent(self, limit, cursor=None):
+        query = mongo_keyset_filter(cursor) if cursor else {}
+        found = self.collection.find(query, {"_id": 0}).sort([("timestamp", -1), ("id", -1)])
+        return list(found.limit(limit))
+
+    def version(self):
+        return None  # No cheap cross-process change signal; callers fall back to a TTL
+
+
+class RecentPalettes:
+    """
+    Bounded newest-first ring buffer in front of a palette store.
+
+    WHY:
+    - "Recent palettes" is the hot read path; serving it from memory makes
+      it O(limit) instead of a storage round-trip.
+    - The buffer is kept warm on writes from this process. Writes from
+      other processes are detected with `store.version()`; stores that
+      cannot provide one are re-read after `ttl` seconds.
+    """
+
+    def __init__(self, store, size=100, ttl=2.0, clock=time.monotonic):
+        self.store = store
+        self.size = size
+        self.ttl = ttl
+        self._clock = clock
+        self._buffer = None  # collections.deque once warmed
+        self._version = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Forget the buffer (after bulk writes); the next read re-warms it."""
+        with self._lock:
+            self._buffer = None
+
+    def push(self, entry):
+        """
+        Record a palette this process just saved.
+
+        The version is left alone: the store's current one may also cover
+        another process's write that this buffer has not seen, so the next
+        read re-warms once instead.
+        """
+        with self._lock:
+            if self._buffer is not None:
+                self._buffer.appendleft(entry)
+
+    def get(self, limit, cursor=None):
+        if limit > self.size:
+            return self.store.recent(limit, cursor)  # Beyond the buffer: ask storage directly
+
+        with self._lock:
+            if self._is_stale():
+                self._warm()
+            start = 0
+            if cursor:
+                # Early cursor pages are usually still in the buffer; otherwise ask storage
+                start = next((i + 1 for i, e in enumerate(self._buffer) if e["id"] == cursor[1]), None)
+                # A full buffer may have older entries in storage past its end
+                runs_past_buffer = start is not None and start + limit > len(self._buffer)
+                if start is None or (runs_past_buffer and len(self._buffer) == self.size):
+                    return self.store.recent(limit, cursor)
+            return [dict(entry) for entry in islice(self._buffer, start, start + limit)]
+
+    def _is_stale(self):
+        if self._buffer is None:
+            return True
+        version = self.store.version()
+        if version is None:
+            return self._clock() - self._loaded_at > self.ttl
+        return version != self._version
+
+    def _warm(self):
+        self._version = self.store.version()
+        self._buffer = deque(self.store.recent(self.size), maxlen=self.size)
+        self._loaded_at = self._clock()
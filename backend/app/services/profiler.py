@@ -0,0 +1,88 @@
+# backend/app/services/profiler.py
+"""
+Opt-in Request Profiler
+-----------------------
+WHY THIS FILE EXISTS:
+- Span metrics say *which* stage is slow; a profile says *why*.
+- Profiling every request is far too expensive, so it is off by default
+  and only runs for requests that are explicitly selected.
+
+Selecting requests (PROFILE_REQUESTS):
+- unset / "0"   never profile (default; the hook is a single flag check)
+- "header"      profile requests carrying `X-Profile: 1`
+- "sample"      profile a random PROFILE_SAMPLE_RATE fraction of requests
+                (plus any that send the header)
+
+Output: one file per profiled request in PROFILE_DIR (default
+data/profiles). cProfile `.prof` files by default (open with `snakeviz`
+or `python -m pstats`); PROFILER=pyinstrument writes `.html` flame views
+when pyinstrument is installed.
+"""
+
+import logging
+import os
+import random
+import time
+import uuid
+
+PROFILE_MODES = ("header", "sample")
+PROFILE_MODE = os.getenv("PROFILE_REQUESTS", "").strip().lower()
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0.01"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(os.path.dirname(__file__), "../../data/profiles"))
+PROFILER = os.getenv("PROFILER", "cprofile")
+
+PROFILE_HEADER = "X-Profile"
+
+ENABLED = PROFILE_MODE in PROFILE_MODES
+
+
+def should_profile(headers):
+    """Decide whether the current request is profiled."""
+    if not ENABLED:
+        return False
+    if headers.get(PROFILE_HEADER, "") in ("1", "true"):
+        return True
+    return PROFILE_MODE == "sample" and random.random() < PROFILE_SAMPLE_RATE
+
+
+class RequestProfile:
+    """Wraps cProfile or pyinstrument for one request."""
+
+    def __init__(self, label):
+        self.label = label
+        self._kind = PROFILER
+        if self._kind == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+                self._profiler = Profiler()
+            except ImportError:
+                logging.warning("[PROFILE] pyinstrument not installed; falling back to cProfile")
+                self._kind = "cprofile"
+        if self._kind != "pyinstrument":
+            import cProfile
+            self._profiler = cProfile.Profile()
+
+    def start(self):
+        if self._kind == "pyinstrument":
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop_and_dump(self):
+        """Stop profiling and write the result; returns the output path."""
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        safe_label = "".join(c if c.isalnum() else "_" for c in self.label).strip("_") or "root"
+        base = os.path.join(PROFILE_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}-{safe_label}")
+
+        if self._kind == "pyinstrument":
+            self._profiler.stop()
+            path = base + ".html"
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self._profiler.output_html())
+        else:
+            self._profiler.disable()
+            path = base + ".prof"
+            self._profiler.dump_stats(path)
+
+        logging.info(f"[PROFILE] {self.label} -> {path}")
+        return path
@@ -0,0 +1,141 @@
+# backend/app/services/search_index.py
+"""
+Outfit Search Index
+-------------------
+WHY THIS FILE EXISTS:
+- `/api/outfits/search` used to materialise every matching outfit, sort
+  the whole list in Python and slice out one page.
+- This is an in-memory inverted index (tag → outfit ids, theme → outfit
+  ids) for the JSON fallback. Queries are set intersections/unions over
+  ids; only the requested page of records is ever read from storage.
+
+Matching:
+- Tags and themes are matched case-insensitively.
+- match="all" → outfit has every requested tag (Mongo `$all`)
+  match="any" → outfit has at least one requested tag (Mongo `$in`)
+- A theme, if given, must also match.
+
+Ordering is by (timestamp, id), newest first by default.
+"""
+
+import heapq
+import threading
+
+SORT_ORDERS = ("newest", "oldest")
+MATCH_MODES = ("all", "any")
+
+
+def search_key(value):
+    """Case- and whitespace-insensitive form of a tag or theme (shared with the MongoDB search fields)."""
+    return str(value).strip().lower()
+
+
+class OutfitSearchIndex:
+    """Inverted tag/theme index over outfit ids, maintained incrementally."""
+
+    def __init__(self):
+        self._by_tag = {}    # normalised tag -> set(ids)
+        self._by_theme = {}  # normalised theme -> set(ids)
+        self._docs = {}      # id -> (sort_key, tags, theme) for updates/removals
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def add(self, outfit):
+        """Index (or re-index) one outfit record."""
+        outfit_id = outfit["id"]
+        tags = frozenset(search_key(t) for t in outfit.get("tags") or [])
+        theme = search_key(outfit["theme"]) if outfit.get("theme") else None
+        sort_key = (outfit.get("timestamp") or "", outfit_id)
+
+        with self._lock:
+            self.remove(outfit_id)
+            self._docs[outfit_id] = (sort_key, tags, theme)
+            for tag in tags:
+                self._by_tag.setdefault(tag, set()).add(outfit_id)
+            if theme is not None:
+                self._by_theme.setdefault(theme, set()).add(outfit_id)
+
+    def add_many(self, outfits):
+        with self._lock:
+            for outfit in outfits:
+                self.add(outfit)
+
+    def remove(self, outfit_id):
+        with self._lock:
+            doc = self._docs.pop(outfit_id, None)
+            if doc is None:
+                return
+            _, tags, theme = doc
+            for tag in tags:
+                self._discard(self._by_tag, tag, outfit_id)
+            if theme is not None:
+                self._discard(self._by_theme, theme, outfit_id)
+
+    def clear(self):
+        with self._lock:
+            self._by_tag.clear()
+            self._by_theme.clear()
+            self._docs.clear()
+
+    def search(self, tags=None, theme=None, match="all", sort="newest", offset=0, limit=10, after=None):
+        """
+        Return (page_ids, total) for the query.
+
+        Only ids are handled here; the caller hydrates the page from storage.
+        Picking the page uses a bounded heap, so cost is O(m log(offset+limit))
+        for m matches instead of a full sort. With `after=(timestamp, id)`
+        (keyset cursor) the window is just `limit`, whatever the page depth.
+        """
+        if match not in MATCH_MODES:
+            raise ValueError(f"match must be one of {MATCH_MODES}")
+        if sort not in SORT_ORDERS:
+            raise ValueError(f"sort must be one of {SORT_ORDERS}")
+
+        with self._lock:
+            candidates = self._candidates([search_key(t) for t in tags or []], theme, match)
+            total = len(candidates)
+            window = offset + limit
+            key = lambda outfit_id: self._docs[outfit_id][0]
+            if after is not None:
+                after = tuple(after)
+                if sort == "newest":
+                    candidates = (i for i in candidates if self._docs[i][0] < after)
+                else:
+                    candidates = (i for i in candidates if self._docs[i][0] > after)
+            if sort == "newest":
+                ranked = heapq.nlargest(window, candidates, key=key)
+            else:
+                ranked = heapq.nsmallest(window, candidates, key=key)
+        return ranked[offset:window], total
+
+    def _candidates(self, tags, theme, match):
+        """Set algebra over posting lists, smallest sets first."""
+        sets = []
+        if tags:
+            tag_sets = [self._by_tag.get(tag, set()) for tag in tags]
+            if match == "all":
+                sets.extend(tag_sets)
+            else:
+                sets.append(set().union(*tag_sets))
+        if theme:
+            sets.append(self._by_theme.get(search_key(theme), set()))
+
+        if not sets:
+            return set(self._docs)
+        sets.sort(key=len)
+        result = set(sets[0])
+        for other in sets[1:]:
+            if not result:
+                break
+            result &= other
+        return result
+
+    @staticmethod
+    def _discard(postings, key, outfit_id):
+        ids = postings.get(key)
+        if ids is not None:
+            ids.discard(outfit_id)
+            if not ids:
+                del postings[key]
@@ -0,0 +1,213 @@
+# backend/app/services/segmentation.py
+"""
+Garment Segmentation
+--------------------
+WHY THIS FILE EXISTS:
+- A fixed centre crop often lands on background, hair or skin rather than
+  the clothes, so the palette describes the wrong thing.
+- The "garment" region mode runs MediaPipe's multiclass selfie segmenter
+  (CPU) and clusters only the pixels it labels as clothing.
+
+Model lifecycle:
+- The segmenter is created on first use and stays resident for the life of
+  the process, so each image worker loads it once (see worker_pool, which
+  warms it when garment mode is the default).
+- MediaPipe's segmenter takes one image per call; `garment_masks` runs a
+  whole list back to back on the resident model, which is what the batch
+  endpoint sends each worker.
+
+Masks are cached in memory keyed by a hash of the decoded pixels, so a
+re-upload (or the same photo under another engine / seed) skips inference.
+Every stage is timed as a span: segment.model_load, segment.cache_lookup,
+segment.infer, segment.resize.
+
+Configuration (environment):
+- PALETTE_REGION              default region mode: "center" (default) or "garment"
+- SEGMENTATION_MODEL          path to selfie_multiclass_256x256.tflite
+                              (default data/models/selfie_multiclass_256x256.tflite)
+- SEGMENTATION_CLASSES        category ids treated as garment (default "4" = clothes)
+- SEGMENTATION_INPUT_SIZE     longest side images are shrunk to before inference (256)
+- SEGMENTATION_MIN_COVERAGE   smallest garment fraction of the image to trust (0.02)
+- SEGMENTATION_CACHE_SIZE     masks kept in memory (default 256, 0 disables)
+- SEGMENTATION_BATCH_SIZE     images per worker task for batch uploads (default 8)
+
+Model download:
+    https://storage.googleapis.com/mediapipe-models/image_segmenter/selfie_multiclass_256x256/float32/latest/selfie_multiclass_256x256.tflite
+
+When mediapipe or the model file is missing, `available()` is False and
+the pipeline falls back to the centre crop (logged once, and counted in
+segmentation_fallback_total).
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from app.services.metrics import span
+
+PALETTE_REGIONS = ("center", "garment")
+DEFAULT_REGION = os.getenv("PALETTE_REGION", "center")
+
+MODEL_PATH = os.getenv(
+    "SEGMENTATION_MODEL",
+    os.path.join(os.path.dirname(__file__), "../../data/models/selfie_multiclass_256x256.tflite"),
+)
+GARMENT_CLASSES = tuple(int(c) for c in os.getenv("SEGMENTATION_CLASSES", "4").split(",") if c.strip())
+INPUT_SIZE = int(os.getenv("SEGMENTATION_INPUT_SIZE", "256"))
+MIN_COVERAGE = float(os.getenv("SEGMENTATION_MIN_COVERAGE", "0.02"))
+CACHE_SIZE = int(os.getenv("SEGMENTATION_CACHE_SIZE", "256"))
+BATCH_SIZE = int(os.getenv("SEGMENTATION_BATCH_SIZE", "8"))
+
+_segmenter = None
+_segmenter_lock = threading.Lock()  # Guards creation and inference (the graph is not thread-safe)
+_available = None
+
+
+class MaskCache:
+    """Thread-safe LRU of garment masks stored at model resolution."""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key):
+        if self.max_entries <= 0:
+            return None
+        with self._lock:
+            mask = self._entries.get(key)
+            if mask is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return mask
+
+    def set(self, key, mask):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = mask
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {**self._stats, "size": len(self._entries), "max_entries": self.max_entries}
+
+
+# Process-wide mask cache
+mask_cache = MaskCache(CACHE_SIZE)
+
+
+def available():
+    """True when mediapipe is importable and the model file exists."""
+    global _available
+    if _available is None:
+        try:
+            import mediapipe  # noqa: F401
+            _available = os.path.isfile(MODEL_PATH)
+        except ImportError:
+            _available = False
+        if not _available:
+            logging.warning(f"[SEGMENT] Garment segmentation unavailable (mediapipe or {MODEL_PATH} missing); using centre crop")
+    return _available
+
+
+def get_segmenter():
+    """Return the process-wide segmenter, loading the model on first use."""
+    global _segmenter
+    with _segmenter_lock:
+        if _segmenter is None:
+            with span("segment.model_load"):
+                from mediapipe.tasks import python as mp_tasks
+                from mediapipe.tasks.python import vision
+
+                options = vision.ImageSegmenterOptions(
+                    base_options=mp_tasks.BaseOptions(
+                        model_asset_path=MODEL_PATH,
+                        delegate=mp_tasks.BaseOptions.Delegate.CPU,
+                    ),
+                    running_mode=vision.RunningMode.IMAGE,
+                    output_category_mask=True,
+                    output_confidence_masks=False,
+                )
+                _segmenter = vision.ImageSegmenter.create_from_options(options)
+        return _segmenter
+
+
+def image_digest(image):
+    """Hash of a decoded image's geometry and pixels (the mask cache key)."""
+    import numpy as np
+
+    digest = hashlib.sha256(f"{image.shape}|{image.dtype}|{GARMENT_CLASSES}|{INPUT_SIZE}".encode("utf-8"))
+    digest.update(np.ascontiguousarray(image).data)
+    return digest.hexdigest()
+
+
+def _infer(images):
+    """Run the segmenter on BGR images; returns garment masks at model input size."""
+    import cv2
+    import mediapipe as mp
+    import numpy as np
+
+    segmenter = get_segmenter()
+    masks = []
+    for image in images:
+        # The model works at 256x256; shrinking first keeps conversion and the cached mask small
+        height, width = image.shape[:2]
+        scale = INPUT_SIZE / max(height, width)
+        if scale < 1:
+            image = cv2.resize(image, (max(1, round(width * scale)), max(1, round(height * scale))), interpolation=cv2.INTER_AREA)
+        rgb = np.ascontiguousarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB))
+
+        with _segmenter_lock:
+            result = segmenter.segment(mp.Image(image_format=mp.ImageFormat.SRGB, data=rgb))
+        categories = result.category_mask.numpy_view()
+        masks.append(np.isin(categories, GARMENT_CLASSES))
+    return masks
+
+
+def garment_masks(images):
+    """
+    Garment masks for a list of BGR images, each a bool array at that
+    image's size, or None where too little garment was found to trust.
+    Cached masks are reused; the rest go through the model in one pass.
+    """
+    import cv2
+
+    with span("segment.cache_lookup"):
+        keys = [image_digest(image) for image in images]
+        small = [mask_cache.get(key) for key in keys]
+
+    missing = [i for i, mask in enumerate(small) if mask is None]
+    if missing:
+        with span("segment.infer"):
+            inferred = _infer([images[i] for i in missing])
+        for i, mask in zip(missing, inferred):
+            small[i] = mask
+            mask_cache.set(keys[i], mask)
+
+    masks = []
+    with span("segment.resize"):
+        for image, mask in zip(images, small):
+            if mask.mean() < MIN_COVERAGE:
+                masks.append(None)
+                continue
+            height, width = image.shape[:2]
+            masks.append(cv2.resize(mask.view("uint8"), (width, height), interpolation=cv2.INTER_NEAREST) > 0)
+    return masks
+
+
+def garment_mask(image):
+    """Single-image form of garment_masks."""
+    return garment_masks([image])[0]
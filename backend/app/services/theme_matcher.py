@@ -4,9 +4,34 @@ theme_matcher.py
 - Input: palette list like ['#aabbcc', '#112233']
 - Output: 'Spring' / 'Summer' / 'Autumn' / 'Winter' / 'Neutral'
 - Converts hex colors to RGB → HSV → Hue degrees, then assigns a seasonal theme.
+- Vectorized with NumPy: `match_themes` labels many palettes in one pass.
+
+Modes:
+- "circular" (default): circular mean of hues weighted by saturation x value,
+  so reds at 350° and 10° average to red (not cyan) and greys barely count.
+  Palettes with almost no colour (greys/black/white) are 'Neutral'.
+- "compat": arithmetic mean of hues, reproducing the original labels for
+  well-formed '#rrggbb' colours.
+
+Set THEME_MATCH_MODE to change the default.
 """
 
 import colorsys
+import os
+
+import numpy as np
+
+THEME_MODES = ("circular", "compat")
+DEFAULT_MODE = os.getenv("THEME_MATCH_MODE", "circular")
+
+# Circular mode: mean saturation x value below this → 'Neutral'
+NEUTRAL_WEIGHT = 0.08
+
+# ASCII code → hex digit value (-1 for anything that is not a hex digit)
+_HEX_LUT = np.full(256, -1, dtype=np.int16)
+for _i, _c in enumerate("0123456789abcdef"):
+    _HEX_LUT[ord(_c)] = _i
+    _HEX_LUT[ord(_c.upper())] = _i
 
 # Define seasonal hue ranges
 def hex_to_rgb(hex_str):
@@ -22,39 +47,108 @@ def rgb_to_hue(rgb):
     h, _, _ = colorsys.rgb_to_hsv(r, g, b)
     return h * 360  # Convert to degrees
 
+
+def _parse_hex(colours):
+    """
+    Vectorized hex parsing.
+    Returns (rgb float64 array of shape (n, 3), valid bool mask of shape (n,)).
+    Invalid entries (non-strings, short or non-hex strings) are masked out,
+    matching the per-colour `except: continue` of the original loop.
+    """
+    cleaned = [c.lstrip('#')[:6] if isinstance(c, str) else '' for c in colours]
+    try:
+        raw = np.array(cleaned, dtype='S6')
+    except UnicodeEncodeError:
+        raw = np.array([c if c.isascii() else '' for c in cleaned], dtype='S6')
+
+    # Strings shorter than 6 chars are NUL-padded, which the LUT maps to -1
+    digits = _HEX_LUT[raw.view(np.uint8).reshape(-1, 6)]
+    valid = (digits >= 0).all(axis=1)
+    rgb = (digits[:, 0::2] * 16 + digits[:, 1::2]).astype(np.float64)
+    return rgb, valid
+
+
+def _rgb_to_hsv(rgb):
+    """Vectorized colorsys.rgb_to_hsv for an (n, 3) array of 0..255 values. Hue in degrees."""
+    r, g, b = (rgb / 255.0).T
+    maxc = np.maximum(np.maximum(r, g), b)
+    minc = np.minimum(np.minimum(r, g), b)
+    delta = maxc - minc
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s = np.where(maxc > 0, delta / maxc, 0.0)
+        rc = (maxc - r) / delta
+        gc = (maxc - g) / delta
+        bc = (maxc - b) / delta
+        # Same branch order as colorsys: red max first, then green, else blue
+        h = np.select([r == maxc, g == maxc], [bc - gc, 2.0 + rc - bc], 4.0 + gc - rc)
+        h = (h / 6.0) % 1.0
+    h = np.where(delta == 0, 0.0, h)
+    return h * 360.0, s, maxc
+
+
+# Hue band edges (degrees) and the season for each band, same ranges as the original:
+# <30 warm reds/oranges, <90 yellows/greens, <210 greens/blues, <330 cool blues/purples, then red again
+_HUE_EDGES = np.array([30.0, 90.0, 210.0, 330.0])
+_HUE_LABELS = np.array(["Autumn", "Spring", "Summer", "Winter", "Autumn", "Neutral"], dtype=object)
+
+
+def _label(avg_hue, has_colour):
+    """Map mean hues to seasonal labels; palettes without colour are 'Neutral'."""
+    bands = np.searchsorted(_HUE_EDGES, avg_hue, side='right')
+    bands[~has_colour] = len(_HUE_LABELS) - 1
+    return _HUE_LABELS[bands].tolist()
+
+
+def match_themes(palettes, mode=None):
+    """
+    Assign a seasonal theme to each palette in `palettes` (a list of hex lists).
+    All colours of all palettes are converted and averaged in a single
+    vectorized pass. Returns a list of labels, one per palette.
+    """
+    mode = mode or DEFAULT_MODE
+    if mode not in THEME_MODES:
+        raise ValueError(f"Unknown theme mode '{mode}'. Choose one of: {', '.join(THEME_MODES)}")
+
+    n = len(palettes)
+    if n == 0:
+        return []
+
+    # Flatten to one colour array plus the palette index of every colour
+    sizes = np.fromiter((len(p) for p in palettes), dtype=np.int64, count=n)
+    owners = np.repeat(np.arange(n), sizes)
+    colours = [c for p in palettes for c in p]
+
+    rgb, valid = _parse_hex(colours)
+    hue, sat, val = _rgb_to_hsv(rgb)
+    owners, hue, sat, val = owners[valid], hue[valid], sat[valid], val[valid]
+    counts = np.bincount(owners, minlength=n)
+
+    if mode == "compat":
+        # Arithmetic mean of hues (the original behaviour)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            avg_hue = np.bincount(owners, weights=hue, minlength=n) / counts
+        return _label(avg_hue, counts > 0)
+
+    # Circular mean weighted by saturation x value: greys and near-blacks barely count
+    weight = sat * val
+    angle = np.deg2rad(hue)
+    x = np.bincount(owners, weights=weight * np.cos(angle), minlength=n)
+    y = np.bincount(owners, weights=weight * np.sin(angle), minlength=n)
+    total = np.bincount(owners, weights=weight, minlength=n)
+    avg_hue = np.rad2deg(np.arctan2(y, x)) % 360.0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        colourful = (counts > 0) & (total / counts >= NEUTRAL_WEIGHT)
+    return _label(avg_hue, colourful)
+
+
 # match theme based on hue to seasonal ranges
-""" 
-Assign a seasonal theme based on average hue of the palette. 
+"""
+Assign a seasonal theme based on average hue of the palette.
 - palette: list of hex strings
+- mode: "circular" (default) or "compat" (original arithmetic mean)
 - returns: 'Spring' / 'Summer' / 'Autumn' / 'Winter' / 'Neutral'
 """
-def match_theme(palette):
-    hues = []
-    for hex_color in palette:
-        try:
-            # Convert hex to RGB, then to hue
-            rgb = hex_to_rgb(hex_color)
-            # Get hue in degrees
-            hue_deg = rgb_to_hue(rgb)
-            # Collect valid hues
-            hues.append(hue_deg)
-        except Exception:
-            # Skip invalid colors
-            continue
-
-    # If no valid hues, return Neutral   
-    if not hues:
-        return "Neutral"
-
-    # Calculate average hue
-    avg_hue = sum(hues) / len(hues)
-
-    # Simple ranges: adjust as needed for better accuracy
-    if avg_hue < 30 or avg_hue >= 330:
-        return "Autumn" # warm reds/oranges
-    elif avg_hue < 90:
-        return "Spring" # yellows/greens
-    elif avg_hue < 210:
-        return "Summer" # greens/blues
-    else:
-        return "Winter" # cool blues/purples
+def match_theme(palette, mode=None):
+    return match_themes([palette], mode=mode)[0]
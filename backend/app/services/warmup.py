@@ -0,0 +1,78 @@
+# backend/app/services/warmup.py
+"""
+Warm-up / Preload
+-----------------
+WHY THIS FILE EXISTS:
+- `create_app` no longer imports cv2, numpy, sklearn or pymongo; they load
+  on the first request that needs them. That keeps health checks, CLI
+  tools and serverless cold starts fast.
+- Pre-fork servers want the opposite: pay the imports once in the master
+  so every forked worker shares them (copy-on-write) and no user request
+  eats the first-import latency.
+
+Usage:
+    create_app(preload=True)            # or APP_PRELOAD=1
+    gunicorn --preload "app:create_app(preload=True)"
+"""
+
+import logging
+import time
+
+# Modules deferred by create_app, in the order they are normally first needed
+HEAVY_MODULES = (
+    "numpy",
+    "cv2",
+    "sklearn.cluster",
+    "app.services.image_pipeline",
+)
+
+
+def warm_image_stack():
+    """
+    Import the image stack and run one tiny extraction so lazy sklearn /
+    BLAS / OpenCV initialisation happens now, not on the first upload.
+    """
+    import numpy as np
+    from app.services.color_palette import extract_palette_from_array
+    from app.services.theme_matcher import match_theme
+
+    palette = extract_palette_from_array(np.zeros((8, 8, 3), dtype=np.uint8) + 1, k=1)
+    match_theme(palette)
+
+
+def warm_segmenter():
+    """
+    Load the garment segmentation model and run it once, when garment mode
+    is the default and the model is available. Image workers call this so
+    the model is resident before their first task.
+    """
+    from app.services import segmentation
+
+    if segmentation.DEFAULT_REGION != "garment" or not segmentation.available():
+        return
+    import numpy as np
+
+    segmentation.garment_masks([np.zeros((32, 32, 3), dtype=np.uint8)])
+    segmentation.mask_cache.clear()
+
+
+def preload(modules=HEAVY_MODULES, warm=True):
+    """
+    Import `modules` (and optionally run warm_image_stack).
+    Returns {module: seconds} so callers can log what startup cost.
+    """
+    import importlib
+
+    timings = {}
+    for name in modules:
+        started = time.perf_counter()
+        importlib.import_module(name)
+        timings[name] = round(time.perf_counter() - started, 4)
+
+    if warm:
+        started = time.perf_counter()
+        warm_image_stack()
+        timings["warm_image_stack"] = round(time.perf_counter() - started, 4)
+
+    logging.info(f"[PRELOAD] {timings}")
+    return timings
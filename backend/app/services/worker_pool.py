@@ -0,0 +1,99 @@
+# backend/app/services/worker_pool.py
+"""
+Image Worker Pool
+-----------------
+WHY THIS FILE EXISTS:
+- Decoding and clustering are CPU-bound; running them on the Flask request
+  thread serialises bulk imports behind the GIL.
+- A bounded ProcessPoolExecutor of warm workers (cv2 / sklearn already
+  imported) spreads that work across cores.
+- A global in-flight limit provides backpressure: when the pool is full,
+  new submissions wait (up to a timeout) instead of queueing unbounded
+  work in memory.
+
+Configuration (environment):
+- IMAGE_WORKERS              worker processes (default: CPU count)
+- IMAGE_POOL_MAX_PENDING     max tasks in flight across all requests
+                             (default: 2 x workers)
+- IMAGE_POOL_SUBMIT_TIMEOUT  seconds to wait for a free slot (default 30)
+- IMAGE_POOL_START_METHOD    multiprocessing start method (default "spawn")
+"""
+
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+MAX_WORKERS = int(os.getenv("IMAGE_WORKERS", "0")) or (os.cpu_count() or 1)
+MAX_PENDING = int(os.getenv("IMAGE_POOL_MAX_PENDING", "0")) or MAX_WORKERS * 2
+SUBMIT_TIMEOUT = float(os.getenv("IMAGE_POOL_SUBMIT_TIMEOUT", "30"))
+START_METHOD = os.getenv("IMAGE_POOL_START_METHOD", "spawn")
+
+_pool = None
+_pool_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(MAX_PENDING)
+
+
+class PoolBusyError(RuntimeError):
+    """Raised when no worker slot frees up within the submit timeout."""
+
+
+def _warm_worker():
+    """
+    Worker initializer: import the heavy stack once and run a tiny
+    extraction so the first real task does not pay import/JIT costs.
+    In garment mode the segmentation model is loaded here too and stays
+    resident for the worker's lifetime.
+    """
+    from app.services.warmup import warm_image_stack, warm_segmenter
+
+    warm_image_stack()
+    warm_segmenter()
+
+
+def get_pool():
+    """Return the process-wide executor, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=MAX_WORKERS,
+                mp_context=multiprocessing.get_context(START_METHOD),
+                initializer=_warm_worker,
+            )
+        return _pool
+
+
+def submit(fn, *args, timeout=SUBMIT_TIMEOUT, **kwargs):
+    """
+    Submit `fn(*args, **kwargs)` to the pool, blocking while MAX_PENDING
+    tasks are already in flight. Raises PoolBusyError on timeout;
+    `timeout=None` waits indefinitely.
+    """
+    # Semaphore.acquire(timeout=None) blocks until a slot frees up; do not map None
+    # to -1 (a negative timeout makes acquire() return False at once)
+    if not _slots.acquire(timeout=timeout):
+        raise PoolBusyError("Image worker pool is busy; try again later.")
+
+    try:
+        future = get_pool().submit(fn, *args, **kwargs)
+    except Exception:
+        _slots.release()
+        raise
+
+    # Free the slot as soon as the task finishes, however it finishes
+    future.add_done_callback(lambda _f: _slots.release())
+    return future
+
+
+def shutdown(wait=True):
+    """Stop the worker processes (called automatically at interpreter exit)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=wait, cancel_futures=True)
+            _pool = None
+
+
+atexit.register(shutdown)
@@ -0,0 +1,79 @@
+# backend/app/utils/admission.py
+"""
+Route-level admission helpers.
+
+WHY THIS FILE EXISTS:
+- Expensive routes opt in to admission control (app.services.admission)
+  with a decorator, the way protected routes use `@require_auth`.
+- Rejections become a JSON 503 (busy) or 429 (rate limited) with a
+  Retry-After header, before the request body is read or decoded.
+"""
+
+from functools import wraps
+
+from flask import jsonify, make_response, request
+
+from app.services.admission import AdmissionRejected, get_controller
+
+
+def rejected_response(error):
+    response = jsonify({"error": str(error), "reason": error.reason})
+    response.status_code = error.status
+    response.headers["Retry-After"] = str(error.retry_after)
+    return response
+
+
+def client_key():
+    """Who a rate limit applies to: the connecting address (not X-Forwarded-For, which clients can forge)."""
+    return request.remote_addr or "unknown"
+
+
+def rate_limited(group):
+    """Take a token from the calling client's bucket for `group`, or answer 429."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            controller = get_controller()
+            if controller is not None:
+                try:
+                    controller.check_rate(group, client_key())
+                except AdmissionRejected as e:
+                    return rejected_response(e)
+            return view(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def admitted(route, priority=0):
+    """
+    Run the view only once `route` is admitted (see app.services.admission),
+    or answer 503. The slot is held until the response is built, or for
+    streamed responses until the stream is closed.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            controller = get_controller()
+            if controller is None:
+                return view(*args, **kwargs)
+            try:
+                ticket = controller.acquire(route, priority)
+            except AdmissionRejected as e:
+                return rejected_response(e)
+
+            try:
+                response = make_response(view(*args, **kwargs))
+            except BaseException:
+                controller.release(ticket)
+                raise
+            if response.is_streamed:
+                response.call_on_close(lambda: controller.release(ticket))
+            else:
+                controller.release(ticket)
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,78 @@
+# backend/app/utils/image_headers.py
+# Pure-Python image header parsing: no cv2 / numpy, so upload checks can run
+# before the image stack is imported or any pixel buffer is allocated.
+
+import zlib
+
+# JPEG start-of-frame markers (baseline, progressive, lossless, arithmetic variants)
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+_JPEG_MAGIC = b"\xff\xd8\xff"
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Bytes needed to recognise a format from its magic number
+SNIFF_BYTES = len(_PNG_SIGNATURE)
+
+# Format ("jpeg" / "png") named by the leading magic bytes, or None.
+def sniff_format(head: bytes):
+    if head[:3] == _JPEG_MAGIC:
+        return "jpeg"
+    if head[:8] == _PNG_SIGNATURE:
+        return "png"
+    return None
+
+# Whether the bytes still contain the format's end marker (JPEG EOI / PNG IEND), i.e. the
+# upload was not cut short. For JPEG the EOI must follow the start of scan: an EXIF thumbnail
+# in APP1 carries its own EOI, so a photo cut anywhere in its scan data would otherwise pass.
+# Entropy data stuffs every 0xFF byte, so FF D9 after the SOS only appears as a real marker
+# (trailers such as motion-photo video after the EOI are allowed). PNGs are checked near the
+# end only (trailing bytes are rare but legal).
+def has_end_marker(data: bytes, image_format: str) -> bool:
+    if image_format == "jpeg":
+        scan = next((offset for marker, offset in _jpeg_segments(data) if marker == 0xDA), None)
+        return scan is not None and data.find(b"\xff\xd9", scan + 2) != -1
+    if image_format == "png":
+        return b"IEND" in data[-64:]
+    return False
+
+# Yield (marker, offset) for each JPEG marker segment after SOI, stopping after the first
+# start of scan or end of image (or at bytes that are not a marker).
+def _jpeg_segments(data: bytes):
+    i = 2
+    while i + 4 <= len(data):
+        if data[i] != 0xFF:
+            return
+        marker = data[i + 1]
+        if marker == 0xFF:  # Fill byte before a marker
+            i += 1
+            continue
+        if marker in (0x01, 0xD8) or 0xD0 <= marker <= 0xD7:  # Standalone markers
+            i += 2
+            continue
+        yield marker, i
+        if marker in (0xD9, 0xDA):
+            return
+        i += 2 + int.from_bytes(data[i + 2:i + 4], "big")
+
+# Read (format, width, height) from a JPEG or PNG header without decoding pixels.
+# Returns None for other formats or truncated / malformed headers (including a PNG
+# IHDR chunk whose CRC does not match).
+def read_image_size(data: bytes):
+    if data[:8] == _PNG_SIGNATURE and len(data) >= 33 and data[12:16] == b"IHDR":
+        if zlib.crc32(data[12:29]) != int.from_bytes(data[29:33], "big"):
+            return None
+        return "png", int.from_bytes(data[16:20], "big"), int.from_bytes(data[20:24], "big")
+
+    if data[:2] != b"\xff\xd8":
+        return None
+
+    # Walk JPEG marker segments until the start-of-frame, which holds the dimensions
+    for marker, i in _jpeg_segments(data):
+        if marker in (0xD9, 0xDA):  # End of image / start of scan before any frame header
+            return None
+        if marker in _JPEG_SOF_MARKERS:
+            if i + 9 > len(data):
+                return None
+            height = int.from_bytes(data[i + 5:i + 7], "big")
+            width = int.from_bytes(data[i + 7:i + 9], "big")
+            return "jpeg", width, height
+    return None
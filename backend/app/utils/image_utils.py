@@ -3,6 +3,48 @@
 import cv2
 import numpy as np
 
+# Header parsing lives with the upload checks (no cv2 needed); re-exported for the pipeline
+from app.utils.image_headers import read_image_size  # noqa: F401
+
+# cv2 flags for decoding a JPEG at 1/2, 1/4 or 1/8 scale (libjpeg scales during the IDCT,
+# so the full-resolution bitmap is never materialised)
+REDUCED_DECODE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+# Decode raw image bytes (e.g. an upload body) straight from memory into a BGR array.
+# Returns None when the bytes are not a decodable image, mirroring cv2.imread.
+# `reduce` (1, 2, 4 or 8) decodes at that fraction of the full resolution.
+def decode_image(data: bytes, reduce: int = 1) -> np.ndarray:
+
+    # Wrap the bytes without copying them; cv2.imdecode needs a 1-D uint8 buffer
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    if buffer.size == 0:
+        return None
+
+    # Decode in the same colour mode cv2.imread uses by default (3-channel BGR)
+    return cv2.imdecode(buffer, REDUCED_DECODE_FLAGS[reduce])
+
+# Perceptual difference hash (dHash) of a decoded BGR image as a 64-bit int.
+# The image is shrunk to (hash_size + 1) x hash_size grey pixels and each bit records
+# whether a pixel is brighter than its right-hand neighbour, so resizing, recompression
+# and small crops flip only a few bits (compare with Hamming distance).
+def dhash(image: np.ndarray, hash_size: int = 8) -> int:
+    grey = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    small = cv2.resize(grey, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+# Mean colour of each cell when the image is split into a grid x grid layout, as an
+# (grid * grid, 3) float32 array of RGB values (cell order: row by row).
+# Cheap colour fingerprint that, unlike dhash, tells colour variants apart.
+def colour_grid(image: np.ndarray, grid: int = 4) -> np.ndarray:
+    small = cv2.resize(image, (grid, grid), interpolation=cv2.INTER_AREA)
+    return small[..., ::-1].reshape(-1, 3).astype(np.float32)
+
 # Crop then center of an image to a given width and height
 def crop_center(image: np.ndarray, crop_width: int, crop_height: int) -> np.ndarray:
 
@@ -14,4 +56,28 @@ def crop_center(image: np.ndarray, crop_width: int, crop_height: int) -> np.ndar
     start_y = max(h // 2 - crop_height // 2, 0)
 
     # Slice the image array to return only the center cropped region
-    return image[start_y:start_y + crop_height, start_x:start_x + crop_width]
\ No newline at end of file
+    return image[start_y:start_y + crop_height, start_x:start_x + crop_width]
+
+# Pick about `max_pixels` pixels spread evenly over the image: one random pixel per
+# step x step block (stratified sampling), so every region of the crop is represented,
+# unlike a uniform random sample. Returns an (N, channels) array.
+# `mask` (bool, same height/width) restricts the sample to the pixels it selects.
+# The same `seed` always picks the same pixels, keeping palettes reproducible.
+def stratified_sample(image: np.ndarray, max_pixels: int, seed=None, mask=None) -> np.ndarray:
+    h, w = image.shape[:2]
+    channels = image.shape[2] if image.ndim == 3 else 1
+    area = h * w if mask is None else int(np.count_nonzero(mask))
+    if not max_pixels or area <= max_pixels:
+        return (image if mask is None else image[mask]).reshape(-1, channels)
+
+    step = int(np.ceil(np.sqrt(area / max_pixels)))
+    rows, cols = -(-h // step), -(-w // step)
+    rng = np.random.default_rng(0 if seed is None else seed)
+
+    # Random offset inside each block, clamped for the partial blocks on the right/bottom edges
+    ys = np.minimum(np.arange(rows)[:, None] * step + rng.integers(0, step, size=(rows, cols)), h - 1)
+    xs = np.minimum(np.arange(cols)[None, :] * step + rng.integers(0, step, size=(rows, cols)), w - 1)
+    if mask is not None:
+        keep = mask[ys, xs]
+        ys, xs = ys[keep], xs[keep]
+    return image[ys, xs].reshape(-1, channels)
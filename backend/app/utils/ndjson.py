@@ -0,0 +1,54 @@
+# backend/app/utils/ndjson.py
+"""
+HTTP side of bulk export / import (see app.services.bulk_io).
+
+WHY THIS FILE EXISTS:
+- Outfits and palettes expose the same /export and /import endpoints; the
+  streaming response and the raw-body import are written once here.
+- Export is a chunked `application/x-ndjson` response generated lazily, so
+  the whole collection is never held in memory.
+- Import reads `request.stream` directly instead of `request.get_json()`,
+  which would buffer and parse the entire body first.
+- Imports are exempt from the app-wide MAX_CONTENT_LENGTH (sized for image
+  uploads); BULK_IMPORT_MAX_BYTES caps them instead (0 = unlimited).
+"""
+
+import os
+
+from flask import Response, jsonify, request, stream_with_context
+
+from app.services import bulk_io
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+# Largest accepted import body (bytes); 0 disables the limit
+IMPORT_MAX_BYTES = int(os.getenv("BULK_IMPORT_MAX_BYTES", "0")) or None
+
+
+def export_response(kind):
+    """Streamed NDJSON download of every `kind` record, oldest first."""
+    return Response(
+        stream_with_context(bulk_io.export_ndjson(kind)),
+        mimetype=NDJSON_MIMETYPE,
+        headers={"Content-Disposition": f'attachment; filename="{kind}.ndjson"'},
+    )
+
+
+def import_response(kind):
+    """
+    Import the request body (NDJSON or a JSON array) into `kind`.
+    Optional ?batch=N overrides BULK_IMPORT_BATCH.
+    Returns 200 with the import stats, or 400 when nothing could be read.
+    """
+    try:
+        batch_size = int(request.args.get("batch", bulk_io.IMPORT_BATCH))
+    except ValueError:
+        return jsonify({"error": "batch must be an integer"}), 400
+    if batch_size < 1:
+        return jsonify({"error": "batch must be at least 1"}), 400
+
+    request.max_content_length = IMPORT_MAX_BYTES
+    stats = bulk_io.import_stream(kind, request.stream, batch_size=batch_size)
+    if not stats["read"]:
+        return jsonify({"error": "Empty import body", **stats}), 400
+    return jsonify(stats), 200
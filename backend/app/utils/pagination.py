@@ -0,0 +1,56 @@
+# backend/app/utils/pagination.py
+"""
+Keyset (cursor) pagination helpers.
+
+WHY THIS FILE EXISTS:
+- skip/limit and list slicing get linearly slower with page depth.
+- A cursor remembers the (timestamp, id) of the last item served, so the
+  next page starts right after it using an index: page N costs the same
+  as page 1.
+
+Cursors are opaque URL-safe strings; clients just echo `next_cursor` back.
+"""
+
+import base64
+import json
+
+
+def encode_cursor(item):
+    """Build an opaque cursor pointing just past `item` (needs "timestamp" and "id")."""
+    raw = json.dumps([item.get("timestamp") or "", item["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token):
+    """Return (timestamp, id) from a cursor. Raises ValueError if it is malformed."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        timestamp, item_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, TypeError, UnicodeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(timestamp, str) or not isinstance(item_id, str):
+        raise ValueError("Invalid cursor")
+    return timestamp, item_id
+
+
+def next_cursor(items, limit):
+    """Cursor for the page after `items`, or None when this page was the last."""
+    if limit <= 0 or len(items) < limit:
+        return None
+    return encode_cursor(items[-1])
+
+
+def mongo_keyset_filter(cursor, descending=True, fields=("timestamp", "id")):
+    """
+    MongoDB filter selecting documents strictly after `cursor` in
+    (timestamp, id) order. Pair it with a matching sort and a compound
+    (timestamp, id) index. `fields` names the two keys when a collection
+    calls them something else.
+    """
+    timestamp, item_id = cursor
+    time_field, id_field = fields
+    op = "$lt" if descending else "$gt"
+    return {"$or": [
+        {time_field: {op: timestamp}},
+        {time_field: timestamp, id_field: {op: item_id}},
+    ]}
@@ -0,0 +1,93 @@
+# backend/app/utils/upload_validation.py
+"""
+Cheap checks that run on an upload before it is decoded.
+
+WHY THIS FILE EXISTS:
+- `allowed_file` only looks at the filename; a renamed PDF, a truncated
+  JPEG or a decompression bomb used to reach cv2 and fail (or allocate a
+  huge bitmap) only after a full decode.
+- The magic bytes are sniffed from the first bytes of the stream, so
+  non-images are rejected without reading the rest of the file.
+- Width and height come from the JPEG / PNG header (app.utils.image_headers),
+  so oversized images are rejected before any pixel buffer exists. Pure
+  Python: no cv2 / numpy import for a rejected upload.
+- Limits on the whole request body are Flask's MAX_CONTENT_LENGTH (see
+  create_app); these limits apply per file.
+"""
+
+import os
+
+from app.services import metrics
+from app.utils.image_headers import SNIFF_BYTES, has_end_marker, read_image_size, sniff_format
+
+# Largest accepted image file (bytes)
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(16 * 1024 * 1024)))
+
+# Largest accepted image area (width x height) and side; a 50 MP decode is ~150 MB of BGR
+UPLOAD_MAX_PIXELS = int(os.getenv("UPLOAD_MAX_PIXELS", "50000000"))
+UPLOAD_MAX_SIDE = int(os.getenv("UPLOAD_MAX_SIDE", "20000"))
+
+# User-facing messages per rejection reason
+MESSAGES = {
+    "empty": "The uploaded file is empty.",
+    "not_an_image": "The file is not a JPG, JPEG or PNG image.",
+    "corrupt_header": "The image header is truncated or corrupt.",
+    "truncated": "The image file is incomplete.",
+    "too_large": "The image file is too large.",
+    "too_many_pixels": "The image dimensions are too large.",
+}
+
+
+class UploadRejected(ValueError):
+    """An upload that failed validation; `reason` is a MESSAGES key, `status` the HTTP status."""
+
+    def __init__(self, reason, status=400):
+        super().__init__(MESSAGES[reason])
+        self.reason = reason
+        self.status = status
+
+
+def check_header(data, max_pixels=UPLOAD_MAX_PIXELS, max_side=UPLOAD_MAX_SIDE):
+    """
+    Validate image bytes from their header alone (plus a scan for the end
+    marker, which catches uploads cut short after the header).
+    Returns (format, width, height) or raises UploadRejected.
+    """
+    if not data:
+        raise UploadRejected("empty")
+    if sniff_format(data[:SNIFF_BYTES]) is None:
+        raise UploadRejected("not_an_image")
+
+    header = read_image_size(data)
+    if header is None or not header[1] or not header[2]:
+        raise UploadRejected("corrupt_header")
+    image_format, width, height = header
+    if max(width, height) > max_side or width * height > max_pixels:
+        raise UploadRejected("too_many_pixels", status=413)
+    if not has_end_marker(data, image_format):
+        raise UploadRejected("truncated")
+    return header
+
+
+def read_upload(file, max_bytes=UPLOAD_MAX_BYTES, route="upload"):
+    """
+    Read and validate an uploaded file (a werkzeug FileStorage).
+    Sniffs the first bytes before reading the rest, stops reading past
+    `max_bytes`, then checks the header. Returns the file's bytes or raises
+    UploadRejected (counted in upload_rejections_total).
+    """
+    try:
+        head = file.stream.read(SNIFF_BYTES)
+        if not head:
+            raise UploadRejected("empty")
+        if sniff_format(head) is None:
+            raise UploadRejected("not_an_image")
+
+        data = head + file.stream.read(max_bytes + 1 - len(head))
+        if len(data) > max_bytes:
+            raise UploadRejected("too_large", status=413)
+        check_header(data)
+        return data
+    except UploadRejected as e:
+        metrics.count("upload_rejections_total", route=route, reason=e.reason)
+        raise
@@ -0,0 +1,7 @@
+# backend/benchmarks/__init__.py
+"""
+Offline benchmark scripts for the BlackStyles backend.
+
+Run any script from the `backend/` directory, e.g.:
+    python -m benchmarks.bench_upload_decode
+"""
@@ -0,0 +1,149 @@
+# backend/benchmarks/bench_auth.py
+"""
+Auth benchmark: token verification cost and login throughput per hash cost.
+
+Token verification, per call:
+- decode_token        full PyJWT verify (HMAC + JSON decode), the old path
+- verify_token cold   cache miss: verify + populate the cache
+- verify_token warm   repeat token: digest + dict lookup
+- require_auth        the decorator around a trivial view, warm cache,
+                      inside a Flask request context
+
+Login throughput (--login): registers one user per PASSWORD_HASH_METHOD
+candidate in an in-memory Mongo (mongomock) and drives POST /api/auth/login
+from --threads client threads. Reports logins/s, latency percentiles and
+the single-hash cost, so the cost setting can be chosen with data.
+Also checks that a hash made with an older method is upgraded on login.
+
+Usage (from backend/):
+    python -m benchmarks.bench_auth [--repeat 2000]
+    python -m benchmarks.bench_auth --login [--methods scrypt:16384:8:1 scrypt:32768:8:1 ...]
+                                    [--threads 8] [--logins 64] [--hash-workers 4]
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+
+from benchmarks.common import summarize, time_call
+from app.services import auth_service
+from app.utils.auth import require_auth
+
+
+DEFAULT_METHODS = ["scrypt:16384:8:1", "scrypt:32768:8:1", "pbkdf2:sha256:600000", "pbkdf2:sha256:1000000"]
+
+
+def bench_login(methods, threads, logins, hash_workers):
+    """Login throughput for each hashing method, through the real route."""
+    from werkzeug.security import generate_password_hash
+
+    from app import create_app
+    from app.services import mongo_service
+
+    mongo_service.configure(uri=mongo_service.MOCK_SCHEME, db_name="bench_auth")
+    auth_service.configure_hashing(workers=hash_workers)
+    app = create_app()
+    users = mongo_service.get_collection("users")
+    report = {"threads": threads, "logins": logins, "hash_workers": auth_service.PASSWORD_HASH_WORKERS, "methods": {}}
+
+    for method in methods:
+        auth_service.configure_hashing(method=method)
+        email = f"{method}@bench"
+        app.test_client().post("/api/auth/register", json={"email": email, "password": "hunter22"})
+
+        started = time.perf_counter()
+        auth_service.hash_password("hunter22")
+        hash_ms = (time.perf_counter() - started) * 1000
+
+        latencies, lock = [], threading.Lock()
+        per_thread = [logins // threads + (i < logins % threads) for i in range(threads)]
+
+        def worker(count):
+            client = app.test_client()
+            for _ in range(count):
+                t0 = time.perf_counter()
+                response = client.post("/api/auth/login", json={"email": email, "password": "hunter22"})
+                elapsed = (time.perf_counter() - t0) * 1000
+                assert response.status_code == 200, response.get_json()
+                with lock:
+                    latencies.append(elapsed)
+
+        workers = [threading.Thread(target=worker, args=(n,)) for n in per_thread]
+        started = time.perf_counter()
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        wall = time.perf_counter() - started
+
+        report["methods"][method] = {
+            **summarize(latencies),
+            "logins_per_s": round(len(latencies) / wall, 1),
+            "hash_ms": round(hash_ms, 2),
+        }
+
+    # Rehash-on-login: a hash made with an older method is replaced by the current one
+    email = "legacy@bench"
+    users.insert_one({"email": email, "password": generate_password_hash("hunter22", method="pbkdf2:sha256:1000")})
+    app.test_client().post("/api/auth/login", json={"email": email, "password": "hunter22"})
+    deadline = time.time() + 10
+    while auth_service.needs_rehash(users.find_one({"email": email})["password"]) and time.time() < deadline:
+        time.sleep(0.01)
+    report["rehash_on_login"] = not auth_service.needs_rehash(users.find_one({"email": email})["password"])
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--login", action="store_true", help="run the login throughput benchmark")
+    parser.add_argument("--methods", nargs="+", default=DEFAULT_METHODS)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--logins", type=int, default=64, help="logins per method")
+    parser.add_argument("--hash-workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if args.login:
+        report = bench_login(args.methods, args.threads, args.logins, args.hash_workers)
+        print(json.dumps(report, indent=2))
+        return report
+
+    token = auth_service.generate_token("bench-user")
+
+    def cold():
+        auth_service.token_cache.clear()
+        auth_service.verify_token(token)
+
+    app = Flask(__name__)
+    view = require_auth(lambda: "ok")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def decorated():
+        with app.test_request_context("/", headers=headers):
+            view()
+
+    def context_only():
+        with app.test_request_context("/", headers=headers):
+            pass
+
+    report = {
+        "decode_token": summarize(time_call(auth_service.decode_token, token, repeat=args.repeat)),
+        "verify_token_cold": summarize(time_call(cold, repeat=args.repeat)),
+        "verify_token_warm": summarize(time_call(auth_service.verify_token, token, repeat=args.repeat)),
+        "request_context": summarize(time_call(context_only, repeat=args.repeat)),
+        "require_auth_warm": summarize(time_call(decorated, repeat=args.repeat)),
+        "token_cache": auth_service.token_cache.stats(),
+    }
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# backend/benchmarks/bench_blob_store.py
+"""
+Blob store benchmark: cost of keeping uploads and their thumbnails.
+
+Reports per upload (synthetic 12 MP JPEG by default):
+- pipeline          hashed_palette_from_bytes without the blob store
+- pipeline_store    the same with the blob store on (first write of each
+                    photo: original + BLOB_THUMBNAIL_SIZES thumbnails)
+- reupload          storing a photo that is already on disk (hash + stat)
+- thumbs_same_pass  thumbnails from the image the pipeline decoded
+- thumbs_redecode   thumbnails from a separate full decode of the bytes,
+                    i.e. what a post-processing thumbnail job would pay
+
+Usage (from backend/):
+    python -m benchmarks.bench_blob_store [--width 4000 --height 3000] [--repeat 10]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.common import encode_image, summarize, synthetic_image, time_call, uncached_palettes
+from app.services.blob_store import BlobStore, make_thumbnails
+from app.services.image_pipeline import decode_upload, hashed_palette_from_bytes
+from app.utils.image_utils import decode_image
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--width", type=int, default=4000)
+    parser.add_argument("--height", type=int, default=3000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    photos = [encode_image(synthetic_image(args.width, args.height, seed=seed)) for seed in range(args.repeat + 2)]
+    image, _ = decode_upload(photos[0])
+    report = {"bytes": len(photos[0]), "decoded_shape": list(image.shape)}
+
+    def pipeline(store):
+        return hashed_palette_from_bytes(photos[0], store=store)
+
+    with tempfile.TemporaryDirectory() as directory:
+        from app.services import image_pipeline
+
+        image_pipeline.blob_store = BlobStore(directory)
+        fresh = iter(photos)
+
+        def first_write():
+            return hashed_palette_from_bytes(next(fresh), store=True)
+
+        with uncached_palettes():
+            report["pipeline"] = summarize(time_call(pipeline, False, repeat=args.repeat, warmup=1))
+            report["pipeline_store"] = summarize(time_call(first_write, repeat=args.repeat, warmup=1))
+        report["reupload"] = summarize(time_call(image_pipeline.blob_store.put, photos[0], image, repeat=args.repeat))
+
+    report["thumbs_same_pass"] = summarize(time_call(make_thumbnails, image, repeat=args.repeat))
+    report["thumbs_redecode"] = summarize(time_call(lambda: make_thumbnails(decode_image(photos[0])), repeat=args.repeat))
+
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    main()
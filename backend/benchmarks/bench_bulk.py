@@ -0,0 +1,126 @@
+# backend/benchmarks/bench_bulk.py
+"""
+Bulk NDJSON benchmark: import / export throughput and memory per store.
+
+For each size and target store it writes a synthetic NDJSON file, then
+reports:
+- import:  records/s and MiB/s through bulk_io.import_stream (validation +
+           batched writes), and the number of batches
+- export:  records/s through bulk_io.export_ndjson
+- with --memory, peak Python-tracked allocation (tracemalloc) of each
+  direction in a second, traced run. SQLite stays flat as the file grows;
+  the JSON-lines logs keep an offset index (outfits also a search index)
+  in memory by design, so their peak tracks the record count of the store,
+  not the size of the file being imported.
+
+Targets: outfits/jsonl, palettes/jsonl, palettes/sqlite.
+
+Usage (from backend/):
+    python -m benchmarks.bench_bulk [--sizes 10000 100000] [--batch 1000] [--memory]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from benchmarks.common import synthetic_outfit, synthetic_palette
+from app.services import bulk_io, outfit_service, palette_service
+
+TARGETS = [("outfits", "jsonl"), ("palettes", "jsonl"), ("palettes", "sqlite")]
+
+
+def write_ndjson(path, make_record, size, seed=0):
+    rng = np.random.default_rng(seed)
+    with open(path, "w") as f:
+        for i in range(size):
+            f.write(json.dumps(make_record(i, rng), separators=(",", ":")) + "\n")
+
+
+def use_target(workdir, kind, backend, tag):
+    """Point the service for `kind` at an empty store under `workdir`."""
+    if kind == "outfits":
+        outfit_service.LOG_FILE = os.path.join(workdir, f"outfits-{tag}.jsonl")
+        outfit_service.DATA_FILE = os.path.join(workdir, "missing-outfits.json")
+        outfit_service._store = None
+        outfit_service._search_index.clear()
+        outfit_service._search_version = None
+        return
+    palette_service.PALETTE_STORE = backend
+    palette_service.DATA_FILE = os.path.join(workdir, "missing-palettes.json")
+    palette_service.LOG_FILE = os.path.join(workdir, f"palettes-{tag}.jsonl")
+    palette_service.DB_FILE = os.path.join(workdir, f"palettes-{tag}.sqlite3")
+    palette_service._store = None
+    palette_service._recent = None
+
+
+def run_once(workdir, kind, backend, source, batch, tag, traced=False):
+    use_target(workdir, kind, backend, tag)
+    if traced:
+        tracemalloc.start()
+    with open(source, "rb") as f:
+        stats = bulk_io.import_stream(kind, f, batch_size=batch)
+    result = {"import": stats}
+    if traced:
+        result["import_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 2)
+        tracemalloc.reset_peak()
+
+    started = time.perf_counter()
+    exported = sum(chunk.count("\n") for chunk in bulk_io.export_ndjson(kind))
+    elapsed = time.perf_counter() - started
+    result["export"] = {"records": exported, "records_per_s": round(exported / elapsed, 1) if elapsed else 0.0}
+    if traced:
+        result["export_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 2)
+        tracemalloc.stop()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--batch", type=int, default=bulk_io.IMPORT_BATCH)
+    parser.add_argument("--memory", action="store_true", help="also measure tracemalloc peaks (slower)")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="bench_bulk_")
+    report = {"batch": args.batch, "results": {}}
+    try:
+        for size in args.sizes:
+            sources = {}
+            for kind, make_record in (("outfits", synthetic_outfit), ("palettes", synthetic_palette)):
+                sources[kind] = os.path.join(workdir, f"{kind}-{size}.ndjson")
+                write_ndjson(sources[kind], make_record, size)
+
+            for kind, backend in TARGETS:
+                run = run_once(workdir, kind, backend, sources[kind], args.batch, f"{size}")
+                stats = run["import"]
+                entry = {
+                    "file_mb": round(os.path.getsize(sources[kind]) / 2 ** 20, 2),
+                    "imported": stats["imported"],
+                    "batches": stats["batches"],
+                    "import_records_per_s": stats["records_per_s"],
+                    "import_mb_per_s": stats["mb_per_s"],
+                    "export_records_per_s": run["export"]["records_per_s"],
+                }
+                if args.memory:
+                    traced = run_once(workdir, kind, backend, sources[kind], args.batch, f"{size}-traced", traced=True)
+                    entry["import_peak_mb"] = traced["import_peak_mb"]
+                    entry["export_peak_mb"] = traced["export_peak_mb"]
+                report["results"][f"{size}/{kind}/{backend}"] = entry
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    main()
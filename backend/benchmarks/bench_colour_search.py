@@ -0,0 +1,111 @@
+# backend/benchmarks/bench_colour_search.py
+"""
+Colour-similarity benchmark: top-k palette search at up to a million entries.
+
+Builds a colour index file of synthetic palettes (random 3-7 colour
+palettes, written straight as records), then reports per size:
+- load_s        time for a fresh process-side index to read the file
+- search        latency of PaletteIndex.search (k=10), median / p95
+- recall_at_k   overlap with an exact brute-force ranking by the
+                order-independent palette distance over every entry, i.e.
+                how often the embedding pre-filter keeps the true top-k
+- memory_mb     size of the in-memory arrays
+
+Usage (from backend/):
+    python -m benchmarks.bench_colour_search [--sizes 100000 1000000] [--queries 50] [--k 10]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from benchmarks.common import summarize, time_call
+from app.services import colour_index
+from app.services.colour_index import RECORD_DTYPE, PaletteIndex, embed_lab, palette_distance, palette_vectors, rgb_to_lab, slot_lab
+
+
+def synthetic_records(size, rng, chunk=100_000):
+    """Yield record chunks for `size` random palettes (vectors built like PaletteIndex.encode)."""
+    for start in range(0, size, chunk):
+        n = min(chunk, size - start)
+        lengths = rng.integers(3, 8, size=n)
+        lab = rgb_to_lab(rng.integers(0, 256, size=(n, 7, 3)))
+
+        records = np.zeros(n, dtype=RECORD_DTYPE)
+        records["id"] = np.char.encode(np.char.mod("%012x", np.arange(start, start + n)), "ascii")
+        records["lab"] = slot_lab(lab, lengths)
+        records["embed"] = embed_lab(lab, lengths)
+        yield records
+
+
+def exact_top_k(index, query, k, chunk=200_000):
+    """Ground truth: palette distance against every entry."""
+    n = index._size
+    distances = np.concatenate([
+        palette_distance(query, index._lab[i:i + chunk]) for i in range(0, n, chunk)
+    ])
+    return {index._ids[i].decode() for i in np.argsort(distances)[:k]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--recall-queries", type=int, default=10, help="queries checked against exact search")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(7)
+    workdir = tempfile.mkdtemp(prefix="bench_colour_")
+    report = {"slots": colour_index.SLOTS, "candidates": colour_index.CANDIDATES, "k": args.k, "results": {}}
+    try:
+        for size in args.sizes:
+            path = os.path.join(workdir, f"index-{size}.bin")
+            with open(path, "wb") as f:
+                for records in synthetic_records(size, rng):
+                    f.write(records.tobytes())
+
+            index = PaletteIndex(path)
+            started = time.perf_counter()
+            index._lock.acquire()
+            index._refresh()
+            index._lock.release()
+            load_s = time.perf_counter() - started
+
+            queries = [
+                ["#{:02x}{:02x}{:02x}".format(*rgb) for rgb in rng.integers(0, 256, size=(int(rng.integers(3, 7)), 3))]
+                for _ in range(args.queries)
+            ]
+            samples = []
+            for query in queries:
+                samples.extend(time_call(index.search, query, args.k, repeat=1))
+
+            hits = 0
+            for query in queries[:args.recall_queries]:
+                found = {item_id for item_id, _ in index.search(query, args.k)}
+                hits += len(found & exact_top_k(index, palette_vectors(query)[0], args.k))
+
+            report["results"][str(size)] = {
+                "load_s": round(load_s, 3),
+                "search": summarize(samples),
+                "recall_at_k": round(hits / (args.k * min(args.recall_queries, len(queries))), 3),
+                "memory_mb": round(sum(a.nbytes for a in (index._ids, index._lab, index._embed, index._norms)) / 2 ** 20, 1),
+            }
+            os.remove(path)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# backend/benchmarks/bench_import_time.py
+"""
+Startup benchmark: `python -X importtime` breakdown of create_app().
+
+Runs a fresh interpreter per sample (imports are cached per process) and
+reports:
+- wall time of `from app import create_app; create_app()` (median / p95)
+- cumulative import time of the slowest top-level packages
+- which heavy modules (numpy, cv2, sklearn, scipy, pymongo, ...) were
+  loaded at startup; for a lazy create_app this list should be empty
+- the same numbers with create_app(preload=True) for comparison
+
+Pass --history FILE to append one JSON line per run (with the git
+revision) so startup cost can be tracked over time.
+
+Usage (from backend/):
+    python -m benchmarks.bench_import_time [--samples 5] [--history import_time.jsonl]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that should only load on the first image / database request
+HEAVY_MODULES = ("numpy", "cv2", "sklearn", "scipy", "joblib", "pymongo", "tensorflow", "mediapipe", "jax")
+
+STARTUP_CODE = (
+    "import time; t = time.perf_counter(); "
+    "from app import create_app; create_app(preload={preload}); "
+    "print(time.perf_counter() - t)"
+)
+
+
+def parse_importtime(stderr):
+    """Parse `-X importtime` lines into {module: (self_us, cumulative_us)}."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def run_once(preload):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", STARTUP_CODE.format(preload=preload)],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+        env=dict(os.environ, APP_PRELOAD=""),
+    )
+    wall_ms = float(proc.stdout.strip().splitlines()[-1]) * 1000
+    return wall_ms, parse_importtime(proc.stderr)
+
+
+def measure(preload, samples, top):
+    walls, last = [], {}
+    for _ in range(samples):
+        wall_ms, last = run_once(preload)
+        walls.append(wall_ms)
+    walls.sort()
+
+    # Top-level packages only, so the report names "cv2" rather than its submodules
+    packages = {name: cumulative for name, (_, cumulative) in last.items() if "." not in name}
+    slowest = sorted(packages.items(), key=lambda kv: kv[1], reverse=True)[:top]
+    return {
+        "wall_ms_median": round(statistics.median(walls), 1),
+        "wall_ms_p95": round(walls[min(len(walls) - 1, int(len(walls) * 0.95))], 1),
+        "modules_loaded": len(last),
+        "heavy_modules_loaded": [m for m in HEAVY_MODULES if any(n == m or n.startswith(m + ".") for n in last)],
+        "slowest_packages_ms": {name: round(us / 1000, 1) for name, us in slowest},
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--no-preload", action="store_true", help="skip the preload=True comparison")
+    parser.add_argument("--history", help="append this run as a JSON line to FILE")
+    args = parser.parse_args()
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "revision": git_revision(),
+        "python": sys.version.split()[0],
+        "lazy": measure(False, args.samples, args.top),
+    }
+    if not args.no_preload:
+        report["preload"] = measure(True, args.samples, args.top)
+
+    print(json.dumps(report, indent=2))
+
+    if args.history:
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps(report) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# backend/benchmarks/bench_metrics_overhead.py
+"""
+Instrumentation overhead benchmark: metrics on vs off.
+
+Measures:
+- span():   cost of one `with span(...)` block, disabled vs enabled
+- request:  GET /api/test through the Flask test client with request
+            metrics disabled vs enabled (includes before/after hooks)
+
+Usage (from backend/):
+    python -m benchmarks.bench_metrics_overhead [--iterations 200000] [--requests 2000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from app.services import metrics
+
+
+def time_spans(iterations):
+    span = metrics.span
+    started = time.perf_counter()
+    for _ in range(iterations):
+        with span("bench"):
+            pass
+    return (time.perf_counter() - started) / iterations * 1e9
+
+
+def time_requests(client, requests):
+    client.get("/api/test")  # warm up routing / JSON provider
+    started = time.perf_counter()
+    for _ in range(requests):
+        client.get("/api/test")
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=200_000)
+    parser.add_argument("--requests", type=int, default=2_000)
+    args = parser.parse_args()
+
+    client = create_app().test_client()
+    report = {}
+    for enabled in (False, True):
+        # The helpers read the flag on every call, so it can be flipped at runtime
+        metrics.METRICS_ENABLED = enabled
+        metrics.registry.reset()
+        report["enabled" if enabled else "disabled"] = {
+            "span_ns": round(time_spans(args.iterations), 1),
+            "request_us": round(time_requests(client, args.requests), 1),
+        }
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# backend/benchmarks/bench_near_duplicates.py
+"""
+Near-duplicate benchmark: perceptual-hash robustness and lookup time vs. index size.
+
+Reports:
+- hashes        dHash distance between synthetic photos and their resized,
+                recompressed and cropped copies, next to the smallest
+                distance to an unrelated photo (the threshold must sit
+                between the two)
+- lookup        per index size: HammingIndex.find latency (median / p95)
+                for queries within NEAR_DUPLICATE_DISTANCE of a stored
+                hash, a NumPy linear scan over the same hashes for
+                comparison, build time, and whether both return the same
+                matches (multi-index hashing is exact)
+
+Stored hashes are uniformly random. Real photo hashes cluster more, which
+makes buckets (and lookups) somewhat larger.
+
+Usage (from backend/):
+    python -m benchmarks.bench_near_duplicates [--sizes 10000 100000 1000000] [--queries 200]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from benchmarks.common import encode_image, summarize, synthetic_image
+from app.services.near_duplicates import HASH_BITS, MAX_DISTANCE, HammingIndex
+from app.utils.image_utils import crop_center, decode_image, dhash
+
+VARIANTS = {
+    "resized_50": lambda image: cv2.resize(image, None, fx=0.5, fy=0.5, interpolation=cv2.INTER_AREA),
+    "jpeg_q50": lambda image: decode_image(encode_image(image, quality=50)),
+    "cropped_95": lambda image: crop_center(image, int(image.shape[1] * 0.95), int(image.shape[0] * 0.95)),
+}
+
+
+def hash_distances(count=20):
+    """dHash distances for near-duplicate variants vs. unrelated images."""
+    originals = [decode_image(encode_image(synthetic_image(seed=seed))) for seed in range(count)]
+    hashes = [dhash(image) for image in originals]
+    report = {}
+    for name, make in VARIANTS.items():
+        distances = [(dhash(make(image)) ^ h).bit_count() for image, h in zip(originals, hashes)]
+        report[name] = {"median": float(np.median(distances)), "max": max(distances)}
+    unrelated = [(a ^ b).bit_count() for i, a in enumerate(hashes) for b in hashes[i + 1:]]
+    report["unrelated"] = {"min": min(unrelated), "median": float(np.median(unrelated))}
+    return report
+
+
+def random_hashes(rng, size):
+    return rng.integers(0, 2 ** 63, size=size, dtype=np.uint64) * np.uint64(2) + rng.integers(0, 2, size=size, dtype=np.uint64)
+
+
+def perturb(rng, image_hash, max_distance):
+    """`image_hash` with up to `max_distance` random bits flipped."""
+    flips = rng.choice(HASH_BITS, size=int(rng.integers(0, max_distance + 1)), replace=False)
+    return image_hash ^ sum(1 << int(bit) for bit in flips)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--distance", type=int, default=MAX_DISTANCE)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    report = {"distance": args.distance, "hashes": hash_distances(), "lookup": {}}
+
+    for size in args.sizes:
+        stored = random_hashes(rng, size)
+        index = HammingIndex()
+        started = time.perf_counter()
+        for i, image_hash in enumerate(stored.tolist()):
+            index.add(image_hash, i)
+        build_s = time.perf_counter() - started
+
+        queries = [perturb(rng, int(stored[i]), args.distance) for i in rng.integers(0, size, size=args.queries)]
+        index_ms, scan_ms, agree = [], [], True
+        for query in queries:
+            started = time.perf_counter()
+            found = index.find(query, args.distance)
+            index_ms.append((time.perf_counter() - started) * 1000)
+
+            started = time.perf_counter()
+            distances = np.bitwise_count(stored ^ np.uint64(query))
+            expected = np.flatnonzero(distances <= args.distance)
+            scan_ms.append((time.perf_counter() - started) * 1000)
+            agree = agree and sorted(value for _, value in found) == expected.tolist()
+
+        report["lookup"][str(size)] = {
+            "build_s": round(build_s, 2),
+            "index": summarize(index_ms),
+            "linear_scan": summarize(scan_ms),
+            "same_matches": agree,
+        }
+
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# backend/benchmarks/bench_outfit_store.py
+"""
+Outfit storage benchmark: legacy JSON array rewrite vs append-only log.
+
+For each catalogue size it reports:
+- legacy:  cost of one save when the whole `outfits.json` is loaded,
+           prepended to and rewritten (measured on a prefilled file)
+- jsonl:   sustained write throughput of JsonLinesStore.append for every
+           fsync policy, index build (open) time, and deep-page read latency
+
+Usage (from backend/):
+    python -m benchmarks.bench_outfit_store [--sizes 10000 100000 1000000]
+                                            [--legacy-max 100000]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from benchmarks.common import summarize, synthetic_outfit
+from app.services.jsonl_store import FSYNC_POLICIES, JsonLinesStore
+
+# fsync="always" is orders of magnitude slower; cap how many writes it gets
+ALWAYS_FSYNC_WRITES = 2000
+
+
+def legacy_save(path, entry):
+    """The pre-change outfit_service.save_outfit JSON branch."""
+    with open(path, "r+") as f:
+        outfits = json.load(f)
+        outfits.insert(0, entry)
+        f.seek(0)
+        json.dump(outfits, f, indent=2)
+
+
+def bench_legacy(workdir, size, rng, saves=5):
+    path = os.path.join(workdir, "outfits.json")
+    with open(path, "w") as f:
+        json.dump([synthetic_outfit(i, rng) for i in range(size)], f, indent=2)
+
+    samples = []
+    for i in range(saves):
+        start = time.perf_counter()
+        legacy_save(path, synthetic_outfit(size + i, rng))
+        samples.append((time.perf_counter() - start) * 1000)
+    result = summarize(samples)
+    result["writes_per_s"] = round(1000 / result["mean_ms"], 1)
+    return result
+
+
+def bench_jsonl(workdir, size, rng, policy):
+    path = os.path.join(workdir, f"outfits-{policy}.jsonl")
+    store = JsonLinesStore(path, fsync=policy)
+    records = [synthetic_outfit(i, rng) for i in range(size)]
+
+    writes = min(size, ALWAYS_FSYNC_WRITES) if policy == "always" else size
+    start = time.perf_counter()
+    for record in records[:writes]:
+        store.append(record)
+    elapsed = time.perf_counter() - start
+    if writes < size:
+        store.append_many(records[writes:])  # Fill the rest so reads see the full catalogue
+    store.close()
+
+    # Cold open: how long a new process takes to build the offset index
+    start = time.perf_counter()
+    reopened = JsonLinesStore(path, fsync=policy)
+    reopened.count()
+    open_ms = (time.perf_counter() - start) * 1000
+
+    page_samples = []
+    for offset in (0, size // 2, size - 10):
+        t = time.perf_counter()
+        reopened.page(offset=offset, limit=10)
+        page_samples.append((time.perf_counter() - t) * 1000)
+    reopened.close()
+
+    return {
+        "writes": writes,
+        "writes_per_s": round(writes / elapsed, 1),
+        "open_index_ms": round(open_ms, 2),
+        "page_read_ms_max": round(max(page_samples), 3),
+        "file_mb": round(os.path.getsize(path) / 1e6, 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--legacy-max", type=int, default=100_000,
+                        help="Skip the legacy rewrite above this size (it gets very slow)")
+    args = parser.parse_args(argv)
+
+    report = {}
+    for size in args.sizes:
+        workdir = tempfile.mkdtemp(prefix="bench-outfits-")
+        rng = np.random.default_rng(size)
+        try:
+            entry = {"jsonl": {p: bench_jsonl(workdir, size, rng, p) for p in FSYNC_POLICIES}}
+            if size <= args.legacy_max:
+                entry["legacy_json"] = bench_legacy(workdir, size, rng)
+            report[str(size)] = entry
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# backend/benchmarks/bench_palette_engines.py
+"""
+Palette engine benchmark: quality vs speed on a fixed synthetic corpus.
+
+For each engine, extracts a palette from every 200x200 crop in the corpus
+and reports latency plus ΔE (CIE76, in CIELAB) palette distance against a
+reference palette from seeded full KMeans.
+
+Palette distance is the symmetric mean nearest-neighbour ΔE: for every
+colour in one palette, the ΔE to the closest colour in the other, averaged
+both ways. 0 means identical palettes; ΔE < ~2.3 is barely perceptible.
+
+Usage (from backend/):
+    python -m benchmarks.bench_palette_engines [--images 12] [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from benchmarks.common import summarize, synthetic_image, time_call
+from app.services.color_palette import extract_palette_from_array
+from app.services.palette_engines import PALETTE_ENGINES
+from app.utils.image_utils import crop_center
+
+REFERENCE_ENGINE = "kmeans"
+SEED = 1234
+
+
+def hex_to_lab(hex_colours):
+    """Convert a list of '#rrggbb' strings to an (n, 3) CIELAB array."""
+    rgb = np.array(
+        [[int(h.lstrip("#")[i:i + 2], 16) for i in (0, 2, 4)] for h in hex_colours],
+        dtype=np.float32,
+    ) / 255.0
+    return cv2.cvtColor(rgb.reshape(1, -1, 3), cv2.COLOR_RGB2LAB).reshape(-1, 3)
+
+
+def palette_delta_e(a, b):
+    """Symmetric mean nearest-neighbour CIE76 ΔE between two hex palettes."""
+    lab_a, lab_b = hex_to_lab(a), hex_to_lab(b)
+    distances = np.linalg.norm(lab_a[:, None, :] - lab_b[None, :, :], axis=2)
+    return float((distances.min(axis=1).mean() + distances.min(axis=0).mean()) / 2)
+
+
+def build_corpus(count):
+    """Fixed corpus: seeded synthetic photos at mixed sizes, centre-cropped."""
+    sizes = [(640, 480), (1024, 768), (1280, 960)]
+    return [
+        crop_center(synthetic_image(*sizes[i % len(sizes)], seed=i), 200, 200)
+        for i in range(count)
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--images", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    corpus = build_corpus(args.images)
+    reference = [
+        extract_palette_from_array(crop, k=args.k, engine=REFERENCE_ENGINE, seed=SEED)
+        for crop in corpus
+    ]
+
+    report = {"images": len(corpus), "k": args.k, "reference": REFERENCE_ENGINE, "engines": {}}
+    for name in PALETTE_ENGINES:
+        samples, distances = [], []
+        for crop, ref in zip(corpus, reference):
+            samples.extend(time_call(
+                extract_palette_from_array, crop, k=args.k, engine=name, seed=SEED,
+                repeat=args.repeat, warmup=1,
+            ))
+            palette = extract_palette_from_array(crop, k=args.k, engine=name, seed=SEED)
+            distances.append(palette_delta_e(palette, ref))
+
+        # Reproducibility check: a second seeded run must give the same palette
+        first = extract_palette_from_array(corpus[0], k=args.k, engine=name, seed=SEED)
+        second = extract_palette_from_array(corpus[0], k=args.k, engine=name, seed=SEED)
+
+        report["engines"][name] = {
+            **summarize(samples),
+            "delta_e_mean": round(float(np.mean(distances)), 3),
+            "delta_e_max": round(float(np.max(distances)), 3),
+            "deterministic": first == second,
+        }
+
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# backend/benchmarks/bench_preprocess.py
+"""
+Preprocessing benchmark: downscale-before-cluster vs full-resolution decode.
+
+Runs palette_from_bytes on synthetic JPEG uploads (VGA up to 12 MP) in four
+configurations and reports, per resolution and engine:
+- latency (median / p95, palette cache disabled)
+- peak Python-tracked memory during one call (tracemalloc; numpy and cv2
+  output arrays are tracked, libjpeg's internal scratch is not)
+- palette drift: ΔE (CIE76) against the legacy full-decode palette, using
+  the same symmetric nearest-neighbour metric as bench_palette_engines
+- fit loss: how much worse the palette describes the full-resolution crop,
+  i.e. the increase in mean pixel → nearest palette colour ΔE. Drift alone
+  overstates harm when a minor colour is swapped for an equally good one.
+
+Configurations:
+    legacy    full decode, every crop pixel clustered (pre-change behaviour)
+    sample    full decode, stratified sample of PALETTE_MAX_PIXELS
+    reduced   IMREAD_REDUCED_COLOR_* decode, every crop pixel clustered
+    both      reduced decode + stratified sample (the default)
+
+Exits 1 when any mean fit loss exceeds --max-fit-loss (default 2.5, about
+one just-noticeable ΔE), so it can gate preprocessing changes.
+
+Usage (from backend/):
+    python -m benchmarks.bench_preprocess [--crop 200x200] [--repeat 5] [--max-fit-loss 2.5]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Every call must do the full work; either palette cache would hide it
+os.environ["PALETTE_CACHE_SIZE"] = "0"
+os.environ["NEAR_DUPLICATE_INDEX_SIZE"] = "0"
+
+import cv2
+import numpy as np
+
+from benchmarks.bench_palette_engines import hex_to_lab, palette_delta_e
+from benchmarks.common import encode_image, summarize, synthetic_image, time_call
+from app.services import image_pipeline
+from app.utils.image_utils import crop_center, decode_image
+
+RESOLUTIONS = [(640, 480), (1920, 1080), (4032, 3024)]
+ENGINES = ["median_cut", "kmeans"]
+SEED = 1234
+
+CONFIGS = {
+    "legacy": {"reduced_decode": False, "max_pixels": 0},
+    "sample": {"reduced_decode": False, "max_pixels": image_pipeline.MAX_PIXELS},
+    "reduced": {"reduced_decode": True, "max_pixels": 0},
+    "both": {"reduced_decode": True, "max_pixels": image_pipeline.MAX_PIXELS},
+}
+
+
+def crop_lab(data, crop_size):
+    """
+    Full-resolution crop (the legacy geometry) as an (n, 3) CIELAB array.
+    Palettes are RGB cluster centres written by bgr_to_hex, so their hex has
+    R and B swapped; the BGR crop is read as RGB here to stay comparable.
+    """
+    image = decode_image(data)
+    height, width = image.shape[:2]
+    crop = crop_center(image, *image_pipeline.crop_pixels(width, height, crop_size))
+    return cv2.cvtColor(crop.astype(np.float32) / 255.0, cv2.COLOR_RGB2LAB).reshape(-1, 3)
+
+
+def palette_fit(pixels_lab, palette):
+    """Mean ΔE from each pixel to its nearest palette colour (lower = better)."""
+    distances = np.linalg.norm(pixels_lab[:, None, :] - hex_to_lab(palette)[None, :, :], axis=2)
+    return float(distances.min(axis=1).mean())
+
+
+def peak_memory_mb(fn, *args, **kwargs):
+    """Peak tracemalloc-tracked allocation (MB) during one call."""
+    tracemalloc.start()
+    try:
+        fn(*args, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 2 ** 20, 2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--crop", default="200x200", help="crop spec, e.g. 200x200 or 0.3")
+    parser.add_argument("--images", type=int, default=3, help="images per resolution")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-fit-loss", type=float, default=2.5, help="fail above this mean fit loss (ΔE)")
+    args = parser.parse_args(argv)
+
+    crop_size = image_pipeline.parse_crop(args.crop)
+    report = {"crop": args.crop, "max_pixels": image_pipeline.MAX_PIXELS,
+              "min_crop_side": image_pipeline.MIN_CROP_SIDE, "results": {}}
+    failed = False
+
+    for width, height in RESOLUTIONS:
+        uploads = [encode_image(synthetic_image(width, height, seed=i)) for i in range(args.images)]
+        reduce = image_pipeline.choose_reduction(uploads[0], crop_size)
+
+        for engine in ENGINES:
+            options = {"crop_size": crop_size, "engine": engine, "seed": SEED}
+            legacy = [image_pipeline.palette_from_bytes(u, **options, **CONFIGS["legacy"]) for u in uploads]
+            pixels = [crop_lab(u, crop_size) for u in uploads]
+            legacy_fit = [palette_fit(p, palette) for p, palette in zip(pixels, legacy)]
+
+            for config, overrides in CONFIGS.items():
+                samples, drift, fit_loss = [], [], []
+                for upload, reference, lab, reference_fit in zip(uploads, legacy, pixels, legacy_fit):
+                    samples.extend(time_call(
+                        image_pipeline.palette_from_bytes, upload, **options, **overrides,
+                        repeat=args.repeat, warmup=1,
+                    ))
+                    palette = image_pipeline.palette_from_bytes(upload, **options, **overrides)
+                    drift.append(palette_delta_e(palette, reference))
+                    fit_loss.append(palette_fit(lab, palette) - reference_fit)
+
+                mean_fit_loss = float(np.mean(fit_loss))
+                failed |= mean_fit_loss > args.max_fit_loss
+                report["results"][f"{width}x{height}/{engine}/{config}"] = {
+                    **summarize(samples),
+                    "reduce": reduce if overrides["reduced_decode"] else 1,
+                    "peak_mb": peak_memory_mb(image_pipeline.palette_from_bytes, uploads[0], **options, **overrides),
+                    "delta_e_mean": round(float(np.mean(drift)), 3),
+                    "delta_e_max": round(float(np.max(drift)), 3),
+                    "fit_loss_mean": round(mean_fit_loss, 3),
+                }
+
+    report["passed"] = not failed
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main()["passed"] else 1)
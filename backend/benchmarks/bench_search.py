@@ -0,0 +1,86 @@
+# backend/benchmarks/bench_search.py
+"""
+Outfit search benchmark: inverted index vs linear scan.
+
+Builds synthetic catalogues and times representative /search queries
+(single tag, tag + theme, multi-tag all/any) against:
+- scan:  filter every outfit in Python, sort all matches, slice one page
+         (what the route used to do)
+- index: OutfitSearchIndex set algebra + bounded-heap page selection
+
+Only ids are compared, so storage I/O is excluded from both sides.
+
+Usage (from backend/):
+    python -m benchmarks.bench_search [--sizes 1000 10000 100000 1000000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from benchmarks.common import summarize, synthetic_outfit, time_call
+from app.services.search_index import OutfitSearchIndex
+
+QUERIES = {
+    "tag": {"tags": ["Party"]},
+    "tag_theme": {"tags": ["Casual"], "theme": "Winter"},
+    "all_tags": {"tags": ["Casual", "Formal"], "match": "all"},
+    "any_tags": {"tags": ["Vintage", "Sport"], "match": "any"},
+    "deep_page": {"tags": ["Party"], "offset": 500},
+}
+
+
+def scan_search(outfits, tags=(), theme=None, match="all", offset=0, limit=10):
+    """The old approach: materialise every match, sort, slice."""
+    wanted = {t.lower() for t in tags}
+    results = []
+    for o in outfits:
+        have = {t.lower() for t in o["tags"]}
+        if wanted and not (wanted <= have if match == "all" else wanted & have):
+            continue
+        if theme and o["theme"].lower() != theme.lower():
+            continue
+        results.append(o)
+    results.sort(key=lambda o: (o["timestamp"], o["id"]), reverse=True)
+    return [o["id"] for o in results[offset:offset + limit]], len(results)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--scan-max", type=int, default=100_000,
+                        help="Skip the linear scan above this size")
+    args = parser.parse_args(argv)
+
+    report = {}
+    for size in args.sizes:
+        rng = np.random.default_rng(size)
+        outfits = [synthetic_outfit(i, rng) for i in range(size)]
+
+        index = OutfitSearchIndex()
+        start = time.perf_counter()
+        index.add_many(outfits)
+        entry = {"build_ms": round((time.perf_counter() - start) * 1000, 1), "queries": {}}
+
+        for name, query in QUERIES.items():
+            result = {"index": summarize(time_call(index.search, repeat=args.repeat, **query))}
+            if size <= args.scan_max:
+                result["scan"] = summarize(time_call(scan_search, outfits, repeat=max(args.repeat // 3, 1), **query))
+                # Both strategies must agree on the page and the total
+                assert index.search(**query) == scan_search(outfits, **query), name
+            entry["queries"][name] = result
+        report[str(size)] = entry
+
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    main()
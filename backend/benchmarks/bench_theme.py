@@ -0,0 +1,88 @@
+# backend/benchmarks/bench_theme.py
+"""
+Theme matcher benchmark: per-colour colorsys loop vs vectorized matcher.
+
+Times, at several batch sizes:
+- legacy:   the original match_theme loop (hex → RGB → colorsys → mean),
+            called once per palette
+- compat:   match_themes(..., mode="compat") in one vectorized call
+- circular: match_themes(..., mode="circular") in one vectorized call
+
+Also checks that compat mode reproduces the legacy labels exactly.
+
+Usage (from backend/):
+    python -m benchmarks.bench_theme [--sizes 1 1000 1000000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from app.services.theme_matcher import hex_to_rgb, match_themes, rgb_to_hue
+
+
+def legacy_match_theme(palette):
+    """The original scalar implementation, kept here as the reference."""
+    hues = []
+    for hex_color in palette:
+        try:
+            hues.append(rgb_to_hue(hex_to_rgb(hex_color)))
+        except Exception:
+            continue
+    if not hues:
+        return "Neutral"
+    avg_hue = sum(hues) / len(hues)
+    if avg_hue < 30 or avg_hue >= 330:
+        return "Autumn"
+    elif avg_hue < 90:
+        return "Spring"
+    elif avg_hue < 210:
+        return "Summer"
+    return "Winter"
+
+
+def synthetic_palettes(count, seed=0):
+    rng = np.random.default_rng(seed)
+    values = rng.integers(0, 0xFFFFFF, size=(count, 5))
+    return [["#{:06x}".format(int(v)) for v in row] for row in values]
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, round((time.perf_counter() - start) * 1000, 3)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 1_000, 1_000_000])
+    args = parser.parse_args(argv)
+
+    report = {}
+    for size in args.sizes:
+        palettes = synthetic_palettes(size, seed=size)
+        legacy, legacy_ms = timed(lambda: [legacy_match_theme(p) for p in palettes])
+        compat, compat_ms = timed(match_themes, palettes, mode="compat")
+        circular, circular_ms = timed(match_themes, palettes, mode="circular")
+
+        report[str(size)] = {
+            "legacy_ms": legacy_ms,
+            "compat_ms": compat_ms,
+            "circular_ms": circular_ms,
+            "compat_speedup": round(legacy_ms / compat_ms, 1) if compat_ms else None,
+            "compat_matches_legacy": compat == legacy,
+            "circular_label_changes": sum(a != b for a, b in zip(circular, legacy)),
+        }
+
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    main()
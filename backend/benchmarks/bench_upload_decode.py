@@ -0,0 +1,124 @@
+# backend/benchmarks/bench_upload_decode.py
+"""
+Upload decode benchmark: temp-file pipeline vs in-memory pipeline.
+
+Compares the old `/api/image/upload` flow (save upload to a temp file →
+cv2.imread → crop → cv2.imwrite crop → re-read in extract_palette) with the
+in-memory flow (cv2.imdecode → crop → extract_palette_from_array).
+
+Reports per-request latency plus read/write syscall counts from /proc/self/io
+and the number of files created under the temp directory.
+
+Usage (from backend/):
+    python -m benchmarks.bench_upload_decode [--repeat 30] [--no-cluster]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+
+from benchmarks.common import (
+    encode_image,
+    proc_io_counters,
+    summarize,
+    synthetic_image,
+    time_call,
+)
+from app.services.color_palette import extract_palette, extract_palette_from_array
+from app.utils.image_utils import crop_center, decode_image
+
+
+def legacy_pipeline(data, cluster=True):
+    """Reproduction of the pre-change handler (minus Flask)."""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as temp:
+        image_path = temp.name
+        temp.write(data)
+    try:
+        image = cv2.imread(image_path)
+        cropped = crop_center(image, 200, 200)
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as temp_cropped:
+            cropped_path = temp_cropped.name
+        cv2.imwrite(cropped_path, cropped)
+        try:
+            if cluster:
+                return extract_palette(cropped_path, k=5)
+            return cv2.imread(cropped_path)
+        finally:
+            os.remove(cropped_path)
+    finally:
+        # The old handler leaked this file; clean it here so the benchmark
+        # does not fill /tmp itself.
+        os.remove(image_path)
+
+
+def in_memory_pipeline(data, cluster=True):
+    """The current handler's decode → crop → extract path."""
+    image = decode_image(data)
+    cropped = crop_center(image, 200, 200)
+    if cluster:
+        return extract_palette_from_array(cropped, k=5)
+    return cropped
+
+
+# Count temp files created via the `tempfile.mkstemp` audit event
+# (NamedTemporaryFile raises it too). Audit hooks cannot be removed, so the
+# hook only increments while `_TEMP_FILES["active"]` is set.
+_TEMP_FILES = {"active": False, "count": 0}
+
+
+def _audit(event, _args):
+    if event == "tempfile.mkstemp" and _TEMP_FILES["active"]:
+        _TEMP_FILES["count"] += 1
+
+
+sys.addaudithook(_audit)
+
+
+def count_io(fn, data, runs, cluster):
+    """Average read/write syscalls and temp files created per call."""
+    _TEMP_FILES.update(active=True, count=0)
+    before = proc_io_counters()
+    try:
+        for _ in range(runs):
+            fn(data, cluster=cluster)
+    finally:
+        after = proc_io_counters()
+        _TEMP_FILES["active"] = False
+
+    result = {"temp_files_per_request": _TEMP_FILES["count"] / runs}
+    if before and after:
+        for key in ("syscr", "syscw", "rchar", "wchar"):
+            result[f"{key}_per_request"] = round((after[key] - before[key]) / runs, 1)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--width", type=int, default=3024)
+    parser.add_argument("--height", type=int, default=4032)
+    parser.add_argument("--no-cluster", action="store_true",
+                        help="Skip KMeans to isolate decode/crop/disk cost")
+    args = parser.parse_args(argv)
+
+    data = encode_image(synthetic_image(args.width, args.height))
+    cluster = not args.no_cluster
+
+    report = {"image_bytes": len(data), "resolution": f"{args.width}x{args.height}",
+              "cluster": cluster}
+    for name, fn in (("temp_files", legacy_pipeline), ("in_memory", in_memory_pipeline)):
+        samples = time_call(fn, data, repeat=args.repeat, cluster=cluster)
+        report[name] = {**summarize(samples), **count_io(fn, data, args.repeat, cluster)}
+
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    main()
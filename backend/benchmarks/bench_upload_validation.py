@@ -0,0 +1,147 @@
+# backend/benchmarks/bench_upload_validation.py
+"""
+Upload validation benchmark: CPU and memory spent on malformed uploads.
+
+Runs each upload in a corpus of bad files through
+- legacy       what /upload did before validation: hashed_palette_from_bytes
+               on the whole body, failing (or succeeding) inside cv2
+- validated    upload_validation.check_header, which rejects from the magic
+               bytes / header without decoding
+
+Each (path, file) pair runs in a fresh subprocess so peak RSS is per file.
+Reports CPU time (process_time, median over --repeat) and the peak-RSS
+growth over the process's footprint after imports (ru_maxrss), plus the
+outcome. A valid photo is included as the control: it must pass both.
+
+Usage (from backend/):
+    python -m benchmarks.bench_upload_validation [--repeat 5] [--bomb-side 12000]
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def png_chunk(kind, payload):
+    return struct.pack(">I", len(payload)) + kind + payload + struct.pack(">I", zlib.crc32(kind + payload))
+
+
+def png_bomb(side):
+    """A valid side x side RGB PNG of zeros: ~side^2 / 1000 bytes on disk, side^2 * 3 bytes decoded."""
+    compressor = zlib.compressobj(9)
+    row = b"\0" * (1 + side * 3)
+    idat = b"".join(compressor.compress(row) for _ in range(side)) + compressor.flush()
+    return (b"\x89PNG\r\n\x1a\n" + png_chunk(b"IHDR", struct.pack(">IIBBBBB", side, side, 8, 2, 0, 0, 0))
+            + png_chunk(b"IDAT", idat) + png_chunk(b"IEND", b""))
+
+
+def build_corpus(directory, bomb_side):
+    import cv2
+    import numpy as np
+
+    from benchmarks.common import encode_image, synthetic_image
+
+    photo = encode_image(synthetic_image())
+    rng = np.random.default_rng(0)
+    corpus = {
+        "control_photo.jpg": photo,
+        "random_bytes.jpg": rng.integers(0, 256, size=2 * 1024 * 1024, dtype=np.uint8).tobytes(),
+        "text_as.png": b"<html><body>not an image</body></html>\n" * 20000,
+        "truncated.jpg": photo[: len(photo) // 2],
+        "corrupt_header.png": png_bomb(64)[:29] + b"\0\0\0\0" + png_bomb(64)[33:],
+        "png_bomb.png": png_bomb(bomb_side),
+        # Real, decodable JPEG that is simply too many megapixels (flat, so tiny on disk)
+        "megapixel.jpg": cv2.imencode(".jpg", np.full((9000, 9000, 3), 128, np.uint8))[1].tobytes(),
+    }
+    paths = {}
+    for name, data in corpus.items():
+        paths[name] = os.path.join(directory, name)
+        with open(paths[name], "wb") as f:
+            f.write(data)
+    return paths
+
+
+def run_child(mode, path, repeat):
+    """Process one file `repeat` times in this process; print JSON stats."""
+    from app.utils.upload_validation import UploadRejected, check_header
+
+    if mode == "legacy":
+        from app.services.image_pipeline import hashed_palette_from_bytes
+
+    with open(path, "rb") as f:
+        data = f.read()
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    cpu_ms, outcome = [], None
+    for _ in range(repeat):
+        started = time.process_time()
+        try:
+            if mode == "legacy":
+                hashed_palette_from_bytes(data)
+            else:
+                check_header(data)
+            outcome = "accepted"
+        except UploadRejected as e:
+            outcome = f"rejected:{e.reason}"
+        except Exception as e:
+            outcome = f"failed:{type(e).__name__}"
+        cpu_ms.append((time.process_time() - started) * 1000)
+
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({
+        "cpu_ms": round(statistics.median(cpu_ms), 3),
+        "peak_rss_growth_mb": round((peak_kb - baseline_kb) / 1024, 1),
+        "outcome": outcome,
+    }))
+
+
+def measure(mode, path, repeat):
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_upload_validation", "--child", mode, path, "--repeat", str(repeat)],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--bomb-side", type=int, default=12000)
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        return run_child(*args.child, repeat=args.repeat)
+
+    report = {"files": {}, "malformed_total": {}}
+    with tempfile.TemporaryDirectory() as directory:
+        for name, path in build_corpus(directory, args.bomb_side).items():
+            entry = {"bytes": os.path.getsize(path)}
+            for mode in ("legacy", "validated"):
+                entry[mode] = measure(mode, path, args.repeat)
+            report["files"][name] = entry
+
+    malformed = [entry for name, entry in report["files"].items() if not name.startswith("control")]
+    for mode in ("legacy", "validated"):
+        report["malformed_total"][mode] = {
+            "cpu_ms": round(sum(entry[mode]["cpu_ms"] for entry in malformed), 3),
+            "max_peak_rss_growth_mb": max(entry[mode]["peak_rss_growth_mb"] for entry in malformed),
+        }
+
+    print(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    main()
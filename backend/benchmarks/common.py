@@ -0,0 +1,152 @@
+# backend/benchmarks/common.py
+"""
+Shared helpers for benchmark scripts.
+
+WHY THIS FILE EXISTS:
+- Every benchmark needs the same synthetic inputs and timing maths.
+- Keeps individual scripts short and their numbers comparable.
+- Everything here is deterministic (seeded) and runs offline.
+"""
+
+import os
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+# Make `import app` work when a script is run as `python benchmarks/xyz.py`
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def synthetic_image(width=1024, height=768, seed=0):
+    """
+    Build a deterministic BGR test image.
+
+    WHY:
+    - Smooth gradients plus a few flat "garment" blocks give KMeans real
+      structure to find, unlike pure noise.
+    """
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    image = np.empty((height, width, 3), dtype=np.uint8)
+    image[..., 0] = (x * 255 // max(width - 1, 1)).astype(np.uint8)
+    image[..., 1] = (y * 255 // max(height - 1, 1)).astype(np.uint8)
+    image[..., 2] = ((x + y) * 127 // max(width + height - 2, 1)).astype(np.uint8)
+
+    # Drop a handful of solid colour blocks, including one over the centre
+    for i in range(6):
+        colour = rng.integers(0, 256, size=3, dtype=np.uint8)
+        bw, bh = width // 4, height // 4
+        if i == 0:
+            x0, y0 = width // 2 - bw // 2, height // 2 - bh // 2
+        else:
+            x0 = int(rng.integers(0, width - bw))
+            y0 = int(rng.integers(0, height - bh))
+        image[y0:y0 + bh, x0:x0 + bw] = colour
+
+    # Light noise so JPEG encoding behaves like a real photo
+    noise = rng.integers(-6, 7, size=image.shape, dtype=np.int16)
+    return np.clip(image.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+
+def encode_image(image, ext=".jpg", quality=90):
+    """Encode a BGR array to upload bytes (JPEG by default)."""
+    params = [cv2.IMWRITE_JPEG_QUALITY, quality] if ext in (".jpg", ".jpeg") else []
+    ok, buffer = cv2.imencode(ext, image, params)
+    if not ok:
+        raise RuntimeError(f"Failed to encode synthetic image as {ext}")
+    return buffer.tobytes()
+
+
+def proc_io_counters():
+    """
+    Read per-process I/O syscall counters from /proc (Linux only).
+
+    Returns a dict with `syscr`, `syscw`, `rchar`, `wchar`, or {} when /proc
+    is unavailable so callers can degrade gracefully.
+    """
+    try:
+        with open("/proc/self/io", "r") as f:
+            pairs = (line.split(":", 1) for line in f if ":" in line)
+            return {k.strip(): int(v) for k, v in pairs}
+    except OSError:
+        return {}
+
+
+def summarize(samples_ms):
+    """Return median / p95 / mean for a list of millisecond timings."""
+    ordered = sorted(samples_ms)
+    p95_index = max(int(round(0.95 * len(ordered))) - 1, 0)
+    return {
+        "median_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[p95_index], 3),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "runs": len(ordered),
+    }
+
+
+def time_call(fn, *args, repeat=20, warmup=2, **kwargs):
+    """Time `fn(*args, **kwargs)` and return per-call timings in milliseconds."""
+    for _ in range(warmup):
+        fn(*args, **kwargs)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args, **kwargs)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+@contextmanager
+def uncached_palettes():
+    """
+    Empty and disable both palette caches (exact bytes and near-duplicate)
+    for the duration, so every palette_from_bytes call extracts.
+    """
+    from app.services.near_duplicates import near_duplicate_palettes
+    from app.services.palette_cache import palette_cache
+
+    caches = (palette_cache, near_duplicate_palettes)
+    saved = [cache.max_entries for cache in caches]
+    for cache in caches:
+        cache.clear()
+        cache.max_entries = 0
+    try:
+        yield
+    finally:
+        for cache, size in zip(caches, saved):
+            cache.max_entries = size
+
+
+THEMES = ["Spring", "Summer", "Autumn", "Winter", "Neutral"]
+TAGS = ["Casual", "Formal", "Party", "Beachwear", "Streetwear", "Workwear",
+        "Vintage", "Sport", "Evening", "Traditional"]
+
+
+def synthetic_outfit(i, rng):
+    """One outfit record shaped like outfit_service.save_outfit output."""
+    return {
+        "id": f"{i:012x}",
+        "timestamp": f"2025-01-01T00:00:{i % 60:02d}.{i:06d}",
+        "image_url": f"https://example.invalid/outfits/{i}.jpg",
+        "colours": ["#{:06x}".format(int(c)) for c in rng.integers(0, 0xFFFFFF, size=5)],
+        "theme": THEMES[int(rng.integers(len(THEMES)))],
+        "caption": "",
+        "tags": sorted({TAGS[int(t)] for t in rng.integers(len(TAGS), size=int(rng.integers(1, 4)))}),
+    }
+
+
+def synthetic_palette(i, rng):
+    """One palette record shaped like palette_service.save_palette output."""
+    return {
+        "id": f"{i:012x}",
+        "timestamp": f"2025-01-01T00:00:{i % 60:02d}.{i:06d}",
+        "image_url": f"https://example.invalid/palettes/{i}.jpg",
+        "colours": ["#{:06x}".format(int(c)) for c in rng.integers(0, 0xFFFFFF, size=5)],
+        "theme": THEMES[int(rng.integers(len(THEMES)))],
+    }
@@ -0,0 +1,392 @@
+# backend/benchmarks/suite.py
+"""
+Benchmark suite: image, theme, storage and route hot paths in one run.
+
+WHY THIS FILE EXISTS:
+- The single-topic scripts next to this file answer one question each;
+  this harness runs a fixed set of cases the same way every time, emits
+  JSON, and compares against a stored baseline so a regression in
+  `extract_palette`, `crop_center`, `match_theme`, `outfit_service` or
+  `palette_service` shows up as a failing run.
+- Everything is synthetic, seeded and offline (MongoDB and admission
+  control are disabled; the JSON-lines / SQLite stores run in a temp
+  directory).
+
+Groups:
+- image     decode / crop_center per resolution, extraction per engine,
+            full palette_from_bytes (cached and uncached)
+- theme     match_theme for one palette, match_themes for large batches
+- storage   outfit feed / deep page / tag search / save, palette recent /
+            save (jsonl + sqlite), per dataset size (1k ... 1M records)
+- routes    Flask test-client throughput for each API route
+
+Usage (from backend/):
+    python -m benchmarks.suite                         # quick profile, JSON to stdout
+    python -m benchmarks.suite --full --output run.json
+    python -m benchmarks.suite --baseline benchmarks/baseline.json --threshold 0.3
+    python -m benchmarks.suite --save-baseline benchmarks/baseline.json
+    python -m benchmarks.suite --groups theme storage --filter search
+
+Comparison uses the median: a case regresses when it is more than
+`threshold` slower than the baseline AND slower by at least --min-delta-ms
+(so sub-microsecond jitter never fails a run). Exit status is 1 when any
+case regresses. Baselines are machine-specific; regenerate one on the
+machine that runs the comparison.
+"""
+
+import argparse
+import io
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+# Offline: never reach a real MongoDB from a benchmark
+os.environ["MONGO_URI"] = ""
+# Route cases call the same upload back to back from one address; measure the
+# handlers, not the admission queue or the per-client rate limit
+os.environ["ADMISSION_CONTROL"] = "0"
+
+import numpy as np
+
+from benchmarks.common import (
+    encode_image,
+    summarize,
+    synthetic_image,
+    synthetic_outfit,
+    synthetic_palette,
+    uncached_palettes,
+)
+
+PROFILES = {
+    "quick": {
+        "resolutions": [(320, 240), (1280, 720), (1920, 1080)],
+        "sizes": [1_000, 10_000],
+        "theme_sizes": [1_000, 100_000],
+        "route_size": 1_000,
+        "budget_s": 0.3,
+    },
+    "full": {
+        "resolutions": [(320, 240), (1280, 720), (1920, 1080), (4032, 3024)],
+        "sizes": [1_000, 10_000, 100_000, 1_000_000],
+        "theme_sizes": [1_000, 100_000, 1_000_000],
+        "route_size": 10_000,
+        "budget_s": 1.0,
+    },
+}
+
+GROUPS = {}
+
+
+def group(name):
+    """Register a generator of (case_name, callable) pairs under `name`."""
+    def register(fn):
+        GROUPS[name] = fn
+        return fn
+    return register
+
+
+def measure(fn, budget_s, min_runs=5, max_runs=2000):
+    """Run `fn` until `budget_s` is spent (within [min_runs, max_runs]); timings in ms."""
+    fn()  # warm-up (imports, caches, JIT-ish first-call costs)
+    samples = []
+    deadline = time.perf_counter() + budget_s
+    while len(samples) < min_runs or (len(samples) < max_runs and time.perf_counter() < deadline):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    result = summarize(samples)
+    result["ops_per_s"] = round(1000 / result["mean_ms"], 1) if result["mean_ms"] else None
+    return result
+
+
+# =========================
+# Dataset helpers
+# =========================
+
+def _fill_log(path, make_record, size, rng, chunk=10_000):
+    from app.services.jsonl_store import JsonLinesStore
+
+    store = JsonLinesStore(path, fsync="never")
+    for start in range(0, size, chunk):
+        store.append_many([make_record(i, rng) for i in range(start, min(start + chunk, size))])
+    store.close()
+
+
+def _use_outfit_log(workdir, size, seed=0):
+    """Point outfit_service at a fresh prefilled JSON-lines log."""
+    from app.services import outfit_service
+
+    path = os.path.join(workdir, f"outfits-{size}.jsonl")
+    if not os.path.exists(path):
+        _fill_log(path, synthetic_outfit, size, np.random.default_rng(seed))
+    outfit_service.LOG_FILE = path
+    outfit_service.DATA_FILE = os.path.join(workdir, "missing-outfits.json")
+    outfit_service._store = None
+    outfit_service._search_index.clear()
+    outfit_service._search_version = None
+    return outfit_service
+
+
+def _use_palette_store(workdir, backend, size, seed=0):
+    """Point palette_service at a fresh prefilled jsonl log or SQLite file."""
+    from app.services import palette_service
+    from app.services.palette_store import SQLitePaletteStore
+
+    rng = np.random.default_rng(seed)
+    palette_service.PALETTE_STORE = backend
+    palette_service.DATA_FILE = os.path.join(workdir, "missing-palettes.json")
+    palette_service.LOG_FILE = os.path.join(workdir, f"palettes-{size}.jsonl")
+    palette_service.DB_FILE = os.path.join(workdir, f"palettes-{size}.sqlite3")
+
+    if backend == "jsonl" and not os.path.exists(palette_service.LOG_FILE):
+        _fill_log(palette_service.LOG_FILE, synthetic_palette, size, rng)
+    elif backend == "sqlite" and not os.path.exists(palette_service.DB_FILE):
+        conn = SQLitePaletteStore(palette_service.DB_FILE)._conn()
+        with conn:
+            conn.executemany(
+                "INSERT INTO palettes (id, timestamp, image_url, colours, theme) VALUES (?, ?, ?, ?, ?)",
+                (
+                    (p["id"], p["timestamp"], p["image_url"], json.dumps(p["colours"]), p["theme"])
+                    for p in (synthetic_palette(i, rng) for i in range(size))
+                ),
+            )
+
+    palette_service._store = None
+    palette_service._recent = None
+    return palette_service
+
+
+# =========================
+# Groups
+# =========================
+
+@group("image")
+def image_cases(cfg, workdir):
+    from app.services.color_palette import extract_palette_from_array
+    from app.services.image_pipeline import palette_from_bytes
+    from app.services.palette_engines import PALETTE_ENGINES
+    from app.utils.image_utils import crop_center, decode_image
+
+    for width, height in cfg["resolutions"]:
+        image = synthetic_image(width, height)
+        data = encode_image(image)
+        yield f"image.decode[{width}x{height}]", lambda data=data: decode_image(data)
+        yield f"image.crop_center[{width}x{height}]", lambda image=image: crop_center(image, 200, 200)
+
+    crop = crop_center(synthetic_image(1280, 720), 200, 200)
+    for engine in sorted(PALETTE_ENGINES):
+        yield f"image.extract_palette[{engine}]", lambda e=engine: extract_palette_from_array(crop, k=5, engine=e, seed=0)
+
+    upload = encode_image(synthetic_image(1280, 720))
+    with uncached_palettes():
+        yield "image.palette_from_bytes[1280x720,median_cut,uncached]", lambda: palette_from_bytes(upload, engine="median_cut", seed=0)
+    yield "image.palette_from_bytes[1280x720,cached]", lambda: palette_from_bytes(upload, engine="median_cut", seed=0)
+
+
+@group("theme")
+def theme_cases(cfg, workdir):
+    from app.services.theme_matcher import match_theme, match_themes
+
+    rng = np.random.default_rng(0)
+    palette = ["#{:06x}".format(int(c)) for c in rng.integers(0, 0xFFFFFF, size=5)]
+    yield "theme.match_theme[1]", lambda: match_theme(palette)
+
+    for size in cfg["theme_sizes"]:
+        colours = rng.integers(0, 0xFFFFFF, size=(size, 5))
+        palettes = [["#{:06x}".format(int(c)) for c in row] for row in colours]
+        yield f"theme.match_themes[{size}]", lambda p=palettes: match_themes(p)
+
+
+@group("storage")
+def storage_cases(cfg, workdir):
+    for size in cfg["sizes"]:
+        service = _use_outfit_log(workdir, size)
+        started = time.perf_counter()
+        service._get_search_index()
+        # One-off cost: building the offset + search index when a worker first opens the log
+        yield f"outfits.open_index[{size}]", None, (time.perf_counter() - started) * 1000
+
+        yield f"outfits.recent[{size}]", lambda s=service: s.get_recent_outfits(limit=10)
+        yield f"outfits.deep_page[{size}]", lambda s=service, p=size // 20: s.get_outfits(page=p, limit=10)
+        yield f"outfits.search_tag[{size}]", lambda s=service: s.search_outfits_by_tags_and_theme(["Party"], "", limit=10)
+        yield f"outfits.search_tag_theme[{size}]", lambda s=service: s.search_outfits_by_tags_and_theme(["Casual"], "Winter", limit=10)
+        yield f"outfits.save[{size}]", lambda s=service: s.save_outfit("https://example.invalid/x.jpg", ["#112233"], "Winter", tags=["Casual"])
+
+        for backend in ("jsonl", "sqlite"):
+            service = _use_palette_store(workdir, backend, size)
+            beyond_buffer = service.RECENT_SIZE + 1
+            yield f"palettes.{backend}.recent[{size}]", lambda s=service: s.get_recent_palettes(limit=5)
+            yield f"palettes.{backend}.recent_uncached[{size}]", lambda s=service: s.get_recent_palettes(limit=beyond_buffer)
+            yield f"palettes.{backend}.save[{size}]", lambda s=service: s.save_palette("https://example.invalid/x.jpg", ["#112233"], "Winter")
+
+
+@group("routes")
+def route_cases(cfg, workdir):
+    from app import create_app
+
+    _use_outfit_log(workdir, cfg["route_size"])
+    _use_palette_store(workdir, "jsonl", cfg["route_size"])
+    client = create_app().test_client()
+    logging.getLogger().setLevel(logging.WARNING)  # routes log every upload at INFO
+
+    def call(method, url, expect=200, **kwargs):
+        def run():
+            response = client.open(url, method=method, **kwargs)
+            if response.status_code != expect:
+                raise RuntimeError(f"{method} {url} returned {response.status_code}")
+        return run
+
+    rng = np.random.default_rng(2)
+    palettes = [["#{:06x}".format(int(c)) for c in row] for row in rng.integers(0, 0xFFFFFF, size=(1000, 5))]
+    upload = encode_image(synthetic_image(640, 480))
+
+    def upload_call(url):
+        def run():
+            response = client.post(url, data={"image": (io.BytesIO(upload), "a.jpg")}, content_type="multipart/form-data")
+            if response.status_code != 200:
+                raise RuntimeError(f"POST {url} returned {response.status_code}")
+        return run
+
+    yield "route.GET /api/test", call("GET", "/api/test")
+    yield "route.POST /api/theme", call("POST", "/api/theme", json={"palette": palettes[0]})
+    yield "route.POST /api/theme/batch[1000]", call("POST", "/api/theme/batch", json={"palettes": palettes})
+    yield "route.POST /api/image/upload[640x480,cached]", upload_call("/api/image/upload?engine=median_cut&seed=0")
+    with uncached_palettes():
+        yield "route.POST /api/image/upload[640x480,median_cut]", upload_call("/api/image/upload?engine=median_cut&seed=0")
+        yield "route.POST /api/image/upload[640x480,kmeans]", upload_call("/api/image/upload?engine=kmeans&seed=0")
+    yield "route.GET /api/outfits/recent", call("GET", "/api/outfits/recent?limit=10")
+    yield "route.GET /api/outfits/search", call("GET", "/api/outfits/search?tags=Party&limit=10")
+    yield "route.POST /api/outfits/save", call(
+        "POST", "/api/outfits/save", expect=201,
+        json={"image_url": "https://example.invalid/x.jpg", "colours": ["#112233"], "theme": "Winter", "tags": ["Casual"]},
+    )
+    yield "route.GET /api/palettes/recent", call("GET", "/api/palettes/recent?limit=5")
+    yield "route.GET /metrics", call("GET", "/metrics")
+
+
+# =========================
+# Runner + baseline comparison
+# =========================
+
+def run_suite(cfg, groups, name_filter=None):
+    results = {}
+    workdir = tempfile.mkdtemp(prefix="blackstyles-bench-")
+    try:
+        for name in groups:
+            for item in GROUPS[name](cfg, workdir):
+                case_name, fn = item[0], item[1]
+                if name_filter and name_filter not in case_name:
+                    continue
+                if fn is None:
+                    # Pre-measured one-off cost (e.g. index build)
+                    results[case_name] = {"median_ms": round(item[2], 3), "runs": 1}
+                else:
+                    results[case_name] = measure(fn, cfg["budget_s"])
+                print(f"{case_name:<60} {results[case_name]['median_ms']:>10.3f} ms", file=sys.stderr)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """Return (rows, regressions) comparing medians against a baseline run."""
+    rows, regressions = [], []
+    for name, current in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None or not previous.get("median_ms"):
+            continue
+        ratio = current["median_ms"] / previous["median_ms"]
+        row = {
+            "case": name,
+            "baseline_ms": previous["median_ms"],
+            "current_ms": current["median_ms"],
+            "ratio": round(ratio, 3),
+        }
+        rows.append(row)
+        if ratio > 1 + threshold and current["median_ms"] - previous["median_ms"] >= min_delta_ms:
+            regressions.append(row)
+    return rows, regressions
+
+
+def _meta(profile, cfg):
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "revision": revision,
+        "profile": profile,
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {k: v for k, v in cfg.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--full", action="store_true", help="large datasets (up to 1M records) and 4K images")
+    parser.add_argument("--groups", nargs="+", choices=sorted(GROUPS), default=list(GROUPS))
+    parser.add_argument("--filter", help="only run cases whose name contains this text")
+    parser.add_argument("--sizes", type=int, nargs="+", help="override storage dataset sizes")
+    parser.add_argument("--budget", type=float, help="seconds of sampling per case")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="compare against this JSON report")
+    parser.add_argument("--threshold", type=float, default=0.3, help="allowed slowdown ratio (0.3 = 30%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05, help="ignore slowdowns smaller than this")
+    parser.add_argument("--save-baseline", help="also write the report here as the new baseline")
+    args = parser.parse_args()
+
+    profile = "full" if args.full else "quick"
+    cfg = dict(PROFILES[profile])
+    if args.sizes:
+        cfg["sizes"] = args.sizes
+    if args.budget is not None:
+        cfg["budget_s"] = args.budget
+
+    report = {"meta": _meta(profile, cfg), "results": run_suite(cfg, args.groups, args.filter)}
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows, regressions = compare(report["results"], baseline, args.threshold, args.min_delta_ms)
+        report["comparison"] = {
+            "baseline": args.baseline,
+            "baseline_revision": baseline.get("meta", {}).get("revision"),
+            "threshold": args.threshold,
+            "cases": rows,
+            "regressions": [row["case"] for row in regressions],
+        }
+        for row in regressions:
+            print(f"REGRESSION {row['case']}: {row['baseline_ms']} ms -> {row['current_ms']} ms (x{row['ratio']})", file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# backend/tests/conftest.py
+"""
+Shared pytest setup.
+
+WHY THIS FILE EXISTS:
+- Services read their storage paths from the environment at import time,
+  so every data file is pointed at a throwaway directory before `app` is
+  imported; tests never touch backend/data.
+- MongoDB is disabled: storage tests exercise the JSON / SQLite fallbacks,
+  and the `mongo_outfits` fixture switches one test to mongomock.
+
+Run from backend/:
+    python -m pytest -q
+"""
+
+import os
+import sys
+import tempfile
+import uuid
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+_DATA_DIR = tempfile.mkdtemp(prefix="blackstyles-tests-")
+os.environ["MONGO_URI"] = ""
+os.environ["JWT_SECRET"] = "test-only-jwt-secret-0123456789abcdef"
+for name, filename in {
+    "OUTFITS_LOG_FILE": "outfits.jsonl",
+    "PALETTES_LOG_FILE": "palettes.jsonl",
+    "PALETTES_DB": "palettes.sqlite3",
+    "FAVORITES_LOG_FILE": "favorites.jsonl",
+    "JOB_QUEUE_DB": "jobs.sqlite3",
+    "ADMISSION_DB": "admission.sqlite3",
+    "BLOB_DIR": "blobs",
+    "COLOUR_INDEX_DIR": "",
+    "PROFILE_DIR": "profiles",
+}.items():
+    os.environ[name] = os.path.join(_DATA_DIR, filename)
+
+
+@pytest.fixture
+def outfit_store(tmp_path, monkeypatch):
+    """outfit_service on empty JSON logs (outfits, favorites) and a colour index of its own."""
+    from app.services import colour_index, outfit_service
+    from app.services.favorites_store import FavoritesCache, FavoritesIndex
+    from app.services.search_index import OutfitSearchIndex
+
+    monkeypatch.setattr(outfit_service, "LOG_FILE", str(tmp_path / "outfits.jsonl"))
+    monkeypatch.setattr(outfit_service, "DATA_FILE", str(tmp_path / "outfits.json"))
+    monkeypatch.setattr(outfit_service, "_store", None)
+    monkeypatch.setattr(outfit_service, "_search_index", OutfitSearchIndex())
+    monkeypatch.setattr(outfit_service, "_search_version", None)
+    monkeypatch.setattr(outfit_service, "FAVORITES_LOG_FILE", str(tmp_path / "favorites.jsonl"))
+    monkeypatch.setattr(outfit_service, "_favorites_store", None)
+    monkeypatch.setattr(outfit_service, "_favorites_index", FavoritesIndex())
+    monkeypatch.setattr(outfit_service, "_favorites_version", None)
+    monkeypatch.setattr(outfit_service, "favorites_cache", FavoritesCache())
+    monkeypatch.setattr(colour_index, "INDEX_DIR", str(tmp_path))
+    monkeypatch.setattr(colour_index, "_indexes", {})
+    outfit_service._clear_hashes()
+    yield outfit_service
+    for store in (outfit_service._store, outfit_service._favorites_store):
+        if store is not None:
+            store.close()
+    outfit_service._clear_hashes()
+
+
+@pytest.fixture
+def mongo_outfits(outfit_store, monkeypatch):
+    """outfit_service on an empty in-memory (mongomock) database of its own."""
+    pytest.importorskip("mongomock")
+    from app.services import mongo_service
+
+    monkeypatch.setattr(outfit_store, "_search_fields_ready", False)
+    monkeypatch.setattr(outfit_store, "_duplicate_since", None)
+    monkeypatch.setattr(outfit_store, "_migrated_users", set())
+    mongo_service.configure(uri=mongo_service.MOCK_SCHEME, db_name=f"test_{uuid.uuid4().hex}")
+    yield outfit_store
+    mongo_service.configure(uri="")
+
+
+@pytest.fixture
+def mongo_bulk_writes(mongo_outfits):
+    """Skip unless mongomock can run this PyMongo's bulk_write operations."""
+    import mongomock
+    import pymongo
+
+    try:
+        mongomock.MongoClient().db.probe.bulk_write([pymongo.ReplaceOne({}, {}, upsert=True)])
+    except TypeError as e:
+        # mongomock 4.3 predates the `sort` argument newer PyMongo passes to bulk builders
+        pytest.skip(f"mongomock cannot run PyMongo {pymongo.version} bulk updates: {e}")
+    return mongo_outfits
+
+
+@pytest.fixture
+def fresh_palette_caches():
+    """Empty exact and near-duplicate palette caches around a test."""
+    from app.services.near_duplicates import near_duplicate_palettes
+    from app.services.palette_cache import palette_cache
+
+    palette_cache.clear()
+    near_duplicate_palettes.clear()
+    yield
+    palette_cache.clear()
+    near_duplicate_palettes.clear()
+
+
+@pytest.fixture
+def client(outfit_store):
+    """Flask test client over the throwaway outfit store."""
+    from app import create_app
+
+    app = create_app(preload=False)
+    app.config["TESTING"] = True
+    return app.test_client()
@@ -0,0 +1,105 @@
+# backend/tests/helpers.py
+"""
+Shared test inputs and palette-quality measures.
+
+WHY THIS FILE EXISTS:
+- Tests need deterministic images and uploads, and the drift tests need
+  the same palette-quality maths as benchmarks/bench_preprocess.py. Keeping
+  copies here means the suite never imports a benchmark script, so the
+  benchmarks can change their CLIs and output freely.
+"""
+
+import struct
+import zlib
+
+import cv2
+import numpy as np
+
+from app.services import image_pipeline
+from app.utils.image_utils import crop_center, decode_image
+
+
+# =========================
+# Inputs
+# =========================
+
+def synthetic_image(width=1024, height=768, seed=0):
+    """Deterministic BGR photo stand-in: gradients, flat "garment" blocks and light noise."""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    image = np.empty((height, width, 3), dtype=np.uint8)
+    image[..., 0] = (x * 255 // max(width - 1, 1)).astype(np.uint8)
+    image[..., 1] = (y * 255 // max(height - 1, 1)).astype(np.uint8)
+    image[..., 2] = ((x + y) * 127 // max(width + height - 2, 1)).astype(np.uint8)
+
+    for i in range(6):
+        colour = rng.integers(0, 256, size=3, dtype=np.uint8)
+        bw, bh = width // 4, height // 4
+        if i == 0:
+            x0, y0 = width // 2 - bw // 2, height // 2 - bh // 2
+        else:
+            x0 = int(rng.integers(0, width - bw))
+            y0 = int(rng.integers(0, height - bh))
+        image[y0:y0 + bh, x0:x0 + bw] = colour
+
+    noise = rng.integers(-6, 7, size=image.shape, dtype=np.int16)
+    return np.clip(image.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+
+def encode_image(image, ext=".jpg", quality=90):
+    """Encode a BGR array to upload bytes (JPEG by default)."""
+    params = [cv2.IMWRITE_JPEG_QUALITY, quality] if ext in (".jpg", ".jpeg") else []
+    ok, buffer = cv2.imencode(ext, image, params)
+    if not ok:
+        raise RuntimeError(f"Failed to encode synthetic image as {ext}")
+    return buffer.tobytes()
+
+
+def png_chunk(kind, payload):
+    return struct.pack(">I", len(payload)) + kind + payload + struct.pack(">I", zlib.crc32(kind + payload))
+
+
+def png_bomb(side):
+    """A valid side x side RGB PNG of zeros: tiny on disk, side^2 * 3 bytes decoded."""
+    compressor = zlib.compressobj(9)
+    row = b"\0" * (1 + side * 3)
+    idat = b"".join(compressor.compress(row) for _ in range(side)) + compressor.flush()
+    return (b"\x89PNG\r\n\x1a\n" + png_chunk(b"IHDR", struct.pack(">IIBBBBB", side, side, 8, 2, 0, 0, 0))
+            + png_chunk(b"IDAT", idat) + png_chunk(b"IEND", b""))
+
+
+# =========================
+# Palette quality
+# =========================
+
+def hex_to_lab(hex_colours):
+    """Convert a list of '#rrggbb' strings to an (n, 3) CIELAB array."""
+    rgb = np.array(
+        [[int(h.lstrip("#")[i:i + 2], 16) for i in (0, 2, 4)] for h in hex_colours],
+        dtype=np.float32,
+    ) / 255.0
+    return cv2.cvtColor(rgb.reshape(1, -1, 3), cv2.COLOR_RGB2LAB).reshape(-1, 3)
+
+
+def palette_delta_e(a, b):
+    """Symmetric mean nearest-neighbour CIE76 ΔE between two hex palettes."""
+    lab_a, lab_b = hex_to_lab(a), hex_to_lab(b)
+    distances = np.linalg.norm(lab_a[:, None, :] - lab_b[None, :, :], axis=2)
+    return float((distances.min(axis=1).mean() + distances.min(axis=0).mean()) / 2)
+
+
+def crop_lab(data, crop_size):
+    """
+    Full-resolution crop of an upload as an (n, 3) CIELAB array. Palette hex
+    has R and B swapped (see bench_preprocess), so the BGR crop is read as RGB.
+    """
+    image = decode_image(data)
+    height, width = image.shape[:2]
+    crop = crop_center(image, *image_pipeline.crop_pixels(width, height, crop_size))
+    return cv2.cvtColor(crop.astype(np.float32) / 255.0, cv2.COLOR_RGB2LAB).reshape(-1, 3)
+
+
+def palette_fit(pixels_lab, palette):
+    """Mean ΔE from each pixel to its nearest palette colour (lower = better)."""
+    distances = np.linalg.norm(pixels_lab[:, None, :] - hex_to_lab(palette)[None, :, :], axis=2)
+    return float(distances.min(axis=1).mean())
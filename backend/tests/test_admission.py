@@ -0,0 +1,180 @@
+# backend/tests/test_admission.py
+"""
+Admission control on both shared states: slot limits, route caps, queue
+priority, queue-full / deadline / timeout rejections and rate limits.
+"""
+
+import threading
+import time
+
+import pytest
+
+from app.services.admission import (
+    PRIORITY_BATCH,
+    PRIORITY_INTERACTIVE,
+    AdmissionController,
+    AdmissionRejected,
+    MemoryAdmissionState,
+    Pool,
+    Rate,
+    SQLiteAdmissionState,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_controller(request, tmp_path):
+    def make(concurrency=1, max_queue=4, max_wait=5.0, batch_cap=1, rate=Rate(0, 1)):
+        if request.param == "memory":
+            state = MemoryAdmissionState()
+        else:
+            state = SQLiteAdmissionState(str(tmp_path / "admission.sqlite3"), poll_interval=0.005)
+        return AdmissionController(
+            state,
+            pools={"image": Pool(concurrency, max_queue, max_wait)},
+            routes={"upload": ("image", None), "upload_batch": ("image", batch_cap)},
+            rates={"image": rate},
+        )
+    return make
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.005)
+
+
+def start_waiter(controller, route, priority, admitted):
+    def run():
+        ticket = controller.acquire(route, priority)
+        admitted.append((route, ticket))
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def rejection(controller, route="upload", priority=PRIORITY_INTERACTIVE):
+    with pytest.raises(AdmissionRejected) as caught:
+        controller.acquire(route, priority)
+    return caught.value
+
+
+def test_concurrency_limit_and_release(make_controller):
+    controller = make_controller(concurrency=2)
+    first = controller.acquire("upload")
+    controller.acquire("upload")
+    assert controller.stats()["image"]["active"] == 2
+
+    admitted = []
+    thread = start_waiter(controller, "upload", PRIORITY_INTERACTIVE, admitted)
+    wait_for(lambda: controller.stats()["image"]["queued"] == 1)
+    assert admitted == []
+
+    controller.release(first)
+    thread.join(timeout=5)
+    assert len(admitted) == 1
+    assert controller.stats()["image"] == {"active": 2, "queued": 0, "concurrency": 2, "max_queue": 4}
+
+
+def test_route_cap_inside_the_pool(make_controller):
+    controller = make_controller(concurrency=3, max_wait=0.1)
+    controller.acquire("upload_batch", PRIORITY_BATCH)
+    # The pool has room but the batch route is at its cap of 1
+    assert rejection(controller, "upload_batch", PRIORITY_BATCH).reason == "timeout"
+    controller.acquire("upload")
+
+
+def test_interactive_requests_jump_the_batch_queue(make_controller):
+    controller = make_controller(concurrency=1)
+    holder = controller.acquire("upload")
+
+    admitted = []
+    batch = start_waiter(controller, "upload_batch", PRIORITY_BATCH, admitted)
+    wait_for(lambda: controller.stats()["image"]["queued"] == 1)
+    interactive = start_waiter(controller, "upload", PRIORITY_INTERACTIVE, admitted)
+    wait_for(lambda: controller.stats()["image"]["queued"] == 2)
+
+    controller.release(holder)
+    interactive.join(timeout=5)
+    controller.release(admitted[0][1])
+    batch.join(timeout=5)
+    assert [route for route, _ in admitted] == ["upload", "upload_batch"]
+
+
+def test_full_queue_is_rejected_at_once(make_controller):
+    controller = make_controller(concurrency=1, max_queue=1)
+    holder = controller.acquire("upload")
+    admitted = []
+    waiter = start_waiter(controller, "upload", PRIORITY_INTERACTIVE, admitted)
+    wait_for(lambda: controller.stats()["image"]["queued"] == 1)
+
+    started = time.monotonic()
+    error = rejection(controller)
+    assert (error.reason, error.status) == ("queue_full", 503)
+    assert error.retry_after >= 1
+    assert time.monotonic() - started < 1
+
+    controller.release(holder)
+    waiter.join(timeout=5)
+
+
+def test_wait_times_out_and_leaves_the_queue(make_controller):
+    controller = make_controller(concurrency=1, max_wait=0.1)
+    controller.acquire("upload")
+    assert rejection(controller).reason == "timeout"
+    assert controller.stats()["image"]["queued"] == 0
+
+
+def test_hopeless_wait_is_rejected_before_queueing(make_controller):
+    controller = make_controller(concurrency=1, max_wait=1.0)
+    # Teach the controller that a slot is held for ~2 s
+    ticket = controller.acquire("upload")
+    controller.release(ticket._replace(admitted_at=ticket.admitted_at - 2.0))
+
+    controller.acquire("upload")
+    started = time.monotonic()
+    error = rejection(controller)
+    assert error.reason == "deadline"
+    assert error.retry_after >= 2
+    assert time.monotonic() - started < 0.5
+    assert controller.stats()["image"]["queued"] == 0
+
+
+def test_rate_limit_per_client(make_controller):
+    controller = make_controller(rate=Rate(per_second=1, burst=2))
+    controller.check_rate("image", "10.0.0.1")
+    controller.check_rate("image", "10.0.0.1")
+    with pytest.raises(AdmissionRejected) as caught:
+        controller.check_rate("image", "10.0.0.1")
+    assert (caught.value.reason, caught.value.status, caught.value.retry_after) == ("rate_limited", 429, 1)
+    # Other clients have their own bucket
+    controller.check_rate("image", "10.0.0.2")
+
+
+def test_default_rates_do_not_throttle_one_address():
+    # Everyone behind a proxy or NAT shares remote_addr: the limit is opt-in
+    controller = AdmissionController(MemoryAdmissionState())
+    for _ in range(50):
+        controller.check_rate("image", "10.0.0.1")
+
+
+def test_upload_route_answers_busy_and_rate_limited(client, make_controller, monkeypatch):
+    from app.services import admission
+
+    controller = make_controller(concurrency=1, max_queue=0, rate=Rate(per_second=0.001, burst=2))
+    monkeypatch.setattr(admission, "_controller", controller)
+
+    # Admitted, and the slot is given back even though the request is rejected (no file)
+    assert client.post("/api/image/upload").status_code == 400
+    assert controller.stats()["image"]["active"] == 0
+
+    holder = controller.acquire("upload")
+    response = client.post("/api/image/upload")
+    assert response.status_code == 503
+    assert response.get_json()["reason"] == "queue_full"
+    assert int(response.headers["Retry-After"]) >= 1
+    controller.release(holder)
+
+    response = client.post("/api/image/upload")
+    assert response.status_code == 429
+    assert response.get_json()["reason"] == "rate_limited"
@@ -0,0 +1,67 @@
+# backend/tests/test_auth_service.py
+"""
+Password hashing: round trips, rehash detection and the concurrency cap.
+"""
+
+import threading
+import time
+
+import pytest
+
+from app.services import auth_service
+
+
+@pytest.fixture
+def cheap_hashing():
+    """A fast hash method and a cap of 2 for the test, restored afterwards."""
+    method, workers = auth_service.PASSWORD_HASH_METHOD, auth_service.PASSWORD_HASH_WORKERS
+    auth_service.configure_hashing(method="pbkdf2:sha256:1000", workers=2)
+    yield
+    auth_service.configure_hashing(method=method, workers=workers)
+
+
+def test_hash_round_trip_and_rehash(cheap_hashing):
+    hashed = auth_service.hash_password("correct horse")
+    assert auth_service.verify_password("correct horse", hashed)
+    assert not auth_service.verify_password("wrong horse", hashed)
+    assert not auth_service.needs_rehash(hashed)
+
+    auth_service.configure_hashing(method="pbkdf2:sha256:2000")
+    assert auth_service.needs_rehash(hashed)
+    assert auth_service.verify_password("correct horse", hashed)
+
+    rehashed = auth_service.hash_password_async("correct horse").result(timeout=10)
+    assert rehashed.startswith("pbkdf2:sha256:2000$")
+
+
+def test_normalize_hash_method():
+    assert auth_service.normalize_hash_method("scrypt") == "scrypt:32768:8:1"
+    assert auth_service.normalize_hash_method("pbkdf2:sha1:5") == "pbkdf2:sha1:5"
+    with pytest.raises(ValueError):
+        auth_service.normalize_hash_method("md5")
+
+
+def test_hashes_run_on_the_caller_thread_within_the_cap(cheap_hashing, monkeypatch):
+    lock = threading.Lock()
+    running, peak, threads = 0, 0, set()
+
+    def slow_check(hashed, password):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+            threads.add(threading.current_thread().name)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+        return True
+
+    monkeypatch.setattr(auth_service, "check_password_hash", slow_check)
+    callers = [threading.Thread(target=auth_service.verify_password, args=("pw", "hash"), name=f"request-{i}") for i in range(6)]
+    for thread in callers:
+        thread.start()
+    for thread in callers:
+        thread.join()
+
+    assert peak == 2
+    assert threads == {f"request-{i}" for i in range(6)}
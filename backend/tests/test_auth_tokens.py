@@ -0,0 +1,73 @@
+# backend/tests/test_auth_tokens.py
+"""
+Token verification: the verified-token cache, revocation and the
+`@require_auth` answers on a protected route.
+"""
+
+import time
+
+import jwt
+import pytest
+
+from app.services import auth_service
+from app.services.auth_service import AuthError, TokenCache, generate_token, revoke_token, token_digest, verify_token
+
+
+def token_for(user_id, expires_in=3600, secret=None):
+    payload = {"user_id": user_id, "exp": int(time.time()) + expires_in}
+    return jwt.encode(payload, secret or auth_service.JWT_SECRET, algorithm=auth_service.JWT_ALGORITHM)
+
+
+def test_token_cache_lru_and_expiry():
+    cache = TokenCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", {"exp": 1030}, now=1000)
+    cache.set("b", {"exp": 5000}, now=1000)
+    assert cache.get("a", now=1001) == {"exp": 1030}
+    cache.set("c", {"exp": 5000}, now=1001)  # evicts "b"
+
+    assert cache.get("b", now=1002) is None
+    # Never cached past the token's own exp, even inside the TTL
+    assert cache.get("a", now=1031) is None
+    assert cache.get("c", now=1059) is not None
+    assert cache.get("c", now=1062) is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_verify_token_caches_and_rejects():
+    token = generate_token("user-1")
+    assert verify_token(token)["user_id"] == "user-1"
+    assert auth_service.token_cache.get(token_digest(token)) is not None
+
+    with pytest.raises(AuthError, match="expired"):
+        verify_token(token_for("user-1", expires_in=-10))
+    with pytest.raises(AuthError, match="Invalid"):
+        verify_token(token_for("user-1", secret="another-test-only-secret-0123456789"))
+    with pytest.raises(AuthError, match="Invalid"):
+        verify_token("not.a.jwt")
+
+
+def test_revoked_token_is_rejected_even_when_cached():
+    token = generate_token("user-2")
+    verify_token(token)
+    revoke_token(token)
+    with pytest.raises(AuthError, match="revoked"):
+        verify_token(token)
+    assert auth_service.token_cache.get(token_digest(token)) is None
+
+
+def test_protected_route_answers(client):
+    token = generate_token("user-3")
+    favorites = "/api/outfits/favorites"
+
+    missing = client.get(favorites)
+    assert missing.status_code == 401
+    assert missing.headers["WWW-Authenticate"] == "Bearer"
+
+    bad = client.get(favorites, headers={"Authorization": "Bearer nonsense"})
+    assert bad.status_code == 401
+    assert 'error="invalid_token"' in bad.headers["WWW-Authenticate"]
+
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get(favorites, headers=headers).status_code == 200
+    assert client.post("/api/auth/logout", headers=headers).status_code == 200
+    assert client.get(favorites, headers=headers).status_code == 401
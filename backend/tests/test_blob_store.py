@@ -0,0 +1,168 @@
+# backend/tests/test_blob_store.py
+"""
+Content-addressed blob store: writes, thumbnails, garbage collection and
+the immutable blob routes.
+"""
+
+import os
+import time
+
+import cv2
+import pytest
+
+from app.services import blob_store as blob_store_module
+from app.services.blob_store import BlobStore, digest_of, referenced_digests
+from helpers import encode_image, synthetic_image
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BlobStore(str(tmp_path / "blobs"), thumbnail_sizes=(64, 256))
+
+
+@pytest.fixture(scope="module")
+def photo():
+    image = synthetic_image(640, 480)
+    return encode_image(image), image
+
+
+def age(store, digest, seconds):
+    """Pretend a blob was last uploaded `seconds` ago."""
+    then = time.time() - seconds
+    os.utime(store.path(digest), (then, then))
+
+
+def test_put_writes_the_upload_once_with_thumbnails(store, photo):
+    data, image = photo
+    digest = store.put(data, image)
+
+    assert digest == digest_of(data)
+    with open(store.path(digest), "rb") as f:
+        assert f.read() == data
+    assert store.mimetype(digest) == "image/jpeg"
+    for size in (64, 256):
+        thumb = cv2.imread(store.path(digest, size))
+        assert max(thumb.shape[:2]) == size
+
+    age(store, digest, 3600)
+    assert store.put(data, image) == digest
+    # A re-upload refreshes the mtime, restarting GC's grace period
+    assert time.time() - os.path.getmtime(store.path(digest)) < 60
+    assert [d for d, _ in store.iter_blobs()] == [digest]
+
+
+def test_thumbnails_never_upscale_and_are_rebuilt(store):
+    small = synthetic_image(100, 50)
+    digest = store.put(encode_image(small), small)
+    assert cv2.imread(store.path(digest, 256)).shape[:2] == (50, 100)
+
+    os.remove(store.path(digest, 64))
+    path = store.thumbnail(digest, 64)
+    assert path == store.path(digest, 64) and os.path.isfile(path)
+
+    assert store.thumbnail(digest, 100) is None  # Not a configured size
+    assert store.thumbnail("0" * 64, 64) is None
+
+
+def test_referenced_digests():
+    digest = "ab" * 32
+    urls = [
+        f"https://cdn.example.com/api/blobs/{digest}",
+        f"/api/blobs/{'cd' * 32}/thumbnails/256",
+        "https://example.com/photo.jpg",
+        None,
+    ]
+    assert referenced_digests(urls) == {digest, "cd" * 32}
+
+
+def test_collect_garbage(store, photo):
+    data, image = photo
+    kept = store.put(data, image)
+    recent = store.put(b"recent upload")
+    orphan = store.put(b"orphaned upload", synthetic_image(64, 64))
+    for digest in (kept, orphan):
+        age(store, digest, 7200)
+
+    dry = store.collect_garbage({kept}, grace=3600, dry_run=True)
+    assert (dry["scanned"], dry["referenced"], dry["recent"], dry["removed"]) == (3, 1, 1, 1)
+    assert store.exists(orphan)
+
+    stats = store.collect_garbage({kept}, grace=3600)
+    assert stats["removed"] == 1 and stats["bytes_freed"] > len(b"orphaned upload")
+    assert not store.exists(orphan)
+    assert not os.listdir(os.path.dirname(store.path(orphan)))  # Thumbnails went too
+    assert store.exists(kept) and store.exists(recent)
+
+
+def test_put_rewrites_a_blob_collected_after_its_existence_check(store, photo, monkeypatch):
+    data, image = photo
+    digest = store.put(data, image)
+    real_utime = os.utime
+
+    def collected_first(path, *args, **kwargs):
+        store.remove(digest)  # GC lands between put()'s isfile() and utime()
+        return real_utime(path, *args, **kwargs)
+
+    monkeypatch.setattr(blob_store_module.os, "utime", collected_first)
+    assert store.put(data, image) == digest
+    monkeypatch.undo()
+
+    with open(store.path(digest), "rb") as f:
+        assert f.read() == data
+    assert all(os.path.isfile(store.path(digest, size)) for size in store.thumbnail_sizes)
+
+
+def test_collect_garbage_keeps_a_blob_uploaded_again_mid_collection(store, monkeypatch):
+    digest = store.put(b"orphaned upload")
+    age(store, digest, 7200)
+    real_getmtime = os.path.getmtime
+    reuploads = []
+
+    def reuploaded_after_stat(path):
+        mtime = real_getmtime(path)
+        if not reuploads:
+            reuploads.append(store.put(b"orphaned upload"))  # Refreshes the mtime
+        return mtime
+
+    monkeypatch.setattr(blob_store_module.os.path, "getmtime", reuploaded_after_stat)
+    stats = store.collect_garbage(set(), grace=3600)
+    monkeypatch.undo()
+
+    assert (stats["recent"], stats["removed"], stats["bytes_freed"]) == (1, 0, 0)
+    assert store.exists(digest)
+
+
+def test_garbage_collection_keeps_blobs_saved_outfits_use(store, outfit_store, monkeypatch):
+    used = store.put(b"used by an outfit")
+    unused = store.put(b"used by nothing")
+    for digest in (used, unused):
+        age(store, digest, 7200)
+    outfit_store.save_outfit(f"http://localhost/api/blobs/{used}", ["#112233"], "Street")
+    monkeypatch.setattr(blob_store_module, "blob_store", store)
+
+    stats = blob_store_module.collect_garbage(grace=3600)
+    assert stats["removed"] == 1
+    assert store.exists(used) and not store.exists(unused)
+
+
+def test_blob_routes(client, store, photo, monkeypatch):
+    from app.routes import blobs
+
+    data, image = photo
+    digest = store.put(data, image)
+    monkeypatch.setattr(blobs, "blob_store", store)
+
+    response = client.get(f"/api/blobs/{digest}")
+    assert response.status_code == 200
+    assert response.data == data
+    assert response.mimetype == "image/jpeg"
+    assert response.headers["ETag"] == f'"{digest}"'
+    assert "immutable" in response.headers["Cache-Control"]
+
+    assert client.get(f"/api/blobs/{digest}", headers={"If-None-Match": f'"{digest}"'}).status_code == 304
+
+    thumb = client.get(f"/api/blobs/{digest}/thumbnails/64")
+    assert thumb.status_code == 200 and thumb.mimetype == "image/jpeg"
+    assert client.get(f"/api/blobs/{digest}/thumbnails/100").status_code == 404
+    assert client.get("/api/blobs/not-a-digest").status_code == 404
+    assert client.get(f"/api/blobs/{'0' * 64}").status_code == 404
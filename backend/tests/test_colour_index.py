@@ -0,0 +1,117 @@
+# backend/tests/test_colour_index.py
+"""
+Colour similarity index: Lab conversion, the palette distance, search
+against an exhaustive scan, replaced ids, and the shared record file.
+"""
+
+import numpy as np
+import pytest
+
+from app.services.colour_index import RECORD_DTYPE, PaletteIndex, hex_to_lab, palette_distance, palette_vectors
+
+
+def random_palettes(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        [f"#{r:02x}{g:02x}{b:02x}" for r, g, b in rng.integers(0, 256, size=(int(rng.integers(1, 8)), 3))]
+        for _ in range(n)
+    ]
+
+
+def exact_distance(a, b):
+    return float(palette_distance(palette_vectors(a)[0], palette_vectors(b)[0][None])[0])
+
+
+def test_hex_to_lab():
+    lab = hex_to_lab(["#ffffff", "#000", "not-a-colour", None, "#12345"])
+    assert lab.shape == (2, 3)
+    np.testing.assert_allclose(lab[0], [100, 0, 0], atol=0.01)
+    np.testing.assert_allclose(lab[1], [0, 0, 0], atol=0.01)
+    assert hex_to_lab([]).shape == (0, 3)
+
+
+def test_palette_distance_ignores_order_and_length():
+    palette = ["#aa2233", "#2255cc", "#eeeeee"]
+    assert exact_distance(palette, list(reversed(palette))) == pytest.approx(0, abs=1e-4)
+    assert exact_distance(palette, palette + palette[:1]) == pytest.approx(0, abs=1e-4)
+    assert exact_distance(["#000000"], ["#ffffff"]) == pytest.approx(100, abs=0.01)
+
+
+def test_search_matches_an_exhaustive_scan(tmp_path):
+    palettes = random_palettes(300)
+    index = PaletteIndex(str(tmp_path / "index.bin"))
+    index.rebuild((f"p{i}", colours) for i, colours in enumerate(palettes))
+    assert len(index) == 300
+
+    for query in random_palettes(5, seed=1):
+        found = index.search(query, k=10)
+        expected = sorted((exact_distance(query, colours), f"p{i}") for i, colours in enumerate(palettes))[:10]
+        assert [item_id for item_id, _ in found] == [item_id for _, item_id in expected]
+        assert [d for _, d in found] == pytest.approx([d for d, _ in expected], abs=1e-3)
+
+    with pytest.raises(ValueError):
+        index.search(["nope"])
+
+
+def test_unindexable_items_are_skipped(tmp_path):
+    index = PaletteIndex(str(tmp_path / "index.bin"))
+    written = index.rebuild([("ok", ["#123456"]), ("no-colours", ["nope"]), ("x" * 65, ["#123456"])])
+    assert written == 1
+    # Without a file, plain adds wait for the first search to back-fill
+    assert PaletteIndex(str(tmp_path / "other.bin")).add([("a", ["#000000"])]) == 0
+
+
+def test_replaced_ids_keep_only_the_latest_palette(tmp_path):
+    index = PaletteIndex(str(tmp_path / "index.bin"))
+    index.rebuild([("a", ["#ff0000"]), ("b", ["#00ff00"])])
+
+    index.add([("a", ["#0000ff"])], replace=True)
+
+    assert len(index) == 2
+    assert index.search(["#0000ff"], k=1) == [("a", 0.0)]
+    # The old red row of "a" no longer matches a red query
+    results = dict(index.search(["#ff0000"], k=5))
+    assert sorted(results) == ["a", "b"]
+    assert results["a"] > 50
+
+
+def test_instances_share_the_file(tmp_path):
+    path = str(tmp_path / "index.bin")
+    writer, reader = PaletteIndex(path), PaletteIndex(path)
+    writer.rebuild([("a", ["#ff0000"])])
+    assert len(reader) == 1
+
+    writer.add([("b", ["#00ff00"])])
+    assert reader.search(["#00ff00"], k=1) == [("b", 0.0)]
+
+    # A rebuild swaps in a new file; the other instance reloads it from scratch
+    writer.rebuild([("c", ["#0000ff"])])
+    assert len(reader) == 1
+    assert reader.search(["#00ff00"], k=5)[0][0] == "c"
+
+
+def test_torn_record_is_dropped_before_the_next_append(tmp_path):
+    path = tmp_path / "index.bin"
+    index = PaletteIndex(str(path))
+    index.rebuild([("a", ["#ff0000"])])
+    with open(path, "ab") as f:
+        f.write(b"\x00" * 10)  # A writer died mid-record
+
+    index.add([("b", ["#00ff00"])])
+    assert path.stat().st_size == 2 * RECORD_DTYPE.itemsize
+    assert sorted(item_id for item_id, _ in index.search(["#00ff00"], k=5)) == ["a", "b"]
+
+
+def test_similar_outfits_back_fill_and_exclude(outfit_store):
+    red = outfit_store.save_outfit("https://example.com/red.jpg", ["#cc2222", "#eeeeee"], "Street")
+    blue = outfit_store.save_outfit("https://example.com/blue.jpg", ["#2222cc", "#eeeeee"], "Street")
+
+    # First search back-fills the index from the store
+    results = outfit_store.find_similar_outfits(["#cc2222", "#eeeeee"], limit=2)
+    assert [o["id"] for o in results] == [red["id"], blue["id"]]
+    assert results[0]["distance"] == 0.0
+
+    # Saved after the index exists: indexed on save
+    dark_red = outfit_store.save_outfit("https://example.com/dark.jpg", ["#aa1111", "#eeeeee"], "Street")
+    results = outfit_store.find_similar_outfits(red["colours"], limit=1, exclude_id=red["id"])
+    assert [o["id"] for o in results] == [dark_red["id"]]
@@ -0,0 +1,188 @@
+# backend/tests/test_jsonl_store.py
+"""
+JSON-lines log: upserts, compaction, change tokens, keyset pages and
+importing older records into a populated log.
+"""
+
+import threading
+
+from app.services.jsonl_store import JsonLinesStore
+
+
+def timestamp(n):
+    return f"2024-01-01T00:00:{n:02d}"
+
+
+def record(n, **extra):
+    return {"id": f"r{n:02d}", "timestamp": timestamp(n), **extra}
+
+
+def by_timestamp(r):
+    return r["timestamp"]
+
+
+def ids(records):
+    return [r["id"] for r in records]
+
+
+def make_store(tmp_path, **kwargs):
+    return JsonLinesStore(str(tmp_path / "log.jsonl"), fsync="never", **kwargs)
+
+
+def test_append_replaces_and_delete_hides(tmp_path):
+    store = make_store(tmp_path)
+    store.append_many([record(1), record(2)])
+    store.append(record(1, theme="new"))
+    store.delete("r02")
+
+    assert store.count() == 1
+    assert store.get("r01")["theme"] == "new"
+    assert store.get("r02") is None
+    assert store.stats()["dead_bytes"] > 0
+
+
+def test_compact_keeps_live_records_in_order(tmp_path):
+    store = make_store(tmp_path)
+    store.append_many([record(n) for n in range(10)])
+    for n in range(0, 10, 2):
+        store.delete(f"r{n:02d}")
+    store.append(record(3, theme="updated"))
+    size = store.stats()["file_bytes"]
+
+    store.compact()
+
+    assert store.stats()["dead_bytes"] == 0
+    assert store.stats()["file_bytes"] < size
+    assert ids(store.iter_records()) == ["r01", "r05", "r07", "r09", "r03"]
+    assert store.get("r03")["theme"] == "updated"
+
+    # A second handle on the same file sees the compacted log
+    assert ids(make_store(tmp_path).iter_records()) == ["r01", "r05", "r07", "r09", "r03"]
+
+
+def test_changes_since_is_incremental_until_a_rewrite(tmp_path):
+    store = make_store(tmp_path)
+    store.append_many([record(1), record(2)])
+    token, records = store.changes_since(None)
+    assert records is None
+
+    store.append(record(3))
+    token, records = store.changes_since(token)
+    assert ids(records) == ["r03"]
+
+    store.delete("r01")
+    token, records = store.changes_since(token)
+    assert records is None
+
+    store.compact()
+    token, records = store.changes_since(token)
+    assert records is None
+    assert store.changes_since(token) == (token, [])
+
+
+def test_page_after_walks_every_record_once(tmp_path):
+    store = make_store(tmp_path)
+    store.append_many([record(n) for n in range(25)])
+
+    seen, page = [], store.page(limit=7)
+    while page:
+        seen += ids(page)
+        page = store.page_after(page[-1]["id"], limit=7)
+
+    assert seen == [f"r{n:02d}" for n in reversed(range(25))]
+
+
+def test_merge_many_appends_newer_records(tmp_path):
+    store = make_store(tmp_path)
+    store.merge_many([record(2), record(1)], key=by_timestamp)
+    token = store.version()
+
+    store.merge_many([record(3)], key=by_timestamp)
+
+    assert ids(store.iter_records()) == ["r01", "r02", "r03"]
+    # Appended, not rewritten: change tracking stays incremental
+    assert ids(store.changes_since(token)[1]) == ["r03"]
+
+
+def test_merge_many_interleaves_older_records(tmp_path):
+    store = make_store(tmp_path)
+    store.append_many([record(n) for n in (10, 20, 30)])
+
+    store.merge_many([record(25), record(5), record(15, theme="x"), record(30, theme="updated")], key=by_timestamp)
+
+    assert ids(store.iter_records()) == ["r05", "r10", "r15", "r20", "r25", "r30"]
+    assert store.get("r30")["theme"] == "updated"
+    assert store.count() == 6
+    assert store.stats()["dead_bytes"] == 0
+
+
+def test_merge_many_keeps_cursors_consistent(tmp_path):
+    store = make_store(tmp_path)
+    store.append_many([record(n) for n in range(30, 60)])
+    # An export of older records imported into the live log
+    store.merge_many([record(n) for n in range(0, 30)], key=by_timestamp)
+
+    first = store.page(limit=10)
+    assert ids(first) == [f"r{n:02d}" for n in range(59, 49, -1)]
+
+    seen, page = [], first
+    while page:
+        seen += ids(page)
+        page = store.page_after(page[-1]["id"], limit=10)
+    timestamps = [store.get(i)["timestamp"] for i in seen]
+    assert len(seen) == len(set(seen)) == 60
+    assert timestamps == sorted(timestamps, reverse=True)
+
+
+def test_torn_append_is_dropped_before_the_next_write(tmp_path):
+    store = make_store(tmp_path)
+    store.append(record(1))
+    # A writer died halfway through its line
+    with open(store.path, "ab") as f:
+        f.write(b'{"id":"r02","timestamp":')
+
+    writer = make_store(tmp_path)
+    writer.append(record(3))
+
+    for handle in (writer, store, make_store(tmp_path)):
+        assert ids(handle.iter_records()) == ["r01", "r03"]
+        assert handle.get("r03") == record(3)
+    with open(store.path, "rb") as f:
+        assert f.read().count(b"\n") == 2
+
+
+def test_unparseable_lines_are_not_indexed(tmp_path):
+    path = tmp_path / "log.jsonl"
+    # What the torn-tail bug used to leave behind: a fragment glued to a record
+    path.write_bytes(
+        b'{"id":"r01","v":1}\n'
+        b'{"id":"r02","v":{"id":"r03","v":3}\n'
+        b'[1, 2]\n'
+        b'{"id":"r04","v":4}\n'
+    )
+    store = make_store(tmp_path)
+
+    assert ids(store.iter_records()) == ["r01", "r04"]
+    assert store.get("r02") is None
+    assert store.page(limit=10)[0]["id"] == "r04"
+
+
+def test_append_if_absent_writes_one_copy_under_contention(tmp_path):
+    handles = [make_store(tmp_path) for _ in range(4)]  # As if four processes
+    start = threading.Barrier(len(handles))
+    written = []
+
+    def save(store):
+        start.wait()
+        written.append(store.append_if_absent(record(1, v=id(store))))
+
+    threads = [threading.Thread(target=save, args=(store,)) for store in handles]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(written) == [False, False, False, True]
+    with open(tmp_path / "log.jsonl", "rb") as f:
+        assert f.read().count(b"\n") == 1
+    assert handles[0].append_if_absent(record(2)) and handles[1].get("r02") is not None
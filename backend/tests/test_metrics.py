@@ -0,0 +1,62 @@
+# backend/tests/test_metrics.py
+"""
+Prometheus rendering: counters, histograms, scrape-time collectors and
+what happens when a collector raises.
+"""
+
+import logging
+
+from app.routes.metrics import _cache_samples, _collect_service_stats
+from app.services.metrics import MetricsRegistry
+
+
+def test_counters_and_histograms_render():
+    registry = MetricsRegistry()
+    registry.describe("uploads_total", "Image uploads")
+    registry.count("uploads_total", route="upload")
+    registry.count("uploads_total", amount=2, route="upload")
+    registry.observe("latency_seconds", 0.003, route="/x")
+
+    text = registry.render_prometheus()
+    assert "# HELP blackstyles_uploads_total Image uploads" in text
+    assert 'blackstyles_uploads_total{route="upload"} 3' in text
+    assert 'blackstyles_latency_seconds_bucket{route="/x",le="0.005"} 1' in text
+    assert 'blackstyles_latency_seconds_count{route="/x"} 1' in text
+
+
+def test_cache_samples_split_gauges_from_counters():
+    samples = _cache_samples("token_cache", "Verified-token cache", {"size": 3, "max_entries": 10, "hits": 7})
+    assert samples == [
+        ("token_cache_size", "gauge", "Verified-token cache size", {}, 3),
+        ("token_cache_max_entries", "gauge", "Verified-token cache max entries", {}, 10),
+        ("token_cache_hits_total", "counter", "Verified-token cache hits", {}, 7),
+    ]
+    users = _cache_samples("favorites_cache", "Favorites page cache", {"users": 2, "misses": 1}, gauges=("users",))
+    assert [(name, kind) for name, kind, *_ in users] == [("favorites_cache_users", "gauge"), ("favorites_cache_misses_total", "counter")]
+
+
+def test_service_collector_reports_every_cache():
+    names = {name for name, *_ in _collect_service_stats()}
+    for prefix in ("palette_cache", "near_duplicate_palettes", "mask_cache", "token_cache"):
+        assert f"{prefix}_size" in names and f"{prefix}_hits_total" in names
+    assert "favorites_cache_users" in names
+    assert "image_pool_max_pending" in names
+
+
+def test_broken_collector_is_logged_and_counted(caplog):
+    registry = MetricsRegistry()
+
+    def broken():
+        raise RuntimeError("stats unavailable")
+
+    registry.register_collector(broken)
+    registry.register_collector(lambda: [("queue_depth", "gauge", "Queue depth", {}, 4)])
+
+    with caplog.at_level(logging.ERROR):
+        text = registry.render_prometheus()
+    assert "blackstyles_queue_depth 4" in text
+    assert "stats unavailable" in caplog.text
+
+    counted = registry.snapshot()["counters"]["metrics_collector_errors_total"]
+    assert list(counted.values()) == [1]
+    assert "metrics_collector_errors_total" in registry.render_prometheus()
@@ -0,0 +1,129 @@
+# backend/tests/test_near_duplicates.py
+import cv2
+import numpy as np
+import pytest
+
+from helpers import encode_image, synthetic_image
+from app.services.image_pipeline import hashed_palette_from_bytes
+from app.services.near_duplicates import HammingIndex, NearDuplicatePalettes, format_hash, parse_hash
+from app.utils.image_utils import decode_image, dhash
+
+# BGR shirt colours that differ in hue but produce the same greyscale gradients
+SHIRTS = {"red": (30, 30, 200), "navy": (110, 20, 20), "green": (40, 140, 40)}
+
+
+def product_shot(bgr, width=600, height=800):
+    """A flat-colour 'shirt' on a white background, as JPEG bytes."""
+    image = np.full((height, width, 3), 255, np.uint8)
+    cv2.rectangle(image, (150, 150), (450, 700), bgr, thickness=-1)
+    cv2.rectangle(image, (60, 150), (150, 380), bgr, thickness=-1)
+    cv2.rectangle(image, (450, 150), (540, 380), bgr, thickness=-1)
+    return cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 92])[1].tobytes()
+
+
+def test_colour_variants_share_a_dhash():
+    hashes = [dhash(decode_image(product_shot(bgr))) for bgr in SHIRTS.values()]
+    assert max((a ^ b).bit_count() for a in hashes for b in hashes) <= 6
+
+
+def test_colour_variants_get_their_own_palettes(fresh_palette_caches):
+    from app.services.near_duplicates import near_duplicate_palettes
+
+    results = {name: hashed_palette_from_bytes(product_shot(bgr), seed=0) for name, bgr in SHIRTS.items()}
+
+    palettes = {tuple(result["palette"]) for result in results.values()}
+    assert len(palettes) == len(SHIRTS)
+    assert near_duplicate_palettes.stats()["hits"] == 0
+    assert near_duplicate_palettes.stats()["colour_mismatches"] >= 1
+
+
+def test_resized_copy_reuses_palette(fresh_palette_caches):
+    from app.services.near_duplicates import near_duplicate_palettes
+
+    image = synthetic_image(seed=1)
+    first = hashed_palette_from_bytes(encode_image(image), seed=0)
+    resized = encode_image(cv2.resize(image, None, fx=0.5, fy=0.5, interpolation=cv2.INTER_AREA), quality=70)
+
+    second = hashed_palette_from_bytes(resized, seed=0)
+    assert second["palette"] == first["palette"]
+    assert near_duplicate_palettes.stats()["hits"] == 1
+
+
+def test_palette_index_rejects_colour_mismatch():
+    index = NearDuplicatePalettes(max_entries=10, max_distance=6, max_delta_e=10)
+    red = np.tile(np.array([[53.0, 80.0, 67.0]], np.float32), (16, 1))
+    navy = np.tile(np.array([[13.0, 40.0, -60.0]], np.float32), (16, 1))
+    index.set(0b1011, "settings", ["#ff0000"], red)
+
+    assert index.get(0b1011, "settings", navy) is None
+    assert index.get(0b1111, "settings", red + 2) == ["#ff0000"]
+    assert index.get(0b1011, "other settings", red) is None
+    stats = index.stats()
+    assert (stats["hits"], stats["colour_mismatches"], stats["misses"]) == (1, 1, 1)
+
+
+def test_palette_index_evicts_least_recent():
+    index = NearDuplicatePalettes(max_entries=2, max_distance=0)
+    layout = np.zeros((16, 3), np.float32)
+    for image_hash in (1, 2, 3):
+        index.set(image_hash, "s", [str(image_hash)], layout)
+    assert index.get(1, "s", layout) is None
+    assert index.get(3, "s", layout) == ["3"]
+    assert index.stats()["evictions"] == 1
+
+
+def test_hamming_index_matches_linear_scan():
+    rng = np.random.default_rng(0)
+    stored = [int(h) for h in rng.integers(0, 2 ** 63, size=2000, dtype=np.uint64)]
+    index = HammingIndex()
+    for i, image_hash in enumerate(stored):
+        index.add(image_hash, i)
+
+    for i in range(0, 2000, 97):
+        query = stored[i] ^ (1 << 3) ^ (1 << 40) ^ (1 << 63)
+        expected = sorted(j for j, h in enumerate(stored) if (h ^ query).bit_count() <= 6)
+        assert sorted(value for _, value in index.find(query, 6)) == expected
+        assert index.nearest(query, 6) == (3, i)
+
+
+def test_hamming_index_remove_and_clear():
+    index = HammingIndex()
+    index.add(5, "a")
+    index.add(5, "b")
+    index.remove(5, "a")
+    assert index.find(5, 0) == [(0, "b")]
+    index.remove(5, "b")
+    assert index.find(5, 0) == [] and len(index) == 0
+    index.add(7, "c")
+    index.clear()
+    assert index.nearest(7) is None
+
+
+@pytest.mark.parametrize("text", ["", "xyz", "0" * 15, "g" * 16, None])
+def test_parse_hash_rejects_malformed(text):
+    with pytest.raises(ValueError):
+        parse_hash(text)
+
+
+def test_hash_round_trip():
+    assert parse_hash(format_hash(0xDEADBEEF)) == 0xDEADBEEF
+
+
+def test_colour_variant_outfits_are_not_flagged(outfit_store):
+    shared_hash = "0f0f0f0f0f0f0f0f"
+    red = outfit_store.save_outfit("/a.jpg", ["#c81e1e", "#ffffff"], "Autumn", image_hash=shared_hash)
+    navy = outfit_store.save_outfit("/b.jpg", ["#141470", "#ffffff"], "Winter", image_hash=shared_hash)
+    again = outfit_store.save_outfit("/c.jpg", ["#c81f1d", "#fefefe"], "Autumn", image_hash="0f0f0f0f0f0f0f0e")
+
+    assert "duplicate_of" not in navy
+    assert again["duplicate_of"] == red["id"]
+
+
+def test_flags_duplicates_within_one_batch(outfit_store):
+    first, second, variant = outfit_store.save_outfits([
+        {"image_url": "/a.jpg", "colours": ["#336699"], "image_hash": "00000000000000ff"},
+        {"image_url": "/b.jpg", "colours": ["#34669a"], "image_hash": "00000000000000fe"},
+        {"image_url": "/c.jpg", "colours": ["#993333"], "image_hash": "00000000000000ff"},
+    ])
+    assert second["duplicate_of"] == first["id"]
+    assert "duplicate_of" not in variant
@@ -0,0 +1,56 @@
+# backend/tests/test_outfit_import.py
+"""
+Importing an older export into a populated JSON store must not put the old
+records at the top of the feed or break keyset cursors.
+"""
+
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+def exported(n):
+    return {
+        "id": f"old-{n:02d}",
+        "timestamp": f"2020-01-01T00:00:{n:02d}",
+        "image_url": f"https://example.com/old-{n}.jpg",
+        "colours": ["#112233"],
+        "theme": "Classic",
+        "tags": [],
+    }
+
+
+def walk_feed(outfit_service, limit):
+    seen, page = [], outfit_service.get_recent_outfits(limit=limit)
+    while page:
+        seen += page
+        cursor = decode_cursor(encode_cursor(page[-1]))
+        page = outfit_service.get_recent_outfits(limit=limit, cursor=cursor)
+    return seen
+
+
+def test_import_keeps_feed_newest_first(outfit_store):
+    saved = [outfit_store.save_outfit(f"https://example.com/{n}.jpg", ["#445566"], "Street") for n in range(5)]
+
+    assert outfit_store.import_outfits([exported(n) for n in range(8)]) == 8
+
+    newest = outfit_store.get_recent_outfits(limit=5)
+    assert [o["id"] for o in newest] == [o["id"] for o in reversed(saved)]
+
+    feed = walk_feed(outfit_store, limit=3)
+    timestamps = [o["timestamp"] for o in feed]
+    assert len(feed) == len({o["id"] for o in feed}) == 13
+    assert timestamps == sorted(timestamps, reverse=True)
+
+
+def test_import_replaces_existing_ids_in_place(outfit_store):
+    outfit_store.import_outfits([exported(n) for n in range(4)])
+    outfit_store.save_outfit("https://example.com/new.jpg", ["#445566"], "Street")
+
+    updated = dict(exported(1), theme="Formal")
+    outfit_store.import_outfits([updated])
+
+    feed = walk_feed(outfit_store, limit=2)
+    assert [o["id"] for o in feed][1:] == ["old-03", "old-02", "old-01", "old-00"]
+    assert feed[3]["theme"] == "Formal"
+    # The rewritten log is picked up by the search index too
+    outfits, total = outfit_store.search_outfits_by_tags_and_theme([], "Formal")
+    assert total == 1 and outfits[0]["id"] == "old-01"
@@ -0,0 +1,124 @@
+# backend/tests/test_outfit_mongo.py
+"""
+outfit_service on MongoDB (mongomock): the shared client and its startup
+indexes, chunked batch saves, imports, feed and favorites paging, and tag /
+theme search matching the way the JSON index does.
+
+Bulk updates (imports, legacy favorites, the search-field backfill) skip
+when the installed mongomock cannot run this PyMongo's bulk operations.
+"""
+
+from app.services import mongo_service
+
+
+def save(service, theme, tags):
+    return service.save_outfit("https://example.com/x.jpg", ["#112233"], theme, tags=tags)
+
+
+def test_search_ignores_case_like_the_json_index(mongo_outfits):
+    party = save(mongo_outfits, "Winter", ["Party", "Evening"])
+    save(mongo_outfits, "Summer", ["party"])
+    save(mongo_outfits, "Winter", ["Casual"])
+
+    results, total = mongo_outfits.search_outfits_by_tags_and_theme(["PARTY", " evening "], "winter")
+    assert ([o["id"] for o in results], total) == ([party["id"]], 1)
+    _, total = mongo_outfits.search_outfits_by_tags_and_theme(["party"], "", match="any")
+    assert total == 2
+    assert "tags_norm" not in results[0] and "theme_norm" not in results[0]
+    assert results[0]["tags"] == ["Party", "Evening"]
+
+
+def test_search_backfills_outfits_stored_without_search_fields(mongo_bulk_writes):
+    mongo_outfits = mongo_bulk_writes
+    mongo_service.get_collection("outfits").insert_one(
+        {"id": "old", "timestamp": "2020-01-01T00:00:00", "image_url": "", "colours": [], "theme": "Autumn", "tags": ["Vintage"]}
+    )
+    results, total = mongo_outfits.search_outfits_by_tags_and_theme(["vintage"], "AUTUMN")
+    assert ([o["id"] for o in results], total) == (["old"], 1)
+
+
+# =========================
+# Client, indexes and bulk helpers
+# =========================
+
+def test_client_is_shared_and_indexes_exist(mongo_outfits):
+    client = mongo_service.get_client()
+    assert mongo_service.get_client() is client
+    indexes = mongo_service.get_collection("outfits").index_information()
+    assert any(spec.get("unique") and spec["key"] == [("id", 1)] for spec in indexes.values())
+    assert any(spec["key"][0] == ("tags_norm", 1) for spec in indexes.values())
+    favorites = mongo_service.get_collection("favorite_outfits").index_information()
+    assert any(spec.get("unique") and spec["key"] == [("user_id", 1), ("outfit_id", 1)] for spec in favorites.values())
+
+
+def test_client_inherited_across_fork_is_replaced(mongo_outfits, monkeypatch):
+    client = mongo_service.get_client()
+    monkeypatch.setattr(mongo_service, "_client_pid", -1)  # As if created in the parent
+    assert mongo_service.get_client() is not client
+
+
+def test_batch_save_is_chunked_and_pages_newest_first(mongo_outfits, monkeypatch):
+    monkeypatch.setattr(mongo_service, "BULK_BATCH_SIZE", 3)
+    saved = mongo_outfits.save_outfits(
+        [{"image_url": f"https://example.com/{n}.jpg", "colours": ["#112233"], "theme": "Winter", "tags": ["Casual"]}
+         for n in range(7)]
+    )
+    assert all("_id" not in entry and "tags_norm" not in entry for entry in saved)
+    assert mongo_service.get_collection("outfits").count_documents({}) == 7
+
+    first = mongo_outfits.get_outfits(limit=4)
+    rest = mongo_outfits.get_outfits(limit=4, cursor=(first[-1]["timestamp"], first[-1]["id"]))
+    assert [o["id"] for o in first + rest] == [o["id"] for o in reversed(saved)]
+    assert all("_id" not in o and "tags_norm" not in o for o in first + rest)
+
+
+def test_import_upserts_by_id(mongo_bulk_writes):
+    service = mongo_bulk_writes
+    kept = save(service, "Winter", ["Casual"])
+    imported = [
+        {"id": kept["id"], "timestamp": kept["timestamp"], "image_url": "", "colours": [], "theme": "Summer", "tags": ["Beach"]},
+        {"id": "older", "timestamp": "2020-01-01T00:00:00", "image_url": "", "colours": [], "theme": "Autumn", "tags": []},
+    ]
+    assert service.import_outfits(imported) == 2
+    assert service.import_outfits(imported) == 2  # Idempotent
+
+    assert [o["id"] for o in service.get_outfits(limit=10)] == [kept["id"], "older"]
+    results, _ = service.search_outfits_by_tags_and_theme(["beach"], "summer")
+    assert [o["id"] for o in results] == [kept["id"]]
+
+
+# =========================
+# Favorites
+# =========================
+
+def test_favorites_are_idempotent_and_page_newest_first(mongo_outfits):
+    outfits = [save(mongo_outfits, "Winter", ["Casual"]) for _ in range(5)]
+    for outfit in outfits:
+        mongo_outfits.save_favorite("alice", outfit["id"])
+    mongo_outfits.save_favorite("alice", outfits[0]["id"])  # Re-saving keeps the original position
+    mongo_outfits.save_favorite("bob", outfits[0]["id"])
+
+    page, cursor = mongo_outfits.get_favorites("alice", limit=3)
+    rest, last = mongo_outfits.get_favorites("alice", limit=3, cursor=cursor)
+    assert [o["id"] for o in page + rest] == [o["id"] for o in reversed(outfits)]
+    assert last is None
+    assert all("favorited_at" in o and "_id" not in o for o in page + rest)
+    assert [o["id"] for o in mongo_outfits.get_favorites("bob")[0]] == [outfits[0]["id"]]
+
+
+def test_saving_a_favorite_drops_the_cached_pages(mongo_outfits):
+    first, second = save(mongo_outfits, "Winter", []), save(mongo_outfits, "Winter", [])
+    mongo_outfits.save_favorite("carol", first["id"])
+    assert len(mongo_outfits.get_favorites("carol")[0]) == 1
+    mongo_outfits.save_favorite("carol", second["id"])
+    assert [o["id"] for o in mongo_outfits.get_favorites("carol")[0]] == [second["id"], first["id"]]
+
+
+def test_legacy_favorites_array_is_migrated_in_order(mongo_bulk_writes):
+    service = mongo_bulk_writes
+    outfits = [save(service, "Winter", []) for _ in range(3)]
+    mongo_service.get_collection("favorites").insert_one({"user_id": "dave", "outfits": [o["id"] for o in outfits]})
+
+    page, _ = service.get_favorites("dave")
+    assert [o["id"] for o in page] == [o["id"] for o in reversed(outfits)]
+    assert mongo_service.get_collection("favorites").count_documents({"user_id": "dave"}) == 0
@@ -0,0 +1,101 @@
+# backend/tests/test_outfit_routes.py
+"""
+Outfit routes: query-parameter validation and cursor paging over HTTP,
+including the authenticated favorites pages and their cache.
+"""
+
+import pytest
+
+from app.routes.outfits import RECENT_PAGE_MAX
+from app.services.auth_service import generate_token
+
+
+@pytest.fixture
+def saved(outfit_store):
+    return [outfit_store.save_outfit(f"https://example.com/{n}.jpg", ["#445566"], "Street") for n in range(RECENT_PAGE_MAX + 5)]
+
+
+@pytest.mark.parametrize("limit", ["abc", "2.5", ""])
+def test_recent_rejects_non_integer_limit(client, limit):
+    response = client.get(f"/api/outfits/recent?limit={limit}")
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "limit must be an integer"}
+
+
+@pytest.mark.parametrize("limit, expected", [("0", 1), ("-3", 1), ("3", 3), (str(RECENT_PAGE_MAX * 10), RECENT_PAGE_MAX)])
+def test_recent_clamps_limit(client, saved, limit, expected):
+    response = client.get(f"/api/outfits/recent?limit={limit}")
+    assert response.status_code == 200
+    assert len(response.get_json()["outfits"]) == expected
+
+
+def test_recent_pages_with_cursor(client, saved):
+    seen, url = [], "/api/outfits/recent?limit=40"
+    while url:
+        body = client.get(url).get_json()
+        seen += [o["id"] for o in body["outfits"]]
+        url = body["next_cursor"] and f"/api/outfits/recent?limit=40&cursor={body['next_cursor']}"
+    assert seen == [o["id"] for o in reversed(saved)]
+
+
+def test_recent_rejects_bad_cursor(client):
+    assert client.get("/api/outfits/recent?cursor=not-a-cursor").status_code == 400
+
+
+@pytest.mark.parametrize("param", ["page", "limit"])
+def test_search_rejects_non_integer_paging(client, param):
+    response = client.get(f"/api/outfits/search?tags=Street&{param}=abc")
+    assert response.status_code == 400
+    assert response.get_json() == {"error": f"{param} must be an integer"}
+
+
+@pytest.mark.parametrize("limit, expected", [("0", 1), ("3", 3), (str(RECENT_PAGE_MAX * 10), RECENT_PAGE_MAX)])
+def test_search_clamps_limit(client, saved, limit, expected):
+    body = client.get(f"/api/outfits/search?theme=Street&limit={limit}").get_json()
+    assert (len(body["outfits"]), body["limit"], body["total"]) == (expected, expected, len(saved))
+
+
+def auth(user_id):
+    return {"Authorization": f"Bearer {generate_token(user_id)}"}
+
+
+def walk_favorites(client, headers, limit):
+    seen, url = [], f"/api/outfits/favorites?limit={limit}"
+    while url:
+        body = client.get(url, headers=headers).get_json()
+        seen += [o["id"] for o in body["favorites"]]
+        url = body["next_cursor"] and f"/api/outfits/favorites?limit={limit}&cursor={body['next_cursor']}"
+    return seen
+
+
+def test_favorites_page_newest_first_without_duplicates(client, outfit_store):
+    outfits = [outfit_store.save_outfit(f"https://example.com/{n}.jpg", ["#445566"], "Street") for n in range(7)]
+    headers = auth("fav-user")
+    for outfit in outfits + outfits[:2]:  # Re-saving a favorite is a no-op
+        assert client.post("/api/outfits/favorite", json={"outfit_id": outfit["id"]}, headers=headers).status_code == 200
+
+    assert walk_favorites(client, headers, 3) == [o["id"] for o in reversed(outfits)]
+    # Other users see only their own favorites
+    assert walk_favorites(client, auth("someone-else"), 3) == []
+
+
+def test_favorites_cache_serves_repeats_and_drops_on_save(client, outfit_store):
+    first, second = (outfit_store.save_outfit(f"https://example.com/{n}.jpg", ["#445566"], "Street") for n in range(2))
+    headers = auth("cached-user")
+    client.post("/api/outfits/favorite", json={"outfit_id": first["id"]}, headers=headers)
+
+    url = "/api/outfits/favorites?limit=5"
+    assert [o["id"] for o in client.get(url, headers=headers).get_json()["favorites"]] == [first["id"]]
+    hits = outfit_store.favorites_cache.stats()["hits"]
+    client.get(url, headers=headers)
+    assert outfit_store.favorites_cache.stats()["hits"] == hits + 1
+
+    client.post("/api/outfits/favorite", json={"outfit_id": second["id"]}, headers=headers)
+    assert [o["id"] for o in client.get(url, headers=headers).get_json()["favorites"]] == [second["id"], first["id"]]
+
+
+def test_favorites_reject_bad_paging(client):
+    headers = auth("fav-user")
+    assert client.get("/api/outfits/favorites?limit=abc", headers=headers).status_code == 400
+    assert client.get("/api/outfits/favorites?cursor=nope", headers=headers).status_code == 400
+    assert client.get("/api/outfits/favorites").status_code == 401
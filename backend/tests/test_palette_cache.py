@@ -0,0 +1,67 @@
+# backend/tests/test_palette_cache.py
+"""
+Palette cache: LRU and TTL in memory, the disk tier, and disk failures
+that must not fail the request that filled the cache.
+"""
+
+import errno
+import logging
+import os
+
+from app.services import palette_cache as palette_cache_module
+from app.services.palette_cache import PaletteCache
+
+KEY = "ab" + "0" * 62
+
+
+def test_lru_eviction_and_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(palette_cache_module.time, "time", lambda: now[0])
+    cache = PaletteCache(max_entries=2, ttl_seconds=60)
+
+    cache.set("a", ["#000000"])
+    cache.set("b", ["#111111"])
+    assert cache.get("a") == ["#000000"]
+    cache.set("c", ["#222222"])  # evicts "b", the least recently used
+
+    assert cache.get("b") is None
+    now[0] += 61
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["evictions"], stats["expirations"]) == (1, 1, 1)
+
+
+def test_disk_tier_survives_a_new_process(tmp_path):
+    PaletteCache(disk_dir=str(tmp_path)).set(KEY, ["#abcdef", "#123456"])
+
+    restarted = PaletteCache(disk_dir=str(tmp_path))
+    assert restarted.get(KEY) == ["#abcdef", "#123456"]
+    assert restarted.stats()["disk_hits"] == 1
+
+
+def test_disk_write_failure_is_logged_and_cleaned_up(tmp_path, monkeypatch, caplog):
+    cache = PaletteCache(disk_dir=str(tmp_path))
+
+    def disk_full(*args, **kwargs):
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    monkeypatch.setattr(palette_cache_module.json, "dump", disk_full)
+    with caplog.at_level(logging.WARNING):
+        cache.set(KEY, ["#abcdef"])
+
+    # Served from memory, counted, logged, and no temp file left in the shard
+    assert cache.get(KEY) == ["#abcdef"]
+    assert cache.stats()["disk_errors"] == 1
+    assert "No space left on device" in caplog.text
+    assert os.listdir(tmp_path / KEY[:2]) == []
+
+
+def test_unwritable_cache_directory_does_not_raise(tmp_path):
+    blocker = tmp_path / "not-a-dir"
+    blocker.write_text("")
+    cache = PaletteCache(disk_dir=str(tmp_path))
+    cache.disk_dir = str(blocker)
+
+    cache.set(KEY, ["#abcdef"])
+    assert cache.get(KEY) == ["#abcdef"]
+    assert cache.stats()["disk_errors"] == 1
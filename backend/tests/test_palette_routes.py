@@ -0,0 +1,36 @@
+# backend/tests/test_palette_routes.py
+"""
+Palette routes: query-parameter validation on /api/palettes/recent.
+"""
+
+import pytest
+
+from app.routes.palettes import RECENT_PAGE_MAX
+
+
+@pytest.fixture
+def palettes(tmp_path, monkeypatch):
+    """palette_service on an empty JSON-lines log, filled past one page."""
+    from app.services import palette_service
+
+    monkeypatch.setattr(palette_service, "PALETTE_STORE", "jsonl")
+    monkeypatch.setattr(palette_service, "LOG_FILE", str(tmp_path / "palettes.jsonl"))
+    monkeypatch.setattr(palette_service, "DATA_FILE", str(tmp_path / "palettes.json"))
+    monkeypatch.setattr(palette_service, "_store", None)
+    monkeypatch.setattr(palette_service, "_recent", None)
+    return [palette_service.save_palette(f"https://example.com/{n}.jpg", ["#112233"], "Summer")
+            for n in range(RECENT_PAGE_MAX + 5)]
+
+
+@pytest.mark.parametrize("limit", ["abc", "2.5"])
+def test_recent_rejects_non_integer_limit(client, limit):
+    response = client.get(f"/api/palettes/recent?limit={limit}")
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "limit must be an integer"}
+
+
+@pytest.mark.parametrize("limit, expected", [("0", 1), ("-3", 1), ("3", 3), (str(RECENT_PAGE_MAX * 10), RECENT_PAGE_MAX)])
+def test_recent_clamps_limit(client, palettes, limit, expected):
+    response = client.get(f"/api/palettes/recent?limit={limit}")
+    assert response.status_code == 200
+    assert len(response.get_json()["palettes"]) == expected
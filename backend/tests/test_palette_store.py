@@ -0,0 +1,109 @@
+# backend/tests/test_palette_store.py
+"""
+Palette stores (JSON-lines and SQLite) and the recent-palettes buffer:
+newest-first order, keyset cursors, imports of older palettes and
+writes made through another handle.
+"""
+
+import threading
+
+import pytest
+
+from app.services.palette_store import JsonLinesPaletteStore, RecentPalettes, SQLitePaletteStore
+
+
+@pytest.fixture(params=["jsonl", "sqlite"])
+def open_store(request, tmp_path):
+    def open_():
+        if request.param == "jsonl":
+            return JsonLinesPaletteStore(str(tmp_path / "palettes.jsonl"), fsync="never")
+        return SQLitePaletteStore(str(tmp_path / "palettes.sqlite3"))
+    return open_
+
+
+def palette(n, theme="Summer"):
+    return {"id": f"p{n:03d}", "timestamp": f"2024-01-01T00:{n // 60:02d}:{n % 60:02d}",
+            "image_url": f"https://example.com/{n}.jpg", "colours": ["#112233"], "theme": theme}
+
+
+def walk(recent, limit):
+    seen, page = [], recent(limit)
+    while page:
+        seen += [p["id"] for p in page]
+        page = recent(limit, (page[-1]["timestamp"], page[-1]["id"]))
+    return seen
+
+
+def test_recent_pages_newest_first(open_store):
+    store = open_store()
+    for n in range(25):
+        store.save(palette(n))
+    assert walk(store.recent, 7) == [f"p{n:03d}" for n in reversed(range(25))]
+    assert [p["id"] for p in store.get_many(["p003", "missing", "p001"])] == ["p003", "p001"]
+
+
+def test_importing_older_palettes_keeps_the_order(open_store):
+    store = open_store()
+    for n in range(50, 60):
+        store.save(palette(n))
+    store.save_many([palette(n) for n in range(0, 50, 5)] + [palette(55, theme="Winter")])
+
+    assert walk(store.recent, 4) == [f"p{n:03d}" for n in reversed(range(60)) if n >= 50 or n % 5 == 0]
+    assert store.get_many(["p055"])[0]["theme"] == "Winter"
+    assert [p["id"] for p in store.iter_all()][:3] == ["p000", "p005", "p010"]
+
+
+def test_recent_buffer_serves_and_falls_back(open_store):
+    store = open_store()
+    for n in range(10):
+        store.save(palette(n))
+    recent = RecentPalettes(store, size=5)
+
+    assert [p["id"] for p in recent.get(3)] == ["p009", "p008", "p007"]
+    # Pages past the buffer come from storage
+    assert walk(recent.get, 3) == [f"p{n:03d}" for n in reversed(range(10))]
+    # Larger than the buffer: straight to storage
+    assert len(recent.get(8)) == 8
+
+    entry = palette(10)
+    store.save(entry)
+    recent.push(entry)
+    assert recent.get(1)[0]["id"] == "p010"
+
+
+def test_recent_buffer_sees_other_writers(open_store):
+    store = open_store()
+    store.save(palette(1))
+    recent = RecentPalettes(store, size=5)
+    assert [p["id"] for p in recent.get(5)] == ["p001"]
+
+    open_store().save(palette(2))  # Another process's handle
+    assert [p["id"] for p in recent.get(5)] == ["p002", "p001"]
+
+
+def test_recent_buffer_version_is_the_same_on_every_thread(open_store):
+    store = open_store()
+    store.save(palette(1))
+    recent = RecentPalettes(store, size=5)
+    assert [p["id"] for p in recent.get(5)] == ["p001"]
+
+    open_store().save(palette(2))
+    # A request thread gets its own SQLite connection; it must still see the write
+    seen = []
+    reader = threading.Thread(target=lambda: seen.append([p["id"] for p in recent.get(5)]))
+    reader.start()
+    reader.join()
+    assert seen == [["p002", "p001"]]
+
+
+def test_push_does_not_hide_another_writers_palette(open_store):
+    store = open_store()
+    store.save(palette(1))
+    recent = RecentPalettes(store, size=5)
+    recent.get(5)
+
+    open_store().save(palette(2))  # Not seen by the buffer yet
+    entry = palette(3)
+    store.save(entry)
+    recent.push(entry)
+    assert [p["id"] for p in recent.get(5)] == ["p003", "p002", "p001"]
@@ -0,0 +1,50 @@
+# backend/tests/test_preprocess.py
+"""
+Reduced-scale JPEG decoding must not change palettes beyond a small bound:
+the same gate as benchmarks/bench_preprocess.py, on fewer, smaller images,
+both clustering every crop pixel and with the default subsample.
+"""
+
+import numpy as np
+import pytest
+
+from app.services import image_pipeline
+from helpers import crop_lab, encode_image, palette_delta_e, palette_fit, synthetic_image
+
+# Mean fit loss above ~1 just-noticeable difference fails (bench_preprocess --max-fit-loss)
+MAX_FIT_LOSS = 2.5
+# Mean palette drift (symmetric nearest-colour ΔE). Drift alone can be large
+# when a minor colour is swapped for an equally good one, so it gets more room.
+MAX_MEAN_DRIFT = 8.0
+
+
+@pytest.fixture(scope="module")
+def uploads():
+    return [encode_image(synthetic_image(1920, 1080, seed=seed)) for seed in range(3)]
+
+
+@pytest.mark.parametrize("max_pixels", [0, image_pipeline.MAX_PIXELS], ids=["all_pixels", "default_sample"])
+@pytest.mark.parametrize("engine", ["median_cut", "kmeans"])
+@pytest.mark.parametrize("crop", ["200x200", "0.6"])
+def test_reduced_decode_palette_drift(uploads, fresh_palette_caches, engine, crop, max_pixels):
+    from app.services.near_duplicates import near_duplicate_palettes
+    from app.services.palette_cache import palette_cache
+
+    crop_size = image_pipeline.parse_crop(crop)
+    options = {"crop_size": crop_size, "engine": engine, "seed": 1234, "region": "center", "max_pixels": max_pixels}
+
+    drift, fit_loss = [], []
+    for upload in uploads:
+        assert image_pipeline.choose_reduction(upload, crop_size) > 1
+        full = image_pipeline.palette_from_bytes(upload, reduced_decode=False, **options)
+        # Both caches would hand the full-decode palette straight back
+        palette_cache.clear()
+        near_duplicate_palettes.clear()
+        reduced = image_pipeline.palette_from_bytes(upload, reduced_decode=True, **options)
+
+        pixels = crop_lab(upload, crop_size)
+        drift.append(palette_delta_e(reduced, full))
+        fit_loss.append(palette_fit(pixels, reduced) - palette_fit(pixels, full))
+
+    assert max(fit_loss) <= MAX_FIT_LOSS
+    assert float(np.mean(drift)) <= MAX_MEAN_DRIFT
@@ -0,0 +1,101 @@
+# backend/tests/test_search_index.py
+"""
+Outfit tag/theme search: the inverted index against a brute-force filter,
+keyset paging, and the /api/outfits/search route on the JSON store.
+"""
+
+import random
+
+import pytest
+
+from app.services.search_index import OutfitSearchIndex
+
+TAGS = ["denim", "casual", "formal", "summer", "layered"]
+THEMES = ["Street", "Classic", "Winter"]
+
+
+def outfits(n, seed=0):
+    rng = random.Random(seed)
+    return [
+        {"id": f"o{i:03d}", "timestamp": f"2024-01-01T00:{rng.randrange(60):02d}:00",
+         "tags": rng.sample(TAGS, rng.randrange(4)), "theme": rng.choice(THEMES)}
+        for i in range(n)
+    ]
+
+
+def brute_force(records, tags, theme, match, newest=True):
+    want = {t.lower() for t in tags}
+    found = []
+    for r in records:
+        have = {t.lower() for t in r["tags"]}
+        if want and (not want <= have if match == "all" else not want & have):
+            continue
+        if theme and r["theme"].lower() != theme.lower():
+            continue
+        found.append(r)
+    found.sort(key=lambda r: (r["timestamp"], r["id"]), reverse=newest)
+    return [r["id"] for r in found]
+
+
+@pytest.mark.parametrize("tags, theme, match", [
+    ([], None, "all"),
+    (["Denim"], None, "all"),
+    (["denim", "casual"], None, "all"),
+    (["denim", "casual"], None, "any"),
+    (["summer"], "street", "all"),
+    (["nonexistent"], None, "any"),
+])
+def test_search_matches_brute_force(tags, theme, match):
+    records = outfits(200)
+    index = OutfitSearchIndex()
+    index.add_many(records)
+    expected = brute_force(records, tags, theme, match)
+
+    page, total = index.search(tags, theme, match=match, offset=0, limit=10)
+    assert total == len(expected)
+    assert page == expected[:10]
+
+    oldest, _ = index.search(tags, theme, match=match, sort="oldest", offset=5, limit=5)
+    assert oldest == brute_force(records, tags, theme, match, newest=False)[5:10]
+
+
+def test_keyset_paging_and_updates():
+    records = outfits(100)
+    index = OutfitSearchIndex()
+    index.add_many(records)
+    by_id = {r["id"]: r for r in records}
+
+    seen, after = [], None
+    while True:
+        page, _ = index.search(["denim"], None, limit=7, after=after)
+        if not page:
+            break
+        seen += page
+        after = (by_id[page[-1]]["timestamp"], page[-1])
+    assert seen == brute_force(records, ["denim"], None, "all")
+
+    # Re-indexing replaces the old postings; removing drops them
+    index.add({**records[0], "tags": ["unique-tag"]})
+    assert index.search(["unique-tag"])[0] == [records[0]["id"]]
+    index.remove(records[0]["id"])
+    assert index.search(["unique-tag"]) == ([], 0)
+
+    with pytest.raises(ValueError):
+        index.search(match="some")
+
+
+def test_search_route(client, outfit_store):
+    outfit_store.save_outfit("https://example.com/a.jpg", ["#111111"], "Street", tags=["denim", "casual"])
+    outfit_store.save_outfit("https://example.com/b.jpg", ["#222222"], "Classic", tags=["denim"])
+    outfit_store.save_outfit("https://example.com/c.jpg", ["#333333"], "Street", tags=["formal"])
+
+    body = client.get("/api/outfits/search?tags=denim&limit=1").get_json()
+    assert body["total"] == 2 and body["total_pages"] == 2
+    assert body["outfits"][0]["image_url"].endswith("b.jpg")
+
+    following = client.get(f"/api/outfits/search?tags=denim&limit=1&cursor={body['next_cursor']}").get_json()
+    assert [o["image_url"][-5:] for o in following["outfits"]] == ["a.jpg"]
+
+    body = client.get("/api/outfits/search?tags=casual,formal&match=any&theme=street").get_json()
+    assert body["total"] == 2
+    assert client.get("/api/outfits/search?match=some").status_code == 400
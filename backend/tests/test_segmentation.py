@@ -0,0 +1,120 @@
+# backend/tests/test_segmentation.py
+"""
+Garment mode with the segmentation model stubbed out: region resolution
+when the model is unavailable, the centre-crop fallback for low coverage,
+the mask cache, and batches segmented in one pass. The real MediaPipe model
+runs once at the end when it is installed.
+"""
+
+import numpy as np
+import pytest
+
+from app.services import image_pipeline, segmentation
+from helpers import encode_image
+
+
+
+def garment_photo(seed=0):
+    """Lossless upload: a grey gradient with a green "garment" block away from the centre."""
+    rng = np.random.default_rng(seed)
+    height, width = 480, 640
+    image = np.empty((height, width, 3), dtype=np.uint8)
+    image[...] = (np.arange(width, dtype=np.uint16) * 200 // width).astype(np.uint8)[None, :, None]
+    top, left = int(rng.integers(0, 60)), int(rng.integers(0, 60))
+    # Pure greens (R == B == 0, so the pipeline's R/B swap in hex output does not matter)
+    garment = image[top:top + 160, left:left + 160]
+    garment[...] = 0
+    garment[..., 1] = 120 + np.arange(160, dtype=np.uint8)[None, :] // 2
+    return encode_image(image, ext=".png")
+
+
+def is_garment_green(colour):
+    red, green, blue = (int(colour.lstrip("#")[i:i + 2], 16) for i in (0, 2, 4))
+    return max(red, blue) <= 8 and 112 <= green <= 207
+
+
+def garment_pixels(image):
+    return (image[..., 0] == 0) & (image[..., 2] == 0) & (image[..., 1] > 0)
+
+
+@pytest.fixture
+def stub_segmenter(monkeypatch, fresh_palette_caches):
+    """Segmentation reported available; inference marks exactly the green pixels, and is counted."""
+    calls = []
+
+    def infer(images):
+        calls.append(len(images))
+        return [garment_pixels(image) for image in images]
+
+    monkeypatch.setattr(segmentation, "_available", True)
+    monkeypatch.setattr(segmentation, "_infer", infer)
+    segmentation.mask_cache.clear()
+    yield calls
+    segmentation.mask_cache.clear()
+
+
+@pytest.fixture
+def fallbacks(monkeypatch):
+    """Reasons passed to segmentation_fallback_total by the pipeline."""
+    reasons = []
+    real_count = image_pipeline.count
+
+    def count(name, amount=1, **labels):
+        if name == "segmentation_fallback_total":
+            reasons.append(labels["reason"])
+        real_count(name, amount, **labels)
+
+    monkeypatch.setattr(image_pipeline, "count", count)
+    return reasons
+
+
+def test_garment_region_falls_back_to_center_when_unavailable(monkeypatch, fallbacks):
+    monkeypatch.setattr(segmentation, "_available", False)
+    assert image_pipeline.resolve_region("garment") == "center"
+    assert fallbacks == ["unavailable"]
+    assert image_pipeline.resolve_region("center") == "center"
+    with pytest.raises(ValueError):
+        image_pipeline.resolve_region("sleeves")
+
+
+def test_garment_palette_comes_from_the_masked_pixels(stub_segmenter):
+    assert image_pipeline.resolve_region("garment") == "garment"
+    palette = image_pipeline.palette_from_bytes(garment_photo(), region="garment", seed=0)
+    assert all(is_garment_green(colour) for colour in palette)
+
+    # Same pixels again: the mask comes from the cache, not the model
+    image_pipeline.palette_from_bytes(garment_photo(), region="garment", seed=1)
+    assert stub_segmenter == [1]
+
+
+def test_low_coverage_mask_falls_back_to_the_centre_crop(stub_segmenter, monkeypatch, fallbacks):
+    monkeypatch.setattr(segmentation, "_infer", lambda images: [np.zeros(image.shape[:2], bool) for image in images])
+    upload = garment_photo()
+
+    garment = image_pipeline.palette_from_bytes(upload, region="garment", seed=0, reduced_decode=False)
+    center = image_pipeline.palette_from_bytes(upload, region="center", seed=0, reduced_decode=False)
+    assert garment == center
+    assert fallbacks == ["low_coverage"]
+
+
+def test_batch_segments_every_image_in_one_pass(stub_segmenter):
+    uploads = [garment_photo(seed) for seed in range(3)]
+    results = image_pipeline.palettes_from_bytes_batch(uploads[:2] + [b"not an image"] + uploads[2:],
+                                                       region="garment", seed=0, store=False)
+
+    assert stub_segmenter == [3]
+    assert "error" in results[2]
+    for result in results[:2] + results[3:]:
+        assert len(result["image_hash"]) == 16
+        assert all(is_garment_green(colour) for colour in result["palette"])
+
+
+def test_real_model_segments_a_photo(fresh_palette_caches, monkeypatch):
+    pytest.importorskip("mediapipe")
+    monkeypatch.setattr(segmentation, "_available", None)
+    if not segmentation.available():
+        pytest.skip(f"segmentation model not found at {segmentation.MODEL_PATH}")
+
+    mask = segmentation.garment_mask(image_pipeline.decode_upload(garment_photo(), region="garment")[0])
+    assert mask is None or mask.dtype == bool
+    assert len(image_pipeline.palette_from_bytes(garment_photo(), region="garment", seed=0)) > 0
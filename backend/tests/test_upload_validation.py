@@ -0,0 +1,103 @@
+# backend/tests/test_upload_validation.py
+"""
+Header-only upload checks: format sniffing, dimensions from JPEG / PNG
+headers, end-marker detection for cut-short uploads, and read_upload limits.
+"""
+
+import io
+import struct
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from app.utils.image_headers import has_end_marker, read_image_size, sniff_format
+from app.utils.upload_validation import UploadRejected, check_header, read_upload
+from helpers import encode_image, png_bomb, synthetic_image
+
+
+@pytest.fixture(scope="module")
+def photo():
+    return encode_image(synthetic_image(640, 480))
+
+
+def with_exif_thumbnail(jpeg, thumbnail):
+    """Insert an APP1 "Exif" segment carrying a JPEG thumbnail (with its own EOI) after SOI."""
+    payload = b"Exif\x00\x00" + b"II*\x00\x08\x00\x00\x00" + thumbnail
+    return jpeg[:2] + b"\xff\xe1" + struct.pack(">H", len(payload) + 2) + payload + jpeg[2:]
+
+
+def rejection(data, **limits):
+    with pytest.raises(UploadRejected) as caught:
+        check_header(data, **limits)
+    return caught.value
+
+
+def test_sniff_format():
+    assert sniff_format(b"\xff\xd8\xff\xe0") == "jpeg"
+    assert sniff_format(png_bomb(8)[:8]) == "png"
+    assert sniff_format(b"%PDF-1.7") is None
+
+
+def test_read_image_size(photo):
+    assert read_image_size(photo) == ("jpeg", 640, 480)
+    assert read_image_size(with_exif_thumbnail(photo, encode_image(synthetic_image(32, 24)))) == ("jpeg", 640, 480)
+    assert read_image_size(png_bomb(300)) == ("png", 300, 300)
+    # Cut before the frame header, or a PNG IHDR with a bad CRC
+    assert read_image_size(photo[:20]) is None
+    corrupt = bytearray(png_bomb(8))
+    corrupt[20] ^= 0xFF
+    assert read_image_size(bytes(corrupt)) is None
+
+
+def test_valid_uploads_pass(photo):
+    assert check_header(photo) == ("jpeg", 640, 480)
+    assert check_header(png_bomb(64)) == ("png", 64, 64)
+    # Bytes after the EOI (e.g. a motion-photo trailer) are legal
+    assert check_header(photo + b"\x00" * 16 + b"ftypmp42") == ("jpeg", 640, 480)
+
+
+def test_truncated_jpeg_is_rejected(photo):
+    assert rejection(photo[: len(photo) // 2]).reason == "truncated"
+
+
+def test_truncated_jpeg_with_exif_thumbnail_is_rejected(photo):
+    full = with_exif_thumbnail(photo, encode_image(synthetic_image(160, 120), quality=70))
+    assert check_header(full) == ("jpeg", 640, 480)
+    assert has_end_marker(full, "jpeg")
+
+    # The thumbnail's EOI survives the cut; only the main image's EOI counts
+    for fraction in (0.5, 0.9):
+        cut = full[: int(len(full) * fraction)]
+        assert b"\xff\xd9" in cut
+        assert not has_end_marker(cut, "jpeg")
+        assert rejection(cut).reason == "truncated"
+
+
+def test_truncated_png_is_rejected():
+    data = png_bomb(64)
+    assert rejection(data[:-12]).reason == "truncated"
+
+
+def test_rejections_by_reason(photo):
+    assert rejection(b"").reason == "empty"
+    assert rejection(b"<html>not an image</html>").reason == "not_an_image"
+    assert rejection(photo[:20]).reason == "corrupt_header"
+
+    bomb = rejection(png_bomb(2000), max_pixels=1_000_000)
+    assert (bomb.reason, bomb.status) == ("too_many_pixels", 413)
+    assert rejection(photo, max_side=600).reason == "too_many_pixels"
+
+
+def test_read_upload_limits(photo):
+    def upload(data):
+        return FileStorage(stream=io.BytesIO(data), filename="photo.jpg")
+
+    assert read_upload(upload(photo)) == photo
+
+    with pytest.raises(UploadRejected) as caught:
+        read_upload(upload(photo), max_bytes=len(photo) - 1)
+    assert (caught.value.reason, caught.value.status) == ("too_large", 413)
+
+    with pytest.raises(UploadRejected) as caught:
+        read_upload(upload(b"GIF89a" + b"\x00" * 100))
+    assert caught.value.reason == "not_an_image"
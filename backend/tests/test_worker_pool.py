@@ -0,0 +1,57 @@
+# backend/tests/test_worker_pool.py
+"""
+Worker pool backpressure: a full pool makes submit() wait for a slot
+(indefinitely with timeout=None) and only times out with a finite timeout.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services import worker_pool
+
+
+@pytest.fixture
+def one_slot_pool(monkeypatch):
+    """worker_pool with one in-flight slot, running tasks on a thread (no worker processes)."""
+    executor = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(worker_pool, "_slots", threading.BoundedSemaphore(1))
+    monkeypatch.setattr(worker_pool, "get_pool", lambda: executor)
+    yield
+    executor.shutdown(wait=True)
+
+
+def test_full_pool_blocks_until_a_slot_frees(one_slot_pool):
+    release = threading.Event()
+    first = worker_pool.submit(release.wait, 5)
+
+    submitted = threading.Event()
+    results = []
+
+    def second():
+        results.append(worker_pool.submit(lambda: "done", timeout=None).result(timeout=5))
+        submitted.set()
+
+    waiter = threading.Thread(target=second)
+    waiter.start()
+    # Still waiting for the slot, not rejected
+    assert not submitted.wait(0.2)
+
+    release.set()
+    waiter.join(5)
+    assert first.result(timeout=5) is True
+    assert results == ["done"]
+
+
+def test_full_pool_times_out_with_a_finite_timeout(one_slot_pool):
+    release = threading.Event()
+    first = worker_pool.submit(release.wait, 5)
+    try:
+        with pytest.raises(worker_pool.PoolBusyError):
+            worker_pool.submit(lambda: None, timeout=0.05)
+    finally:
+        release.set()
+    first.result(timeout=5)
+    # The slot is given back once the task finishes
+    assert worker_pool.submit(lambda: "again", timeout=1).result(timeout=5) == "again"